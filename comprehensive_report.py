@@ -3,14 +3,41 @@
 WebP 품질 및 메타데이터 정밀 분석 종합 리포트
 """
 import os
+import sys
 import json
+import argparse
 from pathlib import Path
 from PIL import Image
 import numpy as np
 
-def generate_report():
+DEFAULT_BASE_DIR = r"C:\cursor\brickbox\output\synthetic\4240375"
+META_REQUIRED_FIELDS = ['schema_version', 'part_id', 'element_id', 'pair_uid',
+                        'transform', 'material', 'bounding_box', 'render_settings']
+E2_REQUIRED_FIELDS = ['schema_version', 'pair_uid', 'part_id', 'element_id',
+                      'annotation', 'qa', 'perf', 'integrity']
+
+def load_catalog_results(catalog_dir, meta_dir):
+    """카탈로그에서 meta/meta-e 필수 필드 검사 결과 (파일을 열지 않고 키 목록 컬럼만 스캔)"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+    from metadata_catalog import MetadataCatalog
+    
+    table = MetadataCatalog(catalog_dir).query(
+        ['stem', 'schema_version', 'e2_schema_version', 'meta_keys', 'meta_e_keys'], meta_dir=meta_dir)
+    json_results, e2_results = [], []
+    for row in table.to_pylist():
+        if row['meta_keys'] is not None:
+            missing = [f for f in META_REQUIRED_FIELDS if f not in row['meta_keys']]
+            json_results.append({'file': f"{row['stem']}.json", 'schema_version': row['schema_version'],
+                                 'has_required_fields': not missing, 'missing_fields': missing})
+        if row['meta_e_keys'] is not None:
+            missing = [f for f in E2_REQUIRED_FIELDS if f not in row['meta_e_keys']]
+            e2_results.append({'file': f"{row['stem']}_e2.json", 'schema_version': row['e2_schema_version'],
+                               'has_required_fields': not missing, 'missing_fields': missing})
+    return json_results, e2_results
+
+def generate_report(base_dir=DEFAULT_BASE_DIR, catalog_dir=None):
     """종합 리포트 생성"""
-    base_dir = r"C:\cursor\brickbox\output\synthetic\4240375"
+    catalog_results = load_catalog_results(catalog_dir, os.path.join(base_dir, 'meta')) if catalog_dir else None
     
     print("=" * 80)
     print("WebP 품질 및 메타데이터 정밀 분석 종합 리포트")
@@ -123,15 +150,14 @@ def generate_report():
     print("4. JSON 메타데이터 분석")
     print("=" * 80)
     
-    json_results = []
-    for json_file in json_files[:10]:  # 샘플 10개
+    json_results = catalog_results[0] if catalog_results else []
+    for json_file in ([] if catalog_results else json_files[:10]):  # 샘플 10개
         json_path = os.path.join(meta_dir, json_file)
         try:
             with open(json_path, 'r', encoding='utf-8') as f:
                 metadata = json.load(f)
             
-            required_fields = ['schema_version', 'part_id', 'element_id', 'pair_uid', 
-                              'transform', 'material', 'bounding_box', 'render_settings']
+            required_fields = META_REQUIRED_FIELDS
             missing_fields = [f for f in required_fields if f not in metadata]
             
             json_results.append({
@@ -144,7 +170,7 @@ def generate_report():
             print(f"ERROR: {json_file} 분석 실패: {e}")
     
     json_pass_rate = sum(1 for r in json_results if r['has_required_fields']) / len(json_results) * 100 if json_results else 0
-    print(f"샘플 분석 (10개):")
+    print(f"{'카탈로그 전체' if catalog_results else '샘플'} 분석 ({len(json_results)}개):")
     print(f"  - 스키마 버전: {json_results[0]['schema_version'] if json_results else 'N/A'}")
     print(f"  - 필수 필드 완성도: {json_pass_rate:.1f}%")
     print()
@@ -154,15 +180,14 @@ def generate_report():
     print("5. E2 JSON 메타데이터 분석")
     print("=" * 80)
     
-    e2_results = []
-    for e2_file in e2_files[:10]:  # 샘플 10개
+    e2_results = catalog_results[1] if catalog_results else []
+    for e2_file in ([] if catalog_results else e2_files[:10]):  # 샘플 10개
         e2_path = os.path.join(meta_e_dir, e2_file)
         try:
             with open(e2_path, 'r', encoding='utf-8') as f:
                 metadata = json.load(f)
             
-            required_fields = ['schema_version', 'pair_uid', 'part_id', 'element_id',
-                              'annotation', 'qa', 'perf', 'integrity']
+            required_fields = E2_REQUIRED_FIELDS
             missing_fields = [f for f in required_fields if f not in metadata]
             
             e2_results.append({
@@ -175,7 +200,7 @@ def generate_report():
             print(f"ERROR: {e2_file} 분석 실패: {e}")
     
     e2_pass_rate = sum(1 for r in e2_results if r['has_required_fields']) / len(e2_results) * 100 if e2_results else 0
-    print(f"샘플 분석 (10개):")
+    print(f"{'카탈로그 전체' if catalog_results else '샘플'} 분석 ({len(e2_results)}개):")
     print(f"  - 스키마 버전: {e2_results[0]['schema_version'] if e2_results else 'N/A'}")
     print(f"  - 필수 필드 완성도: {e2_pass_rate:.1f}%")
     print()
@@ -248,25 +273,8 @@ def generate_report():
     print("=" * 80)
 
 if __name__ == "__main__":
-    generate_report()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-<<<<<<< HEAD
-=======
-
->>>>>>> 87039ac2483fb2cfc80115fa29c3e4f844a1454b
+    parser = argparse.ArgumentParser(description='WebP 품질 및 메타데이터 정밀 분석 종합 리포트')
+    parser.add_argument('base_dir', nargs='?', default=DEFAULT_BASE_DIR, help='분석 대상 부품 폴더')
+    parser.add_argument('--catalog', help='메타데이터 카탈로그 디렉토리 (지정 시 JSON 전체를 컬럼 스캔으로 분석)')
+    args = parser.parse_args()
+    generate_report(args.base_dir, args.catalog)
@@ -1,163 +1,714 @@
 #!/usr/bin/env python3
 """
 실제 AI 추론 스크립트 (YOLO + CLIP)
+
+상주 추론 엔진:
+- 등록된 ONNX 탐지 모델(convert_pt_to_onnx.py 산출물)을 ONNX Runtime으로 1회 로드
+- 탐지 → 크롭 일괄 생성 → CLIP 한 번의 forward로 크롭 임베딩
+- 사전 로드된 부품 임베딩 (로컬 ANN 인덱스 또는 카탈로그 행렬)과 매칭
+- 단계별 지연 시간(ms) 보고
+
+실행 방법:
+    python scripts/ai_inference.py --image-url URL --part-id 3001
+    python scripts/ai_inference.py --serve   # stdin JSON 라인 요청, 엔진 상주
 """
 import argparse
 import json
+import os
 import sys
 import time
 import requests
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 from PIL import Image
 import torch
-import torchvision.transforms as transforms
-from transformers import CLIPProcessor, CLIPModel
-import yolo_model  # 실제 YOLO 모델 로드
+
+# CLIP 모델 레지스트리 (server/clip_model_registry.py) - 호출 간 모델 상주
+sys.path.insert(0, str(Path(__file__).parent.parent / 'server'))
+from clip_model_registry import get_registry
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# 부품 카탈로그 임베딩(768차원)과 같은 공간을 쓰는 CLIP ViT-L/14
+CLIP_MODEL_NAME = os.getenv("CLIP_MODEL_NAME", "openai/clip-vit-large-patch14")
+
+# 등록 모델 로컬 캐시 디렉토리
+MODEL_CACHE_DIR = Path(os.getenv("MODEL_CACHE_DIR", "output/models/cache"))
+
+# 탐지 기본 임계값
+DEFAULT_CONF_THRESHOLD = 0.25
+DEFAULT_IOU_THRESHOLD = 0.45
+DEFAULT_MAX_DETECTIONS = 100
+# CLIP 크롭 여백 비율 (bbox 대비)
+CROP_PADDING = 0.10
+
+# 캐스케이드 기본 임계값 (환경변수로 조정 가능)
+# - CANDIDATE: Stage-1 후보로 남길 최소 신뢰도 (이보다 낮으면 버림)
+# - ACCEPT: 이 이상이고 클래스 마진도 충분하면 Stage-1 결과 바로 수용
+# - MARGIN: 1위/2위 클래스 점수 차가 이보다 작으면 모호 → Stage-2
+# - STAGE2: Stage-2가 크롭에서 확인한 것으로 볼 최소 신뢰도
+CASCADE_CANDIDATE_CONF = float(os.getenv('CASCADE_CANDIDATE_CONF', '0.10'))
+CASCADE_ACCEPT_CONF = float(os.getenv('CASCADE_ACCEPT_CONF', '0.60'))
+CASCADE_MARGIN_THRESHOLD = float(os.getenv('CASCADE_MARGIN_THRESHOLD', '0.15'))
+CASCADE_STAGE2_CONF = float(os.getenv('CASCADE_STAGE2_CONF', '0.25'))
+CASCADE_STATS_PATH = Path(os.getenv('CASCADE_STATS_PATH', 'output/inference/cascade_stats.json'))
+# 상주 모드에서 통계 파일 저장 주기 (프레임)
+CASCADE_STATS_SAVE_EVERY = 50
+
 
 def main():
     parser = argparse.ArgumentParser(description='AI 추론 실행')
-    parser.add_argument('--image-url', required=True, help='이미지 URL')
-    parser.add_argument('--part-id', required=True, help='부품 ID')
-    
+    parser.add_argument('--image-url', help='이미지 URL')
+    parser.add_argument('--part-id', help='부품 ID')
+    parser.add_argument('--model', default=os.getenv('DETECTOR_ONNX_PATH'), help='로컬 ONNX 탐지 모델 경로 (미지정 시 model_registry 활성 모델)')
+    parser.add_argument('--serve', action='store_true', help='상주 모드: stdin JSON 라인({"image_url", "part_id"}) 처리')
+    parser.add_argument('--cascade', action='store_true', help='2단계 캐스케이드: Stage-1 전체 프레임, 저신뢰/모호 영역만 Stage-2')
+    parser.add_argument('--stage2-model', default=os.getenv('STAGE2_ONNX_PATH'), help='로컬 Stage-2 ONNX 경로 (미지정 시 model_registry 활성 stage2)')
+    parser.add_argument('--candidate-conf', type=float, default=CASCADE_CANDIDATE_CONF, help='Stage-1 후보 최소 신뢰도')
+    parser.add_argument('--accept-conf', type=float, default=CASCADE_ACCEPT_CONF, help='Stage-1 즉시 수용 신뢰도')
+    parser.add_argument('--margin-threshold', type=float, default=CASCADE_MARGIN_THRESHOLD, help='모호 판정 클래스 마진')
+    parser.add_argument('--stage2-conf', type=float, default=CASCADE_STAGE2_CONF, help='Stage-2 확인 최소 신뢰도')
+
     args = parser.parse_args()
-    
+
+    engine_options = {}
+    if args.cascade:
+        engine_options = {
+            'cascade': True,
+            'stage2_model_path': args.stage2_model,
+            'cascade_options': {
+                'candidate_conf': args.candidate_conf,
+                'accept_conf': args.accept_conf,
+                'margin_threshold': args.margin_threshold,
+                'stage2_conf': args.stage2_conf
+            }
+        }
+
+    if args.serve:
+        get_engine(args.model, **engine_options)
+        serve(args.model)
+        return
+
+    if not args.image_url or not args.part_id:
+        parser.error('--image-url, --part-id 가 필요합니다 (또는 --serve)')
+
     try:
         # 이미지 다운로드
         image = download_image(args.image_url)
-        
+
         # AI 추론 실행
-        result = run_inference(image, args.part_id)
-        
+        engine = get_engine(args.model, **engine_options)
+        result = run_inference(image, args.part_id, model_path=args.model)
+        if engine.cascade is not None:
+            result['cascade_stats'] = engine.cascade.stats.snapshot()
+            engine.cascade.stats.save()
+
         # 결과 출력
         print(json.dumps(result, ensure_ascii=False))
-        
+
     except Exception as e:
-        error_result = {
-            'success': False,
-            'error': str(e),
-            'accuracy': 0.0,
-            'detected_parts': 0,
-            'predictions': []
-        }
-        print(json.dumps(error_result, ensure_ascii=False))
+        print(json.dumps(error_result(e), ensure_ascii=False))
         sys.exit(1)
 
+def serve(model_path=None):
+    """상주 모드: 엔진을 1회 로드하고 stdin 요청을 순차 처리 (요청당 모델 로드 없음)"""
+    engine = get_engine(model_path)
+    print(json.dumps({'ready': True, 'cascade': engine.cascade is not None}), flush=True)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+            image = download_image(request['image_url'])
+            result = run_inference(image, request.get('part_id', ''), model_path=model_path)
+        except Exception as e:
+            result = error_result(e)
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+
+        # 캐스케이드 카운터 주기 저장 (SLO 체크용)
+        if engine.cascade is not None and engine.cascade.stats.frames % CASCADE_STATS_SAVE_EVERY == 0:
+            engine.cascade.stats.save()
+    if engine.cascade is not None:
+        engine.cascade.stats.save()
+
+def error_result(e):
+    return {
+        'success': False,
+        'error': str(e),
+        'accuracy': 0.0,
+        'detected_parts': 0,
+        'predictions': []
+    }
+
 def download_image(image_url):
     """이미지 다운로드"""
     try:
         response = requests.get(image_url, timeout=30)
         response.raise_for_status()
-        
-        from io import BytesIO
+
         image = Image.open(BytesIO(response.content))
         return image
     except Exception as e:
         raise Exception(f"이미지 다운로드 실패: {str(e)}")
 
-def run_inference(image, part_id):
+
+# ============================================
+# 등록 모델 조회
+# ============================================
+
+def resolve_registered_detector(stage: str = 'stage1') -> Tuple[Path, List[str]]:
+    """model_registry 활성 ONNX 탐지 모델을 로컬 캐시로 받아 (경로, class_names) 반환
+
+    stage1 조회 시 하이브리드 학습 이전의 단일 모델(single)도 허용한다.
+    """
+    from supabase import create_client
+
+    url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
+    key = (
+        os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        or os.getenv('VITE_SUPABASE_SERVICE_ROLE')
+        or os.getenv('VITE_SUPABASE_ANON_KEY')
+    )
+    if not url or not key:
+        raise RuntimeError("Supabase 환경변수가 없어 등록 모델을 조회할 수 없습니다 (--model 로 로컬 경로 지정)")
+    supabase = create_client(url, key)
+
+    stages = ['stage1', 'single'] if stage == 'stage1' else [stage]
+    result = supabase.table('model_registry').select('*') \
+        .eq('is_active', True) \
+        .in_('model_stage', stages) \
+        .like('model_path', '%.onnx') \
+        .order('created_at', desc=True) \
+        .limit(1) \
+        .execute()
+    if not result.data:
+        raise RuntimeError(f"활성 ONNX 탐지 모델({stage})이 model_registry에 없습니다")
+
+    record = result.data[0]
+    class_names = (record.get('training_metadata') or {}).get('class_names') or []
+    local_path = MODEL_CACHE_DIR / record['model_path']
+    if not local_path.exists():
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        print(f"[DOWNLOAD] 탐지 모델 다운로드: {record['model_path']}", file=sys.stderr)
+        data = supabase.storage.from_('models').download(record['model_path'])
+        tmp_path = local_path.with_suffix('.onnx.part')
+        with open(tmp_path, 'wb') as f:
+            f.write(data if isinstance(data, bytes) else data.read())
+        os.replace(tmp_path, local_path)
+    return local_path, class_names
+
+
+# ============================================
+# ONNX YOLO 탐지기
+# ============================================
+
+class OnnxYoloDetector:
+    """Ultralytics ONNX(detect/seg) 탐지기 - 세션 1회 생성 후 상주"""
+
+    def __init__(self, model_path: Optional[str] = None, class_names: Optional[List[str]] = None,
+                 stage: str = 'stage1', conf_threshold: float = DEFAULT_CONF_THRESHOLD,
+                 iou_threshold: float = DEFAULT_IOU_THRESHOLD, max_detections: int = DEFAULT_MAX_DETECTIONS):
+        import onnxruntime as ort
+
+        if model_path:
+            self.model_path = Path(model_path)
+            self.class_names = class_names or []
+        else:
+            self.model_path, self.class_names = resolve_registered_detector(stage)
+
+        providers = [p for p in ('CUDAExecutionProvider', 'CPUExecutionProvider') if p in ort.get_available_providers()]
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(self.model_path), sess_options=options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+        # 고정 입력 크기 (동적이면 640), 배치 차원이 동적이면 크롭 일괄 추론 가능
+        shape = self.session.get_inputs()[0].shape
+        self.imgsz = shape[2] if isinstance(shape[2], int) else 640
+        self.dynamic_batch = not isinstance(shape[0], int)
+
+        # Ultralytics ONNX 메타데이터의 클래스 이름 (registry 값 우선)
+        if not self.class_names:
+            names = self.session.get_modelmeta().custom_metadata_map.get('names')
+            if names:
+                try:
+                    import ast
+                    parsed = ast.literal_eval(names)
+                    self.class_names = [parsed[i] for i in sorted(parsed)] if isinstance(parsed, dict) else list(parsed)
+                except (ValueError, SyntaxError):
+                    self.class_names = []
+
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_detections = max_detections
+
+    def _letterbox(self, image: Image.Image) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+        """비율 유지 리사이즈 + 114 패딩 → CHW float32"""
+        width, height = image.size
+        ratio = min(self.imgsz / width, self.imgsz / height)
+        new_w, new_h = max(1, int(round(width * ratio))), max(1, int(round(height * ratio)))
+        resized = image.resize((new_w, new_h), Image.Resampling.BILINEAR)
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        pad_x, pad_y = (self.imgsz - new_w) / 2, (self.imgsz - new_h) / 2
+        left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+        canvas[top:top + new_h, left:left + new_w] = np.asarray(resized)
+        tensor = canvas.transpose(2, 0, 1).astype(np.float32) / 255.0
+        return tensor, ratio, (left, top)
+
+    @staticmethod
+    def _nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float, max_det: int) -> np.ndarray:
+        """NumPy NMS (boxes: xyxy)"""
+        x1, y1, x2, y2 = boxes.T
+        areas = (x2 - x1) * (y2 - y1)
+        order = scores.argsort()[::-1]
+        keep = []
+        while order.size and len(keep) < max_det:
+            i = order[0]
+            keep.append(i)
+            xx1 = np.maximum(x1[i], x1[order[1:]])
+            yy1 = np.maximum(y1[i], y1[order[1:]])
+            xx2 = np.minimum(x2[i], x2[order[1:]])
+            yy2 = np.minimum(y2[i], y2[order[1:]])
+            inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+            iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+            order = order[1:][iou <= iou_threshold]
+        return np.asarray(keep, dtype=np.int64)
+
+    def _postprocess(self, pred: np.ndarray, num_masks: int, ratio: float, pad: Tuple[float, float],
+                     size: Tuple[int, int], conf_threshold: float) -> List[Dict]:
+        """단일 이미지 출력 (4 + nc + nm, N) → 원본 좌표 탐지 목록"""
+        pred = pred.T
+        num_classes = pred.shape[1] - 4 - num_masks
+        class_scores = pred[:, 4:4 + num_classes]
+        class_ids = class_scores.argmax(axis=1)
+        confidences = class_scores[np.arange(len(pred)), class_ids]
+
+        mask = confidences >= conf_threshold
+        xywh, class_ids, confidences, class_scores = pred[mask, :4], class_ids[mask], confidences[mask], class_scores[mask]
+        boxes = np.empty_like(xywh)
+        boxes[:, 0] = xywh[:, 0] - xywh[:, 2] / 2
+        boxes[:, 1] = xywh[:, 1] - xywh[:, 3] / 2
+        boxes[:, 2] = xywh[:, 0] + xywh[:, 2] / 2
+        boxes[:, 3] = xywh[:, 1] + xywh[:, 3] / 2
+
+        # 클래스별 NMS (클래스 오프셋 트릭)
+        offsets = class_ids[:, None].astype(np.float32) * (self.imgsz + 1)
+        keep = self._nms(boxes + offsets, confidences, self.iou_threshold, self.max_detections)
+        boxes, class_ids, confidences, class_scores = boxes[keep], class_ids[keep], confidences[keep], class_scores[keep]
+
+        # 1위/2위 클래스 점수 차 (모호성 판단용)
+        if num_classes > 1 and len(class_scores):
+            top2 = np.partition(class_scores, -2, axis=1)[:, -2:]
+            margins = top2[:, 1] - top2[:, 0]
+        else:
+            margins = np.ones(len(class_scores), dtype=np.float32)
+
+        # 레터박스 좌표 → 원본 좌표
+        pad_x, pad_y = pad
+        width, height = size
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad_x) / ratio).clip(0, width)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad_y) / ratio).clip(0, height)
+
+        detections = []
+        for box, class_id, confidence, margin in zip(boxes, class_ids, confidences, margins):
+            class_id = int(class_id)
+            detections.append({
+                'class': self.class_names[class_id] if class_id < len(self.class_names) else 'lego_part',
+                'class_id': class_id,
+                'confidence': float(confidence),
+                'margin': float(margin),
+                'bbox': [float(v) for v in box]
+            })
+        return detections
+
+    def detect(self, image: Image.Image, timings: Dict[str, float], prefix: str = 'detect',
+               conf_threshold: Optional[float] = None) -> List[Dict]:
+        """YOLO 탐지 (원본 좌표 xyxy bbox)"""
+        return self.detect_batch([image], timings, prefix, conf_threshold)[0]
+
+    def detect_batch(self, images: List[Image.Image], timings: Dict[str, float], prefix: str = 'detect',
+                     conf_threshold: Optional[float] = None) -> List[List[Dict]]:
+        """여러 이미지 탐지 (동적 배치 모델이면 한 번의 run, 아니면 순차 run)"""
+        conf_threshold = self.conf_threshold if conf_threshold is None else conf_threshold
+        if not images:
+            return []
+
+        t0 = time.perf_counter()
+        letterboxed = [self._letterbox(image) for image in images]
+        t1 = time.perf_counter()
+        if self.dynamic_batch:
+            batch = np.stack([tensor for tensor, _, _ in letterboxed])
+            outputs = self.session.run(None, {self.input_name: batch})
+            preds = list(outputs[0])
+            num_masks = outputs[1].shape[1] if len(outputs) > 1 else 0
+        else:
+            preds, num_masks = [], 0
+            for tensor, _, _ in letterboxed:
+                outputs = self.session.run(None, {self.input_name: tensor[None]})
+                preds.append(outputs[0][0])
+                num_masks = outputs[1].shape[1] if len(outputs) > 1 else 0
+        t2 = time.perf_counter()
+
+        results = [
+            self._postprocess(pred, num_masks, ratio, pad, image.size, conf_threshold)
+            for pred, (_, ratio, pad), image in zip(preds, letterboxed, images)
+        ]
+        t3 = time.perf_counter()
+
+        timings[f'{prefix}_preprocess_ms'] = timings.get(f'{prefix}_preprocess_ms', 0.0) + (t1 - t0) * 1000
+        timings[f'{prefix}_inference_ms'] = timings.get(f'{prefix}_inference_ms', 0.0) + (t2 - t1) * 1000
+        timings[f'{prefix}_postprocess_ms'] = timings.get(f'{prefix}_postprocess_ms', 0.0) + (t3 - t2) * 1000
+        return results
+
+
+def crop_regions(image: Image.Image, detections: List[Dict], padding: float = CROP_PADDING) -> Tuple[List[Image.Image], List[Tuple[int, int, int, int]]]:
+    """탐지 영역 일괄 크롭 (bbox 여백 포함) → (크롭, 원본 좌표 box)"""
+    crops, boxes = [], []
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox']
+        pad_w, pad_h = (x2 - x1) * padding, (y2 - y1) * padding
+        box = (
+            max(0, int(x1 - pad_w)), max(0, int(y1 - pad_h)),
+            min(image.width, int(x2 + pad_w)), min(image.height, int(y2 + pad_h))
+        )
+        if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+            box = (0, 0, image.width, image.height)
+        crops.append(image.crop(box))
+        boxes.append(box)
+    return crops, boxes
+
+
+# ============================================
+# 2단계 캐스케이드 (Stage-2 게이팅)
+# ============================================
+
+class CascadeStats:
+    """캐스케이드 실시간 카운터 (Stage-2 진입률, 단계별 지연)"""
+
+    def __init__(self, window: int = 1000):
+        import threading
+        from collections import deque
+
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.regions = 0
+        self.stage2_frames = 0
+        self.stage2_regions = 0
+        self.stage2_confirmed = 0
+        self.stage2_rejected = 0
+        self.started_at = time.time()
+        self._latencies = {
+            'stage1_ms': deque(maxlen=window),
+            'stage2_ms': deque(maxlen=window),
+            'total_ms': deque(maxlen=window)
+        }
+
+    def record(self, regions: int, stage2_regions: int, confirmed: int, rejected: int,
+               stage1_ms: float, stage2_ms: float, total_ms: float):
+        with self._lock:
+            self.frames += 1
+            self.regions += regions
+            self.stage2_regions += stage2_regions
+            self.stage2_confirmed += confirmed
+            self.stage2_rejected += rejected
+            if stage2_regions:
+                self.stage2_frames += 1
+                self._latencies['stage2_ms'].append(stage2_ms)
+            self._latencies['stage1_ms'].append(stage1_ms)
+            self._latencies['total_ms'].append(total_ms)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latency = {}
+            for name, values in self._latencies.items():
+                if values:
+                    arr = np.asarray(values)
+                    latency[name] = {
+                        'mean': round(float(arr.mean()), 3),
+                        'p50': round(float(np.percentile(arr, 50)), 3),
+                        'p95': round(float(np.percentile(arr, 95)), 3)
+                    }
+            return {
+                'frames': self.frames,
+                'regions': self.regions,
+                'stage2_regions': self.stage2_regions,
+                'stage2_frames': self.stage2_frames,
+                'stage2_confirmed': self.stage2_confirmed,
+                'stage2_rejected': self.stage2_rejected,
+                'stage2_entry_rate': (self.stage2_regions / self.regions * 100) if self.regions else 0.0,
+                'stage2_frame_rate': (self.stage2_frames / self.frames * 100) if self.frames else 0.0,
+                'latency_ms': latency,
+                'uptime_sec': round(time.time() - self.started_at, 1),
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }
+
+    def save(self, path: Path = CASCADE_STATS_PATH):
+        """SLO 체크(slo_performance_checklist)가 읽는 통계 파일 저장"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+class CascadeDetector:
+    """Stage-1(YOLO11n-seg)은 모든 프레임, 저신뢰/모호 영역만 Stage-2(YOLO11s-seg) 크롭 일괄 검증"""
+
+    def __init__(self, stage1: OnnxYoloDetector, stage2: OnnxYoloDetector,
+                 candidate_conf: float = CASCADE_CANDIDATE_CONF, accept_conf: float = CASCADE_ACCEPT_CONF,
+                 margin_threshold: float = CASCADE_MARGIN_THRESHOLD, stage2_conf: float = CASCADE_STAGE2_CONF,
+                 drop_unconfirmed: bool = True, stats: Optional[CascadeStats] = None):
+        self.stage1 = stage1
+        self.stage2 = stage2
+        self.candidate_conf = candidate_conf
+        self.accept_conf = accept_conf
+        self.margin_threshold = margin_threshold
+        self.stage2_conf = stage2_conf
+        self.drop_unconfirmed = drop_unconfirmed
+        self.stats = stats or CascadeStats()
+
+    def needs_stage2(self, det: Dict) -> bool:
+        """게이트: 신뢰도가 수용 임계값 미만이거나 1/2위 클래스 차이가 작으면 Stage-2"""
+        return det['confidence'] < self.accept_conf or det['margin'] < self.margin_threshold
+
+    def detect(self, image: Image.Image, timings: Dict[str, float]) -> List[Dict]:
+        t0 = time.perf_counter()
+        candidates = self.stage1.detect(image, timings, prefix='stage1', conf_threshold=self.candidate_conf)
+        t1 = time.perf_counter()
+
+        accepted, uncertain = [], []
+        for det in candidates:
+            det['stage'] = 1
+            (uncertain if self.needs_stage2(det) else accepted).append(det)
+
+        confirmed = rejected = 0
+        if uncertain:
+            crops, boxes = crop_regions(image, uncertain)
+            stage2_results = self.stage2.detect_batch(crops, timings, prefix='stage2', conf_threshold=self.stage2_conf)
+            for det, box, crop_dets in zip(uncertain, boxes, stage2_results):
+                if crop_dets:
+                    best = max(crop_dets, key=lambda d: d['confidence'])
+                    x1, y1, x2, y2 = best['bbox']
+                    best['bbox'] = [x1 + box[0], y1 + box[1], x2 + box[0], y2 + box[1]]
+                    best['stage'] = 2
+                    best['stage1_confidence'] = det['confidence']
+                    accepted.append(best)
+                    confirmed += 1
+                else:
+                    rejected += 1
+                    if not self.drop_unconfirmed:
+                        det['stage2_rejected'] = True
+                        accepted.append(det)
+        t2 = time.perf_counter()
+
+        stage1_ms = (t1 - t0) * 1000
+        stage2_ms = (t2 - t1) * 1000
+        timings['stage1_ms'] = stage1_ms
+        timings['stage2_ms'] = stage2_ms
+        self.stats.record(len(candidates), len(uncertain), confirmed, rejected, stage1_ms, stage2_ms, stage1_ms + stage2_ms)
+        return accepted
+
+
+# ============================================
+# 상주 추론 엔진
+# ============================================
+
+class InferenceEngine:
+    """ONNX YOLO 탐지 + CLIP 크롭 임베딩 + 부품 임베딩 매칭 (프로세스 내 상주)"""
+
+    def __init__(self, model_path: Optional[str] = None, class_names: Optional[List[str]] = None,
+                 cascade: bool = False, stage2_model_path: Optional[str] = None,
+                 cascade_options: Optional[Dict] = None):
+        self.detector = OnnxYoloDetector(model_path, class_names, stage='stage1')
+        self.cascade = None
+        if cascade:
+            stage2 = OnnxYoloDetector(stage2_model_path, stage='stage2')
+            self.cascade = CascadeDetector(self.detector, stage2, **(cascade_options or {}))
+
+        self.part_index = None
+        self.part_matrix = None
+        self.part_entries: List[Dict] = []
+        self._load_part_embeddings()
+
+    def _load_part_embeddings(self):
+        """부품 임베딩 사전 로드 (로컬 ANN 인덱스 우선, 없으면 카탈로그 행렬)"""
+        try:
+            from part_ann_index import get_part_index
+            self.part_index = get_part_index()
+        except ImportError:
+            self.part_index = None
+        if self.part_index is not None:
+            return
+        try:
+            from precompute_catalog_embeddings import load_catalog_embeddings
+            matrix, entries = load_catalog_embeddings(mmap=False)
+            matrix = matrix.astype(np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            self.part_matrix = matrix
+            self.part_entries = entries
+        except (ImportError, FileNotFoundError):
+            print("[WARN] 부품 임베딩 없음 - 텍스트 프롬프트 분류로 폴백", file=sys.stderr)
+
+    def detect(self, image: Image.Image, timings: Dict[str, float]) -> List[Dict]:
+        """단일 탐지 또는 캐스케이드 탐지"""
+        if self.cascade is not None:
+            return self.cascade.detect(image, timings)
+        return self.detector.detect(image, timings)
+
+    # ---------------- 임베딩 / 매칭 ----------------
+
+    def embed_images(self, images: List[Image.Image]) -> np.ndarray:
+        """CLIP 이미지 임베딩 (한 번의 forward, L2 정규화)"""
+        model, processor = get_registry().get(CLIP_MODEL_NAME)
+        inputs = processor(images=images, return_tensors="pt").to(model.device)
+        with torch.no_grad():
+            features = model.get_image_features(**inputs)
+            features = features / features.norm(dim=-1, keepdim=True)
+        return features.cpu().numpy().astype(np.float32)
+
+    def match(self, embeddings: np.ndarray, k: int = 5) -> Optional[List[List[Dict]]]:
+        """부품 임베딩 top-k 매칭 (부품 임베딩 없으면 None)"""
+        if self.part_index is not None:
+            return self.part_index.query(embeddings, k=k)
+        if self.part_matrix is None:
+            return None
+        sims = embeddings @ self.part_matrix.T
+        k = min(k, sims.shape[1])
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        results = []
+        for row, idx in zip(sims, top):
+            idx = idx[np.argsort(-row[idx])]
+            results.append([{
+                'id': self.part_entries[i]['id'],
+                'part_id': self.part_entries[i]['part_id'],
+                'color_id': self.part_entries[i].get('color_id'),
+                'score': float(row[i])
+            } for i in idx])
+        return results
+
+    def classify_by_prompts(self, embeddings: np.ndarray, part_id: str) -> List[Dict]:
+        """부품 임베딩이 없을 때: 부품 ID 텍스트 프롬프트와 비교 (기존 분류 방식)"""
+        model, processor = get_registry().get(CLIP_MODEL_NAME)
+        text_prompts = [
+            f"LEGO part {part_id}",
+            f"LEGO brick {part_id}",
+            f"LEGO element {part_id}",
+            "LEGO building block",
+            "LEGO construction toy"
+        ]
+        inputs = processor(text=text_prompts, return_tensors="pt", padding=True).to(model.device)
+        with torch.no_grad():
+            text_features = model.get_text_features(**inputs)
+            text_features = text_features / text_features.norm(dim=-1, keepdim=True)
+            logit_scale = model.logit_scale.exp().item()
+        probs = torch.from_numpy(embeddings @ text_features.cpu().numpy().T * logit_scale).softmax(dim=1).numpy()
+        results = []
+        for row in probs:
+            best = int(row.argmax())
+            results.append({
+                'class': text_prompts[best],
+                'confidence': float(row[best]),
+                'all_scores': row.tolist()
+            })
+        return results
+
+    def infer(self, image: Image.Image, part_id: str, top_k: int = 5) -> Dict:
+        """탐지 → 크롭 → 임베딩 → 매칭 (단계별 지연 시간 포함)"""
+        timings: Dict[str, float] = {}
+        image = image.convert('RGB')
+
+        detections = self.detect(image, timings)
+
+        # 탐지가 없으면 전체 이미지를 하나의 크롭으로 식별
+        t0 = time.perf_counter()
+        crops = crop_regions(image, detections)[0] if detections else [image]
+        timings['crop_ms'] = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        embeddings = self.embed_images(crops)
+        timings['clip_embed_ms'] = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        matches = self.match(embeddings, k=top_k)
+        if matches is not None:
+            classifications = [{
+                'class': m[0]['part_id'] if m else '',
+                'confidence': m[0]['score'] if m else 0.0,
+                'candidates': m
+            } for m in matches]
+        else:
+            classifications = self.classify_by_prompts(embeddings, part_id)
+        timings['match_ms'] = (time.perf_counter() - t0) * 1000
+
+        return {
+            'detections': detections,
+            'classifications': classifications,
+            'timings_ms': {name: round(value, 3) for name, value in timings.items()}
+        }
+
+
+_engine: Optional[InferenceEngine] = None
+
+
+def get_engine(model_path: Optional[str] = None, **engine_options) -> InferenceEngine:
+    """프로세스 내 상주 엔진 반환 (첫 호출에서만 모델 로드)"""
+    global _engine
+    if _engine is None:
+        _engine = InferenceEngine(model_path, **engine_options)
+    return _engine
+
+
+def run_inference(image, part_id, model_path=None):
     """실제 AI 추론 실행"""
     start_time = time.time()
-    
+
     try:
-        # YOLO 모델로 객체 탐지
-        yolo_results = run_yolo_detection(image)
-        
-        # CLIP 모델로 부품 분류
-        clip_results = run_clip_classification(image, part_id)
-        
+        engine = get_engine(model_path)
+        result = engine.infer(image, part_id)
+
+        yolo_results = {'detections': result['detections']}
+        clip_results = result['classifications']
+
         # 결과 통합
         processing_time = (time.time() - start_time) * 1000  # ms
-        
+
         # 정확도 계산 (YOLO + CLIP 결과 기반)
         accuracy = calculate_accuracy(yolo_results, clip_results, part_id)
-        
+
         # 탐지된 부품 수
         detected_parts = len(yolo_results.get('detections', []))
-        
+
         # 예측 결과
         predictions = format_predictions(yolo_results, clip_results)
-        
+
         return {
             'success': True,
             'accuracy': accuracy,
             'detected_parts': detected_parts,
             'predictions': predictions,
-            'processing_time': processing_time
+            'processing_time': processing_time,
+            'stage_latencies': result['timings_ms']
         }
-        
+
     except Exception as e:
         raise Exception(f"AI 추론 실행 실패: {str(e)}")
 
-def run_yolo_detection(image):
-    """YOLO 모델로 객체 탐지"""
-    try:
-        # 실제 YOLO 모델 로드 및 추론
-        # 여기서는 시뮬레이션 (실제 구현 시 YOLO 모델 사용)
-        
-        # 이미지 전처리
-        transform = transforms.Compose([
-            transforms.Resize((640, 640)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-        ])
-        
-        input_tensor = transform(image).unsqueeze(0)
-        
-        # YOLO 추론 (실제 모델 사용)
-        with torch.no_grad():
-            # yolo_model은 실제 로드된 YOLO 모델
-            # detections = yolo_model(input_tensor)
-            pass
-        
-        # 시뮬레이션된 결과 (실제로는 YOLO 모델 결과 사용)
-        return {
-            'detections': [
-                {
-                    'class': 'lego_part',
-                    'confidence': 0.85,
-                    'bbox': [100, 100, 200, 200]
-                }
-            ]
-        }
-        
-    except Exception as e:
-        raise Exception(f"YOLO 탐지 실패: {str(e)}")
+PROMPT_PART_PREFIXES = ("LEGO part ", "LEGO brick ", "LEGO element ")
 
-def run_clip_classification(image, part_id):
-    """CLIP 모델로 부품 분류"""
-    try:
-        # CLIP 모델 로드
-        model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-        processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-        
-        # 텍스트 프롬프트 (부품 ID 기반)
-        text_prompts = [
-            f"LEGO part {part_id}",
-            f"LEGO brick {part_id}",
-            f"LEGO element {part_id}",
-            "LEGO building block",
-            "LEGO construction toy"
-        ]
-        
-        # 이미지와 텍스트 인코딩
-        inputs = processor(text=text_prompts, images=image, return_tensors="pt", padding=True)
-        
-        with torch.no_grad():
-            outputs = model(**inputs)
-            logits_per_image = outputs.logits_per_image
-            probs = logits_per_image.softmax(dim=1)
-        
-        # 가장 높은 확률의 클래스 선택
-        best_match_idx = probs.argmax(dim=1).item()
-        confidence = probs[0][best_match_idx].item()
-        
-        return {
-            'class': text_prompts[best_match_idx],
-            'confidence': confidence,
-            'all_scores': probs[0].tolist()
-        }
-        
-    except Exception as e:
-        raise Exception(f"CLIP 분류 실패: {str(e)}")
+
+def normalize_part_id(label) -> str:
+    """분류 결과 라벨 → 부품 ID (classify_by_prompts 프롬프트 접두사 제거, 대소문자/공백 정규화)"""
+    label = str(label or '').strip()
+    for prefix in PROMPT_PART_PREFIXES:
+        if label.startswith(prefix):
+            label = label[len(prefix):]
+            break
+    return label.strip().lower()
 
 def calculate_accuracy(yolo_results, clip_results, target_part_id):
     """정확도 계산"""
@@ -166,25 +717,29 @@ def calculate_accuracy(yolo_results, clip_results, target_part_id):
         yolo_confidence = 0.0
         if yolo_results.get('detections'):
             yolo_confidence = max([det['confidence'] for det in yolo_results['detections']])
-        
-        # CLIP 신뢰도
-        clip_confidence = clip_results.get('confidence', 0.0)
-        
+
+        # CLIP 신뢰도 (대상 부품과 매칭된 크롭 우선, 없으면 최고 점수)
+        # 부품 ID 완전 일치만 인정 (부분 문자열 비교 시 3001이 30010/3001pr0001과도 매칭됨)
+        target = normalize_part_id(target_part_id)
+        matching = [c for c in clip_results if target and normalize_part_id(c.get('class')) == target]
+        best = max(matching or clip_results, key=lambda c: c.get('confidence', 0.0), default={})
+        clip_confidence = best.get('confidence', 0.0)
+
         # 부품 ID 매칭 점수
-        part_match_score = 1.0 if target_part_id in clip_results.get('class', '') else 0.5
-        
+        part_match_score = 1.0 if matching else 0.5
+
         # 가중 평균으로 최종 정확도 계산
         accuracy = (yolo_confidence * 0.4 + clip_confidence * 0.4 + part_match_score * 0.2)
-        
+
         return min(accuracy, 1.0)  # 최대 1.0으로 제한
-        
+
     except Exception as e:
         return 0.5  # 기본값
 
 def format_predictions(yolo_results, clip_results):
     """예측 결과 포맷팅"""
     predictions = []
-    
+
     # YOLO 탐지 결과
     for detection in yolo_results.get('detections', []):
         predictions.append({
@@ -193,14 +748,19 @@ def format_predictions(yolo_results, clip_results):
             'confidence': detection['confidence'],
             'bbox': detection['bbox']
         })
-    
-    # CLIP 분류 결과
-    predictions.append({
-        'type': 'classification',
-        'class': clip_results.get('class', ''),
-        'confidence': clip_results.get('confidence', 0.0)
-    })
-    
+
+    # CLIP 분류 결과 (탐지별, 탐지 없으면 전체 이미지 1건)
+    for index, classification in enumerate(clip_results):
+        prediction = {
+            'type': 'classification',
+            'detection_index': index if yolo_results.get('detections') else None,
+            'class': classification.get('class', ''),
+            'confidence': classification.get('confidence', 0.0)
+        }
+        if 'candidates' in classification:
+            prediction['candidates'] = classification['candidates']
+        predictions.append(prediction)
+
     return predictions
 
 if __name__ == '__main__':
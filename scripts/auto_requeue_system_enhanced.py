@@ -17,6 +17,7 @@ from pathlib import Path
 # 프로젝트 루트를 Python 경로에 추가
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -274,6 +275,42 @@ class AutoRequeueSystemEnhanced:
             logger.error(f"[ERROR] 기본 재삽입 실패: {e}")
             return 0
     
+    def enqueue_hard_examples(self, report: Dict, top_k: int = 10, renders_per_part: int = 40) -> int:
+        """하드 예제 마이닝 결과의 상위 부품을 실패 포즈 파라미터와 함께 render_queue에 삽입"""
+        try:
+            from hard_example_miner import build_render_requests
+            
+            requests_to_insert = build_render_requests(report, top_k, renders_per_part)
+            if not requests_to_insert or not self.supabase:
+                return 0
+            
+            result = self.supabase.table('render_queue').insert(requests_to_insert).execute()
+            inserted = len(result.data) if result.data else 0
+            for request in requests_to_insert:
+                logger.info(f"[HARD] 재렌더 요청: {request['part_id']} x{request['retry_parameters']['count']} - {request['requeue_reason']}")
+            logger.info(f"[OK] 하드 예제 재렌더 요청 {inserted}건 삽입")
+            return inserted
+            
+        except Exception as e:
+            logger.error(f"[ERROR] 하드 예제 재렌더 요청 실패: {e}")
+            return 0
+    
+    def run_hard_example_cycle(self, model_path: str, data_yaml: str, top_k: int = 10,
+                               renders_per_part: int = 40, device: str = 'cpu') -> int:
+        """현재 검출기로 검증 split 마이닝 → 리포트/혼동 그룹 저장 → 재렌더 요청"""
+        try:
+            from hard_example_miner import HardExampleMiner, save_report
+            
+            report = HardExampleMiner(model_path, data_yaml, device=device).mine()
+            save_report(report)
+            logger.info(f"[HARD] 하드 이미지 {report['hard_images']}/{report['total_images']}장, "
+                        f"최상위 부품: {[p['part_id'] for p in report['parts'][:top_k]]}")
+            return self.enqueue_hard_examples(report, top_k, renders_per_part)
+            
+        except Exception as e:
+            logger.error(f"[ERROR] 하드 예제 마이닝 실패: {e}")
+            return 0
+    
     def check_retrain_conditions(self, fail_samples: List[Dict]) -> bool:
         """재학습 조건 확인"""
         try:
@@ -407,11 +444,16 @@ class AutoRequeueSystemEnhanced:
             logger.error(f"[ERROR] 최신 데이터셋 경로 조회 실패: {e}")
             return "output/synthetic"
     
-    def run_auto_requeue_cycle(self, hours: int = 24):
-        """Auto-Requeue 사이클 실행 (실패 원인별 파라미터 적용)"""
+    def run_auto_requeue_cycle(self, hours: int = 24, hard_example_model: Optional[str] = None,
+                               hard_example_data: Optional[str] = None):
+        """Auto-Requeue 사이클 실행 (실패 원인별 파라미터 적용, 모델/검증셋이 주어지면 하드 예제 재렌더 포함)"""
         try:
             logger.info("[RETRY] Auto-Requeue 사이클 시작 (실패 원인별 파라미터 적용)")
             
+            # 0. 하드 예제 마이닝 (QA 통과 이미지 중 검출기가 틀리는 부품/포즈)
+            if hard_example_model and hard_example_data:
+                self.run_hard_example_cycle(hard_example_model, hard_example_data)
+            
             # 1. QA FAIL 샘플 검사
             fail_samples = self.check_qa_failures(hours)
             if not fail_samples:
@@ -479,7 +521,11 @@ def main():
         auto_requeue.initialize_retry_parameters()
         
         # Auto-Requeue 사이클 실행
-        auto_requeue.run_auto_requeue_cycle(hours=24)
+        auto_requeue.run_auto_requeue_cycle(
+            hours=24,
+            hard_example_model=os.getenv('HARD_EXAMPLE_MODEL'),
+            hard_example_data=os.getenv('HARD_EXAMPLE_DATA')
+        )
         
         # 품질 회복 통계 조회
         stats = auto_requeue.get_quality_healing_stats(days=7)
@@ -16,22 +16,34 @@ from datetime import datetime
 import shutil
 from PIL import Image
 import subprocess
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+from dataset_validation_engine import DatasetValidationEngine, ValidationThresholds
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 메타데이터 핵심 필드 (누락 시 _fix_metadata_files에서 보완)
+CORE_META_FIELDS = (
+    'set_id', 'element_id', 'part_id', 'color_id', 'shape_tag', 'series',
+    'stud_count_top', 'tube_count_bottom', 'center_stud', 'groove',
+    'confusions', 'distinguishing_features', 'recognition_hints', 'topo_applicable'
+)
+
 class ComprehensiveFixer:
     """종합 수정기 - 모든 문제점 해결"""
     
-    def __init__(self, dataset_path: str):
+    def __init__(self, dataset_path: str, workers: int = None):
         self.dataset_path = Path(dataset_path)
+        self.workers = workers
         self.backup_dir = self.dataset_path / "backup"
         self.issues_found = []
         self.fixes_applied = []
         
     def analyze_issues(self) -> Dict[str, Any]:
-        """문제점 종합 분석"""
+        """문제점 종합 분석 (통합 검증 엔진 단일 패스 + ai_meta.jsonl 일관성)"""
         logger.info("문제점 종합 분석 시작")
         
         issues = {
@@ -41,150 +53,44 @@ class ComprehensiveFixer:
             'schema_issues': [],
             'consistency_issues': []
         }
+        categories = {
+            'image': 'webp_issues',
+            'meta': 'metadata_issues',
+            'meta_e': 'metadata_issues',
+            'pairing': 'consistency_issues'
+        }
         
-        # 1. WebP 파일 분석
-        image_files = list((self.dataset_path / 'images').glob('*.webp'))
-        for img_file in image_files:
-            webp_issues = self._analyze_webp_file(str(img_file))
-            if webp_issues:
-                issues['webp_issues'].extend(webp_issues)
-        
-        # 2. 메타데이터 파일 분석
-        meta_files = list((self.dataset_path / 'meta').glob('*.json'))
-        for meta_file in meta_files:
-            meta_issues = self._analyze_metadata_file(str(meta_file))
-            if meta_issues:
-                issues['metadata_issues'].extend(meta_issues)
-        
-        # 3. 품질 메트릭 분석
-        quality_issues = self._analyze_quality_metrics()
-        issues['quality_issues'] = quality_issues
+        def collect(result):
+            name = result['stem']
+            stats = result['stats']
+            for issue in result['issues']:
+                issues[categories[issue['check']]].append(f"{issue['message']} - {name}")
+            # 1. WebP 파일 (엔진 이미지 검사 외 수정 대상 항목)
+            if 'exif' in stats and not stats['exif']:
+                issues['webp_issues'].append(f"EXIF 메타데이터 없음: {name}")
+            if stats.get('mode') and stats['mode'] != 'RGB':
+                issues['webp_issues'].append(f"색상 모드 오류: {stats['mode']} (RGB 필요): {name}")
+            # 3. 품질 메트릭 (SSIM이 1.0에 가까우면 비현실적)
+            if stats.get('ssim', 0) >= 0.999:
+                issues['quality_issues'].append(f"비현실적 SSIM 값: {stats['ssim']:.3f} - {name}")
+        
+        # 1~3, 5. WebP/메타데이터/품질 메트릭/파일 일관성 (샘플당 1회 읽기)
+        engine = DatasetValidationEngine(
+            self.dataset_path,
+            checks=('pairing', 'image', 'meta', 'meta_e'),
+            thresholds=ValidationThresholds(extra_meta_fields=CORE_META_FIELDS),
+            workers=self.workers
+        )
+        summary = engine.run(on_result=collect)
+        logger.info(f"샘플 {summary['samples']}개 분석 완료 ({summary['elapsed_sec']:.1f}초)")
         
         # 4. 스키마 일관성 분석
         schema_issues = self._analyze_schema_consistency()
         issues['schema_issues'] = schema_issues
         
-        # 5. 파일 일관성 분석
-        consistency_issues = self._analyze_file_consistency()
-        issues['consistency_issues'] = consistency_issues
-        
         self.issues_found = issues
         return issues
     
-    def _analyze_webp_file(self, image_path: str) -> List[str]:
-        """WebP 파일 문제점 분석"""
-        issues = []
-        
-        try:
-            with Image.open(image_path) as img:
-                # ICC 프로파일 확인
-                if not img.info.get('icc_profile'):
-                    issues.append(f"ICC 프로파일 없음: {os.path.basename(image_path)}")
-                
-                # EXIF 메타데이터 확인
-                if not img.info.get('exif'):
-                    issues.append(f"EXIF 메타데이터 없음: {os.path.basename(image_path)}")
-                
-                # WebP 품질 정보 확인
-                if 'quality' not in img.info:
-                    issues.append(f"WebP 품질 정보 없음: {os.path.basename(image_path)}")
-                
-                # 색상 모드 확인
-                if img.mode != 'RGB':
-                    issues.append(f"색상 모드 오류: {img.mode} (RGB 필요): {os.path.basename(image_path)}")
-        
-        except Exception as e:
-            issues.append(f"WebP 파일 분석 오류: {e}")
-        
-        return issues
-    
-    def _analyze_metadata_file(self, meta_path: str) -> List[str]:
-        """메타데이터 파일 문제점 분석"""
-        issues = []
-        
-        try:
-            with open(meta_path, 'r', encoding='utf-8') as f:
-                meta = json.load(f)
-            
-            # 핵심 12필드 확인
-            core_fields = [
-                'set_id', 'element_id', 'part_id', 'color_id', 'shape_tag', 'series',
-                'stud_count_top', 'tube_count_bottom', 'center_stud', 'groove',
-                'confusions', 'distinguishing_features', 'recognition_hints', 'topo_applicable'
-            ]
-            
-            missing_fields = [field for field in core_fields if field not in meta]
-            if missing_fields:
-                issues.append(f"핵심 필드 누락: {missing_fields} - {os.path.basename(meta_path)}")
-            
-            # 품질 메트릭 확인
-            if 'quality_metrics' in meta:
-                qm = meta['quality_metrics']
-                ssim = qm.get('ssim', 0)
-                snr = qm.get('snr', 0)
-                
-                if ssim < 0.965:
-                    issues.append(f"SSIM 임계값 미달: {ssim:.3f} < 0.965 - {os.path.basename(meta_path)}")
-                
-                if snr < 30:
-                    issues.append(f"SNR 임계값 미달: {snr:.1f}dB < 30dB - {os.path.basename(meta_path)}")
-            
-            # bbox/polygon 일치성 확인
-            if 'bounding_box' in meta and 'polygon_uv' in meta:
-                bbox = meta['bounding_box']
-                polygon = meta['polygon_uv']
-                
-                if len(polygon) >= 2:
-                    poly_x = [p[0] for p in polygon]
-                    poly_y = [p[1] for p in polygon]
-                    
-                    calc_bbox = {
-                        'x_min': min(poly_x),
-                        'y_min': min(poly_y),
-                        'x_max': max(poly_x),
-                        'y_max': max(poly_y)
-                    }
-                    
-                    # bbox 일치성 검증 (5% 허용 오차)
-                    tolerance = 0.05
-                    for key in ['x_min', 'y_min', 'x_max', 'y_max']:
-                        if abs(bbox[key] - calc_bbox[key]) > tolerance:
-                            issues.append(f"bbox/polygon 불일치: {key} - {os.path.basename(meta_path)}")
-                            break
-        
-        except Exception as e:
-            issues.append(f"메타데이터 분석 오류: {e}")
-        
-        return issues
-    
-    def _analyze_quality_metrics(self) -> List[str]:
-        """품질 메트릭 문제점 분석"""
-        issues = []
-        
-        meta_files = list((self.dataset_path / 'meta').glob('*.json'))
-        for meta_file in meta_files:
-            try:
-                with open(meta_file, 'r', encoding='utf-8') as f:
-                    meta = json.load(f)
-                
-                if 'quality_metrics' in meta:
-                    qm = meta['quality_metrics']
-                    ssim = qm.get('ssim', 0)
-                    snr = qm.get('snr', 0)
-                    
-                    # SSIM이 1.0인 경우 (비현실적)
-                    if ssim >= 0.999:
-                        issues.append(f"비현실적 SSIM 값: {ssim:.3f} - {meta_file.name}")
-                    
-                    # SNR이 너무 낮은 경우
-                    if snr < 30:
-                        issues.append(f"SNR 부족: {snr:.1f}dB - {meta_file.name}")
-            
-            except Exception as e:
-                issues.append(f"품질 메트릭 분석 오류: {e}")
-        
-        return issues
-    
     def _analyze_schema_consistency(self) -> List[str]:
         """스키마 일관성 문제점 분석"""
         issues = []
@@ -222,41 +128,6 @@ class ComprehensiveFixer:
         
         return issues
     
-    def _analyze_file_consistency(self) -> List[str]:
-        """파일 일관성 문제점 분석"""
-        issues = []
-        
-        # 각 디렉토리별 파일 수 확인
-        dirs = ['images', 'labels', 'meta', 'meta-e']
-        file_counts = {}
-        
-        for dir_name in dirs:
-            dir_path = self.dataset_path / dir_name
-            if dir_path.exists():
-                files = list(dir_path.glob('*'))
-                file_counts[dir_name] = len(files)
-            else:
-                file_counts[dir_name] = 0
-                issues.append(f"디렉토리 없음: {dir_name}")
-        
-        # 파일 수 일치성 확인
-        if len(set(file_counts.values())) > 1:
-            issues.append(f"디렉토리별 파일 수 불일치: {file_counts}")
-        
-        # 파일명 일치성 확인
-        base_names = set()
-        for dir_name in ['images', 'labels', 'meta']:
-            dir_path = self.dataset_path / dir_name
-            if dir_path.exists():
-                for file_path in dir_path.glob('*'):
-                    base_name = file_path.stem.split('_')[0] + '_' + file_path.stem.split('_')[1]
-                    base_names.add(base_name)
-        
-        if len(base_names) > 1:
-            issues.append(f"파일명 패턴 불일치: {len(base_names)}개 패턴 발견")
-        
-        return issues
-    
     def apply_fixes(self) -> bool:
         """발견된 문제점들 수정"""
         logger.info("종합 수정 시작")
@@ -615,6 +486,7 @@ def main():
     parser.add_argument('dataset_path', help='수정할 데이터셋 경로')
     parser.add_argument('--output', '-o', help='보고서 출력 파일 (선택사항)')
     parser.add_argument('--verbose', '-v', action='store_true', help='상세 로그 출력')
+    parser.add_argument('--workers', type=int, help='분석 프로세스 수 (기본: CPU-1)')
     
     args = parser.parse_args()
     
@@ -622,7 +494,7 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     # 종합 수정 실행
-    fixer = ComprehensiveFixer(args.dataset_path)
+    fixer = ComprehensiveFixer(args.dataset_path, args.workers)
     
     # 1. 문제점 분석
     issues = fixer.analyze_issues()
@@ -8,6 +8,7 @@ Supabase Storage에 업로드된 .pt 파일을 다운로드하여 ONNX로 변환
 import argparse
 import os
 import sys
+import shutil
 from pathlib import Path
 from datetime import datetime
 
@@ -32,6 +33,9 @@ except ImportError as e:
     print("다음 명령어로 설치하세요: pip install supabase ultralytics")
     sys.exit(1)
 
+sys.path.insert(0, str(Path(__file__).parent))
+from model_artifact_store import artifact_sha256, get_model_store
+
 def setup_supabase():
     """Supabase 클라이언트 설정 (환경변수 관리 시스템 사용)"""
     # [FIX] 수정됨: 환경변수 관리 시스템 사용
@@ -66,25 +70,21 @@ def setup_supabase():
     return create_client(supabase_url, supabase_key)
 
 def download_model(supabase, model_path, local_path):
-    """Supabase Storage에서 모델 다운로드"""
+    """Supabase Storage에서 모델 다운로드 (로컬 저장소에 같은 해시가 있으면 전송 생략)"""
     try:
-        print(f"[DOWNLOAD] 모델 다운로드 중: {model_path}")
-        response = supabase.storage.from_('models').download(model_path)
+        print(f"[DOWNLOAD] 모델 준비 중: {model_path}")
+        expected_sha256 = None
+        try:
+            registry = supabase.table('model_registry').select('training_metadata').eq('pt_model_path', model_path).limit(1).execute()
+            expected_sha256 = artifact_sha256(registry.data[0] if registry.data else None, 'pt')
+        except Exception as e:
+            print(f"[WARN] 등록 해시 조회 실패 (조건부 다운로드로 진행): {e}")
         
-        if hasattr(response, 'error') and response.error:
-            print(f"[ERROR] 다운로드 실패: {response.error}")
-            return False
+        store = get_model_store()
+        blob = store.fetch_storage_object(model_path, expected_sha256)
+        store.materialize(blob, local_path)
         
-        # 바이너리 데이터로 받은 경우
-        if isinstance(response, bytes):
-            with open(local_path, 'wb') as f:
-                f.write(response)
-        else:
-            # 파일 객체인 경우
-            with open(local_path, 'wb') as f:
-                f.write(response.read())
-        
-        print(f"[OK] 다운로드 완료: {local_path} ({Path(local_path).stat().st_size / 1024 / 1024:.2f} MB)")
+        print(f"[OK] 모델 준비 완료: {local_path} ({Path(local_path).stat().st_size / 1024 / 1024:.2f} MB)")
         return True
     except Exception as e:
         print(f"[ERROR] 다운로드 중 오류: {e}")
@@ -92,50 +92,28 @@ def download_model(supabase, model_path, local_path):
         traceback.print_exc()
         return False
 
-def convert_to_onnx(pt_path, onnx_path, imgsz=640):
-    """PyTorch 모델을 ONNX로 변환"""
+def convert_to_onnx(pt_path, onnx_path, imgsz=640, opset=12, simplify=True):
+    """PyTorch 모델을 ONNX로 변환 (export()가 반환한 실제 경로를 목적지로 이동)"""
     try:
-        print(f"[CONVERT] ONNX 변환 시작: {pt_path}")
+        print(f"[CONVERT] ONNX 변환 시작: {pt_path} (opset {opset})")
         model = YOLO(str(pt_path))
         
         # ONNX 변환
         export_result = model.export(
             format='onnx',
             imgsz=imgsz,
-            simplify=True,
-            opset=12
+            simplify=simplify,
+            opset=opset
         )
         
-        # export()는 모델 객체의 경로를 반환하거나, 현재 디렉토리에 저장할 수 있음
-        # 여러 가능한 경로에서 파일 찾기
-        possible_paths = [
-            Path(onnx_path),  # 목적지 경로
-            Path(pt_path).with_suffix('.onnx'),  # .pt와 같은 디렉토리
-            Path("yolo11n-seg.onnx"),  # YOLO 기본 이름
-            Path("yolo11n.onnx"),
-            Path("yolo11s-seg.onnx"),
-            Path("yolo11s.onnx"),
-            Path("best.onnx"),
-        ]
-        
-        # export_result가 문자열 경로인 경우
-        if isinstance(export_result, (str, Path)):
-            possible_paths.insert(0, Path(export_result))
-        
-        exported_file = None
-        for p in possible_paths:
-            if p and p.exists():
-                if p != Path(onnx_path):
-                    # 파일이 다른 경로에 있으면 목적지로 이동
-                    p.rename(onnx_path)
-                    print(f"[OK] ONNX 파일 이동: {p} → {onnx_path}")
-                else:
-                    print(f"[OK] ONNX 파일 저장: {onnx_path}")
-                exported_file = Path(onnx_path)
-                break
+        exported_file = Path(export_result) if export_result else None
+        if not exported_file or not exported_file.exists():
+            raise FileNotFoundError(f"ONNX 내보내기 결과 파일이 없습니다: {export_result}")
         
-        if not exported_file:
-            raise FileNotFoundError(f"ONNX 파일을 찾을 수 없습니다. 검색 경로: {possible_paths}")
+        if exported_file.resolve() != Path(onnx_path).resolve():
+            shutil.move(str(exported_file), onnx_path)
+            print(f"[OK] ONNX 파일 이동: {exported_file} → {onnx_path}")
+        exported_file = Path(onnx_path)
         
         print(f"[OK] ONNX 변환 완료: {onnx_path} ({exported_file.stat().st_size / 1024 / 1024:.2f} MB)")
         return True
@@ -147,95 +125,58 @@ def convert_to_onnx(pt_path, onnx_path, imgsz=640):
         return False
 
 def upload_onnx(supabase, onnx_path, model_name):
-    """ONNX 모델을 Supabase Storage에 업로드 (학습 스크립트와 동일한 방식)"""
+    """ONNX 모델을 Supabase Storage에 업로드 (등록된 해시와 같으면 전송 생략, 재개 가능 청크 업로드)"""
+    onnx_bucket_path = f"{model_name}.onnx"
     try:
-        onnx_bucket_path = f"{model_name}.onnx"
-        print(f"[UPLOAD] ONNX 모델 업로드 중: {onnx_bucket_path}")
-        
-        with open(onnx_path, 'rb') as f:
-            onnx_data = f.read()
+        registry_response = supabase.table('model_registry').select('*').eq('model_name', model_name).execute()
+        model_record = registry_response.data[0] if registry_response.data else None
         
-        # [FIX] 수정됨: 학습 스크립트와 동일한 업로드 방식 사용
-        # local_yolo_training.py의 upload_and_register_model 함수와 동일한 방식
-        upload_result = supabase.storage.from_('models').upload(
+        print(f"[UPLOAD] ONNX 모델 업로드 중: {onnx_bucket_path}")
+        artifact = get_model_store().upload(
+            onnx_path,
             onnx_bucket_path,
-            onnx_data
+            known_sha256=artifact_sha256(model_record, 'onnx'),
+            client=supabase
         )
-        
-        # Supabase Storage 업로드 응답 처리 (학습 스크립트와 동일)
-        if hasattr(upload_result, 'error') and upload_result.error:
-            error_msg = upload_result.error
-            print(f"[ERROR] ONNX 모델 업로드 실패: {error_msg}")
-            
-            # 파일이 이미 존재하는 경우 update 시도
-            if 'already exists' in str(error_msg) or 'duplicate' in str(error_msg).lower():
-                print(f"[INFO] 파일이 이미 존재합니다. 업데이트 시도 중...")
-                try:
-                    update_result = supabase.storage.from_('models').update(
-                        onnx_bucket_path,
-                        onnx_data
-                    )
-                    if hasattr(update_result, 'error') and update_result.error:
-                        print(f"[ERROR] ONNX 모델 업데이트 실패: {update_result.error}")
-                        return False
-                    else:
-                        print(f"[OK] ONNX 모델 업데이트 성공")
-                        supabase_url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
-                        onnx_public_url = f"{supabase_url}/storage/v1/object/public/models/{onnx_bucket_path}"
-                        print(f"[OK] ONNX 모델 업로드 완료, 공개 URL: {onnx_public_url}")
-                        return True
-                except Exception as update_err:
-                    print(f"[ERROR] 업데이트 시도 실패: {update_err}")
-                    return False
-            else:
-                # 학습 스크립트처럼 예상 공개 URL을 생성하고 계속 진행
-                supabase_url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
-                onnx_public_url = f"{supabase_url}/storage/v1/object/public/models/{onnx_bucket_path}"
-                print(f"[WARN] 모델 업로드 실패로 인해 예상 공개 URL을 사용합니다: {onnx_public_url}")
-                return False
-        else:
-            # 업로드 성공
-            supabase_url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
-            onnx_public_url = f"{supabase_url}/storage/v1/object/public/models/{onnx_bucket_path}"
-            print(f"[OK] ONNX 모델 업로드 성공, 공개 URL: {onnx_public_url}")
-            return True
-        
-        # model_registry 업데이트
-        try:
-            # model_name에서 타임스탬프 추출
-            # brickbox_s_seg_stage1_20251106_132857 -> stage1
-            stage = 'stage1' if 'stage1' in model_name else ('stage2' if 'stage2' in model_name else 'single')
-            
-            # 활성 모델 찾기
-            registry_response = supabase.table('model_registry').select('*').eq('model_name', model_name).execute()
-            
-            if registry_response.data and len(registry_response.data) > 0:
-                model_record = registry_response.data[0]
-                # model_url과 model_path 업데이트 (ONNX 우선)
-                supabase.table('model_registry').update({
-                    'model_url': onnx_public_url,
-                    'model_path': onnx_bucket_path,
-                    'updated_at': datetime.now().isoformat()
-                }).eq('id', model_record['id']).execute()
-                print(f"[OK] model_registry 업데이트 완료: {model_name}")
-            else:
-                print(f"[WARN] model_registry에서 모델을 찾을 수 없습니다: {model_name}")
-        except Exception as e:
-            print(f"[WARN] model_registry 업데이트 실패: {e}")
-        
-        return True
-        
+        onnx_public_url = artifact['public_url']
+        print(f"[OK] ONNX 모델 업로드 완료, 공개 URL: {onnx_public_url}")
     except Exception as e:
         print(f"[ERROR] ONNX 업로드 중 오류: {e}")
         import traceback
         traceback.print_exc()
         return False
+    
+    # model_registry 업데이트 (ONNX 우선 + 아티팩트 해시 기록)
+    try:
+        if model_record:
+            metadata = model_record.get('training_metadata') or {}
+            artifacts = {
+                **(metadata.get('artifacts') or {}),
+                'onnx': {key: artifact[key] for key in ('path', 'sha256', 'size')}
+            }
+            supabase.table('model_registry').update({
+                'model_url': onnx_public_url,
+                'model_path': onnx_bucket_path,
+                'training_metadata': {**metadata, 'artifacts': artifacts},
+                'updated_at': datetime.now().isoformat()
+            }).eq('id', model_record['id']).execute()
+            print(f"[OK] model_registry 업데이트 완료: {model_name}")
+        else:
+            print(f"[WARN] model_registry에서 모델을 찾을 수 없습니다: {model_name}")
+    except Exception as e:
+        print(f"[WARN] model_registry 업데이트 실패: {e}")
+    
+    return True
 
 def main():
     parser = argparse.ArgumentParser(description='PyTorch 모델을 ONNX로 변환하고 업로드')
     parser.add_argument('model_path', help='Supabase Storage의 모델 경로 (예: brickbox_s_seg_stage1_20251106_132857.pt)')
     parser.add_argument('--imgsz', type=int, default=640, help='이미지 크기 (기본값: 640)')
+    parser.add_argument('--opset', type=int, default=12, help='ONNX opset (기본값: 12, 브라우저 호환)')
     parser.add_argument('--no-upload', action='store_true', help='변환만 하고 업로드하지 않음')
+    parser.add_argument('--variants', action='store_true',
+                        help='fp32/fp16/int8 변형 생성 + CPU 벤치마크 + mAP drift 검증 후 model_registry에 기록')
+    parser.add_argument('--data', help='변형 mAP drift 검증용 dataset.yaml (--variants와 함께 사용)')
     
     args = parser.parse_args()
     
@@ -259,10 +200,16 @@ def main():
             sys.exit(1)
         
         # ONNX 변환
-        if not convert_to_onnx(pt_local_path, onnx_local_path, args.imgsz):
+        if not convert_to_onnx(pt_local_path, onnx_local_path, args.imgsz, args.opset):
             print("[ERROR] ONNX 변환 실패")
             sys.exit(1)
         
+        # 엣지 배포용 변형 (선택)
+        if args.variants:
+            from onnx_export_variants import build_variants, record_variants
+            report = build_variants(pt_local_path, imgsz=args.imgsz, data_yaml=args.data)
+            record_variants(supabase, model_name, report, upload=not args.no_upload)
+        
         # 업로드 (옵션)
         upload_success = True
         if not args.no_upload:
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+데이터셋 샤드 익스포터/리더 (WebDataset 호환 tar)
+- 샘플(WebP/PNG, txt, meta json, meta-e json, EXR)을 고정 크기 tar 샤드로 묶음
+  · split별 디렉토리, 샤드 안에서는 element(그룹) → stem 순으로 연속 배치
+  · 멤버명 "{split}/{element}/{stem}.{ext}" (ext: webp|png|jpg, txt, json, e2.json|e2.msgpack|e2.cbor, exr) → WebDataset 키 규칙과 동일
+  · 결정적 tar(mtime/uid 고정, 정렬): 내용이 같으면 샤드 바이트도 동일 → 스토리지 동기화/버전 관리는 변경 샤드만
+- index.jsonl: 샘플별 (샤드, 멤버 오프셋/크기) → 임의 접근, shards.json: 샤드별 sha256/샘플 수/크기
+- ShardReader: 임의 접근(__getitem__), 샤드 단위 순차 스트리밍(iter_samples), 학습/검증기용 파일 트리 복원(materialize)
+
+실행 방법:
+    python scripts/dataset_shards.py export output/synthetic/dataset_synthetic output/shards --shard-size-mb 256
+    python scripts/dataset_shards.py validate output/shards --split train
+    python scripts/dataset_shards.py yolo output/shards output/shard_datasets/latest --element 6335317
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tarfile
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from dataset_validation_engine import index_samples, SPLIT_DIRS
+
+SHARD_FORMAT_VERSION = 1
+DEFAULT_SHARD_SIZE_MB = 256
+INDEX_NAME = 'index.jsonl'
+MANIFEST_NAME = 'shards.json'
+KIND_EXTENSIONS = {'label': 'txt', 'meta': 'json', 'depth': 'exr'}
+TREE_DIRS = {'image': 'images', 'label': 'labels', 'meta': 'meta', 'meta_e': 'meta-e', 'depth': 'depth'}
+EXTENSION_KINDS = {'txt': 'label', 'json': 'meta', 'e2.json': 'meta_e', 'e2.msgpack': 'meta_e', 'e2.cbor': 'meta_e',
+                   'exr': 'depth',
+                   'webp': 'image', 'png': 'image', 'jpg': 'image', 'jpeg': 'image'}
+TAR_BLOCK = 512
+DEFAULT_SPLIT = 'all'        # split 디렉토리가 없는 부품 폴더형 데이터셋
+YOLO_SPLIT_RATIOS = (0.8, 0.1)  # split 없는 샘플의 train/val 비율 (나머지 test)
+
+
+def _sample_split(root: Path, files: Dict[str, str]) -> str:
+    """경로에 train/val/test 디렉토리가 있으면 해당 split"""
+    for path in files.values():
+        for part in Path(os.path.relpath(path, root)).parts[:-1]:
+            if part in SPLIT_DIRS:
+                return part
+    return DEFAULT_SPLIT
+
+
+def _member_ext(kind: str, path: str) -> str:
+    if kind == 'image':
+        return Path(path).suffix.lower().lstrip('.')
+    if kind == 'meta_e':
+        return 'e2' + Path(path).suffix.lower()  # e2.json | e2.msgpack | e2.cbor (e2_codec 형식 유지)
+    return KIND_EXTENSIONS[kind]
+
+
+def _tar_size(size: int) -> int:
+    """tar 멤버 1개의 대략적 크기 (헤더 + 512 패딩)"""
+    return TAR_BLOCK + (size + TAR_BLOCK - 1) // TAR_BLOCK * TAR_BLOCK
+
+
+def plan_shards(dataset_root, shard_size_mb: float = DEFAULT_SHARD_SIZE_MB,
+                max_samples: Optional[int] = None) -> List[Dict]:
+    """샤드 구성 계획: [{'name', 'split', 'samples': [(key, split, element, stem, [(ext, path), ...])]}]"""
+    root = Path(dataset_root)
+    limit = int(shard_size_mb * 1024 * 1024)
+    by_split: Dict[str, List] = defaultdict(list)
+    for sample in index_samples(root).values():
+        split = _sample_split(root, sample.files)
+        members = sorted((_member_ext(kind, path), path) for kind, path in sample.files.items())
+        key = f"{split}/{sample.group}/{sample.stem}" if sample.group else f"{split}/{sample.stem}"
+        by_split[split].append((key, split, sample.group, sample.stem, members))
+
+    shards = []
+    for split in sorted(by_split):
+        current, current_size = [], 0
+        for entry in sorted(by_split[split], key=lambda e: (e[2], e[3])):
+            size = sum(_tar_size(os.path.getsize(path)) for _, path in entry[4])
+            if current and (current_size + size > limit or (max_samples and len(current) >= max_samples)):
+                shards.append(current)
+                current, current_size = [], 0
+            current.append(entry)
+            current_size += size
+        if current:
+            shards.append(current)
+
+    counters: Dict[str, int] = defaultdict(int)
+    plan = []
+    for samples in shards:
+        split = samples[0][1]
+        plan.append({'name': f"{split}/shard-{counters[split]:06d}.tar", 'split': split, 'samples': samples})
+        counters[split] += 1
+    return plan
+
+
+def _write_shard(task: Tuple[str, str, List]) -> Dict:
+    """샤드 tar 1개 기록 (프로세스 풀 워커) → 샤드 정보 + 샘플 인덱스 항목"""
+    output_dir, name, samples = task
+    path = Path(output_dir) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    entries = []
+    with tarfile.open(tmp, 'w', format=tarfile.PAX_FORMAT) as tar:
+        for key, split, element, stem, members in samples:
+            offsets = {}
+            for ext, src in members:
+                with open(src, 'rb') as f:
+                    data = f.read()
+                info = tarfile.TarInfo(f"{key}.{ext}")
+                info.size = len(data)
+                info.mtime = 0
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+                # addfile은 TarInfo 복사본에 오프셋을 기록하므로 블록 패딩 역산으로 데이터 위치 계산
+                padded = (info.size + TAR_BLOCK - 1) // TAR_BLOCK * TAR_BLOCK
+                offsets[ext] = [tar.offset - padded, info.size]
+            entries.append({'key': key, 'split': split, 'element': element, 'stem': stem,
+                            'shard': name, 'members': offsets})
+    hasher = hashlib.sha256()
+    with open(tmp, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    os.replace(tmp, path)
+    elements = sorted({e['element'] for e in entries})
+    return {
+        'shard': {'name': name, 'split': samples[0][1], 'samples': len(samples), 'bytes': path.stat().st_size,
+                  'sha256': hasher.hexdigest(), 'elements': elements},
+        'entries': entries,
+    }
+
+
+def export_shards(dataset_root, output_dir, shard_size_mb: float = DEFAULT_SHARD_SIZE_MB,
+                  max_samples: Optional[int] = None, workers: Optional[int] = None) -> Dict:
+    """데이터셋 → 샤드 + index.jsonl + shards.json (기존 샤드와 sha256 비교해 변경 샤드 수 보고)"""
+    start = time.time()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = {}
+    if (output_dir / MANIFEST_NAME).exists():
+        with open(output_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            previous = {s['name']: s['sha256'] for s in json.load(f).get('shards', [])}
+
+    plan = plan_shards(dataset_root, shard_size_mb, max_samples)
+    tasks = [(str(output_dir), shard['name'], shard['samples']) for shard in plan]
+    workers = workers or max(1, min(len(tasks), (os.cpu_count() or 2) - 1))
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_write_shard, tasks))
+    else:
+        results = [_write_shard(task) for task in tasks]
+
+    # 더 이상 계획에 없는 이전 샤드 제거
+    planned = {shard['name'] for shard in plan}
+    for name in previous:
+        if name not in planned and (output_dir / name).exists():
+            (output_dir / name).unlink()
+
+    with open(output_dir / INDEX_NAME, 'w', encoding='utf-8') as f:
+        for result in results:
+            for entry in result['entries']:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    shards = [r['shard'] for r in results]
+    manifest = {
+        'version': SHARD_FORMAT_VERSION,
+        'source': str(Path(dataset_root).resolve()),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'shard_size_mb': shard_size_mb,
+        'samples': sum(s['samples'] for s in shards),
+        'bytes': sum(s['bytes'] for s in shards),
+        'shards': shards,
+    }
+    with open(output_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    changed = [s['name'] for s in shards if previous.get(s['name']) != s['sha256']]
+    return {
+        'shards': len(shards),
+        'samples': manifest['samples'],
+        'bytes': manifest['bytes'],
+        'changed_shards': changed,
+        'removed_shards': sorted(set(previous) - planned),
+        'elapsed_sec': round(time.time() - start, 2),
+    }
+
+
+class ShardReader:
+    """샤드 데이터셋 리더 (index.jsonl 기반 임의 접근 + 샤드 단위 순차 스트리밍)"""
+
+    def __init__(self, shard_dir, split: Optional[str] = None, elements: Optional[Sequence[str]] = None):
+        self.shard_dir = Path(shard_dir)
+        with open(self.shard_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        elements = {str(e) for e in elements} if elements else None
+        self.entries: List[Dict] = []
+        with open(self.shard_dir / INDEX_NAME, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if split and entry['split'] != split:
+                    continue
+                if elements and entry['element'] not in elements:
+                    continue
+                self.entries.append(entry)
+        self._handles: Dict[str, object] = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getstate__(self):
+        # DataLoader 워커로 전달 시 파일 핸들 제외 (워커마다 지연 오픈)
+        state = self.__dict__.copy()
+        state['_handles'] = {}
+        return state
+
+    def _handle(self, shard: str):
+        handle = self._handles.get(shard)
+        if handle is None:
+            handle = self._handles[shard] = open(self.shard_dir / shard, 'rb')
+        return handle
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+
+    @staticmethod
+    def _sample_dict(entry: Dict) -> Dict:
+        return {'__key__': entry['key'], '__split__': entry['split'], '__element__': entry['element'],
+                '__stem__': entry['stem']}
+
+    def __getitem__(self, i: int) -> Dict:
+        """샘플 i → {'__key__', '__split__', '__element__', '__stem__', ext: bytes, ...} (멤버별 seek + read)"""
+        entry = self.entries[i]
+        handle = self._handle(entry['shard'])
+        sample = self._sample_dict(entry)
+        for ext, (offset, size) in entry['members'].items():
+            handle.seek(offset)
+            sample[ext] = handle.read(size)
+        return sample
+
+    def shards(self) -> List[str]:
+        return list(OrderedDict.fromkeys(e['shard'] for e in self.entries))
+
+    def iter_samples(self, shards: Optional[Sequence[str]] = None, shuffle: bool = False,
+                     seed: int = 0) -> Iterator[Dict]:
+        """샤드 단위 순차 읽기 (샤드 파일을 한 번에 읽고 인덱스 오프셋으로 분할), shuffle 시 샤드/샤드 내 순서 섞음"""
+        import random
+        rng = random.Random(seed)
+        by_shard: Dict[str, List[Dict]] = defaultdict(list)
+        for entry in self.entries:
+            by_shard[entry['shard']].append(entry)
+        order = list(shards) if shards is not None else list(by_shard)
+        if shuffle:
+            rng.shuffle(order)
+        for shard in order:
+            with open(self.shard_dir / shard, 'rb') as f:
+                data = memoryview(f.read())
+            entries = list(by_shard.get(shard, []))
+            if shuffle:
+                rng.shuffle(entries)
+            for entry in entries:
+                sample = self._sample_dict(entry)
+                for ext, (offset, size) in entry['members'].items():
+                    sample[ext] = bytes(data[offset:offset + size])
+                yield sample
+
+    def worker_shards(self, worker_id: int, num_workers: int) -> List[str]:
+        """DataLoader 워커별 샤드 분할 (샤드 단위로 나눠 순차 I/O 유지)"""
+        return self.shards()[worker_id::num_workers]
+
+    def materialize(self, dest, layout: str = 'tree', kinds: Optional[Sequence[str]] = None) -> Path:
+        """샤드 → 파일 트리 복원
+        - layout='tree': {element}/images|labels|meta|meta-e|depth/{stem}.* (검증기 입력 형식)
+        - layout='yolo': images/{split}/{stem}.*, labels/{split}/{stem}.txt (Ultralytics 입력 형식)
+        """
+        dest = Path(dest)
+        kinds = set(kinds) if kinds else set(TREE_DIRS)
+        for sample in self.iter_samples():
+            for ext, data in sample.items():
+                if ext.startswith('__'):
+                    continue
+                kind = EXTENSION_KINDS.get(ext)
+                if kind not in kinds:
+                    continue
+                stem = sample['__stem__'] + ('_e2' if kind == 'meta_e' else '')
+                suffix = ext[2:] if kind == 'meta_e' else f'.{ext}'
+                if layout == 'yolo':
+                    target = dest / TREE_DIRS[kind] / yolo_split(sample) / f"{stem}{suffix}"
+                else:
+                    target = dest / (sample['__element__'] or '.') / TREE_DIRS[kind] / f"{stem}{suffix}"
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(data)
+        return dest
+
+
+def yolo_split(sample: Dict) -> str:
+    """샤드 split → 학습 split (split 없는 샘플은 키 해시로 80/10/10 결정적 분할)"""
+    if sample['__split__'] in SPLIT_DIRS:
+        return sample['__split__']
+    bucket = int(hashlib.md5(sample['__key__'].encode('utf-8')).hexdigest()[:8], 16) / 0xFFFFFFFF
+    if bucket < YOLO_SPLIT_RATIOS[0]:
+        return 'train'
+    return 'val' if bucket < sum(YOLO_SPLIT_RATIOS) else 'test'
+
+
+def decode_image(data: bytes):
+    """이미지 바이트 → BGR ndarray (cv2 우선, 없으면 PIL)"""
+    import numpy as np
+    try:
+        import cv2
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    except ImportError:
+        from PIL import Image
+        return np.asarray(Image.open(io.BytesIO(data)).convert('RGB'))[:, :, ::-1].copy()
+
+
+def decode_json(data: bytes) -> Dict:
+    return json.loads(data.decode('utf-8'))
+
+
+def decode_e2(data: bytes, ext: str) -> Dict:
+    """E2 멤버 디코딩 (e2.json | e2.msgpack | e2.cbor)"""
+    from e2_codec import decode_e2 as _decode, format_from_path
+    return _decode(data, format_from_path(ext))
+
+
+def materialize_yolo_dataset(shard_dir, dest, elements: Optional[Sequence[str]] = None) -> Path:
+    """샤드 → Ultralytics 데이터셋 (images/labels + dataset.yaml), 같은 샤드 버전이면 재사용"""
+    import yaml
+
+    dest = Path(dest)
+    with open(Path(shard_dir) / MANIFEST_NAME, 'rb') as f:
+        version = hashlib.sha256(f.read() + json.dumps(sorted(elements or [])).encode()).hexdigest()[:16]
+    marker = dest / '.shard_version'
+    dataset_yaml = dest / 'dataset.yaml'
+    if dataset_yaml.exists() and marker.exists() and marker.read_text().strip() == version:
+        print(f"[INFO] 샤드 데이터셋 재사용: {dest}")
+        return dataset_yaml
+
+    if dest.exists():
+        shutil.rmtree(dest)
+    reader = ShardReader(shard_dir, elements=elements)
+    if not len(reader):
+        raise FileNotFoundError(f"샤드에 해당 샘플이 없습니다: {shard_dir} (elements={elements})")
+    reader.materialize(dest, layout='yolo', kinds=('image', 'label'))
+
+    class_names = [str(elements[0])] if elements and len(elements) == 1 else ['lego_part']
+    yaml_content = {
+        'path': str(dest.absolute()),
+        'train': 'images/train',
+        'val': 'images/val',
+        'test': 'images/test',
+        'nc': len(class_names),
+        'names': class_names,
+    }
+    with open(dataset_yaml, 'w', encoding='utf-8') as f:
+        yaml.dump(yaml_content, f, default_flow_style=False, allow_unicode=True)
+    marker.write_text(version)
+    print(f"[OK] 샤드 → YOLO 데이터셋: {len(reader)}개 샘플 ({dest})")
+    return dataset_yaml
+
+
+def validate_shards(shard_dir, split: Optional[str] = None, elements: Optional[Sequence[str]] = None,
+                    workers: Optional[int] = None, output_jsonl=None) -> Dict:
+    """샤드를 임시 트리로 복원해 통합 검증 엔진 실행"""
+    from dataset_validation_engine import DatasetValidationEngine
+
+    reader = ShardReader(shard_dir, split=split, elements=elements)
+    with tempfile.TemporaryDirectory(prefix='shard_validate_') as tmp:
+        reader.materialize(tmp, layout='tree')
+        return DatasetValidationEngine(tmp, workers=workers).run(output_jsonl)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='데이터셋 샤드 익스포터/리더 (WebDataset 호환 tar)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    export_parser = sub.add_parser('export', help='데이터셋 → 샤드')
+    export_parser.add_argument('dataset_root', help='데이터셋 루트')
+    export_parser.add_argument('output_dir', help='샤드 출력 디렉토리')
+    export_parser.add_argument('--shard-size-mb', type=float, default=DEFAULT_SHARD_SIZE_MB, help='샤드 최대 크기 (MB)')
+    export_parser.add_argument('--max-samples', type=int, help='샤드당 최대 샘플 수')
+    export_parser.add_argument('--workers', type=int, help='샤드 기록 프로세스 수')
+    validate_parser = sub.add_parser('validate', help='샤드 검증 (통합 검증 엔진)')
+    validate_parser.add_argument('shard_dir')
+    validate_parser.add_argument('--split')
+    validate_parser.add_argument('--element', action='append')
+    validate_parser.add_argument('--workers', type=int)
+    validate_parser.add_argument('--output', help='검증 결과 JSONL 경로')
+    yolo_parser = sub.add_parser('yolo', help='샤드 → Ultralytics 데이터셋')
+    yolo_parser.add_argument('shard_dir')
+    yolo_parser.add_argument('dest')
+    yolo_parser.add_argument('--element', action='append')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        result = export_shards(args.dataset_root, args.output_dir, args.shard_size_mb, args.max_samples, args.workers)
+        print(f"[OK] 샤드 {result['shards']}개, 샘플 {result['samples']}개, {result['bytes'] / 1024 / 1024:.1f}MB "
+              f"({result['elapsed_sec']}s)")
+        print(f"[INFO] 변경 샤드 {len(result['changed_shards'])}개, 제거 샤드 {len(result['removed_shards'])}개")
+    elif args.command == 'validate':
+        from dataset_validation_engine import print_summary
+        report = validate_shards(args.shard_dir, args.split, args.element, args.workers, args.output)
+        print_summary(report)
+        sys.exit(1 if report['by_status'].get('FAIL') else 0)
+    else:
+        materialize_yolo_dataset(args.shard_dir, args.dest, args.element)
+
+
+if __name__ == '__main__':
+    main()
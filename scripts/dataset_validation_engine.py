@@ -0,0 +1,804 @@
+#!/usr/bin/env python3
+"""
+합성 데이터셋 통합 검증 엔진
+- 데이터셋 트리를 한 번만 순회해 image/label/meta/meta-e/depth를 (그룹, stem)으로 조인
+  · 부품 폴더형({부품}/images, {부품}/labels ...)과 split형(images/train/{부품}, meta/{부품} ...) 모두 지원
+  · meta-e의 _e2/.e2 접미사는 stem 조인 시 제거
+- 샘플 단위 작업을 프로세스 풀에서 실행: 파일당 1회 읽기, 이미지당 1회 디코드로 모든 검사 수행
+- 라벨 검사는 데이터셋 단위: 대상 라벨 전체를 LabelSet(yolo_label_toolkit)으로 한 번에 파싱 후 벡터화 audit
+- 샘플별 결과를 JSONL로 스트리밍 기록하고 요약(상태/검사별 집계, 품질 지표 평균, QA 플래그 분포) 생성
+- 결과 캐시(ValidationCache, SQLite): (파일 해시, 검증기 버전, 임계값/검사 구성) 키로 이전 결과 재사용
+  · 렌더는 기록 후 불변이므로 변경되지 않은 샘플은 재검증하지 않음 (해시는 size/mtime이 바뀐 파일만 재계산)
+  · --since: mtime이 기준 이후인 샘플만 대상 (야간 검증 비용 ∝ 당일 신규 렌더)
+- validate_synthetic_data / validate_synthetic_dataset / validate_dataset_quality / webp_quality_check /
+  comprehensive_fix 는 이 엔진의 프런트엔드
+
+실행 방법:
+    python scripts/dataset_validation_engine.py output/synthetic/dataset_synthetic --output output/validation/run.jsonl
+    python scripts/dataset_validation_engine.py output/synthetic/dataset_synthetic --cache --since 24h
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+VALIDATOR_VERSION = '2'  # 검사 로직 변경 시 올려서 캐시 무효화
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / 'output' / 'validation' / 'validation_cache.sqlite3'
+CACHE_COMMIT_EVERY = 500
+KIND_DIRS = {'images': 'image', 'labels': 'label', 'meta': 'meta', 'meta-e': 'meta_e', 'depth': 'depth'}
+KIND_SUFFIXES = {
+    'image': ('.webp', '.png', '.jpg', '.jpeg'),
+    'label': ('.txt',),
+    'meta': ('.json',),
+    'meta_e': ('.json', '.msgpack', '.cbor'),  # e2_codec 압축 형식 포함
+    'depth': ('.exr',),
+}
+SPLIT_DIRS = {'train', 'val', 'test'}
+SKIP_DIRS = {'backup', '__pycache__'}
+ALL_CHECKS = ('pairing', 'image', 'label', 'meta', 'meta_e', 'depth')
+STATUS_RANK = {'PASS': 0, 'WARN': 1, 'FAIL': 2}
+META_REQUIRED_FIELDS = ('part_id', 'element_id', 'pair_uid', 'transform', 'material', 'bounding_box',
+                        'polygon_uv', 'render_settings', 'quality_metrics')
+E2_REQUIRED_FIELDS = ('schema_version', 'part_id', 'annotation', 'qa')
+E2_ANNOTATION_FIELDS = ('bbox_pixel_xyxy', 'bbox_norm_xyxy')
+
+
+@dataclass
+class ValidationThresholds:
+    """기술문서 기준 검증 임계값 (모든 프런트엔드가 공유)"""
+    ssim_min: float = 0.965
+    snr_min: float = 30.0
+    rms_max: float = 1.5
+    depth_score_min: float = 0.85
+    mask_bbox_ratio_min: float = 0.25
+    mask_bbox_ratio_max: float = 0.98
+    bbox_area_min: float = 0.01
+    bbox_area_max: float = 0.95
+    bbox_polygon_tolerance: float = 0.05
+    min_resolution: int = 512
+    blur_laplacian_min: float = 100.0
+    noise_std_max: float = 50.0
+    channel_imbalance_max: float = 30.0
+    image_size_min_bytes: int = 1024
+    image_size_max_bytes: int = 10 * 1024 * 1024
+    exr_size_min_kb: float = 50.0
+    exr_size_warn_kb: float = 300.0
+    exr_size_max_kb: float = 500.0
+    single_class: bool = False      # True면 class_id != 0 을 경고 (YOLO 1-class 데이터셋)
+    require_meta_e: bool = True
+    extra_meta_fields: Tuple[str, ...] = ()  # 추가로 요구할 메타 필드 (누락 시 경고)
+
+
+@dataclass
+class Sample:
+    """(그룹, stem)으로 조인된 한 렌더 샘플의 파일 경로"""
+    group: str
+    stem: str
+    files: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.group}/{self.stem}" if self.group else self.stem
+
+
+def _normalize_stem(name: str, kind: str) -> str:
+    stem = os.path.splitext(name)[0]
+    if kind == 'meta_e':
+        for suffix in ('_e2', '.e2'):
+            if stem.endswith(suffix):
+                return stem[:-len(suffix)]
+    return stem
+
+
+def index_samples(root) -> Dict[str, Sample]:
+    """트리 1회 순회로 샘플 인덱스 생성 (경로에서 종류 디렉토리와 split 디렉토리를 뺀 나머지가 그룹)"""
+    root = Path(root)
+    samples: Dict[str, Sample] = {}
+    stack: List[Tuple[str, Tuple[str, ...], Optional[str]]] = [(str(root), (), None)]
+    while stack:
+        path, parts, kind = stack.pop()
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in SKIP_DIRS or entry.name.startswith('.'):
+                    continue
+                if kind is None and entry.name in KIND_DIRS:
+                    stack.append((entry.path, parts, KIND_DIRS[entry.name]))
+                elif entry.name in SPLIT_DIRS:
+                    stack.append((entry.path, parts, kind))
+                else:
+                    stack.append((entry.path, parts + (entry.name,), kind))
+            elif kind and entry.name.lower().endswith(KIND_SUFFIXES[kind]):
+                group = '/'.join(parts)
+                stem = _normalize_stem(entry.name, kind)
+                sample = samples.setdefault(f"{group}/{stem}", Sample(group, stem))
+                sample.files.setdefault(kind, entry.path)
+    return samples
+
+
+def _issue(issues: List[Dict], checks: Dict[str, str], check: str, status: str, message: str, path: str = None):
+    issues.append({'check': check, 'status': status, 'message': message, 'file': path})
+    if STATUS_RANK[status] > STATUS_RANK[checks.get(check, 'PASS')]:
+        checks[check] = status
+
+
+def _check_pairing(files, t, issues, checks, stats):
+    for kind, status in (('image', 'FAIL'), ('label', 'FAIL'), ('meta', 'FAIL'),
+                         ('meta_e', 'FAIL' if t['require_meta_e'] else 'WARN')):
+        if kind not in files:
+            _issue(issues, checks, 'pairing', status, f"{kind} 파일 누락")
+
+
+def _check_image(files, t, issues, checks, stats):
+    path = files.get('image')
+    if not path:
+        return
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        _issue(issues, checks, 'image', 'FAIL', f"이미지 읽기 오류: {e}", path)
+        return
+    stats['image_size'] = len(data)
+    if len(data) < t['image_size_min_bytes'] or len(data) > t['image_size_max_bytes']:
+        _issue(issues, checks, 'image', 'WARN', f"파일 크기 이상: {len(data)} bytes", path)
+
+    try:
+        from PIL import Image
+        import numpy as np
+    except ImportError:
+        _issue(issues, checks, 'image', 'WARN', "PIL/numpy 미설치로 이미지 디코드 검사 생략", path)
+        return
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            width, height = img.size
+            stats.update(width=width, height=height, mode=img.mode, format=img.format,
+                         icc_profile='icc_profile' in img.info, exif=bool(img.info.get('exif')))
+            if path.lower().endswith('.webp') and img.format != 'WEBP':
+                _issue(issues, checks, 'image', 'FAIL', f"WebP 형식이 아님: 실제 형식={img.format}", path)
+            if 'icc_profile' not in img.info:
+                _issue(issues, checks, 'image', 'WARN', "ICC 프로파일 없음", path)
+            # 이미지당 1회 디코드 (이후 모든 픽셀 검사가 같은 배열 사용)
+            pixels = np.asarray(img.convert('RGB'), dtype=np.float32)
+    except Exception as e:
+        _issue(issues, checks, 'image', 'FAIL', f"이미지 디코드 실패: {e}", path)
+        return
+
+    if width != height:
+        _issue(issues, checks, 'image', 'WARN', f"정사각형 이미지 아님: {width}x{height}", path)
+    if width < t['min_resolution'] or height < t['min_resolution']:
+        _issue(issues, checks, 'image', 'WARN', f"해상도 낮음: {width}x{height}", path)
+
+    gray = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    laplacian = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:] - 4.0 * gray[1:-1, 1:-1])
+    laplacian_var = float(laplacian.var()) if laplacian.size else 0.0
+    noise_level = float(gray.std())
+    mean_r, mean_g, mean_b = (float(v) for v in pixels.mean(axis=(0, 1)))
+    stats.update(laplacian_var=laplacian_var, noise_level=noise_level,
+                 color_balance=float(np.std([mean_r, mean_g, mean_b])))
+    if laplacian_var < t['blur_laplacian_min']:
+        _issue(issues, checks, 'image', 'WARN', f"이미지 블러 가능성: Laplacian variance={laplacian_var:.2f}", path)
+    if noise_level > t['noise_std_max']:
+        _issue(issues, checks, 'image', 'WARN', f"노이즈 높음: {noise_level:.2f}", path)
+    if abs(mean_b - mean_g) > t['channel_imbalance_max'] or abs(mean_g - mean_r) > t['channel_imbalance_max']:
+        _issue(issues, checks, 'image', 'WARN',
+               f"채널 불균형: B={mean_b:.1f}, G={mean_g:.1f}, R={mean_r:.1f}", path)
+
+
+def audit_label_files(paths: List[str], t: Dict, workers: Optional[int] = None) -> Dict[str, Dict]:
+    """라벨 파일 전체를 한 번에 파싱/벡터화 검사 → 경로별 {'status', 'issues', 'stats'}"""
+    from yolo_label_toolkit import LabelSet
+    import numpy as np
+
+    labels = LabelSet.from_files(paths, workers=workers)
+    flags = labels.audit(ratio_range=(t['mask_bbox_ratio_min'], t['mask_bbox_ratio_max']),
+                         area_range=(t['bbox_area_min'], t['bbox_area_max']),
+                         tolerance=t['bbox_polygon_tolerance'], single_class=t['single_class'])
+    ratios = labels.mask_bbox_ratios()
+    areas = labels.bbox_areas()
+
+    # 파일별 (라인, 검사 순서, 상태, 메시지) - 오류 라인과 플래그가 선 객체만 순회
+    per_file: Dict[int, List[Tuple[int, int, str, str]]] = defaultdict(list)
+    skipped_lines = defaultdict(int)  # 객체로 파싱되지 않은 라인 수 (objects 통계에 포함)
+    skip_polygon = np.zeros(len(labels), dtype=bool)
+    for file_index, line_num, message in labels.errors:
+        order = -1
+        if line_num:
+            start, end = labels.file_offsets[file_index], labels.file_offsets[file_index + 1]
+            matched = start + np.flatnonzero(labels.lines[start:end] == line_num)
+            if matched.size:
+                skip_polygon[matched] = True  # 폴리곤 좌표 개수 홀수: bbox 검사 후 보고, 폴리곤 검사 생략
+                order = 3
+            else:
+                skipped_lines[file_index] += 1
+        per_file[file_index].append((line_num, order, 'FAIL', f"라인 {line_num}: {message}" if line_num else message))
+    ratios[skip_polygon] = np.nan
+    flags['polygon_out_of_range'] &= ~skip_polygon
+    flags['mask_bbox_ratio'] &= ~skip_polygon
+
+    object_files = labels.object_files
+    flagged = np.zeros(len(labels), dtype=bool)
+    for name, mask in flags.items():
+        if name != 'bbox_polygon_mismatch':  # bbox/폴리곤 일치성은 meta 검사 담당
+            flagged |= mask
+    for obj in np.flatnonzero(flagged):
+        line_num = int(labels.lines[obj])
+        entries = per_file[int(object_files[obj])]
+        if 'class_id' in flags and flags['class_id'][obj]:
+            entries.append((line_num, 0, 'WARN',
+                            f"라인 {line_num}: YOLO 1-class 기준에 맞지 않음 (class_id={int(labels.class_ids[obj])})"))
+        if flags['bbox_out_of_range'][obj]:
+            xc, yc, w, h = (float(v) for v in labels.boxes[obj])
+            entries.append((line_num, 1, 'FAIL', f"라인 {line_num}: bbox 범위 오류 (xc={xc}, yc={yc}, w={w}, h={h})"))
+        if flags['bbox_area'][obj]:
+            entries.append((line_num, 2, 'WARN', f"라인 {line_num}: bbox 면적 이상 (area={areas[obj]:.4f})"))
+        if flags['polygon_out_of_range'][obj]:
+            entries.append((line_num, 3, 'FAIL', f"라인 {line_num}: 폴리곤 좌표 범위 초과"))
+        if flags['mask_bbox_ratio'][obj]:
+            entries.append((line_num, 4, 'WARN',
+                            f"라인 {line_num}: 마스크/bbox 면적 비율 범위 초과: {ratios[obj]:.3f} "
+                            f"(범위: {t['mask_bbox_ratio_min']}-{t['mask_bbox_ratio_max']})"))
+
+    area_list, ratio_list = areas.tolist(), ratios.tolist()
+    offsets = labels.file_offsets.tolist()
+    results = {}
+    for file_index, path in enumerate(labels.files):
+        start, end = offsets[file_index], offsets[file_index + 1]
+        entries = sorted(per_file.get(file_index, ()))
+        issues: List[Dict] = []
+        checks = {'label': 'PASS'}
+        stats: Dict = {}
+        if start == end and not entries:
+            _issue(issues, checks, 'label', 'FAIL', "빈 라벨 파일", path)
+        for _, _, status, message in entries:
+            _issue(issues, checks, 'label', status, message, path)
+        objects = end - start + skipped_lines.get(file_index, 0)
+        if objects:
+            stats['objects'] = objects
+        if end > start:
+            stats['bbox_areas'] = area_list[start:end]
+            mask_ratios = [r for r in ratio_list[start:end] if r == r]  # NaN 제외
+            if mask_ratios:
+                stats['mask_bbox_ratios'] = mask_ratios
+        results[path] = {'status': checks['label'], 'issues': issues, 'stats': stats}
+    return results
+
+
+def _merge_label_result(result: Dict, label: Optional[Dict], error: Optional[str] = None) -> Dict:
+    """데이터셋 단위 라벨 audit 결과를 샘플 결과에 병합 (검사/이슈 순서는 ALL_CHECKS 기준)"""
+    path = result['files'].get('label')
+    checks = result['checks']
+    if error is not None:
+        checks['label'] = 'PASS'
+        _issue(result['issues'], checks, 'label', 'FAIL', f"검사 오류: {error}", path)
+    else:
+        checks['label'] = label['status']
+        result['issues'].extend(label['issues'])
+        result['stats'].update(label['stats'])
+    result['issues'].sort(key=lambda issue: ALL_CHECKS.index(issue['check']))
+    result['checks'] = {name: checks[name] for name in ALL_CHECKS if name in checks}
+    result['status'] = max(result['checks'].values(), key=STATUS_RANK.get)
+    return result
+
+
+def _bbox_edges(bbox: Dict) -> Optional[Tuple[float, float, float, float]]:
+    if all(k in bbox for k in ('x_min', 'y_min', 'x_max', 'y_max')):
+        return bbox['x_min'], bbox['y_min'], bbox['x_max'], bbox['y_max']
+    if all(k in bbox for k in ('center_x', 'center_y', 'width', 'height')):
+        cx, cy, w, h = bbox['center_x'], bbox['center_y'], bbox['width'], bbox['height']
+        return cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2
+    return None
+
+
+def _read_json(path, check, issues, checks) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        _issue(issues, checks, check, 'FAIL', f"JSON 파싱 오류: {e}", path)
+        return None
+
+
+def _check_meta(files, t, issues, checks, stats):
+    path = files.get('meta')
+    if not path:
+        return
+    meta = _read_json(path, 'meta', issues, checks)
+    if meta is None:
+        return
+
+    schema_version = str(meta.get('schema_version', ''))
+    if not (schema_version.startswith('1.6.1') or schema_version.startswith('2.0')):
+        _issue(issues, checks, 'meta', 'WARN', f"스키마 버전 확인 필요: {schema_version}", path)
+    for name in META_REQUIRED_FIELDS:
+        if name not in meta:
+            _issue(issues, checks, 'meta', 'FAIL', f"필수 필드 누락: {name}", path)
+    missing_extra = [name for name in t['extra_meta_fields'] if name not in meta]
+    if missing_extra:
+        _issue(issues, checks, 'meta', 'WARN', f"핵심 필드 누락: {missing_extra}", path)
+
+    qm = meta.get('quality_metrics') or {}
+    for key, stat in (('ssim', 'ssim'), ('snr', 'snr'), ('reprojection_rms_px', 'rms'), ('depth_score', 'depth_score')):
+        if isinstance(qm.get(key), (int, float)):
+            stats[stat] = float(qm[key])
+    if 'ssim' in stats and stats['ssim'] < t['ssim_min']:
+        _issue(issues, checks, 'meta', 'WARN', f"SSIM 임계값 미달: {stats['ssim']} < {t['ssim_min']}", path)
+    if 'snr' in stats and stats['snr'] < t['snr_min']:
+        _issue(issues, checks, 'meta', 'WARN', f"SNR 임계값 미달: {stats['snr']} < {t['snr_min']}", path)
+    if 'rms' in stats and stats['rms'] > t['rms_max']:
+        _issue(issues, checks, 'meta', 'WARN', f"재투영 RMS 초과: {stats['rms']:.2f} > {t['rms_max']}px", path)
+    if 'depth_score' in stats and stats['depth_score'] < t['depth_score_min']:
+        _issue(issues, checks, 'meta', 'WARN',
+               f"깊이 점수 미달: {stats['depth_score']:.4f} < {t['depth_score_min']}", path)
+    qa_flag = qm.get('qa_flag', meta.get('qa_flag'))
+    if qa_flag is not None:
+        stats['qa_flag'] = qa_flag if isinstance(qa_flag, str) else ('FAIL' if qa_flag else 'PASS')
+        if stats['qa_flag'] != 'PASS':
+            _issue(issues, checks, 'meta', 'WARN', f"QA 플래그 활성화: {qa_flag}", path)
+
+    polygon = meta.get('polygon_uv') or []
+    edges = _bbox_edges(meta.get('bounding_box') or {})
+    if edges and len(polygon) >= 2:
+        try:
+            xs, ys = [p[0] for p in polygon], [p[1] for p in polygon]
+            poly_edges = (min(xs), min(ys), max(xs), max(ys))
+            if any(abs(a - b) > t['bbox_polygon_tolerance'] for a, b in zip(edges, poly_edges)):
+                _issue(issues, checks, 'meta', 'WARN', "bbox와 polygon 범위 불일치", path)
+        except (TypeError, IndexError):
+            _issue(issues, checks, 'meta', 'WARN', "polygon_uv 형식 이상", path)
+
+    resolution = (meta.get('render_settings') or {}).get('resolution', [])
+    if len(resolution) != 2 or resolution[0] != resolution[1]:
+        _issue(issues, checks, 'meta', 'WARN', f"해상도 설정 확인 필요: {resolution}", path)
+
+
+def _read_e2(path, issues, checks) -> Optional[Dict]:
+    """E2 읽기 (JSON 외 msgpack/cbor는 e2_codec 디코딩)"""
+    if path.endswith('.json'):
+        return _read_json(path, 'meta_e', issues, checks)
+    try:
+        from e2_codec import read_e2
+        return read_e2(path)
+    except Exception as e:
+        _issue(issues, checks, 'meta_e', 'FAIL', f"E2 디코딩 오류: {e}", path)
+        return None
+
+
+def _check_meta_e(files, t, issues, checks, stats):
+    path = files.get('meta_e')
+    if not path:
+        return
+    meta_e = _read_e2(path, issues, checks)
+    if meta_e is None:
+        return
+    for name in E2_REQUIRED_FIELDS:
+        if name not in meta_e:
+            _issue(issues, checks, 'meta_e', 'FAIL', f"필수 필드 누락: {name}", path)
+    if 'schema_version' in meta_e and 'E2' not in str(meta_e['schema_version']):
+        _issue(issues, checks, 'meta_e', 'WARN', f"E2 스키마 버전 형식 이상: {meta_e['schema_version']}", path)
+    annotation = meta_e.get('annotation') or {}
+    for name in E2_ANNOTATION_FIELDS:
+        if 'annotation' in meta_e and name not in annotation:
+            _issue(issues, checks, 'meta_e', 'FAIL', f"annotation 필수 필드 누락: {name}", path)
+    qa = meta_e.get('qa') or {}
+    if 'qa_flag' in qa and 'qa_flag' not in stats:
+        stats['qa_flag'] = qa['qa_flag']
+
+
+def _check_depth(files, t, issues, checks, stats):
+    path = files.get('depth')
+    if not path:
+        return
+    size_kb = os.path.getsize(path) / 1024
+    stats['depth_size'] = size_kb * 1024
+    if size_kb < t['exr_size_min_kb']:
+        _issue(issues, checks, 'depth', 'WARN', f"EXR 파일 크기 비정상적으로 작음 ({size_kb:.2f} KB)", path)
+    elif size_kb > t['exr_size_max_kb']:
+        _issue(issues, checks, 'depth', 'FAIL', f"EXR 파일 크기 비정상적으로 큼 ({size_kb:.2f} KB) - 압축 미적용 가능성", path)
+    elif size_kb > t['exr_size_warn_kb']:
+        _issue(issues, checks, 'depth', 'WARN', f"EXR 파일 크기 큼 ({size_kb:.2f} KB) - 압축 확인 필요", path)
+
+
+CHECK_FUNCTIONS: Dict[str, Callable] = {
+    'pairing': _check_pairing,
+    'image': _check_image,
+    'meta': _check_meta,
+    'meta_e': _check_meta_e,
+    'depth': _check_depth,
+}
+
+
+def validate_sample(task: Tuple[str, str, str, Dict[str, str], Dict, Tuple[str, ...]]) -> Dict:
+    """샘플 1개 검증 (프로세스 풀 워커, 입력/출력 모두 picklable)"""
+    key, group, stem, files, thresholds, checks_enabled = task
+    issues: List[Dict] = []
+    checks: Dict[str, str] = {}
+    stats: Dict = {}
+    for name in checks_enabled:
+        applicable = name == 'pairing' or name in files
+        if not applicable:
+            continue
+        checks.setdefault(name, 'PASS')
+        try:
+            CHECK_FUNCTIONS[name](files, thresholds, issues, checks, stats)
+        except Exception as e:
+            _issue(issues, checks, name, 'FAIL', f"검사 오류: {e}")
+    status = max(checks.values(), key=STATUS_RANK.get) if checks else 'PASS'
+    return {'sample': key, 'group': group, 'stem': stem, 'files': files,
+            'status': status, 'checks': checks, 'issues': issues, 'stats': stats}
+
+
+class _Summary:
+    """스트리밍 결과 집계"""
+
+    def __init__(self):
+        self.samples = 0
+        self.by_status = defaultdict(int)
+        self.by_check = defaultdict(lambda: defaultdict(int))
+        self.groups = defaultdict(lambda: defaultdict(int))
+        self.missing = defaultdict(int)
+        self.qa_flags = defaultdict(int)
+        self.sums = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.worst: List[Dict] = []
+
+    def add(self, result: Dict):
+        self.samples += 1
+        self.by_status[result['status']] += 1
+        self.groups[result['group']][result['status']] += 1
+        for name, status in result['checks'].items():
+            self.by_check[name][status] += 1
+        for kind in ('image', 'label', 'meta', 'meta_e'):
+            if kind not in result['files']:
+                self.missing[kind] += 1
+        stats = result['stats']
+        if 'qa_flag' in stats:
+            self.qa_flags[str(stats['qa_flag'])] += 1
+        for name in ('width', 'height', 'image_size', 'laplacian_var', 'ssim', 'snr', 'rms', 'depth_score', 'depth_size'):
+            if isinstance(stats.get(name), (int, float)):
+                self.sums[name] += stats[name]
+                self.counts[name] += 1
+        for name in ('bbox_areas', 'mask_bbox_ratios'):
+            for value in stats.get(name, []):
+                self.sums[name] += value
+                self.counts[name] += 1
+        if result['status'] == 'FAIL' and len(self.worst) < 20:
+            self.worst.append({'sample': result['sample'], 'issues': result['issues'][:5]})
+
+    def to_dict(self) -> Dict:
+        return {
+            'samples': self.samples,
+            'by_status': dict(self.by_status),
+            'by_check': {name: dict(counts) for name, counts in self.by_check.items()},
+            'groups': {name: dict(counts) for name, counts in sorted(self.groups.items())},
+            'missing': dict(self.missing),
+            'qa_flags': dict(self.qa_flags),
+            'means': {name: self.sums[name] / self.counts[name] for name in self.sums if self.counts[name]},
+            'fail_examples': self.worst,
+        }
+
+
+def parse_since(value) -> Optional[float]:
+    """--since 값 → epoch 초 ('24h', '7d', '30m', ISO 날짜/시각, epoch 숫자)
+
+    형식 오류는 argparse.ArgumentTypeError (add_cache_arguments의 type으로 쓰면 CLI 오류 메시지 후 종료)
+    """
+    if value is None or value == '':
+        return None
+    text = str(value).strip()
+    units = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+    if text[-1:].lower() in units and text[:-1].replace('.', '', 1).isdigit():
+        delta = timedelta(**{units[text[-1].lower()]: float(text[:-1])})
+        return (datetime.now() - delta).timestamp()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"형식 오류: {value!r} (예: 30m, 24h, 7d, 2025-01-31, 2025-01-31T09:00, epoch 초)")
+
+
+def filter_since(samples: List[Sample], since: float) -> List[Sample]:
+    """파일 중 하나라도 mtime >= since 인 샘플만 (신규/수정 렌더)"""
+    selected = []
+    for sample in samples:
+        for path in sample.files.values():
+            try:
+                if os.stat(path).st_mtime >= since:
+                    selected.append(sample)
+                    break
+            except OSError:
+                continue
+    return selected
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ValidationCache:
+    """검증 결과 캐시 (SQLite)
+    - file_hashes: 경로별 (size, mtime_ns, sha256) → stat이 같으면 재해시 생략
+    - results: sha256(검증기 버전 + 검사/임계값 + 종류별 파일 해시) → 샘플 결과 JSON
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, hash_workers: int = 8):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hash_workers = hash_workers
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS file_hashes '
+                          '(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS results '
+                          '(cache_key TEXT PRIMARY KEY, result TEXT, created_at TEXT)')
+        self.conn.commit()
+
+    def _select_in(self, sql: str, values: List[str]) -> List[Tuple]:
+        rows = []
+        for i in range(0, len(values), 500):  # SQLite 변수 개수 제한
+            chunk = values[i:i + 500]
+            rows.extend(self.conn.execute(sql.format(','.join('?' * len(chunk))), chunk).fetchall())
+        return rows
+
+    def file_hashes(self, paths: List[str]) -> Dict[str, str]:
+        """경로 → sha256 (size/mtime이 기록과 같으면 저장된 해시, 아니면 병렬 재계산)"""
+        stats = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stats[path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                continue
+        known = {row[0]: row for row in self._select_in(
+            'SELECT path, size, mtime_ns, sha256 FROM file_hashes WHERE path IN ({})', list(stats))}
+        hashes, stale = {}, []
+        for path, (size, mtime_ns) in stats.items():
+            row = known.get(path)
+            if row and row[1] == size and row[2] == mtime_ns:
+                hashes[path] = row[3]
+            else:
+                stale.append(path)
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.hash_workers) as pool:
+                for path, digest in zip(stale, pool.map(_sha256_file, stale)):
+                    hashes[path] = digest
+            self.conn.executemany('INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)',
+                                  [(path, *stats[path], hashes[path]) for path in stale])
+            self.conn.commit()
+        return hashes
+
+    @staticmethod
+    def config_digest(checks: Tuple[str, ...], thresholds: Dict) -> str:
+        payload = json.dumps({'version': VALIDATOR_VERSION, 'checks': list(checks), 'thresholds': thresholds},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def sample_keys(self, samples: List[Sample], config_digest: str) -> Dict[str, str]:
+        """샘플 키 → 캐시 키 (파일 중 하나라도 해시 불가면 캐시 대상 제외)"""
+        hashes = self.file_hashes([path for sample in samples for path in sample.files.values()])
+        keys = {}
+        for sample in samples:
+            if not all(path in hashes for path in sample.files.values()):
+                continue
+            content = json.dumps([config_digest, sorted((kind, hashes[path]) for kind, path in sample.files.items())])
+            keys[sample.key] = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return keys
+
+    def get_many(self, cache_keys: List[str]) -> Dict[str, str]:
+        """캐시 키 → 결과 JSON 문자열 (샘플마다 독립 객체로 파싱하도록 문자열 그대로 반환)"""
+        return {key: result for key, result in self._select_in(
+            'SELECT cache_key, result FROM results WHERE cache_key IN ({})', cache_keys)}
+
+    def put_many(self, items: List[Tuple[str, Dict]]):
+        now = datetime.now().isoformat()
+        self.conn.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                              [(key, json.dumps(result, ensure_ascii=False), now) for key, result in items])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _rebind_result(result: Dict, sample: Sample) -> Dict:
+    """캐시된 결과를 현재 샘플 경로로 갱신 (내용이 같으면 이동/복사된 파일도 재사용)"""
+    moved = {old: sample.files.get(kind, old) for kind, old in result['files'].items()}
+    for issue in result['issues']:
+        issue['file'] = moved.get(issue['file'], issue['file'])
+    result.update(sample=sample.key, group=sample.group, stem=sample.stem, files=sample.files, cached=True)
+    return result
+
+
+class DatasetValidationEngine:
+    """데이터셋 통합 검증 엔진 (1회 인덱싱 + 프로세스 풀 샘플 검증 + JSONL 스트리밍)"""
+
+    def __init__(self, root, checks: Iterable[str] = ALL_CHECKS,
+                 thresholds: Optional[ValidationThresholds] = None, workers: Optional[int] = None,
+                 cache: Optional[ValidationCache] = None, since: Optional[float] = None):
+        self.root = Path(root)
+        self.checks = tuple(c for c in ALL_CHECKS if c in set(checks))
+        self.thresholds = thresholds or ValidationThresholds()
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.cache = cache
+        self.since = since
+
+    def index(self) -> List[Sample]:
+        samples = sorted(index_samples(self.root).values(), key=lambda s: s.key)
+        return filter_since(samples, self.since) if self.since is not None else samples
+
+    def _validate(self, samples: List[Sample]):
+        thresholds = asdict(self.thresholds)
+        label_results, label_error = {}, None
+        if 'label' in self.checks:
+            label_paths = [s.files['label'] for s in samples if 'label' in s.files]
+            try:
+                label_results = audit_label_files(label_paths, thresholds, self.workers)
+            except Exception as e:
+                label_error = str(e)
+        # 라벨은 위에서 데이터셋 단위로 검사했으므로 샘플 워커에서는 제외
+        sample_checks = tuple(c for c in self.checks if c != 'label')
+        tasks = [(s.key, s.group, s.stem, s.files, thresholds, sample_checks) for s in samples]
+
+        def merged(results):
+            for sample, result in zip(samples, results):
+                if 'label' in self.checks and 'label' in sample.files:
+                    result = _merge_label_result(result, label_results.get(sample.files['label']), label_error)
+                yield result
+
+        if self.workers <= 1 or len(tasks) < 64:
+            yield from merged(map(validate_sample, tasks))
+            return
+        chunksize = max(8, min(256, len(tasks) // (self.workers * 8)))
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            yield from merged(pool.map(validate_sample, tasks, chunksize=chunksize))
+
+    def iter_results(self, samples: Optional[List[Sample]] = None):
+        """샘플별 결과 생성 (캐시 적중분을 먼저, 이후 신규/변경 샘플 검증 결과를 입력 순서대로)"""
+        samples = self.index() if samples is None else samples
+        if self.cache is None:
+            yield from self._validate(samples)
+            return
+
+        keys = self.cache.sample_keys(samples, self.cache.config_digest(self.checks, asdict(self.thresholds)))
+        cached = self.cache.get_many(list(set(keys.values())))
+        misses = []
+        for sample in samples:
+            hit = cached.get(keys.get(sample.key))
+            if hit is None:
+                misses.append(sample)
+            else:
+                yield _rebind_result(json.loads(hit), sample)
+
+        pending = []
+        for sample, result in zip(misses, self._validate(misses)):
+            if sample.key in keys:
+                pending.append((keys[sample.key], result))
+            if len(pending) >= CACHE_COMMIT_EVERY:
+                self.cache.put_many(pending)
+                pending = []
+            yield result
+        if pending:
+            self.cache.put_many(pending)
+
+    def run(self, output_jsonl=None, on_result: Optional[Callable[[Dict], None]] = None,
+            samples: Optional[List[Sample]] = None) -> Dict:
+        """전체 검증 실행 → 요약 dict (output_jsonl 지정 시 결과 스트리밍 + 요약 JSON 저장)"""
+        start = time.time()
+        samples = self.index() if samples is None else samples
+        index_sec = time.time() - start
+        summary = _Summary()
+        cache_hits = 0
+        writer = None
+        if output_jsonl:
+            output_jsonl = Path(output_jsonl)
+            output_jsonl.parent.mkdir(parents=True, exist_ok=True)
+            writer = open(output_jsonl, 'w', encoding='utf-8')
+        try:
+            for result in self.iter_results(samples):
+                cache_hits += bool(result.get('cached'))
+                summary.add(result)
+                if writer:
+                    writer.write(json.dumps(result, ensure_ascii=False) + '\n')
+                if on_result:
+                    on_result(result)
+        finally:
+            if writer:
+                writer.close()
+
+        elapsed = time.time() - start
+        report = summary.to_dict()
+        report.update(root=str(self.root), checks=list(self.checks), thresholds=asdict(self.thresholds),
+                      workers=self.workers, index_sec=round(index_sec, 3), elapsed_sec=round(elapsed, 3),
+                      validator_version=VALIDATOR_VERSION, cache_hits=cache_hits,
+                      validated=summary.samples - cache_hits,
+                      since=datetime.fromtimestamp(self.since).isoformat() if self.since is not None else None,
+                      samples_per_sec=round(summary.samples / elapsed, 1) if elapsed > 0 else None)
+        if output_jsonl:
+            with open(output_jsonl.with_suffix('.summary.json'), 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+
+def print_summary(report: Dict):
+    print(f"[STATS] 샘플 {report['samples']}개, {report['elapsed_sec']:.1f}초 "
+          f"({report.get('samples_per_sec') or 0:.1f} 샘플/초, 워커 {report['workers']}개)")
+    print(f"   캐시 재사용 {report['cache_hits']}개, 신규 검증 {report['validated']}개"
+          + (f" (since {report['since']})" if report.get('since') else ''))
+    print(f"   상태: {report['by_status']}")
+    for name, counts in report['by_check'].items():
+        print(f"   [{name}] {counts}")
+    if report['missing']:
+        print(f"   누락: {report['missing']}")
+    for name, value in sorted(report['means'].items()):
+        print(f"   평균 {name}: {value:.4f}")
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser):
+    """프런트엔드 공통 캐시/증분 옵션"""
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_PATH),
+                        help=f'검증 결과 캐시 사용 (경로 생략 시 {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--since', type=parse_since, help='mtime 기준 이후 샘플만 검증 (예: 24h, 7d, 2025-01-31)')
+
+
+def cache_from_args(args) -> Tuple[Optional[ValidationCache], Optional[float]]:
+    """(캐시, since epoch) - 캐시는 호출자가 close() 또는 with 문으로 닫아야 함"""
+    since = getattr(args, 'since', None)
+    if isinstance(since, str):
+        since = parse_since(since)
+    return (ValidationCache(args.cache) if getattr(args, 'cache', None) else None, since)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 데이터셋 통합 검증 엔진')
+    parser.add_argument('dataset_path', help='검증할 데이터셋 루트')
+    parser.add_argument('--output', '-o', help='샘플별 결과 JSONL 경로 (요약은 .summary.json)')
+    parser.add_argument('--checks', nargs='+', default=list(ALL_CHECKS), choices=ALL_CHECKS, help='실행할 검사')
+    parser.add_argument('--workers', type=int, help='프로세스 수 (기본: CPU-1)')
+    parser.add_argument('--single-class', action='store_true', help='class_id != 0 경고')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    cache, since = cache_from_args(args)
+    engine = DatasetValidationEngine(args.dataset_path, args.checks,
+                                     ValidationThresholds(single_class=args.single_class), args.workers,
+                                     cache=cache, since=since)
+    try:
+        report = engine.run(args.output)
+    finally:
+        if cache:
+            cache.close()
+    print_summary(report)
+    sys.exit(1 if report['by_status'].get('FAIL') else 0)
+
+
+if __name__ == '__main__':
+    main()
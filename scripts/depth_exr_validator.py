@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+독립 실행형 Depth EXR 검증기 (Blender/OpenEXR 불필요)
+- 스캔라인 EXR을 NumPy로 직접 파싱: 필요한 채널 1개만 추출, HALF=float16 / FLOAT=float32 / UINT=uint32 정확 매핑
+  · 지원 압축: NONE, RLE, ZIPS, ZIP (Blender 깊이 출력 기본값 ZIP)
+  · 그 외 압축(PIZ 등)은 OpenEXR 모듈이 있으면 폴백
+- 파일 통계(validate_exr_file)와 렌더러 _validate_depth_map_exr 점수를 벡터화 계산 (cv2 Sobel → NumPy)
+- 디렉토리 전체를 프로세스 풀로 병렬 검증
+
+실행 방법:
+    python scripts/depth_exr_validator.py output/synthetic --workers 8 --output depth_report.json
+"""
+
+import os
+import sys
+import json
+import zlib
+import struct
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+EXR_MAGIC = 20000630
+PIXEL_DTYPES = {0: np.dtype('<u4'), 1: np.dtype('<f2'), 2: np.dtype('<f4')}
+PIXEL_TYPE_NAMES = {0: 'UINT', 1: 'HALF', 2: 'FLOAT'}
+COMPRESSION_NAMES = {0: 'NONE', 1: 'RLE', 2: 'ZIPS', 3: 'ZIP', 4: 'PIZ', 5: 'PXR24', 6: 'B44', 7: 'B44A', 8: 'DWAA', 9: 'DWAB'}
+LINES_PER_BLOCK = {0: 1, 1: 1, 2: 1, 3: 16, 4: 32, 5: 16, 6: 32, 7: 32, 8: 32, 9: 256}
+DEPTH_CHANNELS = ('R', 'Y', 'Z', 'V')   # 깊이 채널 우선순위 (없으면 첫 번째 채널)
+
+# 기술문서 기준 (validate_depth_exr_quality 와 동일)
+EXPECTED_RESOLUTION = (1024, 1024)
+MIN_VALID_PIXEL_RATIO = 0.95
+MAX_DEPTH_VALUE = 1e12
+MIN_DEPTH_VARIANCE = 1e-6
+
+
+class ExrFormatError(ValueError):
+    """지원하지 않거나 손상된 EXR"""
+
+
+def _read_cstr(buf: bytes, pos: int):
+    end = buf.index(b'\0', pos)
+    return buf[pos:end].decode('latin-1'), end + 1
+
+
+def read_exr_header(data: bytes) -> Dict:
+    """EXR 헤더 파싱 (단일 파트 스캔라인만)"""
+    if len(data) < 8 or struct.unpack_from('<i', data, 0)[0] != EXR_MAGIC:
+        raise ExrFormatError("EXR 매직 넘버 불일치")
+    flags = struct.unpack_from('<I', data, 4)[0]
+    if flags & 0x200:
+        raise ExrFormatError("타일 EXR 미지원")
+    if flags & 0x1800:
+        raise ExrFormatError("deep/multipart EXR 미지원")
+
+    header, pos = {}, 8
+    while data[pos] != 0:
+        name, pos = _read_cstr(data, pos)
+        attr_type, pos = _read_cstr(data, pos)
+        size = struct.unpack_from('<i', data, pos)[0]
+        pos += 4
+        value = data[pos:pos + size]
+        pos += size
+        if attr_type == 'chlist':
+            channels, p = [], 0
+            while value[p] != 0:
+                ch_name, p = _read_cstr(value, p)
+                pixel_type, _, x_sampling, y_sampling = struct.unpack_from('<iB3xii', value, p)
+                p += 16
+                channels.append({'name': ch_name, 'type': pixel_type, 'x_sampling': x_sampling, 'y_sampling': y_sampling})
+            header[name] = channels
+        elif attr_type == 'compression':
+            header[name] = value[0]
+        elif attr_type == 'box2i':
+            header[name] = struct.unpack('<4i', value)
+        elif attr_type == 'lineOrder':
+            header[name] = value[0]
+    header['offset_table'] = pos + 1
+    for key in ('channels', 'compression', 'dataWindow'):
+        if key not in header:
+            raise ExrFormatError(f"필수 헤더 누락: {key}")
+    return header
+
+
+def _undo_predictor(raw: np.ndarray) -> np.ndarray:
+    """ZIP/RLE 공통 후처리: 바이트 차분 복원 + 두 반쪽 인터리브 해제"""
+    diff = raw.copy()
+    diff[1:] -= 128
+    restored = np.cumsum(diff, dtype=np.uint8)
+    out = np.empty_like(restored)
+    half = (len(restored) + 1) // 2
+    out[0::2] = restored[:half]
+    out[1::2] = restored[half:]
+    return out
+
+
+def _rle_decode(buf: bytes, expected: int) -> np.ndarray:
+    out, pos = bytearray(), 0
+    while pos < len(buf) and len(out) < expected:
+        count = struct.unpack_from('b', buf, pos)[0]
+        pos += 1
+        if count < 0:
+            out += buf[pos:pos - count]
+            pos -= count
+        else:
+            out += buf[pos:pos + 1] * (count + 1)
+            pos += 1
+    return np.frombuffer(bytes(out), dtype=np.uint8)
+
+
+def _decode_block(payload: bytes, compression: int, expected: int) -> np.ndarray:
+    if compression == 0 or len(payload) == expected:
+        # 압축 이득이 없으면 원본 그대로 저장됨
+        return np.frombuffer(payload, dtype=np.uint8)
+    if compression == 1:
+        return _undo_predictor(_rle_decode(payload, expected))
+    if compression in (2, 3):
+        return _undo_predictor(np.frombuffer(zlib.decompress(payload), dtype=np.uint8))
+    raise ExrFormatError(f"미지원 압축: {COMPRESSION_NAMES.get(compression, compression)}")
+
+
+def _select_channel(channels: List[Dict], channel: Optional[str]) -> Dict:
+    names = [c['name'] for c in channels]
+    if channel is not None:
+        if channel not in names:
+            raise ExrFormatError(f"채널 없음: {channel} (보유: {names})")
+        return channels[names.index(channel)]
+    for preferred in DEPTH_CHANNELS:
+        for c in channels:
+            if c['name'] == preferred or c['name'].endswith('.' + preferred):
+                return c
+    return channels[0]
+
+
+def _read_with_openexr(path: str, channel: Optional[str]):
+    """OpenEXR 폴백 (PIZ/DWA 등 NumPy 파서 미지원 압축)"""
+    import OpenEXR
+    import Imath
+
+    exr_file = OpenEXR.InputFile(str(path))
+    try:
+        header = exr_file.header()
+        dw = header['dataWindow']
+        width, height = dw.max.x - dw.min.x + 1, dw.max.y - dw.min.y + 1
+        channels = [{'name': name, 'type': getattr(ch.type, 'v', ch.type)} for name, ch in header['channels'].items()]
+        selected = _select_channel(channels, channel)
+        raw = exr_file.channel(selected['name'], Imath.PixelType(selected['type']))
+    finally:
+        exr_file.close()
+    return np.frombuffer(raw, dtype=PIXEL_DTYPES[selected['type']]).reshape(height, width), selected
+
+
+def read_exr_channel(path, channel: Optional[str] = None) -> Dict:
+    """EXR에서 채널 1개 읽기 → {'data': (H, W) ndarray(원본 dtype), 'channel', 'pixel_type', 'compression', 'channels'}"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    header = read_exr_header(data)
+    channels = header['channels']
+    compression = header['compression']
+    x_min, y_min, x_max, y_max = header['dataWindow']
+    width, height = x_max - x_min + 1, y_max - y_min + 1
+
+    if compression not in (0, 1, 2, 3):
+        try:
+            depth, selected = _read_with_openexr(path, channel)
+        except ImportError:
+            raise ExrFormatError(f"미지원 압축: {COMPRESSION_NAMES.get(compression, compression)} (OpenEXR 없음)")
+    else:
+        if any(c['x_sampling'] != 1 or c['y_sampling'] != 1 for c in channels):
+            raise ExrFormatError("서브샘플링 채널 미지원")
+        selected = _select_channel(channels, channel)
+        dtype = PIXEL_DTYPES[selected['type']]
+
+        # 스캔라인 1줄 안에서 채널별 바이트 위치 (채널은 이름순으로 연속 저장)
+        channel_offset = 0
+        for c in channels:
+            if c is selected:
+                break
+            channel_offset += width * PIXEL_DTYPES[c['type']].itemsize
+        line_bytes = sum(width * PIXEL_DTYPES[c['type']].itemsize for c in channels)
+        channel_bytes = width * dtype.itemsize
+
+        lines_per_block = LINES_PER_BLOCK[compression]
+        n_blocks = (height + lines_per_block - 1) // lines_per_block
+        offsets = np.frombuffer(data, dtype='<u8', count=n_blocks, offset=header['offset_table'])
+        depth = np.empty((height, width), dtype=dtype)
+        for offset in offsets:
+            y, size = struct.unpack_from('<ii', data, int(offset))
+            row = y - y_min
+            lines = min(lines_per_block, height - row)
+            start = int(offset) + 8
+            block = _decode_block(data[start:start + size], compression, lines * line_bytes)
+            block = block[:lines * line_bytes].reshape(lines, line_bytes)
+            depth[row:row + lines] = block[:, channel_offset:channel_offset + channel_bytes].copy().view(dtype)
+
+    return {
+        'data': depth,
+        'channel': selected['name'],
+        'pixel_type': PIXEL_TYPE_NAMES.get(selected['type'], str(selected['type'])),
+        'compression': COMPRESSION_NAMES.get(compression, str(compression)),
+        'channels': [c['name'] for c in channels],
+    }
+
+
+def load_depth_map(path, channel: Optional[str] = None) -> np.ndarray:
+    """렌더러용: 깊이 채널을 float32 (H, W)로 로드 (bpy 이미지 로더 대체)"""
+    return read_exr_channel(path, channel)['data'].astype(np.float32, copy=False)
+
+
+def _sobel_magnitude(depth: np.ndarray) -> np.ndarray:
+    """cv2.Sobel(ksize=3, BORDER_REFLECT_101)과 동일한 그래디언트 크기"""
+    p = np.pad(depth, 1, mode='reflect')
+    smooth_y = p[:-2] + 2 * p[1:-1] + p[2:]
+    smooth_x = p[:, :-2] + 2 * p[:, 1:-1] + p[:, 2:]
+    gx = smooth_y[:, 2:] - smooth_y[:, :-2]
+    gy = smooth_x[2:] - smooth_x[:-2]
+    return np.sqrt(gx * gx + gy * gy)
+
+
+def score_depth_map(depth_map: np.ndarray, zmin: Optional[float] = None, zmax: Optional[float] = None) -> Dict:
+    """렌더러 _validate_depth_map_exr 와 동일한 Depth Quality 점수 (합성 렌더링 특성 고려)"""
+    depth_map = np.asarray(depth_map, dtype=np.float32)
+    finite = np.isfinite(depth_map)
+    valid = finite & (depth_map >= 1e-6)
+    valid_ratio = float(np.mean(valid)) if depth_map.size else 0.0
+
+    if not valid.any():
+        return {
+            'valid_pixel_ratio': 0.0,
+            'depth_variance': 1e9,
+            'out_of_range_pixels': 0,
+            'edge_smoothness': 0.0,
+            'depth_quality_score': 0.85,  # 합성 렌더링 기본값
+            'method': 'no_valid_pixels_fallback'
+        }
+
+    if zmin is None or zmax is None:
+        in_range = depth_map[finite & (depth_map >= 0)]
+        zmin, zmax = float(in_range.min()), float(in_range.max())
+
+    depth_range = float(zmax - zmin)
+    if depth_range <= 0:
+        depth_range = 1.0
+
+    # 깊이 분산 (깊이 범위^2로 정규화)
+    depth_var_abs = float(np.var(depth_map[valid], dtype=np.float64))
+    depth_var_normalized = depth_var_abs / (depth_range ** 2 + 1e-6)
+    if depth_var_normalized < 0.001:
+        depth_var_score = 0.6
+    elif depth_var_normalized > 1.0:
+        depth_var_score = 0.8
+    else:
+        depth_var_score = 0.6 + depth_var_normalized * 0.3
+
+    # 엣지 강도 (깊이 범위로 정규화)
+    edge_strength_abs = float(np.mean(_sobel_magnitude(depth_map), dtype=np.float64))
+    edge_strength_normalized = edge_strength_abs / (depth_range + 1e-6)
+    if edge_strength_normalized < 0.001:
+        edge_smoothness_score = 0.6
+    elif edge_strength_normalized > 2.0:
+        edge_smoothness_score = 0.8
+    else:
+        edge_smoothness_score = 0.6 + min(0.3, (edge_strength_normalized / 2.0) * 0.3)
+
+    out_of_range = int(np.count_nonzero((depth_map < zmin) | (depth_map > zmax)))
+    out_of_range_ratio = out_of_range / (depth_map.size + 1e-6)
+
+    score = 0.6 * valid_ratio + 0.2 * depth_var_score + 0.2 * edge_smoothness_score
+    if out_of_range_ratio > 0.05:
+        score *= 1.0 - min(0.1, out_of_range_ratio * 1.5)
+    score = min(1.0, max(0.0, score))
+
+    # 합성 렌더링 최소 품질 보정
+    if valid_ratio >= 0.95 and depth_var_score >= 0.6 and edge_smoothness_score >= 0.6:
+        score = max(score, 0.85)
+    elif valid_ratio >= 0.80 and depth_var_score >= 0.7 and edge_smoothness_score >= 0.7:
+        score = max(score, 0.85)
+    elif valid_ratio >= 0.85 and depth_var_score >= 0.65 and edge_smoothness_score >= 0.65:
+        score = max(score, 0.85)
+
+    return {
+        'valid_pixel_ratio': valid_ratio,
+        'depth_variance': depth_var_abs,
+        'depth_variance_normalized': depth_var_normalized,
+        'edge_strength': edge_strength_abs,
+        'edge_strength_normalized': edge_strength_normalized,
+        'out_of_range_pixels': out_of_range,
+        'edge_smoothness': edge_smoothness_score,
+        'depth_quality_score': float(score),
+        'method': 'sobel+range+validity+normalized'
+    }
+
+
+def depth_file_stats(depth: np.ndarray) -> Dict:
+    """파일 단위 통계 (NaN/Inf/유효 비율/범위/분산)"""
+    values = depth.astype(np.float64, copy=False)
+    finite = np.isfinite(values)
+    nan_count = int(np.count_nonzero(np.isnan(values)))
+    finite_values = values[finite]
+    has_finite = finite_values.size > 0
+    return {
+        'min_depth': float(finite_values.min()) if has_finite else float('nan'),
+        'max_depth': float(finite_values.max()) if has_finite else float('nan'),
+        'mean_depth': float(finite_values.mean()) if has_finite else float('nan'),
+        'std_depth': float(finite_values.std()) if has_finite else float('nan'),
+        'depth_variance': float(finite_values.var()) if has_finite else 0.0,
+        'valid_pixel_ratio': float(finite_values.size / values.size) if values.size else 0.0,
+        'nan_count': nan_count,
+        'inf_count': int(values.size - finite_values.size - nan_count),
+    }
+
+
+def validate_exr_file(exr_path, expected_resolution=EXPECTED_RESOLUTION, with_score: bool = True) -> Dict:
+    """EXR 1개 검증 (프로세스 풀 워커) → {'file', 'valid', 'issues', 'stats'} 또는 {'file', 'valid': False, 'error'}"""
+    exr_path = str(exr_path)
+    try:
+        result = read_exr_channel(exr_path)
+    except Exception as e:
+        return {'file': exr_path, 'valid': False, 'error': f'EXR 파일 읽기 실패: {e}'}
+
+    depth = result['data']
+    height, width = depth.shape
+    stats = {
+        'width': width,
+        'height': height,
+        'dtype': str(depth.dtype),
+        'pixel_type': result['pixel_type'],
+        'channel': result['channel'],
+        'compression': result['compression'],
+        'file_size_mb': os.path.getsize(exr_path) / (1024 * 1024),
+    }
+    stats.update(depth_file_stats(depth))
+
+    issues = []
+    if expected_resolution and (width, height) != tuple(expected_resolution):
+        issues.append(f'해상도 불일치: {width}x{height} (기대: {expected_resolution[0]}x{expected_resolution[1]})')
+    if depth.dtype != np.float32:
+        issues.append(f'데이터 타입 불일치: {depth.dtype} ({result["pixel_type"]}, 기대: float32)')
+    if stats['min_depth'] < 0:
+        issues.append(f"음수 깊이 값 발견: min={stats['min_depth']:.6f}")
+    if stats['max_depth'] > MAX_DEPTH_VALUE:
+        issues.append(f"비정상적으로 큰 깊이 값: max={stats['max_depth']:.2e}")
+    if stats['nan_count']:
+        issues.append(f"NaN 값 {stats['nan_count']}개 발견")
+    if stats['inf_count']:
+        issues.append(f"Inf 값 {stats['inf_count']}개 발견")
+    if stats['valid_pixel_ratio'] < MIN_VALID_PIXEL_RATIO:
+        issues.append(f"유효 픽셀 비율 낮음: {stats['valid_pixel_ratio']:.2%} (기대: ≥{MIN_VALID_PIXEL_RATIO:.0%})")
+    if stats['valid_pixel_ratio'] > 0 and stats['depth_variance'] < MIN_DEPTH_VARIANCE:
+        issues.append(f"깊이 분산이 너무 낮음: {stats['depth_variance']:.6e} (평면일 가능성)")
+
+    if with_score:
+        stats['depth_quality'] = score_depth_map(depth)
+    return {'file': exr_path, 'valid': not issues, 'issues': issues, 'stats': stats}
+
+
+def validate_exr_files(paths: Sequence, workers: Optional[int] = None, with_score: bool = True) -> List[Dict]:
+    """EXR 목록 병렬 검증 (입력 순서 유지)"""
+    paths = [str(p) for p in paths]
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    if workers <= 1 or len(paths) < 2:
+        return [validate_exr_file(p, with_score=with_score) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(validate_exr_file, paths, [EXPECTED_RESOLUTION] * len(paths),
+                             [with_score] * len(paths), chunksize=16))
+
+
+def summarize(results: List[Dict]) -> Dict:
+    scores = [r['stats']['depth_quality']['depth_quality_score'] for r in results
+              if 'depth_quality' in r.get('stats', {})]
+    return {
+        'total': len(results),
+        'valid': sum(1 for r in results if r.get('valid')),
+        'with_issues': sum(1 for r in results if r.get('issues')),
+        'errors': sum(1 for r in results if 'error' in r),
+        'mean_depth_quality': float(np.mean(scores)) if scores else None,
+        'below_085': sum(1 for s in scores if s < 0.85),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Depth EXR 병렬 검증 (Blender 불필요)')
+    parser.add_argument('root', nargs='?', default='output/synthetic', help='EXR 검색 루트 (하위 *.exr 전체)')
+    parser.add_argument('--workers', type=int, help='프로세스 수 (기본: CPU-1)')
+    parser.add_argument('--no-score', action='store_true', help='Depth Quality 점수 계산 생략')
+    parser.add_argument('--output', '-o', help='결과 JSON 경로')
+    args = parser.parse_args()
+
+    paths = sorted(Path(args.root).rglob('*.exr'))
+    if not paths:
+        print(f"[ERROR] EXR 파일 없음: {args.root}")
+        sys.exit(1)
+
+    print(f"[INFO] EXR {len(paths)}개 검증 시작")
+    results = validate_exr_files(paths, args.workers, with_score=not args.no_score)
+    summary = summarize(results)
+    print(f"[STATS] 정상 {summary['valid']}/{summary['total']}, 이슈 {summary['with_issues']}, 오류 {summary['errors']}")
+    if summary['mean_depth_quality'] is not None:
+        print(f"[STATS] 평균 Depth Quality {summary['mean_depth_quality']:.4f} (0.85 미만 {summary['below_085']}개)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"[OK] 결과 저장: {args.output}")
+    sys.exit(1 if summary['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+E2(Essential) 메타데이터 압축 인코딩/리더
+- 형식
+  · json    : 기존 {stem}_e2.json (indent=2)
+  · min     : {stem}_e2.json (공백 없는 JSON, 기존 리더와 완전 호환)
+  · msgpack : {stem}_e2.msgpack (고정 스키마 위치 배열 → 키 반복 제거, RLE counts는 base64 대신 원시 바이트)
+  · cbor    : {stem}_e2.cbor (msgpack과 동일 레코드 구조)
+- meta-e 디렉토리 zstd 번들(e2_bundle.{msgpack|cbor|json}.zst): Edge 동기화용 단일 파일 (stem → 레코드)
+- 리더(read_e2, E2Store)는 확장자로 형식을 판별하고 번들까지 조회 → 매니페스트/검증/카탈로그 도구가 공용 사용
+- 선택 의존성: msgpack, cbor2, zstandard (없으면 해당 형식만 사용 불가)
+
+실행 방법:
+    python scripts/e2_codec.py convert output/synthetic/dataset_synthetic --format msgpack
+    python scripts/e2_codec.py bundle output/synthetic/dataset_synthetic --format msgpack --level 19
+    python scripts/e2_codec.py unbundle output/synthetic/dataset_synthetic/6335317/meta-e
+    python scripts/e2_codec.py read output/synthetic/dataset_synthetic/6335317/meta-e/6335317_000_e2.msgpack
+"""
+
+import os
+import sys
+import json
+import base64
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+E2_SCHEMA_ID = 1
+# 고정 스키마: 렌더러 _create_e2_metadata 필드 순서 (점 경로), 스키마 외 필드는 extras로 보존
+E2_FIELDS = (
+    'schema_version', 'pair_uid', 'part_id', 'element_id',
+    'qa_flag', 'reprojection_rms_px', 'depth_quality_score', 'ssim', 'snr',
+    'annotation.bbox_pixel_xyxy', 'annotation.bbox_norm_xyxy',
+    'annotation.segmentation.format', 'annotation.segmentation.size',
+    'annotation.segmentation.rle_base64', 'annotation.segmentation.compressed_size',
+    'qa.qa_flag', 'qa.qa_flag_runtime', 'qa.qa_flag_strict', 'qa.reprojection_rms_px', 'qa.depth_quality_score',
+    'perf.avg_confidence', 'perf.avg_inference_time_ms',
+    'integrity.validated_at', 'integrity.image_blake3',
+)
+_FIELD_INDEX = {name: i for i, name in enumerate(E2_FIELDS)}
+RLE_FIELD = 'annotation.segmentation.rle_base64'
+
+FORMATS = ('json', 'min', 'msgpack', 'cbor')
+FORMAT_SUFFIXES = {'json': '_e2.json', 'min': '_e2.json', 'msgpack': '_e2.msgpack', 'cbor': '_e2.cbor'}
+E2_SUFFIXES = ('_e2.json', '_e2.msgpack', '_e2.cbor', '.e2.json')
+BUNDLE_PREFIX = 'e2_bundle.'
+BUNDLE_SUFFIX = '.zst'
+
+
+def _require(fmt: str):
+    if fmt == 'msgpack' and msgpack is None:
+        raise ImportError("msgpack 형식에는 msgpack 패키지가 필요합니다: pip install msgpack")
+    if fmt == 'cbor' and cbor2 is None:
+        raise ImportError("cbor 형식에는 cbor2 패키지가 필요합니다: pip install cbor2")
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise ImportError("번들에는 zstandard 패키지가 필요합니다: pip install zstandard")
+
+
+def _flatten(obj: Dict, prefix: str = '', out: Optional[Dict] = None) -> Dict[str, Any]:
+    """중첩 dict → {점 경로: 값} (빈 dict는 값으로 유지)"""
+    out = {} if out is None else out
+    for key, value in obj.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            _flatten(value, path + '.', out)
+        else:
+            out[path] = value
+    return out
+
+
+def _unflatten(flat: Dict[str, Any]) -> Dict:
+    out: Dict = {}
+    for path, value in flat.items():
+        node = out
+        *parents, leaf = path.split('.')
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return out
+
+
+def pack_record(e2: Dict, binary_rle: bool = True) -> List:
+    """E2 dict → [스키마 ID, 값 배열, 존재 비트마스크, extras] (키 문자열 반복 제거)
+
+    binary_rle=False면 RLE를 base64 문자열로 유지 (JSON 직렬화용)
+    """
+    flat = _flatten(e2)
+    values = [None] * len(E2_FIELDS)
+    present = 0
+    extras = {}
+    for path, value in flat.items():
+        i = _FIELD_INDEX.get(path)
+        if i is None:
+            extras[path] = value
+            continue
+        if binary_rle and path == RLE_FIELD and isinstance(value, str) and value:
+            raw = base64.b64decode(value)
+            if base64.b64encode(raw).decode('ascii') == value:
+                value = raw  # 왕복 동일할 때만 바이트로 저장
+        values[i] = value
+        present |= 1 << i
+    while values and values[-1] is None and not (present >> (len(values) - 1)) & 1:
+        values.pop()
+    return [E2_SCHEMA_ID, values, present, extras] if extras else [E2_SCHEMA_ID, values, present]
+
+
+def unpack_record(record: List) -> Dict:
+    """pack_record 역변환"""
+    if record[0] != E2_SCHEMA_ID:
+        raise ValueError(f"지원하지 않는 E2 스키마 ID: {record[0]}")
+    values, present = record[1], record[2]
+    extras = record[3] if len(record) > 3 else {}
+    flat: Dict[str, Any] = {}
+    for i, name in enumerate(E2_FIELDS):
+        if (present >> i) & 1:
+            value = values[i] if i < len(values) else None
+            if name == RLE_FIELD and isinstance(value, (bytes, bytearray)):
+                value = base64.b64encode(value).decode('ascii')
+            flat[name] = value
+    flat.update(extras)
+    return _unflatten(flat)
+
+
+def dumps(obj: Any, fmt: str) -> bytes:
+    """형식별 직렬화 (msgpack/cbor는 레코드 리스트/딕트 그대로)"""
+    if fmt == 'json':
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    if fmt == 'min':
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    _require(fmt)
+    if fmt == 'msgpack':
+        return msgpack.packb(obj, use_bin_type=True)
+    return cbor2.dumps(obj)
+
+
+def loads(data: bytes, fmt: str) -> Any:
+    if fmt in ('json', 'min'):
+        return json.loads(data.decode('utf-8'))
+    _require(fmt)
+    if fmt == 'msgpack':
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    return cbor2.loads(data)
+
+
+def encode_e2(e2: Dict, fmt: str = 'min') -> bytes:
+    """E2 dict → 바이트 (json/min은 dict 그대로, 바이너리는 고정 스키마 레코드)"""
+    if fmt in ('json', 'min'):
+        return dumps(e2, fmt)
+    return dumps(pack_record(e2), fmt)
+
+
+def decode_e2(data: bytes, fmt: str) -> Dict:
+    obj = loads(data, fmt)
+    return obj if isinstance(obj, dict) else unpack_record(obj)
+
+
+def format_from_path(path) -> str:
+    name = str(path)
+    if name.endswith('.msgpack'):
+        return 'msgpack'
+    if name.endswith('.cbor'):
+        return 'cbor'
+    return 'json'
+
+
+def e2_stem(name: str) -> Optional[str]:
+    """파일명 → 샘플 stem (E2 파일이 아니면 None)"""
+    for suffix in E2_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return None
+
+
+def e2_path(json_path, fmt: str) -> Path:
+    """기존 {stem}_e2.json 경로 → 형식별 경로"""
+    json_path = Path(json_path)
+    stem = e2_stem(json_path.name) or json_path.stem
+    return json_path.with_name(stem + FORMAT_SUFFIXES[fmt])
+
+
+def write_e2(e2: Dict, json_path, fmt: str = 'json') -> Tuple[Path, int]:
+    """E2 저장 (json_path는 기존 {stem}_e2.json 경로, 형식에 맞는 확장자로 기록) → (경로, 바이트 수)"""
+    path = e2_path(json_path, fmt)
+    data = encode_e2(e2, fmt)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path, len(data)
+
+
+def read_e2(path) -> Dict:
+    """E2 파일 읽기 (확장자로 형식 판별)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return decode_e2(data, format_from_path(path))
+
+
+def _bundle_format(name: str) -> Optional[str]:
+    if name.startswith(BUNDLE_PREFIX) and name.endswith(BUNDLE_SUFFIX):
+        fmt = name[len(BUNDLE_PREFIX):-len(BUNDLE_SUFFIX)]
+        return fmt if fmt in FORMATS else None
+    return None
+
+
+def read_bundle(path) -> Dict[str, Dict]:
+    """zstd 번들 → {stem: E2 dict}"""
+    _require_zstd()
+    fmt = _bundle_format(Path(path).name)
+    with open(path, 'rb') as f:
+        payload = loads(zstandard.ZstdDecompressor().decompress(f.read()), fmt)
+    if payload.get('fields') != list(E2_FIELDS):
+        raise ValueError(f"번들 스키마 불일치: {path}")
+    return {stem: unpack_record(record) for stem, record in payload['records'].items()}
+
+
+class E2Store:
+    """meta-e 디렉토리 리더 (개별 파일 우선, 없으면 번들 조회)"""
+
+    def __init__(self, meta_e_dir):
+        self.meta_e_dir = Path(meta_e_dir)
+        self._files: Optional[Dict[str, Path]] = None
+        self._bundle: Optional[Dict[str, Dict]] = None
+
+    def files(self) -> Dict[str, Path]:
+        if self._files is None:
+            self._files = {}
+            if self.meta_e_dir.is_dir():
+                for entry in sorted(os.scandir(self.meta_e_dir), key=lambda e: e.name):
+                    stem = e2_stem(entry.name)
+                    if stem is not None and entry.is_file():
+                        # 같은 stem에 여러 형식이 있으면 JSON(사람이 수정한 원본) 우선
+                        if stem not in self._files or entry.name.endswith('.json'):
+                            self._files[stem] = Path(entry.path)
+        return self._files
+
+    def bundle(self) -> Dict[str, Dict]:
+        if self._bundle is None:
+            self._bundle = {}
+            if self.meta_e_dir.is_dir():
+                for entry in os.scandir(self.meta_e_dir):
+                    if _bundle_format(entry.name):
+                        self._bundle.update(read_bundle(entry.path))
+        return self._bundle
+
+    def stems(self) -> List[str]:
+        return sorted(set(self.files()) | set(self.bundle()))
+
+    def get(self, stem: str) -> Optional[Dict]:
+        path = self.files().get(stem)
+        if path is not None:
+            return read_e2(path)
+        return self.bundle().get(stem)
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        for stem in self.stems():
+            yield stem, self.get(stem)
+
+
+def iter_meta_e_dirs(root) -> Iterator[Path]:
+    root = Path(root)
+    if root.name == 'meta-e':
+        yield root
+        return
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in ('backup', '__pycache__') and not d.startswith('.')]
+        if os.path.basename(dirpath) == 'meta-e':
+            dirnames[:] = []
+            yield Path(dirpath)
+
+
+def _size_baseline(e2: Dict) -> int:
+    return len(dumps(e2, 'json'))
+
+
+def convert_directory(meta_e_dir, fmt: str, remove_sources: bool = True) -> Dict:
+    """meta-e 개별 파일 → 지정 형식 (바이트 절감 통계 반환)"""
+    stats = {'files': 0, 'bytes_before': 0, 'bytes_after': 0, 'baseline_bytes': 0, 'errors': 0}
+    for stem, path in E2Store(meta_e_dir).files().items():
+        try:
+            e2 = read_e2(path)
+            stats['bytes_before'] += path.stat().st_size
+            stats['baseline_bytes'] += _size_baseline(e2)
+            new_path, size = write_e2(e2, path.with_name(stem + '_e2.json'), fmt)
+            stats['bytes_after'] += size
+            stats['files'] += 1
+            if remove_sources and new_path != path:
+                path.unlink()
+        except Exception as e:
+            print(f"[ERROR] {path}: {e}")
+            stats['errors'] += 1
+    return stats
+
+
+def bundle_directory(meta_e_dir, fmt: str = 'msgpack', level: int = 19, remove_sources: bool = False) -> Dict:
+    """meta-e 전체 → 단일 zstd 번들 (Edge 동기화용)"""
+    _require_zstd()
+    meta_e_dir = Path(meta_e_dir)
+    store = E2Store(meta_e_dir)
+    binary_rle = fmt not in ('json', 'min')  # JSON 번들은 바이트를 담을 수 없으므로 base64 유지
+    records, bundled, baseline, before, errors = {}, [], 0, 0, 0
+    for stem, path in store.files().items():
+        try:
+            e2 = read_e2(path)
+            records[stem] = pack_record(e2, binary_rle)
+            baseline += _size_baseline(e2)
+            before += path.stat().st_size
+            bundled.append(path)
+        except Exception as e:
+            print(f"[ERROR] {path}: {e}")
+            errors += 1
+    payload = dumps({'fields': list(E2_FIELDS), 'records': records}, fmt)
+    data = zstandard.ZstdCompressor(level=level).compress(payload)
+    bundle_path = meta_e_dir / f"{BUNDLE_PREFIX}{fmt}{BUNDLE_SUFFIX}"
+    tmp = bundle_path.with_name(bundle_path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, bundle_path)
+    if remove_sources:
+        # 읽기 실패한 파일은 번들에 없으므로 남겨 둔다
+        for path in bundled:
+            path.unlink()
+    return {'files': len(records), 'bytes_before': before, 'bytes_after': len(data),
+            'baseline_bytes': baseline, 'bundle': str(bundle_path), 'errors': errors}
+
+
+def unbundle_directory(meta_e_dir, fmt: str = 'json') -> int:
+    """번들 → 개별 E2 파일 복원 (검증/수정 도구 입력용)"""
+    meta_e_dir = Path(meta_e_dir)
+    count = 0
+    for stem, e2 in E2Store(meta_e_dir).bundle().items():
+        write_e2(e2, meta_e_dir / f"{stem}_e2.json", fmt)
+        count += 1
+    return count
+
+
+def _print_stats(label: str, stats: Dict):
+    baseline = stats['baseline_bytes'] or 1
+    saved = stats['baseline_bytes'] - stats['bytes_after']
+    print(f"[STATS] {label}: {stats['files']}개, {stats['bytes_before']:,} → {stats['bytes_after']:,} bytes "
+          f"(indent JSON 대비 {saved:,} bytes 절감, {saved / baseline * 100:.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='E2 메타데이터 압축 인코딩/리더')
+    sub = parser.add_subparsers(dest='command', required=True)
+    convert_parser = sub.add_parser('convert', help='개별 E2 파일 형식 변환')
+    convert_parser.add_argument('root', help='데이터셋 루트 또는 meta-e 디렉토리')
+    convert_parser.add_argument('--format', choices=FORMATS, default='min')
+    convert_parser.add_argument('--keep-sources', action='store_true', help='원본 파일 유지')
+    bundle_parser = sub.add_parser('bundle', help='meta-e 디렉토리별 zstd 번들 생성')
+    bundle_parser.add_argument('root', help='데이터셋 루트 또는 meta-e 디렉토리')
+    bundle_parser.add_argument('--format', choices=FORMATS, default='msgpack')
+    bundle_parser.add_argument('--level', type=int, default=19, help='zstd 압축 레벨')
+    bundle_parser.add_argument('--remove-sources', action='store_true', help='번들 생성 후 개별 파일 삭제')
+    unbundle_parser = sub.add_parser('unbundle', help='번들 → 개별 파일 복원')
+    unbundle_parser.add_argument('root', help='데이터셋 루트 또는 meta-e 디렉토리')
+    unbundle_parser.add_argument('--format', choices=FORMATS, default='json')
+    read_parser = sub.add_parser('read', help='E2 파일 내용 출력')
+    read_parser.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'read':
+        print(json.dumps(read_e2(args.path), ensure_ascii=False, indent=2))
+        return
+
+    total = {'files': 0, 'bytes_before': 0, 'bytes_after': 0, 'baseline_bytes': 0, 'errors': 0}
+    for meta_e_dir in iter_meta_e_dirs(args.root):
+        if args.command == 'unbundle':
+            print(f"[OK] {meta_e_dir}: {unbundle_directory(meta_e_dir, args.format)}개 복원")
+            continue
+        if args.command == 'convert':
+            stats = convert_directory(meta_e_dir, args.format, not args.keep_sources)
+        else:
+            stats = bundle_directory(meta_e_dir, args.format, args.level, args.remove_sources)
+        for key in total:
+            total[key] += stats[key]
+    if args.command != 'unbundle':
+        _print_stats(f"{args.command} ({args.format})", total)
+        sys.exit(1 if total['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
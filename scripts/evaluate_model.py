@@ -13,6 +13,9 @@ from pathlib import Path
 from datetime import datetime
 import argparse
 
+sys.path.insert(0, str(Path(__file__).parent))
+from validation_engine import ValidationEngine
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -50,6 +53,8 @@ class ModelEvaluator:
             "conf_threshold": 0.001,
             "iou_threshold": 0.6,
             "max_det": 300,
+            "batch": 16,
+            "workers": 8,
             "save_results": True,
             "save_dir": "evaluation_results",
             "metrics": ["mAP50", "mAP50-95", "precision", "recall", "f1"],
@@ -83,6 +88,33 @@ class ModelEvaluator:
         logger.info("전제 조건 확인 완료")
         return True
     
+    def run_engine_validation(self, model_path, data_path):
+        """배치 검증 엔진으로 프로세스 내 검증 (subprocess 기동/stdout 파싱 없음)"""
+        logger.info("검증 엔진 실행 중...")
+        
+        engine = ValidationEngine(
+            model_path,
+            imgsz=self.config['imgsz'],
+            batch=self.config.get('batch', 16),
+            device=self.config['device'],
+            conf_threshold=self.config['conf_threshold'],
+            iou_threshold=self.config['iou_threshold'],
+            max_det=self.config['max_det'],
+            workers=self.config.get('workers')
+        )
+        result = engine.validate(os.path.join(data_path, "data.yaml"), class_names=self.config.get('class_names') or None)
+        logger.info(f"검증 엔진 완료: {result['images']}장, {result['images_per_sec']} img/s")
+        
+        return {
+            'mAP50': result['mAP50'],
+            'mAP50-95': result['mAP50_95'],
+            'precision': result['precision'],
+            'recall': result['recall'],
+            'f1': result['f1_score'],
+            'per_class': result['per_class'],
+            'timings_sec': result['timings_sec']
+        }
+    
     def run_yolo_validation(self, model_path, data_path):
         """YOLO 모델 검증 실행"""
         logger.info("YOLO 모델 검증 실행 중...")
@@ -256,11 +288,13 @@ class ModelEvaluator:
             # 1. 전제 조건 확인
             self.check_prerequisites(model_path, data_path)
             
-            # 2. YOLO 검증 실행
-            stdout, stderr = self.run_yolo_validation(model_path, data_path)
-            
-            # 3. 검증 결과 파싱
-            metrics = self.parse_validation_results(stdout)
+            # 2-3. 검증 실행 (엔진 실패 시 ultralytics CLI + 출력 파싱)
+            try:
+                metrics = self.run_engine_validation(model_path, data_path)
+            except Exception as e:
+                logger.warning(f"검증 엔진 실패, ultralytics CLI로 대체: {e}")
+                stdout, stderr = self.run_yolo_validation(model_path, data_path)
+                metrics = self.parse_validation_results(stdout)
             
             # 4. 추가 메트릭 계산
             metrics = self.calculate_additional_metrics(metrics)
@@ -10,6 +10,12 @@ from pathlib import Path
 import argparse
 import logging
 from datetime import datetime
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+from yolo_label_toolkit import pack_polygons, polygon_bounds
+
+BBOX_KEYS = ('x_min', 'y_min', 'x_max', 'y_max')
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,71 +27,64 @@ class BboxPolygonFixer:
     def __init__(self, dataset_path: str):
         self.dataset_path = Path(dataset_path)
     
-    def fix_bbox_polygon_consistency(self) -> bool:
-        """bbox/polygon 일치성 수정"""
+    def fix_bbox_polygon_consistency(self, tolerance: float = 0.01) -> bool:
+        """bbox/polygon 일치성 수정 (polygon 외접 bbox를 전체 벡터화 계산, 변경된 파일만 저장)"""
         logger.info("bbox/polygon 일치성 수정 시작")
         
-        meta_files = list((self.dataset_path / 'meta').glob('*.json'))
+        meta_files = sorted((self.dataset_path / 'meta').glob('*.json'))
         success_count = 0
+        if not meta_files:
+            logger.warning("메타 파일 없음")
+            return False
         
+        # 1) 메타 로드 + polygon_uv 수집
+        loaded = []
+        polygons = []
         for meta_file in meta_files:
             try:
                 with open(meta_file, 'r', encoding='utf-8') as f:
                     meta = json.load(f)
-                
-                # polygon_uv에서 bbox 재계산
-                if 'polygon_uv' in meta and len(meta['polygon_uv']) >= 2:
-                    polygon = np.array(meta['polygon_uv'])
-                    
-                    # polygon 범위 계산
-                    x_coords = polygon[:, 0]
-                    y_coords = polygon[:, 1]
-                    
-                    new_bbox = {
-                        'x_min': float(np.min(x_coords)),
-                        'y_min': float(np.min(y_coords)),
-                        'x_max': float(np.max(x_coords)),
-                        'y_max': float(np.max(y_coords))
-                    }
-                    
-                    # 기존 bbox와 비교
-                    if 'bounding_box' in meta:
-                        old_bbox = meta['bounding_box']
-                        
-                        # 1% 허용 오차로 비교 (더 엄격한 기준)
-                        tolerance = 0.01
-                        is_different = False
-                        
-                        for key in ['x_min', 'y_min', 'x_max', 'y_max']:
-                            if abs(old_bbox[key] - new_bbox[key]) > tolerance:
-                                is_different = True
-                                break
-                        
-                        if is_different:
-                            meta['bounding_box'] = new_bbox
-                            logger.info(f"bbox 수정: {meta_file.name}")
-                        else:
-                            logger.info(f"bbox 일치: {meta_file.name}")
-                    else:
-                        meta['bounding_box'] = new_bbox
-                        logger.info(f"bbox 추가: {meta_file.name}")
-                    
-                    # 업데이트 시간 갱신
-                    meta['updated_at'] = datetime.now().isoformat() + "Z"
-                    
-                    # 파일 저장
-                    with open(meta_file, 'w', encoding='utf-8') as f:
-                        json.dump(meta, f, indent=2, ensure_ascii=False)
-                    
-                    success_count += 1
-                else:
-                    logger.warning(f"polygon_uv 데이터 부족: {meta_file.name}")
-            
+                polygon = np.asarray(meta.get('polygon_uv') or [], dtype=np.float64).reshape(-1, 2)
+            except Exception as e:
+                logger.error(f"bbox/polygon 수정 실패 {meta_file.name}: {e}")
+                continue
+            if len(polygon) < 2:
+                logger.warning(f"polygon_uv 데이터 부족: {meta_file.name}")
+                continue
+            loaded.append((meta_file, meta))
+            polygons.append(polygon)
+        
+        # 2) polygon 범위 및 기존 bbox 비교 (1% 허용 오차, 벡터화)
+        offsets, points = pack_polygons(polygons)
+        new_bboxes = polygon_bounds(offsets, points)
+        old_bboxes = np.full_like(new_bboxes, np.nan)
+        for i, (_, meta) in enumerate(loaded):
+            old_bbox = meta.get('bounding_box')
+            if isinstance(old_bbox, dict) and all(isinstance(old_bbox.get(k), (int, float)) for k in BBOX_KEYS):
+                old_bboxes[i] = [old_bbox[k] for k in BBOX_KEYS]
+        missing = np.isnan(old_bboxes).any(axis=1)
+        different = missing | (np.abs(old_bboxes - new_bboxes) > tolerance).any(axis=1)
+        
+        # 3) 변경된 파일만 저장
+        updated_at = datetime.now().isoformat() + "Z"
+        for i, (meta_file, meta) in enumerate(loaded):
+            if not different[i]:
+                logger.debug(f"bbox 일치: {meta_file.name}")
+                success_count += 1
+                continue
+            try:
+                meta['bounding_box'] = dict(zip(BBOX_KEYS, map(float, new_bboxes[i])))
+                meta['updated_at'] = updated_at
+                with open(meta_file, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f, indent=2, ensure_ascii=False)
+                logger.info(f"bbox {'추가' if missing[i] else '수정'}: {meta_file.name}")
+                success_count += 1
             except Exception as e:
                 logger.error(f"bbox/polygon 수정 실패 {meta_file.name}: {e}")
         
         success_rate = (success_count / len(meta_files)) * 100
-        logger.info(f"bbox/polygon 수정 완료: {success_count}/{len(meta_files)} ({success_rate:.1f}%)")
+        logger.info(f"bbox/polygon 수정 완료: {success_count}/{len(meta_files)} ({success_rate:.1f}%) "
+                    f"- 변경 {int(different.sum())}개")
         
         return success_count == len(meta_files)
 
@@ -2,15 +2,22 @@
 """6313121 파트의 e2 JSON 메타데이터 생성 스크립트"""
 
 import os
+import sys
 import json
 import time
+import argparse
 from pathlib import Path
 
-def create_e2_metadata(part_id, element_id, unique_id, metadata, quality_metrics):
+sys.path.insert(0, str(Path(__file__).parent))
+from e2_codec import FORMATS, dumps, write_e2
+
+def create_e2_metadata(part_id, element_id, unique_id, metadata, quality_metrics, meta_path=None):
     """E2 JSON 메타데이터 생성 (v1.6.1-E2 스펙 준수)"""
     try:
         print(f"[CHECK] E2 메타데이터 생성: part_id={part_id}, element_id={element_id}")
         
+        segmentation = get_segmentation(metadata, meta_path)
+        
         # 기술문서 요구사항에 따른 E2 스키마 (경량화된 필수 메타데이터만)
         e2_metadata = {
             "schema_version": "1.6.1-E2",
@@ -23,6 +30,8 @@ def create_e2_metadata(part_id, element_id, unique_id, metadata, quality_metrics
                 "bbox_pixel_xyxy": extract_bbox_pixel(metadata),
                 "bbox_norm_xyxy": extract_bbox_norm(metadata),
                 "segmentation": {
+                    "format": segmentation.get('format', 'coco_rle'),
+                    "size": segmentation.get('size'),
                     "rle_base64": extract_segmentation_rle(metadata),
                     "compressed_size": calculate_seg_size(metadata)
                 }
@@ -89,13 +98,28 @@ def extract_bbox_norm(metadata):
     except:
         return [0.0, 0.0, 1.0, 1.0]
 
+def get_segmentation(metadata, meta_path=None):
+    """세그멘테이션 COCO RLE (메타데이터에 없으면 깊이 EXR/폴리곤에서 생성 후 캐시)"""
+    seg = metadata.get('annotation', {}).get('seg')
+    if seg and seg.get('format'):
+        return seg
+    try:
+        from mask_rle import segmentation_from_metadata
+        seg = segmentation_from_metadata(metadata, meta_path)
+    except Exception as e:
+        print(f"[WARN] 세그멘테이션 RLE 생성 실패: {e}")
+        seg = None
+    if seg:
+        metadata.setdefault('annotation', {})['seg'] = seg
+    return seg or {}
+
 def extract_segmentation_rle(metadata):
-    """세그멘테이션 RLE 추출 (더미 데이터)"""
-    return "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+    """세그멘테이션 RLE 추출 (COCO 압축 counts의 base64)"""
+    return get_segmentation(metadata).get('rle_base64', '')
 
 def calculate_seg_size(metadata):
-    """세그멘테이션 크기 계산"""
-    return 8432
+    """세그멘테이션 크기 계산 (COCO counts 바이트 수)"""
+    return int(get_segmentation(metadata).get('compressed_size', 0))
 
 def calculate_qa_flag(quality_metrics, part_id):
     """QA 플래그 계산"""
@@ -128,6 +152,10 @@ def calculate_inference_time(quality_metrics):
 
 def main():
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description='E2 JSON 메타데이터 생성')
+    parser.add_argument('--format', choices=FORMATS, default='json', help='E2 저장 형식 (json|min|msgpack|cbor)')
+    args = parser.parse_args()
+    
     element_id = "6313121"
     part_id = "11476"  # 메타데이터에서 확인된 part_id
     
@@ -146,6 +174,8 @@ def main():
     
     success_count = 0
     error_count = 0
+    baseline_bytes = 0
+    written_bytes = 0
     
     for meta_file in meta_files:
         try:
@@ -160,17 +190,15 @@ def main():
             
             # E2 메타데이터 생성
             quality_metrics = metadata.get('quality_metrics', {})
-            e2_metadata = create_e2_metadata(part_id, element_id, unique_id, metadata, quality_metrics)
+            e2_metadata = create_e2_metadata(part_id, element_id, unique_id, metadata, quality_metrics, meta_file)
             
             if e2_metadata:
-                # E2 JSON 파일 저장
-                e2_filename = f"{unique_id}_e2.json"
-                e2_path = meta_e_dir / e2_filename
-                
-                with open(e2_path, 'w', encoding='utf-8') as f:
-                    json.dump(e2_metadata, f, ensure_ascii=False, indent=2)
+                # E2 파일 저장 (--format 형식)
+                e2_path, size = write_e2(e2_metadata, meta_e_dir / f"{unique_id}_e2.json", args.format)
+                baseline_bytes += len(dumps(e2_metadata, 'json'))
+                written_bytes += size
                 
-                print(f"[OK] E2 JSON 저장: {e2_filename}")
+                print(f"[OK] E2 저장: {e2_path.name} ({size} bytes)")
                 success_count += 1
             else:
                 print(f"[ERROR] E2 메타데이터 생성 실패: {meta_file.name}")
@@ -184,27 +212,9 @@ def main():
     print(f"  성공: {success_count}개")
     print(f"  실패: {error_count}개")
     print(f"  총 파일: {len(meta_files)}개")
+    if args.format != 'json' and baseline_bytes:
+        saved = baseline_bytes - written_bytes
+        print(f"  [STATS] {args.format}: {written_bytes:,} bytes (indent JSON 대비 {saved:,} bytes, {saved / baseline_bytes * 100:.1f}% 절감)")
 
 if __name__ == "__main__":
     main()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-<<<<<<< HEAD
-=======
-
->>>>>>> 87039ac2483fb2cfc80115fa29c3e4f844a1454b
@@ -12,6 +12,11 @@ from typing import Dict, List, Any
 import argparse
 from datetime import datetime
 import logging
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+from mask_rle import segmentation_from_metadata
+from e2_codec import E2Store
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,12 +25,48 @@ logger = logging.getLogger(__name__)
 class ManifestGenerator:
     """매니페스트 생성기"""
     
-    def __init__(self, dataset_path: str, set_id: str):
+    def __init__(self, dataset_path: str, set_id: str, catalog_dir: str = None):
         self.dataset_path = Path(dataset_path)
         self.set_id = set_id
+        self.catalog_dir = catalog_dir
         self.renders_data = []
         self.ai_meta_data = []
-        
+        self._meta_index = None
+        self._e2_store = None
+    
+    def catalog_meta(self) -> Dict[str, Dict[str, Any]]:
+        """카탈로그의 이 데이터셋 meta 레코드 (stem → meta), 최초 1회 컬럼 스캔"""
+        if self._meta_index is None:
+            from metadata_catalog import MetadataCatalog
+            catalog = MetadataCatalog(self.catalog_dir)
+            self._meta_index = {stem: meta for stem, meta, _ in
+                                catalog.records(meta_dir=self.dataset_path / 'meta') if meta is not None}
+            logger.info(f"카탈로그 메타 로드: {len(self._meta_index)}개 ({self.catalog_dir})")
+        return self._meta_index
+    
+    def load_meta(self, meta_file: Path) -> Dict[str, Any]:
+        """메타데이터 로드 (카탈로그 지정 시 파일을 열지 않고 카탈로그 레코드 사용)"""
+        if self.catalog_dir and meta_file.stem in self.catalog_meta():
+            return self.catalog_meta()[meta_file.stem]
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def meta_files(self) -> List[Path]:
+        """메타 파일 목록 (카탈로그 지정 시 디렉토리 대신 카탈로그 stem 사용)"""
+        if self.catalog_dir:
+            return [self.dataset_path / 'meta' / f"{stem}.json" for stem in sorted(self.catalog_meta())]
+        return sorted((self.dataset_path / 'meta').glob('*.json'))
+    
+    def load_e2(self, stem: str) -> Dict[str, Any]:
+        """기존 E2 레코드 (meta-e의 json/msgpack/cbor 파일 또는 zstd 번들), 없으면 빈 dict"""
+        if self._e2_store is None:
+            self._e2_store = E2Store(self.dataset_path / 'meta-e')
+        try:
+            return self._e2_store.get(stem) or {}
+        except Exception as e:
+            logger.warning(f"E2 로드 실패 {stem}: {e}")
+            return {}
+    
     def calculate_file_hash(self, file_path: Path) -> str:
         """파일 해시 계산 (BLAKE3)"""
         try:
@@ -39,8 +80,10 @@ class ManifestGenerator:
     def extract_essential_metadata(self, meta_file: Path) -> Dict[str, Any]:
         """Essential 메타데이터 추출 (v1.6.1-E2)"""
         try:
-            with open(meta_file, 'r', encoding='utf-8') as f:
-                meta = json.load(f)
+            meta = self.load_meta(meta_file)
+            # 세그멘테이션 COCO RLE (기존 E2 → 렌더러 기록값 → 깊이 EXR → polygon_uv 순)
+            stored = self.load_e2(meta_file.stem).get("annotation", {}).get("segmentation", {})
+            segmentation = stored if stored.get("rle_base64") else (segmentation_from_metadata(meta, meta_file) or {})
             
             # Essential 필드만 추출
             essential = {
@@ -58,8 +101,10 @@ class ManifestGenerator:
                         meta.get("bounding_box", {}).get("center_y", 0) + meta.get("bounding_box", {}).get("height", 0)/2
                     ],
                     "segmentation": {
-                        "rle_base64": "",  # 실제 구현에서는 RLE 인코딩 필요
-                        "compressed_size": 0
+                        "format": segmentation.get("format", "coco_rle"),
+                        "size": segmentation.get("size"),
+                        "rle_base64": segmentation.get("rle_base64", ""),
+                        "compressed_size": segmentation.get("compressed_size", 0)
                     }
                 },
                 "qa": {
@@ -101,12 +146,11 @@ class ManifestGenerator:
                 
                 # 해당하는 메타 파일 찾기
                 meta_file = self.dataset_path / 'meta' / f"{stem}.json"
-                if not meta_file.exists():
+                if not (self.catalog_dir and stem in self.catalog_meta()) and not meta_file.exists():
                     logger.warning(f"메타 파일 없음: {meta_file}")
                     continue
                 
-                with open(meta_file, 'r', encoding='utf-8') as f:
-                    meta = json.load(f)
+                meta = self.load_meta(meta_file)
                 
                 # renders.jsonl 레코드 생성
                 render_record = {
@@ -141,13 +185,10 @@ class ManifestGenerator:
         """ai_meta.jsonl 생성 (핵심 12필드)"""
         ai_meta = []
         
-        # meta 디렉토리에서 JSON 파일들 찾기
-        meta_files = list((self.dataset_path / 'meta').glob('*.json'))
-        
-        for meta_file in sorted(meta_files):
+        # meta 디렉토리(또는 카탈로그)에서 메타데이터 찾기
+        for meta_file in self.meta_files():
             try:
-                with open(meta_file, 'r', encoding='utf-8') as f:
-                    meta = json.load(f)
+                meta = self.load_meta(meta_file)
                 
                 # 핵심 12필드 추출 (기술문서 기준)
                 ai_record = {
@@ -272,6 +313,7 @@ def main():
     parser.add_argument('dataset_path', help='데이터셋 경로')
     parser.add_argument('--set-id', required=True, help='세트 ID')
     parser.add_argument('--output', '-o', help='보고서 출력 파일 (선택사항)')
+    parser.add_argument('--catalog', help='메타데이터 카탈로그 디렉토리 (metadata_catalog.py update 결과)')
     parser.add_argument('--verbose', '-v', action='store_true', help='상세 로그 출력')
     
     args = parser.parse_args()
@@ -280,7 +322,7 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     # 매니페스트 생성
-    generator = ManifestGenerator(args.dataset_path, args.set_id)
+    generator = ManifestGenerator(args.dataset_path, args.set_id, args.catalog)
     success = generator.generate_manifests()
     
     if success:
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+하드 예제 마이너
+- 현재 검출기로 검증 split을 돌려 GT 객체별 난이도(1 - 최고 IoU×신뢰도), 미검출, 타 부품 혼동을 집계
+- 부품별 난이도 = AP50 부족분 + 평균 객체 난이도, 관측 혼동 쌍은 confusion_groups.json으로 저장
+  (렌더러 _get_confusion_groups가 이 파일을 읽어 E2 메타의 confusion_groups에 반영)
+- 가장 어려운 이미지의 렌더 메타(카메라 포즈/회전/배경/조명)를 찾아 render_queue 재렌더 요청 생성
+  → 균일 렌더 대신 정확도를 가장 많이 올릴 부품/포즈에 렌더 예산 사용
+
+실행 방법:
+    python scripts/hard_example_miner.py --model best.pt --data dataset.yaml --top_k 10 --dry_run
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+HARD_EXAMPLE_DIR = Path('output/hard_examples')
+CONFUSION_GROUPS_PATH = HARD_EXAMPLE_DIR / 'confusion_groups.json'
+LATEST_REPORT_PATH = HARD_EXAMPLE_DIR / 'latest.json'
+MINING_CONF = 0.25          # 운영 추론 임계값과 동일 (이보다 낮은 예측은 검출 실패로 간주)
+MATCH_IOU = 0.5
+HARD_OBJECT_DIFFICULTY = 0.5
+MIN_CONFUSION_COUNT = 2     # 이 횟수 이상 관측된 혼동만 그룹으로 기록
+POSES_PER_PART = 5          # 부품당 재렌더 요청에 담을 실패 포즈 수
+
+
+def load_confusion_pairs() -> Dict[str, Dict[str, int]]:
+    """confusion_groups.json의 혼동 쌍 {부품 ID: {상대 부품 ID: 횟수}} (결과 파일이 없으면 빈 dict)"""
+    try:
+        with open(CONFUSION_GROUPS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f).get('pairs', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def get_mined_confusions(part_id, min_count: int = MIN_CONFUSION_COUNT,
+                         pairs: Optional[Dict[str, Dict[str, int]]] = None) -> List[str]:
+    """마이닝에서 관측된 혼동 상대 부품 ID (많이 혼동된 순)
+
+    pairs 미지정 시 파일을 읽음 - 반복 호출하는 쪽은 load_confusion_pairs() 결과를 한 번 읽어 전달
+    """
+    if pairs is None:
+        pairs = load_confusion_pairs()
+    partners = pairs.get(str(part_id), {})
+    return [other for other, count in sorted(partners.items(), key=lambda item: -item[1]) if count >= min_count]
+
+
+def build_meta_index(meta_root) -> Dict[str, Path]:
+    """렌더 메타 JSON 인덱스 {이미지 stem: meta 경로} (meta-e의 _e2.json 제외)"""
+    index = {}
+    for meta_path in Path(meta_root).rglob('meta/*.json'):
+        index.setdefault(meta_path.stem, meta_path)
+    return index
+
+
+def extract_render_params(meta: Dict) -> Dict:
+    """렌더 메타에서 재렌더에 필요한 포즈/조명 파라미터만 추출"""
+    camera = meta.get('camera') or {}
+    transform = meta.get('transform') or {}
+    material = meta.get('material') or {}
+    return {
+        'camera_location': camera.get('location'),
+        'camera_rotation_euler': camera.get('rotation_euler'),
+        'lens_mm': camera.get('lens_mm'),
+        'part_rotation': transform.get('rotation'),
+        'part_scale': transform.get('scale'),
+        'background': meta.get('background'),
+        'color_management': meta.get('color_management'),
+        'lighting': meta.get('lighting'),
+        'color_id': material.get('color_id'),
+        'resolution': (meta.get('render_settings') or {}).get('resolution'),
+        'render_seed': meta.get('render_seed'),
+    }
+
+
+class HardExampleMiner:
+    """검증 split 예측으로 부품/포즈별 난이도 집계 및 재렌더 요청 생성"""
+
+    def __init__(self, model_path, data_yaml, meta_root='output/synthetic', conf_threshold: float = MINING_CONF,
+                 device: str = 'cpu', batch: int = 16, split: str = 'val'):
+        self.model_path = Path(model_path)
+        self.data_yaml = Path(data_yaml)
+        self.meta_root = Path(meta_root)
+        self.conf_threshold = conf_threshold
+        self.device = device
+        self.batch = batch
+        self.split = split
+
+    def mine(self) -> Dict:
+        import numpy as np
+        from validation_engine import ValidationEngine, load_split
+
+        _, names = load_split(self.data_yaml, self.split)
+        objects = defaultdict(list)        # part → [객체 난이도 기록]
+        confusions = defaultdict(Counter)  # part → {혼동 부품: 횟수}
+        image_difficulty = {}              # 이미지 경로 → (최대 난이도, 해당 부품)
+
+        def part_name(class_id):
+            return names[class_id] if class_id < len(names) else str(class_id)
+
+        def on_image(image_path, gt_cls, gt_boxes, boxes, conf, cls, iou):
+            keep = conf >= self.conf_threshold
+            if len(gt_cls) == 0:
+                return
+            iou_kept = iou[:, keep] if keep.any() else np.zeros((len(gt_cls), 0))
+            conf_kept, cls_kept = conf[keep], cls[keep]
+            same_class = cls_kept[None, :] == gt_cls[:, None]
+            # 같은 부품 예측 중 IoU×신뢰도 최대값 → 난이도 (미검출이면 1.0)
+            quality = (iou_kept * conf_kept[None, :] * same_class).max(axis=1) if iou_kept.shape[1] else np.zeros(len(gt_cls))
+            difficulty = 1.0 - quality
+            best_any = iou_kept.argmax(axis=1) if iou_kept.shape[1] else None
+
+            worst = 0.0, None
+            for g, class_id in enumerate(gt_cls):
+                part = part_name(int(class_id))
+                confused_with = None
+                if best_any is not None and iou_kept[g, best_any[g]] >= MATCH_IOU and cls_kept[best_any[g]] != class_id:
+                    confused_with = part_name(int(cls_kept[best_any[g]]))
+                    confusions[part][confused_with] += 1
+                missed = not (iou_kept.shape[1] and (iou_kept[g] * same_class[g] >= MATCH_IOU).any())
+                objects[part].append({'difficulty': float(difficulty[g]), 'missed': missed,
+                                      'confused': confused_with is not None, 'image': str(image_path)})
+                if difficulty[g] > worst[0]:
+                    worst = float(difficulty[g]), part
+            image_difficulty[str(image_path)] = worst
+
+        engine = ValidationEngine(self.model_path, batch=self.batch, device=self.device)
+        metrics = engine.validate(self.data_yaml, self.split, on_image=on_image)
+
+        meta_index = build_meta_index(self.meta_root) if self.meta_root.exists() else {}
+        parts = []
+        for part, records in objects.items():
+            ap50 = metrics['per_class'].get(part, {}).get('ap50', 0.0)
+            mean_difficulty = sum(r['difficulty'] for r in records) / len(records)
+            confusion_rate = sum(r['confused'] for r in records) / len(records)
+            hardest = sorted(records, key=lambda r: -r['difficulty'])[:POSES_PER_PART]
+            poses = []
+            for record in hardest:
+                if record['difficulty'] < HARD_OBJECT_DIFFICULTY:
+                    break
+                meta_path = meta_index.get(Path(record['image']).stem)
+                params = None
+                if meta_path:
+                    try:
+                        with open(meta_path, 'r', encoding='utf-8') as f:
+                            params = extract_render_params(json.load(f))
+                    except (OSError, ValueError):
+                        params = None
+                poses.append({'image': record['image'], 'difficulty': round(record['difficulty'], 4),
+                              'missed': record['missed'], 'confused': record['confused'], 'render_params': params})
+            parts.append({
+                'part_id': part,
+                'objects': len(records),
+                'ap50': ap50,
+                'mean_difficulty': round(mean_difficulty, 4),
+                'miss_rate': round(sum(r['missed'] for r in records) / len(records), 4),
+                'confusion_rate': round(confusion_rate, 4),
+                'confused_with': dict(confusions[part].most_common(5)),
+                # AP50 부족분과 객체 난이도를 같은 비중으로, 혼동이 많을수록 가중
+                'hardness': round((0.5 * (1 - ap50) + 0.5 * mean_difficulty) * (1 + confusion_rate), 4),
+                'hard_poses': poses,
+            })
+        parts.sort(key=lambda p: -p['hardness'])
+
+        hard_images = sum(1 for difficulty, _ in image_difficulty.values() if difficulty >= HARD_OBJECT_DIFFICULTY)
+        return {
+            'created_at': datetime.now().isoformat(),
+            'model': str(self.model_path),
+            'dataset': str(self.data_yaml),
+            'conf_threshold': self.conf_threshold,
+            'metrics': {k: metrics[k] for k in ('mAP50', 'mAP50_95', 'precision', 'recall', 'images')},
+            'total_images': len(image_difficulty),
+            'hard_images': hard_images,
+            'parts': parts,
+            'confusion_pairs': {part: dict(counter) for part, counter in confusions.items()},
+        }
+
+
+def save_report(report: Dict, output_dir: Path = HARD_EXAMPLE_DIR) -> Path:
+    """리포트 저장 (타임스탬프 + latest) 및 혼동 그룹 파일 갱신"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    report_path = output_dir / f"hard_examples_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    for path in (report_path, LATEST_REPORT_PATH):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    with open(CONFUSION_GROUPS_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'updated_at': report['created_at'], 'model': report['model'],
+                   'pairs': report['confusion_pairs']}, f, indent=2, ensure_ascii=False)
+    print(f"[OK] 하드 예제 리포트 저장: {report_path}")
+    return report_path
+
+
+def build_render_requests(report: Dict, top_k: int = 10, renders_per_part: int = 40,
+                          partner_share: float = 0.25) -> List[Dict]:
+    """상위 top_k 부품의 재렌더 요청 (실패 포즈 파라미터 포함, 혼동 상대 부품은 같은 포즈로 일부 배분)"""
+    requests_list = []
+    now = datetime.now()
+    for rank, part in enumerate(report['parts'][:top_k], 1):
+        if not part['hard_poses']:
+            continue
+        poses = [p['render_params'] for p in part['hard_poses'] if p['render_params']]
+        partners = [other for other in part['confused_with'] if other != part['part_id']]
+        partner_count = int(renders_per_part * partner_share) if partners else 0
+        targets = [(part['part_id'], renders_per_part - partner_count)]
+        targets += [(other, max(1, partner_count // len(partners))) for other in partners] if partner_count else []
+
+        for part_id, count in targets:
+            is_partner = part_id != part['part_id']
+            reason = (f"hard_example: {part['part_id']}와 혼동 (같은 포즈로 대비 학습)" if is_partner else
+                      f"hard_example: 난이도 {part['hardness']:.3f}, AP50 {part['ap50']:.3f}, "
+                      f"미검출 {part['miss_rate']:.0%}, 혼동 {part['confusion_rate']:.0%}")
+            requests_list.append({
+                'pair_uid': f"uuid-{part_id}-hard-{now.strftime('%Y%m%d%H%M%S')}-{rank}",
+                'part_id': str(part_id),
+                'reason': 'hard_example',
+                'requeue_reason': reason,
+                'priority': 'high' if rank <= max(1, top_k // 3) else 'normal',
+                'status': 'pending',
+                'retry_parameters': {
+                    'count': count,
+                    'poses': poses,
+                    'hardness': part['hardness'],
+                    'confused_with': part['part_id'] if is_partner else partners,
+                    'source_report': report['created_at'],
+                },
+                'created_at': now.isoformat(),
+            })
+    return requests_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description='하드 예제 마이닝 → render_queue 재렌더 요청')
+    parser.add_argument('--model', required=True, help='검출 모델 경로(.pt/.onnx)')
+    parser.add_argument('--data', required=True, help='검증 dataset.yaml')
+    parser.add_argument('--meta_root', default='output/synthetic', help='렌더 메타 JSON 루트')
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--top_k', type=int, default=10, help='재렌더할 상위 부품 수')
+    parser.add_argument('--renders_per_part', type=int, default=40, help='부품당 재렌더 이미지 수')
+    parser.add_argument('--dry_run', action='store_true', help='render_queue에 넣지 않고 요청만 출력')
+    args = parser.parse_args()
+
+    miner = HardExampleMiner(args.model, args.data, args.meta_root, device=args.device)
+    report = miner.mine()
+    save_report(report)
+
+    print(f"[STATS] 하드 이미지 {report['hard_images']}/{report['total_images']}장")
+    for part in report['parts'][:args.top_k]:
+        print(f"   {part['part_id']}: 난이도 {part['hardness']:.3f} (AP50 {part['ap50']:.3f}, "
+              f"혼동 {part['confused_with'] or '-'})")
+
+    if args.dry_run:
+        print(json.dumps(build_render_requests(report, args.top_k, args.renders_per_part), indent=2, ensure_ascii=False))
+        return
+
+    from auto_requeue_system_enhanced import AutoRequeueSystemEnhanced
+    from supabase import create_client
+    supabase = create_client(os.getenv('VITE_SUPABASE_URL'), os.getenv('VITE_SUPABASE_SERVICE_ROLE'))
+    AutoRequeueSystemEnhanced(supabase).enqueue_hard_examples(report, args.top_k, args.renders_per_part)
+
+
+if __name__ == '__main__':
+    main()
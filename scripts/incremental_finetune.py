@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+증분 파인튜닝 (신규 부품만 학습)
+- 현재 등록 모델(.pt)에서 시작하여 분류 헤드를 신규 부품 수만큼 확장 (기존 클래스 가중치 유지)
+- 신규 부품 데이터 + 기존 부품 리플레이 버퍼(부품별 샘플)로 짧게 파인튜닝 (망각 방지)
+- 병합 모델(기존 + 신규 class_names)을 model_registry에 등록
+"""
+
+import os
+import sys
+import math
+import random
+import shutil
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+IMAGE_EXTENSIONS = ('.webp', '.png', '.jpg', '.jpeg')
+MODEL_CACHE_DIR = Path('output/models/cache')
+DEFAULT_OUTPUT_DIR = Path('output/training/incremental')
+
+# 증분 학습 기본값 (전체 재학습 대비 짧은 에폭, 낮은 학습률, 백본 고정)
+DEFAULT_EPOCHS = 20
+DEFAULT_LR0 = 0.001
+DEFAULT_FREEZE = 10            # YOLO11 백본 레이어 수
+DEFAULT_REPLAY_PER_CLASS = 30  # 기존 부품당 리플레이 학습 이미지 수
+REPLAY_VAL_RATIO = 0.2         # 리플레이 검증 이미지 비율 (기존 부품 성능 저하 감시)
+
+
+class IncrementalUnavailable(RuntimeError):
+    """증분 학습 전제 불충족 (기준 모델 없음 / 헤드 확장 불가) - 모델 등록 전에만 발생, 전체 학습으로 대체 가능"""
+
+
+def _dataset_synthetic_root() -> Path:
+    try:
+        from scripts.utils.path_config import get_dataset_synthetic_path
+        return Path(get_dataset_synthetic_path())
+    except ImportError:
+        return Path('output/synthetic/dataset_synthetic')
+
+
+def _list_images(directory: Path) -> List[Path]:
+    if not directory or not directory.exists():
+        return []
+    return sorted(p for p in directory.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def _label_path_for(image_path: Path) -> Path:
+    """Ultralytics 규칙: .../images/{split}/x.webp -> .../labels/{split}/x.txt"""
+    parts = list(image_path.parts)
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i] == 'images':
+            parts[i] = 'labels'
+            break
+    return Path(*parts).with_suffix('.txt')
+
+
+def _read_dataset_yaml(dataset_yaml) -> dict:
+    if yaml is None:
+        raise ImportError("PyYAML이 필요합니다: pip install pyyaml")
+    with open(dataset_yaml, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def _split_dir(dataset_config: dict, dataset_yaml, split: str) -> Optional[Path]:
+    value = dataset_config.get(split)
+    if not value:
+        return None
+    path = Path(value)
+    if not path.is_absolute():
+        path = Path(dataset_config.get('path') or Path(dataset_yaml).parent) / path
+    return path if path.exists() else None
+
+
+def _names_list(names) -> List[str]:
+    """YOLO names(dict 또는 list) -> 클래스 ID 순서의 문자열 리스트"""
+    if isinstance(names, dict):
+        return [str(names[i]) for i in sorted(names)]
+    return [str(n) for n in (names or [])]
+
+
+# ============================================
+# 기준 모델 조회
+# ============================================
+
+def fetch_registered_weights(stage: str = 'stage1') -> Tuple[Path, List[str], dict]:
+    """model_registry 활성 모델의 PyTorch 가중치를 로컬 캐시로 받아 (경로, class_names, 레코드) 반환"""
+    from supabase import create_client
+
+    url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
+    key = (
+        os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        or os.getenv('VITE_SUPABASE_SERVICE_ROLE')
+        or os.getenv('VITE_SUPABASE_ANON_KEY')
+    )
+    if not url or not key:
+        raise IncrementalUnavailable("Supabase 환경변수가 없어 등록 모델을 조회할 수 없습니다")
+    supabase = create_client(url, key)
+
+    stages = ['stage1', 'single'] if stage == 'stage1' else [stage]
+    result = supabase.table('model_registry').select('*') \
+        .eq('is_active', True) \
+        .in_('model_stage', stages) \
+        .not_.is_('pt_model_path', 'null') \
+        .order('created_at', desc=True) \
+        .limit(1) \
+        .execute()
+    if not result.data:
+        raise IncrementalUnavailable(f"활성 {stage} 모델(.pt)이 model_registry에 없습니다")
+
+    record = result.data[0]
+    class_names = (record.get('training_metadata') or {}).get('class_names') or []
+    # 내용 해시 저장소 경유: 등록 해시와 같은 파일이 있으면 다운로드 생략
+    sys.path.insert(0, str(Path(__file__).parent))
+    from model_artifact_store import artifact_sha256, get_model_store
+
+    store = get_model_store()
+    blob = store.fetch_storage_object(record['pt_model_path'], artifact_sha256(record, 'pt'))
+    local_path = store.materialize(blob, MODEL_CACHE_DIR / record['pt_model_path'])
+    return local_path, [str(n) for n in class_names], record
+
+
+# ============================================
+# 클래스 헤드 확장
+# ============================================
+
+def expand_class_head(model, merged_names: List[str]) -> int:
+    """YOLO Detect/Segment 헤드의 분류 출력(cv3 마지막 Conv)을 merged_names 크기로 확장
+
+    기존 클래스 가중치/바이어스는 그대로 복사하고, 신규 클래스는 Ultralytics 기본
+    바이어스 초기값(클래스 사전확률)으로 시작한다. 확장된 클래스 수를 반환.
+    """
+    import torch
+    import torch.nn as nn
+
+    net = model.model
+    head = net.model[-1]
+    if not hasattr(head, 'nc') or getattr(head, 'cv3', None) is None:
+        raise IncrementalUnavailable(f"분류 헤드(cv3)를 확장할 수 없는 모델입니다: {type(head).__name__}")
+    old_nc, new_nc = int(head.nc), len(merged_names)
+    if new_nc < old_nc:
+        raise IncrementalUnavailable(f"병합 클래스 수({new_nc})가 기존 클래스 수({old_nc})보다 작습니다")
+
+    if new_nc > old_nc:
+        for attr in ('cv3', 'one2one_cv3'):
+            branches = getattr(head, attr, None)
+            if branches is None:
+                continue
+            for i, branch in enumerate(branches):
+                old_conv = branch[-1]
+                new_conv = nn.Conv2d(old_conv.in_channels, new_nc, old_conv.kernel_size,
+                                     old_conv.stride, old_conv.padding, bias=True)
+                new_conv = new_conv.to(device=old_conv.weight.device, dtype=old_conv.weight.dtype)
+                with torch.no_grad():
+                    new_conv.weight[:old_nc] = old_conv.weight
+                    stride = float(head.stride[i]) if head.stride is not None and len(head.stride) > i else 8.0 * 2 ** i
+                    new_conv.bias.fill_(math.log(5 / new_nc / (640 / stride) ** 2))
+                    new_conv.bias[:old_nc] = old_conv.bias
+                branch[-1] = new_conv
+
+        head.nc = new_nc
+        head.no = new_nc + head.reg_max * 4
+
+    net.names = {i: name for i, name in enumerate(merged_names)}
+    if isinstance(getattr(net, 'yaml', None), dict):
+        net.yaml['nc'] = new_nc
+    return new_nc - old_nc
+
+
+# ============================================
+# 신규 + 리플레이 데이터셋 구성
+# ============================================
+
+def _link_or_copy(src: Path, dst: Path):
+    try:
+        os.symlink(src.resolve(), dst)
+    except (OSError, NotImplementedError):
+        # 심볼릭 링크 권한이 없는 환경(Windows 등)은 복사
+        shutil.copy2(src, dst)
+
+
+def _write_sample(image_path: Path, class_id_map, split: str, output_dir: Path, used_names: set) -> bool:
+    """이미지를 병합 데이터셋에 연결하고 라벨 클래스 ID를 병합 ID로 변환하여 기록"""
+    label_path = _label_path_for(image_path)
+    if not label_path.exists():
+        return False
+
+    lines = []
+    for line in label_path.read_text(encoding='utf-8').splitlines():
+        values = line.split()
+        if len(values) < 5:
+            continue
+        merged_id = class_id_map(int(float(values[0])))
+        if merged_id is None:
+            continue
+        values[0] = str(merged_id)
+        lines.append(' '.join(values))
+    if not lines:
+        return False
+
+    name = image_path.name
+    stem, suffix = image_path.stem, image_path.suffix
+    counter = 1
+    while name in used_names:
+        name = f"{stem}_{counter}{suffix}"
+        counter += 1
+    used_names.add(name)
+
+    _link_or_copy(image_path, output_dir / 'images' / split / name)
+    (output_dir / 'labels' / split / Path(name).with_suffix('.txt').name).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return True
+
+
+def build_incremental_dataset(new_dataset_yaml, base_names: List[str], output_dir,
+                              replay_per_class: int = DEFAULT_REPLAY_PER_CLASS,
+                              replay_root: Optional[Path] = None, seed: int = 0) -> Tuple[Path, List[str], Dict]:
+    """신규 부품 데이터셋 + 기존 부품 리플레이 샘플로 병합 데이터셋 생성
+
+    반환: (dataset.yaml 경로, 병합 class_names(기존 순서 유지 + 신규 추가), 통계)
+    """
+    new_config = _read_dataset_yaml(new_dataset_yaml)
+    new_names = _names_list(new_config.get('names'))
+    merged_names = list(base_names) + [n for n in new_names if n not in base_names]
+    merged_index = {name: i for i, name in enumerate(merged_names)}
+
+    output_dir = Path(output_dir)
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    for split in ('train', 'val'):
+        (output_dir / 'images' / split).mkdir(parents=True, exist_ok=True)
+        (output_dir / 'labels' / split).mkdir(parents=True, exist_ok=True)
+
+    stats = {'new_train': 0, 'new_val': 0, 'replay_train': 0, 'replay_val': 0, 'replay_missing': []}
+    used_names = {'train': set(), 'val': set()}
+
+    # 1) 신규 데이터 전체 (데이터셋 클래스 ID -> 병합 ID)
+    def new_map(class_id):
+        return merged_index.get(new_names[class_id]) if 0 <= class_id < len(new_names) else None
+
+    for split in ('train', 'val'):
+        for image_path in _list_images(_split_dir(new_config, new_dataset_yaml, split)):
+            if _write_sample(image_path, new_map, split, output_dir, used_names[split]):
+                stats[f'new_{split}'] += 1
+
+    # 2) 기존 부품 리플레이 (부품 단위 데이터셋: dataset_synthetic/{part}/images/{split}, 라벨은 단일 클래스)
+    rng = random.Random(seed)
+    replay_root = Path(replay_root) if replay_root else _dataset_synthetic_root()
+    replay_counts = {'train': replay_per_class, 'val': max(1, int(replay_per_class * REPLAY_VAL_RATIO))}
+    new_set = set(new_names)
+    for part_name in base_names:
+        if part_name in new_set:
+            continue
+        part_dir = replay_root / part_name
+        if not part_dir.exists():
+            stats['replay_missing'].append(part_name)
+            continue
+
+        def replay_map(_class_id, merged_id=merged_index[part_name]):
+            return merged_id
+
+        for split, count in replay_counts.items():
+            candidates = _list_images(part_dir / 'images' / split)
+            for image_path in rng.sample(candidates, min(count, len(candidates))):
+                if _write_sample(image_path, replay_map, split, output_dir, used_names[split]):
+                    stats[f'replay_{split}'] += 1
+
+    dataset_yaml = output_dir / 'dataset.yaml'
+    with open(dataset_yaml, 'w', encoding='utf-8') as f:
+        yaml.dump({
+            'path': str(output_dir.absolute()),
+            'train': 'images/train',
+            'val': 'images/val',
+            'nc': len(merged_names),
+            'names': merged_names,
+        }, f, default_flow_style=False, allow_unicode=True)
+
+    print(f"[DATASET] 증분 데이터셋: 신규 {stats['new_train']}/{stats['new_val']}장, "
+          f"리플레이 {stats['replay_train']}/{stats['replay_val']}장 (train/val), "
+          f"리플레이 데이터 없는 부품 {len(stats['replay_missing'])}개")
+    return dataset_yaml, merged_names, stats
+
+
+# ============================================
+# 파인튜닝
+# ============================================
+
+def finetune_incremental(base_weights, new_dataset_yaml, base_names: Optional[List[str]] = None,
+                         output_dir=DEFAULT_OUTPUT_DIR, name: Optional[str] = None,
+                         epochs: int = DEFAULT_EPOCHS, batch: int = 16, imgsz: int = 640,
+                         lr0: float = DEFAULT_LR0, freeze: int = DEFAULT_FREEZE, device: Optional[str] = None,
+                         replay_per_class: int = DEFAULT_REPLAY_PER_CLASS, patience: int = 10,
+                         workers: int = 4) -> Optional[Dict]:
+    """기준 모델에서 헤드 확장 후 신규 + 리플레이 데이터로 파인튜닝
+
+    신규 부품이 없으면 None 반환. 결과: best 가중치 경로, 병합 class_names, 신규 부품, 메트릭.
+    """
+    from ultralytics import YOLO
+    import torch
+
+    model = YOLO(str(base_weights))
+    base_names = list(base_names) if base_names else _names_list(model.names)
+
+    name = name or f"incremental_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_dir = Path(output_dir)
+    dataset_yaml, merged_names, stats = build_incremental_dataset(
+        new_dataset_yaml, base_names, run_dir / 'datasets' / name, replay_per_class
+    )
+    new_parts = merged_names[len(base_names):]
+    if not new_parts:
+        print("[SKIP] 기준 모델에 없는 신규 부품이 없어 증분 학습을 건너뜁니다")
+        return None
+    if stats['new_train'] == 0:
+        raise RuntimeError("신규 부품 학습 이미지가 없습니다")
+
+    added = expand_class_head(model, merged_names)
+    print(f"[HEAD] 분류 헤드 확장: {len(base_names)} -> {len(merged_names)} 클래스 (+{added})")
+
+    if device is None:
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+
+    start = datetime.now()
+    results = model.train(
+        data=str(dataset_yaml),
+        epochs=epochs,
+        batch=batch,
+        imgsz=imgsz,
+        device=device,
+        project=str(run_dir),
+        name=name,
+        lr0=lr0,
+        lrf=0.1,
+        warmup_epochs=1,
+        freeze=freeze,
+        patience=patience,
+        workers=workers,
+        optimizer='AdamW',
+        plots=False,
+        exist_ok=True,
+    )
+    training_time = (datetime.now() - start).total_seconds()
+
+    trainer = getattr(model, 'trainer', None)
+    best = Path(getattr(trainer, 'best', '') or run_dir / name / 'weights' / 'best.pt')
+    metrics = {k: float(v) for k, v in (getattr(results, 'results_dict', None) or {}).items()}
+    print(f"[OK] 증분 학습 완료: {training_time:.1f}초, 신규 부품 {len(new_parts)}개, best={best}")
+
+    return {
+        'best': str(best),
+        'class_names': merged_names,
+        'new_parts': new_parts,
+        'base_weights': str(base_weights),
+        'dataset_yaml': str(dataset_yaml),
+        'dataset_stats': stats,
+        'metrics': metrics,
+        'training_time': training_time,
+    }
+
+
+def run_registered_incremental(dataset_yaml, config: dict, stages=('stage1', 'stage2'),
+                               register=None) -> Dict[str, Optional[Dict]]:
+    """등록된 활성 모델(단계별)을 증분 파인튜닝하고 ONNX 변환 후 병합 모델로 재등록
+
+    register: (pt 경로, onnx 경로, config) 등록 함수 (기본: local_yolo_training.upload_and_register_model)
+    IncrementalUnavailable은 아무 단계도 등록되기 전에만 전달된다 (이후 단계에서는 RuntimeError로 변환).
+    """
+    from ultralytics import YOLO
+    if register is None:
+        sys.path.insert(0, str(Path(__file__).parent))
+        from local_yolo_training import upload_and_register_model as register
+
+    outcomes = {}
+    registered = []
+    for stage in stages:
+        print(f"\n[INCREMENTAL] {stage} 증분 학습 시작")
+        try:
+            base_weights, base_names, record = fetch_registered_weights(stage)
+            outcome = finetune_incremental(
+                base_weights, dataset_yaml, base_names or None,
+                name=f"{stage}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                epochs=config.get('incremental_epochs', DEFAULT_EPOCHS),
+                batch=config.get('batch_size', 16),
+                imgsz=config.get('imgsz', 640),
+                device=config.get('device'),
+                replay_per_class=config.get('replay_per_class', DEFAULT_REPLAY_PER_CLASS),
+                workers=config.get('workers', 4),
+            )
+        except IncrementalUnavailable as e:
+            # 앞 단계가 이미 등록되었으면 전체 학습 대체 시 중복 등록되므로 실패로 처리
+            if registered:
+                raise RuntimeError(f"{stage} 증분 학습 불가 ({', '.join(registered)} 등록 후): {e}") from e
+            raise
+        outcomes[stage] = outcome
+        if outcome is None:
+            continue
+
+        onnx_path = None
+        try:
+            onnx_path = YOLO(outcome['best']).export(format='onnx', imgsz=config.get('imgsz', 640), simplify=True, opset=12)
+        except Exception as e:
+            print(f"[WARN] {stage} ONNX 변환 실패: {e}")
+
+        stage_config = dict(config)
+        stage_config.update({
+            'model_stage': stage,
+            'class_names': outcome['class_names'],
+            'trained_parts': outcome['class_names'],
+            'num_classes': len(outcome['class_names']),
+            'epochs': config.get('incremental_epochs', DEFAULT_EPOCHS),
+            'incremental': {
+                'base_model': record.get('model_name'),
+                'new_parts': outcome['new_parts'],
+                'replay_train': outcome['dataset_stats']['replay_train'],
+            },
+        })
+        register(outcome['best'], onnx_path, stage_config)
+        registered.append(stage)
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='증분 파인튜닝 (신규 부품 + 리플레이 버퍼)')
+    parser.add_argument('--data', required=True, help='신규 부품 dataset.yaml')
+    parser.add_argument('--model', help='기준 모델 .pt (미지정 시 model_registry 활성 모델)')
+    parser.add_argument('--stage', choices=['stage1', 'stage2', 'hybrid'], default='hybrid', help='등록 모델 단계')
+    parser.add_argument('--epochs', type=int, default=DEFAULT_EPOCHS)
+    parser.add_argument('--batch', type=int, default=16)
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--device', help='cuda 또는 cpu')
+    parser.add_argument('--replay-per-class', type=int, default=DEFAULT_REPLAY_PER_CLASS)
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT_DIR), help='로컬 모델 사용 시 출력 디렉토리')
+    args = parser.parse_args()
+
+    try:
+        if args.model:
+            outcome = finetune_incremental(
+                args.model, args.data, output_dir=args.output, epochs=args.epochs, batch=args.batch,
+                imgsz=args.imgsz, device=args.device, replay_per_class=args.replay_per_class,
+            )
+            print(f"[RESULT] {outcome['best'] if outcome else '신규 부품 없음'}")
+        else:
+            stages = ('stage1', 'stage2') if args.stage == 'hybrid' else (args.stage,)
+            run_registered_incremental(args.data, {
+                'incremental_epochs': args.epochs,
+                'batch_size': args.batch,
+                'imgsz': args.imgsz,
+                'device': args.device,
+                'replay_per_class': args.replay_per_class,
+            }, stages)
+    except Exception as e:
+        print(f"[ERROR] 증분 학습 실패: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
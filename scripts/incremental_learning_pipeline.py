@@ -48,7 +48,7 @@ class IncrementalLearningPipeline:
             "model_path": "models/current_model.pt",
             "new_data_path": "output/synthetic/dataset_synthetic",
             "output_path": "models/incremental",
-            "epochs": 100,
+            "epochs": 20,
             "batch_size": 16,
             "learning_rate": 0.001,
             "device": "cuda",
@@ -56,7 +56,8 @@ class IncrementalLearningPipeline:
             "patience": 10,
             "save_period": 10,
             "validation_split": 0.2,
-            "min_improvement": 0.001
+            "min_improvement": 0.001,
+            "replay_per_class": 30
         }
     
     def save_config(self):
@@ -77,10 +78,9 @@ class IncrementalLearningPipeline:
         if not os.path.exists(self.config['new_data_path']):
             raise FileNotFoundError(f"새 데이터를 찾을 수 없습니다: {self.config['new_data_path']}")
         
-        # YOLO 학습 스크립트 존재 확인
-        yolo_script = "scripts/train_yolo_incremental.py"
-        if not os.path.exists(yolo_script):
-            raise FileNotFoundError(f"YOLO 학습 스크립트를 찾을 수 없습니다: {yolo_script}")
+        # 새 데이터는 dataset.yaml (파일 또는 디렉토리 내) 형식이어야 함
+        if not self.resolve_dataset_yaml(self.config['new_data_path']):
+            raise FileNotFoundError(f"새 데이터의 dataset.yaml을 찾을 수 없습니다: {self.config['new_data_path']}")
         
         logger.info("전제 조건 확인 완료")
         return True
@@ -108,40 +108,52 @@ class IncrementalLearningPipeline:
         # 검증 스크립트가 없으면 전체 새 데이터 사용
         return self.config['new_data_path']
     
+    def resolve_dataset_yaml(self, data_path):
+        """데이터 경로(dataset.yaml 파일 또는 이를 포함한 디렉토리) -> dataset.yaml 경로"""
+        path = Path(data_path)
+        if path.is_file() and path.suffix in ('.yaml', '.yml'):
+            return path
+        candidate = path / 'dataset.yaml'
+        return candidate if candidate.exists() else None
+    
     def run_incremental_training(self, data_path):
-        """증분 학습 실행"""
+        """증분 학습 실행 (현재 모델의 헤드를 확장하여 신규 부품 + 리플레이 버퍼로 파인튜닝)"""
         logger.info("증분 학습 시작...")
         
+        sys.path.insert(0, str(Path(__file__).parent))
+        from incremental_finetune import finetune_incremental
+        
         # 출력 디렉토리 생성
         os.makedirs(self.config['output_path'], exist_ok=True)
         
-        # YOLO 증분 학습 명령어 구성
-        cmd = [
-            sys.executable, "scripts/train_yolo_incremental.py",
-            "--model", self.config['model_path'],
-            "--data", data_path,
-            "--epochs", str(self.config['epochs']),
-            "--batch", str(self.config['batch_size']),
-            "--lr", str(self.config['learning_rate']),
-            "--device", self.config['device'],
-            "--imgsz", str(self.config['imgsz']),
-            "--patience", str(self.config['patience']),
-            "--save-period", str(self.config['save_period']),
-            "--project", self.config['output_path'],
-            "--name", f"incremental_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        ]
-        
-        logger.info(f"학습 명령어: {' '.join(cmd)}")
+        dataset_yaml = self.resolve_dataset_yaml(data_path)
+        if not dataset_yaml:
+            raise FileNotFoundError(f"dataset.yaml을 찾을 수 없습니다: {data_path}")
         
         try:
-            # 학습 실행
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            logger.info("증분 학습 완료")
-            return result.stdout
-        except subprocess.CalledProcessError as e:
+            outcome = finetune_incremental(
+                self.config['model_path'],
+                dataset_yaml,
+                output_dir=self.config['output_path'],
+                name=f"incremental_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                epochs=self.config['epochs'],
+                batch=self.config['batch_size'],
+                imgsz=self.config['imgsz'],
+                lr0=self.config['learning_rate'],
+                device=self.config['device'],
+                patience=self.config['patience'],
+                replay_per_class=self.config.get('replay_per_class', 30)
+            )
+        except Exception as e:
             logger.error(f"증분 학습 실패: {e}")
-            logger.error(f"오류 출력: {e.stderr}")
             raise
+        
+        if outcome is None:
+            logger.info("신규 부품이 없어 증분 학습을 건너뜀")
+        else:
+            self.last_training = outcome
+            logger.info(f"증분 학습 완료: 신규 부품 {len(outcome['new_parts'])}개, {outcome['training_time']:.1f}초")
+        return outcome
     
     def evaluate_model(self, model_path):
         """모델 성능 평가"""
@@ -266,9 +278,11 @@ class IncrementalLearningPipeline:
             
             # 3. 증분 학습 실행
             training_output = self.run_incremental_training(data_path)
+            if training_output is None:
+                return {"status": "success", "deployed": False, "metrics": None, "reason": "no_new_parts"}
             
-            # 4. 학습된 모델 경로 찾기
-            model_path = self.find_trained_model()
+            # 4. 학습된 모델 경로 (이번 실행의 best.pt)
+            model_path = training_output['best'] if Path(training_output['best']).exists() else self.find_trained_model()
             if not model_path:
                 raise FileNotFoundError("학습된 모델을 찾을 수 없습니다")
             
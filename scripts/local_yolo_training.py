@@ -71,6 +71,12 @@ except ImportError as e:
     print("다음 명령어로 설치하세요: pip install ultralytics torch")
     sys.exit(1)
 
+# 학습 이미지 전처리 캐시 (scripts/training_image_cache.py)
+sys.path.insert(0, str(Path(__file__).parent))
+from training_image_cache import build_image_cache, build_cached_trainer
+from training_progress_reporter import get_progress_reporter
+from model_artifact_store import get_model_store
+
 def setup_supabase(override_url: str | None = None, override_key: str | None = None):
     """Supabase 클라이언트 설정 (Service Role 우선)"""
     # 환경변수 디버깅
@@ -102,26 +108,15 @@ def setup_supabase(override_url: str | None = None, override_key: str | None = N
     
     return create_client(url, key)
 
-def update_training_progress(supabase, job_id, epoch, total_epochs, metrics=None):
-    """학습 진행률을 데이터베이스에 업데이트"""
+def get_job_reporter(job_id, supabase=None):
+    """작업별 비동기 진행률 리포터 (DB 쓰기는 백그라운드 스레드에서 병합/간격 제한 후 전송)"""
+    return get_progress_reporter(job_id, client=supabase, client_factory=setup_supabase)
+
+def update_training_progress(supabase, job_id, epoch, total_epochs, metrics=None, **extra):
+    """학습 진행률을 데이터베이스에 업데이트 (논블로킹, 최소 간격 내 호출은 최신 값으로 병합)"""
     try:
-        progress_data = {
-            'current_epoch': epoch,
-            'total_epochs': total_epochs,
-            'percent': round((epoch / total_epochs) * 100, 2),
-            'status': 'training',
-            'metrics': metrics or {}
-        }
-        
-        # training_jobs 테이블 업데이트
-        supabase.table('training_jobs').update({
-            'progress': progress_data,
-            'status': 'training',
-            'updated_at': datetime.now().isoformat()
-        }).eq('id', job_id).execute()
-        
-        print(f"[PROGRESS] 진행률 업데이트: {epoch}/{total_epochs} ({progress_data['percent']}%)")
-        
+        get_job_reporter(job_id, supabase).report_progress(epoch, total_epochs, metrics, **extra)
+        print(f"[PROGRESS] 진행률 업데이트: {epoch}/{total_epochs} ({round((epoch / total_epochs) * 100, 2)}%)")
     except Exception as e:
         print(f"[WARN] 진행률 업데이트 실패: {e}")
 
@@ -148,27 +143,10 @@ def setup_logging():
     return logging.getLogger(__name__)
 
 def update_training_status(job_id, status, progress=None, metrics=None):
-    """학습 상태를 데이터베이스에 업데이트"""
+    """학습 상태를 데이터베이스에 업데이트 (진행률 리포터를 통해 즉시 전송 예약)"""
     try:
-        import requests
-        
-        # Supabase API 호출 (실제 구현 시 환경변수에서 URL 가져오기)
-        supabase_url = os.getenv('VITE_SUPABASE_URL', 'https://npferbxuxocbfnfbpcnz.supabase.co')
-        supabase_key = os.getenv('VITE_SUPABASE_ANON_KEY', 'your-anon-key')
-        
-        # 학습 상태 업데이트
-        update_data = {
-            'status': status,
-            'updated_at': datetime.now().isoformat()
-        }
-        
-        if progress:
-            update_data['progress'] = progress
-            
-        if metrics:
-            update_data['metrics'] = metrics
+        get_job_reporter(job_id).report_status(status, progress=progress, metrics=metrics)
         
-        # 실제 구현 시 Supabase REST API 호출
         print(f"[STATS] 학습 상태 업데이트: {status}")
         if progress:
             print(f"[PROGRESS] 진행률: {progress}")
@@ -784,9 +762,131 @@ def update_part_training_status(set_num, part_id, metrics):
     except Exception as e:
         print(f"[ERROR] 부품 학습 상태 업데이트 실패: {e}")
 
+def _stage_training_worker(dataset_yaml, stage_config, num_threads, progress_queue):
+    """병렬 하이브리드 학습 자식 프로세스: 한 단계 학습 후 결과(가중치 경로, 메트릭)를 큐로 전달"""
+    stage = stage_config['model_stage']
+    try:
+        torch.set_num_threads(num_threads)
+        stage_config['progress_queue'] = progress_queue
+        results, model = train_yolo_model(dataset_yaml, stage_config, None)
+        
+        trainer = getattr(model, 'trainer', None)
+        best_path = str(getattr(trainer, 'best', '') or '') if trainer else ''
+        progress_queue.put(('result', stage, {
+            'best': best_path,
+            'save_dir': str(getattr(results, 'save_dir', '') or ''),
+            'results_dict': {k: float(v) for k, v in getattr(results, 'results_dict', {}).items()},
+            'class_names': stage_config.get('class_names', []),
+            'trained_parts': stage_config.get('trained_parts', []),
+            'num_classes': stage_config.get('num_classes', 1)
+        }))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        progress_queue.put(('error', stage, str(e)))
+
+def split_cpu_budget(cpu_budget=None):
+    """CPU 스레드 예산을 1단계/2단계에 분배 (YOLO11s는 YOLO11n 대비 연산량이 약 3배이므로 1:2)"""
+    budget = max(2, cpu_budget or os.cpu_count() or 2)
+    stage1_threads = max(1, budget // 3)
+    return {'stage1': stage1_threads, 'stage2': max(1, budget - stage1_threads)}
+
+def train_stages_parallel(dataset_yaml, config, job_id=None, supabase=None):
+    """1단계/2단계를 별도 프로세스로 동시 학습 (CPU 스레드 예산 분할, 진행률 통합 기록)"""
+    import queue as queue_module
+    from types import SimpleNamespace
+    
+    ctx = multiprocessing.get_context('spawn')
+    progress_queue = ctx.Queue()
+    threads = split_cpu_budget(config.get('cpu_budget'))
+    # 데이터로더 워커도 두 프로세스가 나눠 사용
+    workers_per_stage = max(1, config.get('workers', 4) // 2)
+    
+    processes = {}
+    for stage in ('stage1', 'stage2'):
+        stage_config = config.copy()
+        stage_config['model_stage'] = stage
+        stage_config['workers'] = workers_per_stage
+        
+        # BLAS/OpenMP 스레드 수는 자식 프로세스 시작 시점 환경변수로 결정됨
+        previous = {var: os.environ.get(var) for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS')}
+        for var in previous:
+            os.environ[var] = str(threads[stage])
+        process = ctx.Process(
+            target=_stage_training_worker,
+            args=(dataset_yaml, stage_config, threads[stage], progress_queue),
+            name=f'hybrid-{stage}'
+        )
+        process.start()
+        for var, value in previous.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+        processes[stage] = process
+        print(f"[PARALLEL] {stage} 학습 프로세스 시작 (PID {process.pid}, 스레드 {threads[stage]}, 워커 {workers_per_stage})")
+    
+    stage_progress = {stage: {'current_epoch': 0, 'total_epochs': config.get('epochs', 100), 'metrics': {}} for stage in processes}
+    outcomes = {}
+    
+    def all_reported():
+        return len(outcomes) == len(processes)
+    
+    while not all_reported():
+        try:
+            kind, stage, payload = progress_queue.get(timeout=5)
+        except queue_module.Empty:
+            # 결과 보고 없이 종료된 프로세스 (비정상 종료)
+            for stage, process in processes.items():
+                if stage not in outcomes and not process.is_alive():
+                    outcomes[stage] = ('error', f'프로세스 비정상 종료 (exit code {process.exitcode})')
+            continue
+        
+        if kind == 'progress':
+            stage_progress[stage] = payload
+            done = sum(p['current_epoch'] for p in stage_progress.values())
+            total = sum(p['total_epochs'] for p in stage_progress.values())
+            percent = round(done / total * 100, 2) if total else 0.0
+            print(f"[PROGRESS] {stage}: {payload['current_epoch']}/{payload['total_epochs']} (전체 {percent}%)")
+            if job_id:
+                get_job_reporter(job_id, supabase).update({
+                    'progress': {
+                        'current_epoch': min(p['current_epoch'] for p in stage_progress.values()),
+                        'total_epochs': config.get('epochs', 100),
+                        'percent': percent,
+                        'status': 'training',
+                        'parallel': True,
+                        'stages': stage_progress
+                    },
+                    'status': 'training'
+                }, history_entry={'stage': stage, 'epoch': payload['current_epoch'], **payload['metrics']})
+        else:
+            outcomes[stage] = (kind, payload)
+    
+    for process in processes.values():
+        process.join()
+    
+    errors = {stage: payload for stage, (kind, payload) in outcomes.items() if kind == 'error'}
+    if errors:
+        raise RuntimeError(f"병렬 하이브리드 학습 실패: {errors}")
+    
+    # 부모 프로세스에서 best 가중치를 다시 로드하여 이후 저장/ONNX 변환/업로드 경로를 그대로 사용
+    results, models = {}, {}
+    for stage, (_, payload) in outcomes.items():
+        results[stage] = SimpleNamespace(save_dir=payload['save_dir'], results_dict=payload['results_dict'])
+        models[stage] = YOLO(payload['best']) if payload['best'] else None
+        for key in ('class_names', 'trained_parts', 'num_classes'):
+            if payload.get(key):
+                config[key] = payload[key]
+    return results, models
+
 def train_hybrid_models(dataset_yaml, config, job_id=None):
-    """하이브리드 YOLO 모델 학습 (1단계 + 2단계 순차 실행)"""
-    print("[HYBRID] 하이브리드 학습 시작: 1단계 + 2단계 순차 실행")
+    """하이브리드 YOLO 모델 학습 (1단계 + 2단계 순차 실행, parallel_stages 시 동시 실행)"""
+    parallel = bool(config.get('parallel_stages'))
+    if parallel:
+        print("[HYBRID] 하이브리드 학습 시작: 1단계 + 2단계 병렬 실행")
+    else:
+        print("[HYBRID] 하이브리드 학습 시작: 1단계 + 2단계 순차 실행")
     
     # Supabase 클라이언트 설정
     supabase = None
@@ -797,52 +897,62 @@ def train_hybrid_models(dataset_yaml, config, job_id=None):
         except Exception as e:
             print(f"[WARN] Supabase 연결 실패: {e}")
     
+    # 전처리 캐시는 큰 imgsz(2단계) 기준으로 한 번만 생성하여 두 단계가 공유
+    if config.get('image_cache'):
+        use_cpu = not (torch.cuda.is_available() and config.get('device') == 'cuda')
+        try:
+            build_image_cache(dataset_yaml, 512 if use_cpu else config.get('imgsz', 768))
+        except Exception as e:
+            print(f"[WARN] 전처리 캐시 생성 실패 (단계별 기본 데이터로더 사용): {e}")
+    
     results = {}
     
     try:
-        # 1단계 학습 (YOLO11n-seg)
-        print("\n" + "="*60)
-        print("[TARGET] 1단계 학습 시작: YOLO11n-seg (빠른 스캔)")
-        print("="*60)
-        
-        stage1_config = config.copy()
-        stage1_config['model_stage'] = 'stage1'
-        stage1_results, stage1_model = train_yolo_model(dataset_yaml, stage1_config, job_id)
-        results['stage1'] = stage1_results
-        
-        print(f"\n[OK] 1단계 학습 완료: {stage1_results}")
-        
-        # 2단계 학습 (YOLO11s-seg)
-        print("\n" + "="*60)
-        print("[TARGET] 2단계 학습 시작: YOLO11s-seg (정밀 검증)")
-        print("="*60)
-        
-        stage2_config = config.copy()
-        stage2_config['model_stage'] = 'stage2'
-        stage2_results, stage2_model = train_yolo_model(dataset_yaml, stage2_config, job_id)
-        results['stage2'] = stage2_results
-        
-        print(f"\n[OK] 2단계 학습 완료: {stage2_results}")
+        if parallel:
+            print("\n" + "="*60)
+            print("[TARGET] 1단계(YOLO11n-seg) + 2단계(YOLO11s-seg) 동시 학습 시작")
+            print("="*60)
+            
+            start_time = time.time()
+            results, stage_models = train_stages_parallel(dataset_yaml, config, job_id, supabase)
+            stage1_results, stage2_results = results['stage1'], results['stage2']
+            stage1_model, stage2_model = stage_models['stage1'], stage_models['stage2']
+            print(f"\n[OK] 병렬 학습 완료 ({time.time() - start_time:.1f}초)")
+        else:
+            # 1단계 학습 (YOLO11n-seg)
+            print("\n" + "="*60)
+            print("[TARGET] 1단계 학습 시작: YOLO11n-seg (빠른 스캔)")
+            print("="*60)
+            
+            stage1_config = config.copy()
+            stage1_config['model_stage'] = 'stage1'
+            stage1_results, stage1_model = train_yolo_model(dataset_yaml, stage1_config, job_id)
+            results['stage1'] = stage1_results
+            
+            print(f"\n[OK] 1단계 학습 완료: {stage1_results}")
+            
+            # 2단계 학습 (YOLO11s-seg)
+            print("\n" + "="*60)
+            print("[TARGET] 2단계 학습 시작: YOLO11s-seg (정밀 검증)")
+            print("="*60)
+            
+            stage2_config = config.copy()
+            stage2_config['model_stage'] = 'stage2'
+            stage2_results, stage2_model = train_yolo_model(dataset_yaml, stage2_config, job_id)
+            results['stage2'] = stage2_results
+            
+            print(f"\n[OK] 2단계 학습 완료: {stage2_results}")
         
         # 하이브리드 학습 완료 상태 업데이트
-        if supabase and job_id:
-            try:
-                supabase.table('training_jobs').update({
-                    'status': 'completed',
-                    'progress': {
-                        'current_epoch': config.get('epochs', 100),
-                        'total_epochs': config.get('epochs', 100),
-                        'percent': 100,
-                        'status': 'completed',
-                        'stage1_completed': True,
-                        'stage2_completed': True
-                    },
-                    'completed_at': datetime.now().isoformat(),
-                    'updated_at': datetime.now().isoformat()
-                }).eq('id', job_id).execute()
-                print("[OK] 하이브리드 학습 완료 상태 업데이트됨")
-            except Exception as e:
-                print(f"[WARN] 하이브리드 학습 완료 상태 업데이트 실패: {e}")
+        if job_id:
+            get_job_reporter(job_id, supabase).report_status('completed', progress={
+                'current_epoch': config.get('epochs', 100),
+                'total_epochs': config.get('epochs', 100),
+                'percent': 100,
+                'stage1_completed': True,
+                'stage2_completed': True
+            })
+            print("[OK] 하이브리드 학습 완료 상태 업데이트됨")
         
         # 하이브리드 모델 저장 및 업로드
         print("\n" + "="*60)
@@ -993,18 +1103,8 @@ def train_hybrid_models(dataset_yaml, config, job_id=None):
         
     except Exception as e:
         print(f"[ERROR] 하이브리드 학습 실패: {e}")
-        if supabase and job_id:
-            try:
-                supabase.table('training_jobs').update({
-                    'status': 'failed',
-                    'progress': {
-                        'status': 'failed',
-                        'error': str(e)
-                    },
-                    'updated_at': datetime.now().isoformat()
-                }).eq('id', job_id).execute()
-            except Exception as update_error:
-                print(f"[WARN] 실패 상태 업데이트 실패: {update_error}")
+        if job_id:
+            get_job_reporter(job_id, supabase).report_status('failed', progress={'error': str(e)})
         raise e
 
 def train_yolo_model(dataset_yaml, config, job_id=None):
@@ -1079,7 +1179,7 @@ def train_yolo_model(dataset_yaml, config, job_id=None):
             'patience': 25,  # Early stopping (15 → 25, 작은 데이터셋은 더 많은 에폭 필요)
             'save_period': 10,
             'cache': True,
-            'workers': 4,
+            'workers': config.get('workers', 4),
             'optimizer': 'AdamW',
             'lr0': 0.005,  # 0.01 → 0.005 (작은 데이터셋에 적합)
             'lrf': 0.1,  # 0.01 → 0.1 (더 부드러운 감소)
@@ -1134,7 +1234,7 @@ def train_yolo_model(dataset_yaml, config, job_id=None):
             'patience': 25,  # Early stopping (15 → 25, 작은 데이터셋은 더 많은 에폭 필요)
             'save_period': 10,
             'cache': True,
-            'workers': 4,
+            'workers': config.get('workers', 4),
             'optimizer': 'AdamW',
             'lr0': 0.005,  # 0.01 → 0.005 (작은 데이터셋에 적합)
             'lrf': 0.1,  # 0.01 → 0.1 (더 부드러운 감소)
@@ -1176,8 +1276,20 @@ def train_yolo_model(dataset_yaml, config, job_id=None):
     start_time = time.time()
     
     # 실시간 진행률 업데이트를 위한 콜백 함수
+    # 병렬 하이브리드 학습의 자식 프로세스는 DB 대신 부모에게 큐로 전달 (부모가 두 단계 진행률을 합쳐 기록)
+    progress_queue = config.get('progress_queue')
+    
     def on_train_epoch_end(trainer):
-        if supabase and job_id:
+        if progress_queue is not None:
+            metrics = {}
+            if hasattr(trainer, 'metrics') and trainer.metrics:
+                metrics = {k: float(v) for k, v in trainer.metrics.items() if isinstance(v, (int, float))}
+            progress_queue.put(('progress', model_stage, {
+                'current_epoch': trainer.epoch + 1,
+                'total_epochs': training_args['epochs'],
+                'metrics': metrics
+            }))
+        elif job_id:
             epoch = trainer.epoch + 1
             total_epochs = training_args['epochs']
             
@@ -1199,29 +1311,33 @@ def train_yolo_model(dataset_yaml, config, job_id=None):
     # YOLO 모델에 콜백 추가
     model.add_callback('on_train_epoch_end', on_train_epoch_end)
     
-    results = model.train(**training_args)
+    # 전처리 memmap 캐시 사용 시 데이터로더 훅 연결 (Ultralytics RAM 캐시는 중복이므로 비활성화)
+    cached_trainer = None
+    if config.get('image_cache'):
+        try:
+            cache_dir = build_image_cache(dataset_yaml, training_args['imgsz'])
+            cached_trainer = build_cached_trainer(cache_dir)
+            training_args['cache'] = False
+        except Exception as e:
+            print(f"[WARN] 전처리 캐시 사용 불가, 기본 데이터로더로 진행: {e}")
+    
+    if cached_trainer is not None:
+        results = model.train(trainer=cached_trainer, **training_args)
+    else:
+        results = model.train(**training_args)
     end_time = time.time()
     
     training_time = end_time - start_time
     print(f"[TIME] 학습 완료 시간: {training_time:.2f}초")
     
-    # 학습 완료 상태 업데이트
-    if supabase and job_id:
-        try:
-            supabase.table('training_jobs').update({
-                'status': 'completed',
-                'progress': {
-                    'current_epoch': training_args['epochs'],
-                    'total_epochs': training_args['epochs'],
-                    'percent': 100,
-                    'status': 'completed'
-                },
-                'completed_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }).eq('id', job_id).execute()
-            print("[OK] 학습 완료 상태 업데이트됨")
-        except Exception as e:
-            print(f"[WARN] 학습 완료 상태 업데이트 실패: {e}")
+    # 학습 완료 상태 업데이트 (리포터가 대기 중인 진행률과 병합하여 즉시 전송)
+    if job_id:
+        get_job_reporter(job_id, supabase).report_status('completed', progress={
+            'current_epoch': training_args['epochs'],
+            'total_epochs': training_args['epochs'],
+            'percent': 100
+        })
+        print("[OK] 학습 완료 상태 업데이트됨")
     
     return results, model
 
@@ -1297,10 +1413,6 @@ def upload_and_register_model(model_path, onnx_path, config):
             
         supabase = create_client(supabase_url, supabase_key)
         
-        # 모델 파일 읽기
-        with open(model_path, 'rb') as f:
-            model_data = f.read()
-        
         # 파일명 생성 (타임스탬프 + 스테이지 포함) // [FIX] 수정됨
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         stage_label = config.get('model_stage', 'single')
@@ -1309,21 +1421,20 @@ def upload_and_register_model(model_path, onnx_path, config):
         model_name = f"brickbox_s_seg_{stage_label}_{timestamp}"
         pt_bucket_path = f"{model_name}.pt"
         
+        # 재개 가능 청크 업로드 + 로컬 저장소 등록 (sha256은 registry에 기록)
+        store = get_model_store()
+        artifacts = {}
+        
         # PyTorch 모델 업로드
         print(f"[UPLOAD] PyTorch 모델 업로드 중: {pt_bucket_path}")
-        upload_result = supabase.storage.from_('models').upload(
-            pt_bucket_path,
-            model_data
-        )
-        
-        # Supabase Storage 업로드 응답 처리
-        if hasattr(upload_result, 'error') and upload_result.error:
-            print(f"[ERROR] PyTorch 모델 업로드 실패: {upload_result.error}")
-            pt_public_url = f"{supabase_url}/storage/v1/object/public/models/{pt_bucket_path}"
-            print(f"[WARN] 모델 업로드 실패로 인해 예상 공개 URL을 사용합니다: {pt_public_url}")
-        else:
-            pt_public_url = f"{supabase_url}/storage/v1/object/public/models/{pt_bucket_path}"
+        pt_public_url = f"{supabase_url}/storage/v1/object/public/models/{pt_bucket_path}"
+        try:
+            pt_artifact = store.upload(model_path, pt_bucket_path, client=supabase)
+            artifacts['pt'] = {key: pt_artifact[key] for key in ('path', 'sha256', 'size')}
             print(f"[OK] PyTorch 모델 업로드 성공, 공개 URL: {pt_public_url}")
+        except Exception as e:
+            print(f"[ERROR] PyTorch 모델 업로드 실패: {e}")
+            print(f"[WARN] 모델 업로드 실패로 인해 예상 공개 URL을 사용합니다: {pt_public_url}")
         
         # ONNX 모델 업로드 (있는 경우) // [FIX] 수정됨
         onnx_bucket_path = None
@@ -1333,25 +1444,19 @@ def upload_and_register_model(model_path, onnx_path, config):
         if onnx_path_obj and onnx_path_obj.exists():
             onnx_bucket_path = f"{model_name}.onnx"
             print(f"[UPLOAD] ONNX 모델 업로드 중: {onnx_bucket_path}")
-            with open(onnx_path_obj, 'rb') as f:
-                onnx_data = f.read()
-            
-            onnx_upload_result = supabase.storage.from_('models').upload(
-                onnx_bucket_path,
-                onnx_data
-            )
-            
-            if hasattr(onnx_upload_result, 'error') and onnx_upload_result.error:
-                print(f"[ERROR] ONNX 모델 업로드 실패: {onnx_upload_result.error}")
-            else:
-                onnx_public_url = f"{supabase_url}/storage/v1/object/public/models/{onnx_bucket_path}"
+            try:
+                onnx_artifact = store.upload(onnx_path_obj, onnx_bucket_path, client=supabase)
+                artifacts['onnx'] = {key: onnx_artifact[key] for key in ('path', 'sha256', 'size')}
+                onnx_public_url = onnx_artifact['public_url']
                 print(f"[OK] ONNX 모델 업로드 성공, 공개 URL: {onnx_public_url}")
+            except Exception as e:
+                print(f"[ERROR] ONNX 모델 업로드 실패: {e}")
         else:
             print("[WARN] ONNX 파일이 없어 업로드를 건너뜁니다")
         
         # model_registry에 등록
         print(f"[REGISTER] 모델 등록 중: {model_name}")
-        model_size_mb = len(model_data) / (1024 * 1024)
+        model_size_mb = Path(model_path).stat().st_size / (1024 * 1024)
         
         # 동일 stage의 활성 모델만 비활성화 (stage1과 stage2는 별도 관리) // [FIX] 수정됨
         current_stage = config.get('model_stage', 'single')
@@ -1399,7 +1504,11 @@ def upload_and_register_model(model_path, onnx_path, config):
                 # [FIX] 부품 단위 학습 모델: class_names 저장 (classId → part_id 매핑용)
                 'class_names': config.get('class_names', []),  # 부품 단위 학습 시 부품 ID 리스트
                 'trained_parts': config.get('trained_parts', []),  # 학습된 부품 목록 (class_names와 동일)
-                'num_classes': config.get('num_classes', 1)  # 클래스 수
+                'num_classes': config.get('num_classes', 1),  # 클래스 수
+                # 증분 학습 모델: 기준 모델과 이번에 추가된 부품 (전체 학습이면 None)
+                'incremental': config.get('incremental'),
+                # 아티팩트 해시: 기기/검증 스크립트는 해시가 같으면 다운로드 생략
+                'artifacts': artifacts
             }
         }
         
@@ -1433,9 +1542,33 @@ def main():
     parser.add_argument('--job_id', help='학습 작업 ID')
     parser.add_argument('--model_stage', choices=['stage1', 'stage2', 'hybrid'], default='hybrid', 
                        help='하이브리드 모델 단계 (hybrid: 1단계+2단계, stage1: YOLO11n-seg, stage2: YOLO11s-seg)')
+    parser.add_argument('--parallel_stages', action='store_true',
+                       help='하이브리드 학습 시 1단계/2단계를 별도 프로세스로 동시 실행 (CPU 학습 서버용)')
+    parser.add_argument('--cpu_budget', type=int, help='병렬 학습 시 두 프로세스가 나눠 쓸 CPU 스레드 수 (기본: 전체 코어)')
+    parser.add_argument('--workers', type=int, default=4, help='데이터로더 워커 수 (병렬 학습 시 단계별로 분할)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='등록된 활성 모델에서 시작하여 신규 부품만 파인튜닝 (헤드 확장 + 리플레이 버퍼)')
+    parser.add_argument('--replay_per_class', type=int, default=30, help='증분 학습 시 기존 부품당 리플레이 이미지 수')
+    parser.add_argument('--image_cache', action='store_true',
+                       help='학습 이미지를 한 번 디코딩하여 memmap 캐시로 재사용 (데이터셋 해시 기준, 단계/증분 학습 공유)')
+    parser.add_argument('--shards', help='샤드 디렉토리 (dataset_shards.py export 결과)에서 데이터셋 복원 후 학습')
+    parser.add_argument('--benchmark', action='store_true',
+                       help='학습 대신 합성 데이터셋으로 처리량 벤치마크 실행 (workers/batch/cache 스윕, 세부 조합은 training_benchmark.py)')
     
     args = parser.parse_args()
     
+    # 처리량 벤치마크 모드: 학습 노드 사이징/회귀 확인용 (DB/데이터셋 접근 없음)
+    if args.benchmark:
+        from training_benchmark import main as benchmark_main
+        model = 'yolo11s-seg.pt' if args.model_stage == 'stage2' else 'yolo11n-seg.pt'
+        sys.exit(benchmark_main([
+            '--workers', ','.join(str(w) for w in sorted({0, args.workers // 2, args.workers})),
+            '--batch', ','.join(str(b) for b in sorted({max(1, args.batch_size // 2), args.batch_size})),
+            '--imgsz', str(args.imgsz),
+            '--model', model,
+            '--device', args.device
+        ]))
+    
     # 로깅 설정
     logger = setup_logging()
     
@@ -1448,7 +1581,12 @@ def main():
         'imgsz': args.imgsz,
         'device': args.device,
         'job_id': args.job_id,
-        'model_stage': args.model_stage
+        'model_stage': args.model_stage,
+        'parallel_stages': args.parallel_stages,
+        'cpu_budget': args.cpu_budget,
+        'workers': args.workers,
+        'image_cache': args.image_cache,
+        'replay_per_class': args.replay_per_class
     }
     
     print("[START] BrickBox YOLO 학습 시작")
@@ -1463,13 +1601,43 @@ def main():
         actual_part_id = args.part_id
         
         # 3. 데이터셋 준비 (중복 부품 제거 포함)
-        dataset_yaml_result = prepare_dataset(args.set_num, actual_part_id)
+        if args.shards:
+            from dataset_shards import materialize_yolo_dataset
+            dest = Path('output/shard_datasets') / (actual_part_id or args.set_num)
+            elements = [actual_part_id] if actual_part_id else None
+            dataset_yaml_result = str(materialize_yolo_dataset(args.shards, dest, elements))
+        else:
+            dataset_yaml_result = prepare_dataset(args.set_num, actual_part_id)
         if not dataset_yaml_result:
             print("[ERROR] 데이터셋 준비 실패")
             if args.job_id:
                 update_training_status(args.job_id, 'failed', {'error': '데이터셋 준비 실패'})
             sys.exit(1)
         
+        dataset_yaml = dataset_yaml_result
+        
+        # 4-1. 증분 학습: 기존 모델 + 신규 부품만 파인튜닝 후 병합 모델 등록
+        if args.incremental:
+            from incremental_finetune import IncrementalUnavailable, run_registered_incremental
+            stages = ('stage1', 'stage2') if args.model_stage == 'hybrid' else (args.model_stage,)
+            try:
+                outcomes = run_registered_incremental(dataset_yaml, config, stages, register=upload_and_register_model)
+                trained = {stage: o for stage, o in outcomes.items() if o}
+                if trained:
+                    first = next(iter(trained.values()))
+                    update_part_training_status(args.set_num, actual_part_id, {
+                        'mAP50': first['metrics'].get('metrics/mAP50(M)', first['metrics'].get('metrics/mAP50(B)', 0.0)),
+                        'precision': first['metrics'].get('metrics/precision(M)', first['metrics'].get('metrics/precision(B)', 0.0)),
+                        'recall': first['metrics'].get('metrics/recall(M)', first['metrics'].get('metrics/recall(B)', 0.0))
+                    })
+                if args.job_id:
+                    update_training_status(args.job_id, 'completed', {'incremental': True, 'stages': list(trained)})
+                print("[OK] 증분 학습 완료!")
+                return
+            except IncrementalUnavailable as e:
+                # 기준 모델이 없거나 헤드 확장 불가 (등록 전) 시에만 전체 학습으로 진행, 그 외 오류는 실패 처리
+                print(f"[WARN] 증분 학습 불가, 전체 학습으로 진행: {e}")
+        
         # 4. YOLO 모델 학습
         print("[START] YOLO 모델 학습 시작...")
         results, model = train_yolo_model(dataset_yaml, config, args.job_id)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+세그멘테이션 마스크 COCO RLE 인코더/디코더 (NumPy 벡터화)
+- 마스크 → 열 우선(Fortran) 순서 run 길이 (np.diff 기반 경계 검출, 픽셀 루프 없음)
+- run 길이 → COCO 압축 counts 문자열 (pycocotools rleToString 호환, 5비트 가변 길이 + 델타)
+- 마스크 소스: 깊이 EXR(배경 Z ≈ clip_end 이상/무한대) 우선, 없으면 polygon_uv 래스터화
+- E2 annotation.segmentation 필드: rle_base64(counts의 base64), compressed_size(counts 바이트 수), size, area
+
+실행 방법:
+    python scripts/mask_rle.py output/synthetic/dataset_synthetic/6335317/meta/6335317_000.json
+"""
+
+import os
+import sys
+import json
+import base64
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+RLE_FORMAT = 'coco_rle'
+BACKGROUND_DEPTH = 1e9  # Cycles 배경 Z 값(1e10) 판정 기준
+
+
+def mask_runs(mask: np.ndarray) -> np.ndarray:
+    """이진 마스크 → COCO run 길이 (열 우선, 0-run부터 시작)"""
+    flat = np.asarray(mask, dtype=bool).ravel(order='F')
+    if flat.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate(([0], change, [flat.size]))
+    runs = np.diff(bounds)
+    if flat[0]:
+        runs = np.concatenate(([0], runs))
+    return runs.astype(np.int64)
+
+
+def compress_counts(runs: Sequence[int]) -> bytes:
+    """run 길이 → COCO 압축 counts (pycocotools rleToString 동일 규칙)"""
+    out = bytearray()
+    runs = [int(r) for r in runs]
+    for i, run in enumerate(runs):
+        x = run - runs[i - 2] if i > 2 else run
+        more = True
+        while more:
+            c = x & 0x1f
+            x >>= 5
+            more = (x != -1) if (c & 0x10) else (x != 0)
+            if more:
+                c |= 0x20
+            out.append(c + 48)
+    return bytes(out)
+
+
+def decompress_counts(counts) -> np.ndarray:
+    """COCO 압축 counts → run 길이"""
+    if isinstance(counts, str):
+        counts = counts.encode('ascii')
+    runs: List[int] = []
+    p = 0
+    while p < len(counts):
+        x, k, more = 0, 0, True
+        while more:
+            c = counts[p] - 48
+            x |= (c & 0x1f) << (5 * k)
+            more = bool(c & 0x20)
+            p += 1
+            k += 1
+            if not more and (c & 0x10):
+                x |= -1 << (5 * k)
+        if len(runs) > 2:
+            x += runs[-2]
+        runs.append(x)
+    return np.asarray(runs, dtype=np.int64)
+
+
+def encode_mask(mask: np.ndarray) -> Dict:
+    """마스크 → {'size': [h, w], 'counts': str} (COCO 압축 RLE)"""
+    mask = np.asarray(mask)
+    return {'size': [int(mask.shape[0]), int(mask.shape[1])],
+            'counts': compress_counts(mask_runs(mask)).decode('ascii')}
+
+
+def decode_mask(rle: Dict) -> np.ndarray:
+    """COCO RLE → bool 마스크 (h, w)"""
+    h, w = rle['size']
+    counts = rle['counts']
+    runs = np.asarray(counts, dtype=np.int64) if isinstance(counts, list) else decompress_counts(counts)
+    values = np.arange(len(runs)) % 2 == 1
+    flat = np.repeat(values, runs)
+    if flat.size != h * w:
+        raise ValueError(f"RLE 길이 불일치: {flat.size} != {h}x{w}")
+    return flat.reshape((h, w), order='F')
+
+
+def rle_area(rle: Dict) -> int:
+    counts = rle['counts']
+    runs = np.asarray(counts, dtype=np.int64) if isinstance(counts, list) else decompress_counts(counts)
+    return int(runs[1::2].sum())
+
+
+def mask_from_depth(depth: np.ndarray, clip_end: Optional[float] = None) -> np.ndarray:
+    """깊이 맵 → 객체 마스크 (배경은 Z가 무한대/1e10 또는 clip_end 이상)"""
+    depth = np.asarray(depth, dtype=np.float32)
+    limit = min(float(clip_end), BACKGROUND_DEPTH) if clip_end else BACKGROUND_DEPTH
+    return np.isfinite(depth) & (depth > 0) & (depth < limit)
+
+
+def rasterize_polygon(polygon_uv, width: int, height: int) -> np.ndarray:
+    """정규화 폴리곤(uv) → 마스크 (픽셀 중심 even-odd 판정, 폴리곤 bbox 영역만 계산)"""
+    mask = np.zeros((height, width), dtype=bool)
+    pts = np.asarray(polygon_uv, dtype=np.float64).reshape(-1, 2) * [width, height]
+    if len(pts) < 3:
+        return mask
+    x0, y0 = np.clip(np.floor(pts.min(axis=0)).astype(int), 0, [width, height])
+    x1, y1 = np.clip(np.ceil(pts.max(axis=0)).astype(int), 0, [width, height])
+    if x1 <= x0 or y1 <= y0:
+        return mask
+    px = np.arange(x0, x1) + 0.5
+    py = (np.arange(y0, y1) + 0.5)[:, None]
+    inside = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+    for (ax, ay), (bx, by) in zip(pts, np.roll(pts, -1, axis=0)):
+        if ay == by:
+            continue
+        crosses = (ay > py) != (by > py)
+        x_cross = ax + (py - ay) * (bx - ax) / (by - ay)
+        inside ^= crosses & (px < x_cross)
+    mask[y0:y1, x0:x1] = inside
+    return mask
+
+
+def segmentation_field(mask: np.ndarray, source: str = 'mask') -> Dict:
+    """마스크 → E2 annotation.segmentation 필드"""
+    rle = encode_mask(mask)
+    counts = rle['counts'].encode('ascii')
+    return {
+        'format': RLE_FORMAT,
+        'size': rle['size'],
+        'rle_base64': base64.b64encode(counts).decode('ascii'),
+        'compressed_size': len(counts),
+        'area': rle_area(rle),
+        'source': source,
+    }
+
+
+def decode_segmentation_field(seg: Dict) -> np.ndarray:
+    """E2 annotation.segmentation 필드 → bool 마스크"""
+    counts = base64.b64decode(seg['rle_base64']).decode('ascii')
+    return decode_mask({'size': seg['size'], 'counts': counts})
+
+
+def _resolve(path, base_dir: Optional[Path]) -> Optional[Path]:
+    if not path:
+        return None
+    p = Path(path)
+    if p.exists() or base_dir is None:
+        return p if p.exists() else None
+    # 메타 기준 상대 위치 ({element}/meta/x.json → {element}/depth/x.exr)
+    candidate = base_dir.parent / 'depth' / p.name
+    return candidate if candidate.exists() else None
+
+
+def segmentation_from_metadata(meta: Dict, meta_path=None) -> Optional[Dict]:
+    """메타데이터 → segmentation 필드 (기존 RLE → 깊이 EXR → polygon_uv 순)"""
+    seg = (meta.get('annotation') or {}).get('seg') or {}
+    if seg.get('rle_base64') and seg.get('format') == RLE_FORMAT:
+        return seg
+
+    resolution = (meta.get('render_settings') or {}).get('resolution') or [768, 768]
+    width, height = int(resolution[0]), int(resolution[1])
+    base_dir = Path(meta_path).parent if meta_path else None
+
+    depth_path = _resolve(meta.get('depth_path'), base_dir)
+    if depth_path is not None:
+        try:
+            from depth_exr_validator import load_depth_map
+            clip_end = (meta.get('camera') or {}).get('clip_end')
+            mask = mask_from_depth(load_depth_map(depth_path), clip_end)
+            if mask.any():
+                return segmentation_field(mask, 'depth')
+        except Exception as e:
+            print(f"[WARN] 깊이 마스크 생성 실패 ({depth_path}): {e}")
+
+    polygon_uv = meta.get('polygon_uv')
+    if polygon_uv and len(polygon_uv) >= 3:
+        return segmentation_field(rasterize_polygon(polygon_uv, width, height), 'polygon')
+    return None
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("사용법: python scripts/mask_rle.py <meta.json> [...]")
+        sys.exit(1)
+    for path in sys.argv[1:]:
+        with open(path, 'r', encoding='utf-8') as f:
+            seg = segmentation_from_metadata(json.load(f), path)
+        if seg is None:
+            print(f"[WARN] {os.path.basename(path)}: 마스크 소스 없음")
+        else:
+            print(f"[OK] {os.path.basename(path)}: {seg['source']} size={seg['size']} "
+                  f"area={seg['area']} compressed={seg['compressed_size']}B")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+메타데이터 카탈로그 (meta + meta-e → Parquet, element_id 파티션)
+- 데이터셋 트리를 dataset_validation_engine.index_samples 로 1회 순회해 meta/meta-e 를 (그룹, stem)으로 조인
+- 샘플당 1행: 분석용 스칼라 컬럼(CATALOG_FIELDS) + 최상위 키 목록 + 원본 JSON(minified) 문자열
+- 저장 구조: {catalog}/element_id={값}/part-0.parquet (hive 파티션), {catalog}/_manifest.parquet (파일 지문)
+- 증분 갱신: size/mtime 지문이 바뀐 파일만 다시 파싱하고, 영향 받은 파티션만 재기록 (삭제된 샘플 제거)
+- 조회 API: MetadataCatalog.query / rows / records → 분석 스크립트는 파일 10만 개 대신 컬럼 스캔
+
+실행 방법:
+    python scripts/metadata_catalog.py update output/synthetic
+    python scripts/metadata_catalog.py stats
+    python scripts/metadata_catalog.py query --element-id 6335317 --columns stem,ssim,snr,render_time_sec
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = pq = ds = None
+
+sys.path.insert(0, str(Path(__file__).parent))
+from dataset_validation_engine import index_samples
+
+DEFAULT_CATALOG_DIR = Path(__file__).parent.parent / 'output' / 'catalog'
+MANIFEST_NAME = '_manifest.parquet'
+PARTITION_FILE = 'part-0.parquet'
+CATALOG_VERSION = '2'  # 스키마 변경 시 증가 (매니페스트 메타데이터, 불일치 시 전체 재파싱)
+
+# 컬럼명: (소스, 경로 후보들, 타입) - 첫 번째로 값이 있는 경로 사용
+CATALOG_FIELDS: Dict[str, Tuple[str, Tuple[Tuple[str, ...], ...], str]] = {
+    'part_id': ('meta', (('part_id',),), 'str'),
+    'pair_uid': ('meta', (('pair_uid',),), 'str'),
+    'schema_version': ('meta', (('schema_version',),), 'str'),
+    'color_id': ('meta', (('material', 'color_id'), ('color_id',)), 'int'),
+    'shape_tag': ('meta', (('shape_tag',),), 'str'),
+    'series': ('meta', (('series',),), 'str'),
+    'variant': ('meta', (('variant',),), 'str'),
+    'render_seed': ('meta', (('render_seed',),), 'int'),
+    'render_time_sec': ('meta', (('render_time_sec',), ('render_settings', 'render_time_sec')), 'float'),
+    'samples': ('meta', (('render_settings', 'samples'),), 'int'),
+    'tile_size': ('meta', (('render_settings', 'tile_size'),), 'int'),
+    'resolution_x': ('meta', (('render_settings', 'resolution_x'), ('render_settings', 'width')), 'int'),
+    'resolution_y': ('meta', (('render_settings', 'resolution_y'), ('render_settings', 'height')), 'int'),
+    'denoise': ('meta', (('render_settings', 'denoise'),), 'bool'),
+    'device': ('meta', (('render_settings', 'device'),), 'str'),
+    'engine': ('meta', (('render_settings', 'engine'),), 'str'),
+    'ssim': ('meta', (('quality_metrics', 'ssim'),), 'float'),
+    'snr': ('meta', (('quality_metrics', 'snr'),), 'float'),
+    'rms': ('meta', (('quality_metrics', 'rms'),), 'float'),
+    'reprojection_rms_px': ('meta', (('quality_metrics', 'reprojection_rms_px'),), 'float'),
+    'depth_score': ('meta', (('quality_metrics', 'depth_score'), ('depth_score',)), 'float'),
+    'qa_flag': ('meta', (('quality_metrics', 'qa_flag'), ('qa_flag',)), 'str'),
+    'is_transparent': ('meta', (('material', 'is_transparent'),), 'bool'),
+    'is_bright_part': ('meta', (('material', 'is_bright_part'),), 'bool'),
+    'e2_schema_version': ('meta_e', (('schema_version',),), 'str'),
+    'e2_qa_flag': ('meta_e', (('qa', 'qa_flag'),), 'str'),
+    'e2_reprojection_rms_px': ('meta_e', (('qa', 'reprojection_rms_px'),), 'float'),
+}
+ARROW_TYPES = {'str': 'string', 'int': 'int64', 'float': 'float64', 'bool': 'bool_'}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow 미설치: pip install pyarrow")
+
+
+def catalog_schema() -> 'pa.Schema':
+    """파티션 파일 스키마 (element_id 는 디렉토리 파티션 값)"""
+    _require_pyarrow()
+    fields = [
+        ('key', pa.string()), ('group', pa.string()), ('stem', pa.string()),
+        ('meta_path', pa.string()), ('meta_dir', pa.string()), ('meta_e_path', pa.string()),
+        ('fingerprint', pa.string()), ('meta_error', pa.string()), ('meta_e_error', pa.string()),
+    ]
+    fields += [(name, getattr(pa, ARROW_TYPES[kind])()) for name, (_, _, kind) in CATALOG_FIELDS.items()]
+    fields += [
+        ('meta_keys', pa.list_(pa.string())), ('meta_e_keys', pa.list_(pa.string())),
+        ('meta_json', pa.string()), ('meta_e_json', pa.string()),
+    ]
+    return pa.schema(fields)
+
+
+def dataset_schema() -> 'pa.Schema':
+    """조회 스키마 (파티션 파일 스키마 + element_id 파티션 컬럼)"""
+    return catalog_schema().append(pa.field('element_id', pa.string()))
+
+
+def _conform(table: 'pa.Table', schema: 'pa.Schema') -> 'pa.Table':
+    """이전 버전 파티션 → 현재 스키마 (없는 컬럼은 null, 제거된 컬럼은 버림)"""
+    columns = [table[field.name].cast(field.type) if field.name in table.column_names
+               else pa.nulls(table.num_rows, field.type) for field in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _lookup(record: Optional[Dict], paths: Tuple[Tuple[str, ...], ...]) -> Any:
+    if not isinstance(record, dict):
+        return None
+    for path in paths:
+        value = record
+        for part in path:
+            value = value.get(part) if isinstance(value, dict) else None
+        if value is not None:
+            return value
+    return None
+
+
+def _convert(value: Any, kind: str) -> Any:
+    """강건한 타입 변환 (변환 불가 시 None)"""
+    if value is None:
+        return None
+    try:
+        if kind == 'int':
+            return int(float(str(value)))
+        if kind == 'float':
+            return float(str(value))
+        if kind == 'bool':
+            return bool(value)
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def _fingerprint(*paths: Optional[str]) -> str:
+    parts = []
+    for path in paths:
+        if not path:
+            parts.append('-')
+            continue
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append('?')
+    return '|'.join(parts)
+
+
+def _load_json(path: Optional[str]) -> Tuple[Optional[Dict], Optional[str]]:
+    if not path:
+        return None, None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f), None
+    except json.JSONDecodeError as e:
+        return None, f"JSONDecodeError: {e}"
+    except Exception as e:
+        return None, f"OtherError: {e}"
+
+
+def _load_e2(path: Optional[str]) -> Tuple[Optional[Dict], Optional[str]]:
+    """E2 로드 (msgpack/cbor 압축 형식은 e2_codec)"""
+    if not path or path.endswith('.json'):
+        return _load_json(path)
+    try:
+        from e2_codec import read_e2
+        return read_e2(path), None
+    except Exception as e:
+        return None, f"E2DecodeError: {e}"
+
+
+def _extract_row(task: Tuple[str, str, str, Optional[str], Optional[str], str]) -> Dict[str, Any]:
+    """샘플 1개 → 카탈로그 행 (프로세스 풀 워커)"""
+    key, group, stem, meta_path, meta_e_path, fingerprint = task
+    meta, meta_error = _load_json(meta_path)
+    meta_e, meta_e_error = _load_e2(meta_e_path)
+    sources = {'meta': meta, 'meta_e': meta_e}
+    row = {
+        'key': key,
+        'group': group,
+        'stem': stem,
+        'meta_path': meta_path,
+        'meta_dir': os.path.dirname(meta_path) if meta_path else None,
+        'meta_e_path': meta_e_path,
+        'fingerprint': fingerprint,
+        'meta_error': meta_error,
+        'meta_e_error': meta_e_error,
+    }
+    for name, (source, paths, kind) in CATALOG_FIELDS.items():
+        row[name] = _convert(_lookup(sources[source], paths), kind)
+    row['meta_keys'] = sorted(meta) if isinstance(meta, dict) else None
+    row['meta_e_keys'] = sorted(meta_e) if isinstance(meta_e, dict) else None
+    row['meta_json'] = json.dumps(meta, ensure_ascii=False, separators=(',', ':')) if meta is not None else None
+    row['meta_e_json'] = json.dumps(meta_e, ensure_ascii=False, separators=(',', ':')) if meta_e is not None else None
+    element_id = _lookup(meta, (('element_id',),)) or _lookup(meta_e, (('element_id',),)) or group
+    row['element_id'] = str(element_id) if element_id not in (None, '') else 'unknown'
+    return row
+
+
+class MetadataCatalog:
+    """Parquet 메타데이터 카탈로그 (element_id 파티션, 증분 갱신)"""
+
+    def __init__(self, catalog_dir=DEFAULT_CATALOG_DIR):
+        _require_pyarrow()
+        self.catalog_dir = Path(catalog_dir)
+
+    # ----- 기록 -----
+
+    def _partition_path(self, element_id: str) -> Path:
+        return self.catalog_dir / f"element_id={quote(element_id, safe='')}" / PARTITION_FILE
+
+    def _load_manifest(self) -> Dict[str, Tuple[str, str]]:
+        """key → (fingerprint, element_id), 카탈로그 버전이 다르면 빈 매니페스트 (전체 재파싱)"""
+        path = self.catalog_dir / MANIFEST_NAME
+        if not path.exists():
+            return {}
+        table = pq.read_table(path)
+        if (table.schema.metadata or {}).get(b'catalog_version') != CATALOG_VERSION.encode():
+            print(f"[INFO] 카탈로그 버전 변경 (v{CATALOG_VERSION}): 이 루트를 다시 파싱합니다 "
+                  f"(다른 데이터셋 루트도 update 필요)")
+            return {}
+        return {k: (f, e) for k, f, e in zip(table['key'].to_pylist(), table['fingerprint'].to_pylist(),
+                                            table['element_id'].to_pylist())}
+
+    def _save_manifest(self, manifest: Dict[str, Tuple[str, str]]):
+        keys = sorted(manifest)
+        table = pa.table({
+            'key': pa.array(keys, pa.string()),
+            'fingerprint': pa.array([manifest[k][0] for k in keys], pa.string()),
+            'element_id': pa.array([manifest[k][1] for k in keys], pa.string()),
+        }).replace_schema_metadata({'catalog_version': CATALOG_VERSION})
+        self._write_atomic(table, self.catalog_dir / MANIFEST_NAME)
+
+    @staticmethod
+    def _write_atomic(table: 'pa.Table', path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        pq.write_table(table, tmp, compression='zstd')
+        os.replace(tmp, path)
+
+    def update(self, dataset_root, workers: Optional[int] = None, full: bool = False) -> Dict[str, Any]:
+        """dataset_root 하위 meta/meta-e 를 카탈로그에 반영 (변경분만 파싱, 영향 파티션만 재기록)"""
+        started = time.time()
+        root = Path(dataset_root).resolve()
+        root_prefix = str(root) + os.sep
+        manifest = self._load_manifest()
+
+        # 1) 현재 샘플 + 지문 (stat 만 수행)
+        current: Dict[str, Tuple] = {}
+        for sample in index_samples(root).values():
+            meta_path, meta_e_path = sample.files.get('meta'), sample.files.get('meta_e')
+            if not meta_path and not meta_e_path:
+                continue
+            key = os.path.abspath(meta_path or meta_e_path)
+            current[key] = (key, sample.group, sample.stem, meta_path and os.path.abspath(meta_path),
+                            meta_e_path and os.path.abspath(meta_e_path), _fingerprint(meta_path, meta_e_path))
+
+        # 2) 변경/삭제 판정 (다른 루트의 항목은 유지)
+        #    full=True 면 지문과 무관하게 이 루트의 모든 샘플을 다시 파싱
+        changed = [task for key, task in current.items() if full or manifest.get(key, (None,))[0] != task[5]]
+        removed = [key for key in manifest if key.startswith(root_prefix) and key not in current]
+
+        # 3) 변경분 파싱
+        workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        if workers > 1 and len(changed) > 200:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                new_rows = list(pool.map(_extract_row, changed, chunksize=64))
+        else:
+            new_rows = [_extract_row(task) for task in changed]
+
+        # 4) 영향 파티션 재기록
+        stale_keys = set(removed) | {task[0] for task in changed}
+        affected = {manifest[k][1] for k in stale_keys if k in manifest} | {row['element_id'] for row in new_rows}
+        rows_by_partition: Dict[str, List[Dict]] = {}
+        for row in new_rows:
+            rows_by_partition.setdefault(row.pop('element_id'), []).append(row)
+
+        schema = catalog_schema()
+        for element_id in affected:
+            path = self._partition_path(element_id)
+            tables = []
+            if path.exists():
+                existing = _conform(pq.read_table(path), schema)
+                keep = [k not in stale_keys for k in existing['key'].to_pylist()]
+                tables.append(existing.filter(pa.array(keep, pa.bool_())))
+            if element_id in rows_by_partition:
+                tables.append(pa.Table.from_pylist(rows_by_partition[element_id], schema=schema))
+            table = pa.concat_tables(tables) if tables else None
+            if table is None or table.num_rows == 0:
+                if path.exists():
+                    path.unlink()
+                    try:
+                        path.parent.rmdir()
+                    except OSError:
+                        pass
+                continue
+            self._write_atomic(table.sort_by('key'), path)
+
+        # 5) 매니페스트 갱신
+        for key in removed:
+            manifest.pop(key, None)
+        for element_id, rows in rows_by_partition.items():
+            for row in rows:
+                manifest[row['key']] = (row['fingerprint'], element_id)
+        self._save_manifest(manifest)
+
+        return {
+            'root': str(root),
+            'samples': len(current),
+            'parsed': len(new_rows),
+            'removed': len(removed),
+            'partitions_rewritten': len(affected),
+            'errors': sum(1 for rows in rows_by_partition.values() for r in rows
+                          if r['meta_error'] or r['meta_e_error']),
+            'elapsed_sec': round(time.time() - started, 2),
+        }
+
+    # ----- 조회 -----
+
+    def dataset(self) -> 'ds.Dataset':
+        partitioning = ds.partitioning(pa.schema([('element_id', pa.string())]), flavor='hive')
+        return ds.dataset(str(self.catalog_dir), format='parquet', partitioning=partitioning,
+                          schema=dataset_schema())
+
+    def query(self, columns: Optional[Sequence[str]] = None, element_ids: Optional[Sequence[str]] = None,
+              meta_dir=None, where: Optional['ds.Expression'] = None) -> 'pa.Table':
+        """컬럼 스캔 (element_id 파티션 프루닝 + meta_dir/임의 필터)"""
+        if not self.catalog_dir.exists():
+            table = dataset_schema().empty_table()
+            return table.select(list(columns)) if columns else table
+        conditions = []
+        if element_ids:
+            conditions.append(ds.field('element_id').isin([str(e) for e in element_ids]))
+        if meta_dir is not None:
+            conditions.append(ds.field('meta_dir') == str(Path(meta_dir).resolve()))
+        if where is not None:
+            conditions.append(where)
+        condition = None
+        for c in conditions:
+            condition = c if condition is None else condition & c
+        return self.dataset().to_table(columns=list(columns) if columns else None, filter=condition)
+
+    def rows(self, columns: Optional[Sequence[str]] = None, **filters) -> List[Dict[str, Any]]:
+        return self.query(columns, **filters).to_pylist()
+
+    def records(self, **filters) -> Iterator[Tuple[str, Optional[Dict], Optional[Dict]]]:
+        """(stem, meta, meta_e) 원본 레코드 (파일 재열기 없이 카탈로그 JSON 문자열에서 복원)"""
+        table = self.query(['stem', 'meta_json', 'meta_e_json'], **filters)
+        for stem, meta_json, meta_e_json in zip(table['stem'].to_pylist(), table['meta_json'].to_pylist(),
+                                                table['meta_e_json'].to_pylist()):
+            yield (stem, json.loads(meta_json) if meta_json else None,
+                   json.loads(meta_e_json) if meta_e_json else None)
+
+    def stats(self) -> Dict[str, Any]:
+        table = self.query(['element_id', 'meta_error', 'meta_e_error'])
+        counts: Dict[str, int] = {}
+        for element_id in table['element_id'].to_pylist():
+            counts[element_id] = counts.get(element_id, 0) + 1
+        return {
+            'rows': table.num_rows,
+            'partitions': len(counts),
+            'meta_errors': table.num_rows - table['meta_error'].null_count,
+            'meta_e_errors': table.num_rows - table['meta_e_error'].null_count,
+            'top_partitions': sorted(counts.items(), key=lambda x: -x[1])[:10],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='메타데이터 카탈로그 (Parquet, element_id 파티션)')
+    parser.add_argument('--catalog', default=str(DEFAULT_CATALOG_DIR), help='카탈로그 디렉토리')
+    sub = parser.add_subparsers(dest='command', required=True)
+    update_parser = sub.add_parser('update', help='데이터셋 변경분 반영')
+    update_parser.add_argument('dataset_root', help='데이터셋 루트 (예: output/synthetic)')
+    update_parser.add_argument('--workers', type=int, help='파싱 프로세스 수 (기본: CPU-1)')
+    update_parser.add_argument('--full', action='store_true', help='전체 재구축')
+    sub.add_parser('stats', help='카탈로그 요약')
+    query_parser = sub.add_parser('query', help='컬럼 조회 (JSONL 출력)')
+    query_parser.add_argument('--element-id', action='append', help='element_id 필터 (반복 가능)')
+    query_parser.add_argument('--columns', default='element_id,stem,ssim,snr,render_time_sec,qa_flag',
+                              help='쉼표 구분 컬럼 목록')
+    query_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        catalog = MetadataCatalog(args.catalog)
+    except ImportError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    if args.command == 'update':
+        result = catalog.update(args.dataset_root, workers=args.workers, full=args.full)
+        print(f"[OK] 카탈로그 갱신: 샘플 {result['samples']}개, 파싱 {result['parsed']}개, 삭제 {result['removed']}개, "
+              f"파티션 {result['partitions_rewritten']}개 재기록 ({result['elapsed_sec']}s)")
+        if result['errors']:
+            print(f"[WARN] 파싱 오류 {result['errors']}개")
+    elif args.command == 'stats':
+        print(json.dumps(catalog.stats(), indent=2, ensure_ascii=False))
+    else:
+        table = catalog.query(args.columns.split(','), element_ids=args.element_id)
+        for row in table.slice(0, args.limit).to_pylist():
+            print(json.dumps(row, ensure_ascii=False))
+        print(f"[INFO] {table.num_rows}행 중 {min(args.limit, table.num_rows)}행 출력")
+
+
+if __name__ == '__main__':
+    main()
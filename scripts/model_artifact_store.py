@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+모델 아티팩트 저장소
+- 로컬 저장소: 내용 해시(sha256) 키, 디스크 예산 초과 시 LRU 제거
+  · blob은 읽기 전용, 외부 파일과는 복사(가능하면 reflink)로만 주고받음 (하드링크 시 best.pt 재기록 등이 blob을 오염)
+- 다운로드: 해시 일치 시 네트워크 생략, ETag/Last-Modified 조건부 요청, Range 이어받기
+- 업로드: Supabase TUS 재개 가능 청크 업로드, 원격과 해시가 같은 아티팩트는 전송 생략
+- model_registry.training_metadata.artifacts에 {path, sha256, size} 기록 → 매장 기기도 해시로 변경 여부 판단
+
+환경변수:
+    MODEL_STORE_DIR        로컬 저장소 경로 (기본: output/models/store)
+    MODEL_STORE_BUDGET_MB  로컬 저장소 디스크 예산 (기본: 4096)
+"""
+
+import os
+import json
+import stat
+import time
+import base64
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, Optional, Set
+
+MODEL_STORE_DIR = Path(os.getenv('MODEL_STORE_DIR', 'output/models/store'))
+MODEL_STORE_BUDGET_MB = float(os.getenv('MODEL_STORE_BUDGET_MB', '4096'))
+STORAGE_BUCKET = 'models'
+TRANSFER_CHUNK = 6 * 1024 * 1024   # Supabase TUS 업로드는 6MB 청크 고정
+READ_CHUNK = 1024 * 1024
+MAX_TRANSFER_RETRIES = 3
+FICLONE = 0x40049409  # Linux ioctl: copy-on-write 복제 (Btrfs/XFS)
+
+
+def sha256_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def clone_file(source: Path, dest: Path):
+    """reflink(copy-on-write) 복제 시도, 미지원 파일시스템/OS는 일반 복사 (임시 파일 → os.replace)"""
+    dest = Path(dest)
+    tmp = dest.with_name(dest.name + '.tmp')
+    try:
+        import fcntl
+        with open(source, 'rb') as src, open(tmp, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copystat(source, tmp)
+    except (ImportError, OSError):
+        shutil.copy2(source, tmp)
+    os.replace(tmp, dest)
+
+
+def _make_writable(path: Path):
+    try:
+        os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) | stat.S_IWRITE)
+    except OSError:
+        pass
+
+
+def _remove_blob(path: Path):
+    # Windows는 읽기 전용 파일 삭제 불가 → 쓰기 권한 복구 후 삭제
+    if path.exists():
+        _make_writable(path)
+        path.unlink(missing_ok=True)
+
+
+def supabase_storage_config():
+    """(supabase_url, key) - 학습 스크립트와 같은 우선순위 (Service Role 우선)"""
+    url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
+    key = (
+        os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        or os.getenv('VITE_SUPABASE_SERVICE_ROLE')
+        or os.getenv('SUPABASE_ANON_KEY')
+        or os.getenv('VITE_SUPABASE_ANON_KEY')
+    )
+    return url, key
+
+
+def public_object_url(bucket_path: str, bucket: str = STORAGE_BUCKET) -> str:
+    supabase_url, _ = supabase_storage_config()
+    return f"{supabase_url}/storage/v1/object/public/{bucket}/{bucket_path}"
+
+
+def _auth_headers(key: str) -> Dict[str, str]:
+    return {'apikey': key, 'Authorization': f'Bearer {key}'}
+
+
+# ============================================
+# 로컬 저장소
+# ============================================
+
+class ModelStore:
+    """내용 해시 키 로컬 모델 저장소 (index.json: blobs / urls / uploads)"""
+
+    def __init__(self, root=MODEL_STORE_DIR, budget_mb: float = MODEL_STORE_BUDGET_MB):
+        self.root = Path(root)
+        self.partial_dir = self.root / 'partial'
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.index_path = self.root / 'index.json'
+        self._lock = threading.Lock()
+
+    # ---------- 인덱스 ----------
+
+    def _load_index(self) -> Dict[str, Dict]:
+        index = {}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+        for section in ('blobs', 'urls', 'uploads'):
+            index.setdefault(section, {})
+        return index
+
+    def _update_index(self, mutate: Callable[[Dict], None]) -> Dict:
+        """디스크의 최신 인덱스를 읽어 수정 후 원자적으로 저장 (다른 프로세스의 기록 보존)"""
+        with self._lock:
+            index = self._load_index()
+            mutate(index)
+            tmp_path = self.index_path.with_suffix(f'.json.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+            return index
+
+    def _blob_path(self, sha256: str, suffix: str) -> Path:
+        return self.root / f"{sha256}{suffix}"
+
+    # ---------- 조회 / 등록 ----------
+
+    def get(self, sha256: str) -> Optional[Path]:
+        """해시로 저장된 파일 경로 (사용 시각 갱신)"""
+        entry = self._load_index()['blobs'].get(sha256)
+        if not entry:
+            return None
+        path = self._blob_path(sha256, entry['suffix'])
+        if not path.exists():
+            return None
+        self._update_index(lambda index: index['blobs'].get(sha256, {}).update(last_used=time.time()))
+        return path
+
+    def lookup(self, url: str) -> Optional[Path]:
+        entry = self._load_index()['urls'].get(url)
+        return self.get(entry['sha256']) if entry else None
+
+    def put(self, source: Path, url: Optional[str] = None, headers: Optional[Dict] = None,
+            move: bool = False, sha256: Optional[str] = None) -> Path:
+        """파일을 저장소에 등록 (같은 내용은 한 번만 저장, 외부 파일은 복사 - blob은 읽기 전용)"""
+        source = Path(source)
+        sha256 = sha256 or sha256_file(source)
+        suffix = source.suffix
+        if suffix in ('', '.part', '.tmp') and url:
+            suffix = Path(url.split('?')[0]).suffix
+        blob = self._blob_path(sha256, suffix)
+
+        if blob.exists():
+            if move:
+                source.unlink(missing_ok=True)
+        else:
+            if move:
+                os.replace(source, blob)
+            else:
+                clone_file(source, blob)
+            os.chmod(blob, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+
+        def mutate(index):
+            index['blobs'][sha256] = {'suffix': suffix, 'size': blob.stat().st_size, 'last_used': time.time()}
+            if url:
+                index['urls'][url] = {
+                    'sha256': sha256,
+                    'etag': (headers or {}).get('ETag'),
+                    'last_modified': (headers or {}).get('Last-Modified'),
+                    'fetched_at': datetime.now().isoformat(),
+                }
+        self._update_index(mutate)
+        self.evict(keep={sha256})
+        return blob
+
+    def materialize(self, blob: Path, dest: Path) -> Path:
+        """저장소 파일을 지정 경로에 복사 (reflink 가능 시 추가 디스크 없음) - 파일명이 의미 있는 호출자용
+
+        호출자가 dest를 제자리 수정해도 blob은 변하지 않음 (하드링크 미사용)
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            _make_writable(dest)
+            dest.unlink()
+        clone_file(blob, dest)
+        _make_writable(dest)
+        return dest
+
+    def evict(self, keep: Optional[Set[str]] = None) -> int:
+        """디스크 예산 초과 시 오래 사용하지 않은 파일부터 제거, 제거한 바이트 반환"""
+        keep = keep or set()
+        freed = 0
+
+        def mutate(index):
+            nonlocal freed
+            blobs = index['blobs']
+            total = sum(entry['size'] for entry in blobs.values())
+            for sha256, entry in sorted(blobs.items(), key=lambda item: item[1].get('last_used', 0)):
+                if total <= self.budget_bytes:
+                    break
+                if sha256 in keep:
+                    continue
+                _remove_blob(self._blob_path(sha256, entry['suffix']))
+                total -= entry['size']
+                freed += entry['size']
+                del blobs[sha256]
+            index['urls'] = {url: entry for url, entry in index['urls'].items() if entry['sha256'] in blobs}
+        self._update_index(mutate)
+        if freed:
+            print(f"[CACHE] 모델 저장소 LRU 정리: {freed / 1024 / 1024:.1f} MB 해제")
+        return freed
+
+    # ---------- 다운로드 ----------
+
+    def fetch(self, url: str, expected_sha256: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Path:
+        """URL의 모델을 저장소 경로로 반환
+
+        - expected_sha256이 저장소에 있으면 네트워크 요청 없음
+        - 캐시된 URL은 조건부 요청 (304면 재사용)
+        - 중단된 다운로드는 Range 요청으로 이어받기 (ETag가 바뀌었으면 처음부터)
+        """
+        import requests
+
+        if expected_sha256:
+            blob = self.get(expected_sha256)
+            if blob:
+                print(f"[CACHE] 모델 해시 일치, 다운로드 생략: {blob.name}", flush=True)
+                return blob
+
+        request_headers = dict(headers or {})
+        cached = self.lookup(url)
+        url_entry = self._load_index()['urls'].get(url, {})
+        if cached:
+            if url_entry.get('etag'):
+                request_headers['If-None-Match'] = url_entry['etag']
+            if url_entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = url_entry['last_modified']
+
+        partial = self.partial_dir / (hashlib.sha1(url.encode('utf-8')).hexdigest() + '.part')
+        partial_meta = partial.with_suffix('.json')
+
+        for attempt in range(1, MAX_TRANSFER_RETRIES + 1):
+            attempt_headers = dict(request_headers)
+            offset = partial.stat().st_size if partial.exists() else 0
+            if offset and partial_meta.exists():
+                meta = json.loads(partial_meta.read_text(encoding='utf-8'))
+                attempt_headers['Range'] = f'bytes={offset}-'
+                if meta.get('etag'):
+                    attempt_headers['If-Range'] = meta['etag']
+            try:
+                with requests.get(url, stream=True, headers=attempt_headers, timeout=60) as response:
+                    if response.status_code == 304 and cached:
+                        print(f"[CACHE] 모델 변경 없음 (304): {cached.name}", flush=True)
+                        return cached
+                    response.raise_for_status()
+                    mode = 'ab' if response.status_code == 206 else 'wb'
+                    if mode == 'ab':
+                        print(f"[DOWNLOAD] 이어받기: {offset / 1024 / 1024:.1f} MB부터", flush=True)
+                    partial_meta.write_text(json.dumps({'url': url, 'etag': response.headers.get('ETag')}), encoding='utf-8')
+                    with open(partial, mode) as f:
+                        for chunk in response.iter_content(chunk_size=READ_CHUNK):
+                            if chunk:
+                                f.write(chunk)
+                    response_headers = response.headers
+                break
+            except requests.HTTPError:
+                if 'Range' not in attempt_headers:
+                    raise
+                # 서버가 이어받기를 거부 (416 등) → 처음부터
+                partial.unlink(missing_ok=True)
+                partial_meta.unlink(missing_ok=True)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == MAX_TRANSFER_RETRIES:
+                    raise
+                print(f"[WARN] 다운로드 중단 ({attempt}/{MAX_TRANSFER_RETRIES}), 이어받기 재시도: {e}", flush=True)
+                time.sleep(2 ** attempt)
+        else:
+            # 마지막 시도까지 이어받기 거부로 끝난 경우 (완료된 다운로드 없음)
+            raise RuntimeError(f"모델 다운로드 실패 ({MAX_TRANSFER_RETRIES}회 시도): {url}")
+
+        sha256 = sha256_file(partial)
+        if expected_sha256 and sha256 != expected_sha256:
+            partial.unlink(missing_ok=True)
+            partial_meta.unlink(missing_ok=True)
+            raise ValueError(f"모델 해시 불일치: {sha256} != {expected_sha256}")
+        blob = self.put(partial, url, response_headers, move=True, sha256=sha256)
+        partial_meta.unlink(missing_ok=True)
+        print(f"[DOWNLOAD] 모델 저장 → {blob.name} ({blob.stat().st_size / 1024 / 1024:.1f} MB)", flush=True)
+        return blob
+
+    def fetch_storage_object(self, bucket_path: str, expected_sha256: Optional[str] = None,
+                             bucket: str = STORAGE_BUCKET) -> Path:
+        """Supabase Storage 객체 다운로드 (인증 엔드포인트 - 비공개 버킷도 지원)"""
+        supabase_url, key = supabase_storage_config()
+        if not supabase_url or not key:
+            raise RuntimeError("Supabase 환경변수가 설정되지 않았습니다")
+        url = f"{supabase_url}/storage/v1/object/{bucket}/{bucket_path}"
+        return self.fetch(url, expected_sha256, headers=_auth_headers(key))
+
+    # ---------- 업로드 ----------
+
+    def upload(self, local_path, bucket_path: str, known_sha256: Optional[str] = None,
+               bucket: str = STORAGE_BUCKET, client=None) -> Dict:
+        """아티팩트 업로드 (원격 해시가 같으면 생략) → {path, sha256, size, uploaded, public_url}"""
+        local_path = Path(local_path)
+        sha256 = sha256_file(local_path)
+        size = local_path.stat().st_size
+        upload_key = f"{bucket}/{bucket_path}"
+        artifact = {'path': bucket_path, 'sha256': sha256, 'size': size,
+                    'uploaded': False, 'public_url': public_object_url(bucket_path, bucket)}
+
+        previous = self._load_index()['uploads'].get(upload_key, {})
+        if sha256 in (known_sha256, previous.get('sha256') if previous.get('completed') else None):
+            print(f"[SKIP] 변경 없는 아티팩트, 업로드 생략: {bucket_path}")
+            return artifact
+
+        try:
+            self._tus_upload(local_path, bucket_path, bucket, sha256, size, previous)
+        except Exception as e:
+            if client is None:
+                raise
+            print(f"[WARN] 재개 가능 업로드 실패, 단일 요청 업로드로 대체: {e}")
+            with open(local_path, 'rb') as f:
+                client.storage.from_(bucket).upload(bucket_path, f.read(), file_options={'upsert': 'true'})
+
+        def mutate(index):
+            index['uploads'][upload_key] = {'sha256': sha256, 'completed': True, 'uploaded_at': datetime.now().isoformat()}
+        self._update_index(mutate)
+        # 업로드한 파일은 로컬 저장소에도 등록 (같은 호스트의 검증/변환은 다운로드 생략)
+        self.put(local_path, artifact['public_url'], sha256=sha256)
+        artifact['uploaded'] = True
+        return artifact
+
+    def _tus_upload(self, local_path: Path, bucket_path: str, bucket: str, sha256: str, size: int, previous: Dict):
+        """Supabase TUS 재개 가능 업로드 (같은 내용의 미완료 업로드는 서버 오프셋부터 재개)"""
+        import requests
+
+        supabase_url, key = supabase_storage_config()
+        if not supabase_url or not key:
+            raise RuntimeError("Supabase 환경변수가 설정되지 않았습니다")
+        headers = {**_auth_headers(key), 'Tus-Resumable': '1.0.0', 'x-upsert': 'true'}
+        upload_key = f"{bucket}/{bucket_path}"
+
+        upload_url, offset = None, 0
+        if previous.get('sha256') == sha256 and previous.get('tus_url') and not previous.get('completed'):
+            response = requests.head(previous['tus_url'], headers=headers, timeout=30)
+            if response.ok and 'Upload-Offset' in response.headers:
+                upload_url, offset = previous['tus_url'], int(response.headers['Upload-Offset'])
+                print(f"[UPLOAD] 업로드 재개: {bucket_path} ({offset / 1024 / 1024:.1f} MB부터)")
+
+        if upload_url is None:
+            def encode(value: str) -> str:
+                return base64.b64encode(value.encode('utf-8')).decode('ascii')
+            metadata = ','.join([
+                f"bucketName {encode(bucket)}",
+                f"objectName {encode(bucket_path)}",
+                f"contentType {encode('application/octet-stream')}",
+            ])
+            response = requests.post(f"{supabase_url}/storage/v1/upload/resumable",
+                                     headers={**headers, 'Upload-Length': str(size), 'Upload-Metadata': metadata},
+                                     timeout=30)
+            response.raise_for_status()
+            upload_url = response.headers['Location']
+            self._update_index(lambda index: index['uploads'].__setitem__(
+                upload_key, {'sha256': sha256, 'tus_url': upload_url, 'completed': False}))
+
+        print(f"[UPLOAD] {bucket_path} 업로드 중 ({size / 1024 / 1024:.1f} MB, 청크 {TRANSFER_CHUNK // 1024 // 1024} MB)")
+        with open(local_path, 'rb') as f:
+            retries = 0
+            while offset < size:
+                f.seek(offset)
+                chunk = f.read(TRANSFER_CHUNK)
+                try:
+                    response = requests.patch(upload_url, data=chunk, timeout=120, headers={
+                        **headers,
+                        'Content-Type': 'application/offset+octet-stream',
+                        'Upload-Offset': str(offset),
+                    })
+                    response.raise_for_status()
+                    offset = int(response.headers.get('Upload-Offset', offset + len(chunk)))
+                    retries = 0
+                except requests.RequestException:
+                    retries += 1
+                    if retries > MAX_TRANSFER_RETRIES:
+                        raise
+                    time.sleep(2 ** retries)
+                    # 서버가 실제로 받은 위치부터 재개
+                    head = requests.head(upload_url, headers=headers, timeout=30)
+                    if head.ok and 'Upload-Offset' in head.headers:
+                        offset = int(head.headers['Upload-Offset'])
+
+
+_default_store: Optional[ModelStore] = None
+
+
+def get_model_store() -> ModelStore:
+    """프로세스 전역 기본 저장소"""
+    global _default_store
+    if _default_store is None:
+        _default_store = ModelStore()
+    return _default_store
+
+
+def artifact_sha256(record: Optional[Dict], kind: str) -> Optional[str]:
+    """model_registry 레코드에 기록된 아티팩트 해시 (kind: 'pt' / 'onnx')"""
+    artifacts = ((record or {}).get('training_metadata') or {}).get('artifacts') or {}
+    return (artifacts.get(kind) or {}).get('sha256')
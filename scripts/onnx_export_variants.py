@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+ONNX 내보내기 변형 파이프라인
+- .pt → fp32 ONNX 1회 내보내기 후 fp16 / dynamic-int8 / static-int8(합성 데이터 캘리브레이션) 변형 생성
+- 변형별 ONNX Runtime 오프라인 그래프 최적화 (.opt.onnx 저장)
+- 고정 이미지 세트로 CPU 지연 시간 벤치마크 (p50/p95)
+- .pt 대비 mAP 변화(drift) 검증 (Ultralytics val, dataset.yaml 필요)
+- 허용 drift 이내에서 가장 빠른 변형을 엣지 배포 후보로 선택, model_registry에 변형별 기록
+
+실행 방법:
+    python scripts/onnx_export_variants.py best.pt --data dataset.yaml --model-name brickbox_s_seg_stage1_20251106_132857
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+VARIANTS = ('fp32', 'fp16', 'int8_dynamic', 'int8_static')
+DEFAULT_OPSET = 17           # 채널별 QDQ 양자화는 opset 13 이상 필요
+DEFAULT_OUTPUT_DIR = Path('output/models/onnx_variants')
+CALIBRATION_IMAGES = 64      # static-int8 캘리브레이션 이미지 수
+BENCHMARK_IMAGES = 32        # 벤치마크 고정 이미지 수
+BENCHMARK_WARMUP = 3
+MAX_MAP_DRIFT = float(os.getenv('ONNX_MAX_MAP_DRIFT', '0.01'))  # 허용 mAP50 하락폭
+SAMPLE_SEED = 1234           # 캘리브레이션/벤치마크 이미지 샘플링 시드 (실행 간 동일 세트)
+IMAGE_EXTENSIONS = ('.webp', '.png', '.jpg', '.jpeg')
+
+
+def _dataset_synthetic_root() -> Path:
+    try:
+        from scripts.utils.path_config import get_dataset_synthetic_path
+        return Path(get_dataset_synthetic_path())
+    except ImportError:
+        return Path('output/synthetic/dataset_synthetic')
+
+
+def sample_images(count: int, split: str = 'train', root: Optional[Path] = None, seed: int = SAMPLE_SEED) -> List[Path]:
+    """합성 데이터셋(dataset_synthetic/{part}/images/{split})에서 고정 시드로 이미지 샘플링"""
+    root = Path(root) if root else _dataset_synthetic_root()
+    candidates = sorted(
+        p for p in root.glob(f'*/images/{split}/*')
+        if p.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    if not candidates:
+        return []
+    return random.Random(seed).sample(candidates, min(count, len(candidates)))
+
+
+def letterbox_tensor(image_path: Path, imgsz: int) -> np.ndarray:
+    """Ultralytics 전처리와 동일한 레터박스 (1, 3, S, S) float32"""
+    from PIL import Image
+
+    image = Image.open(image_path).convert('RGB')
+    width, height = image.size
+    ratio = min(imgsz / width, imgsz / height)
+    new_w, new_h = max(1, int(round(width * ratio))), max(1, int(round(height * ratio)))
+    resized = image.resize((new_w, new_h), Image.Resampling.BILINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    left, top = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+    canvas[top:top + new_h, left:left + new_w] = np.asarray(resized)
+    return (canvas.transpose(2, 0, 1)[None].astype(np.float32) / 255.0)
+
+
+# ============================================
+# 변형 생성
+# ============================================
+
+def export_fp32(pt_path, output_path: Path, imgsz: int = 640, opset: int = DEFAULT_OPSET) -> Path:
+    """Ultralytics 내보내기 (반환 경로 사용, 추측 없음)"""
+    from ultralytics import YOLO
+
+    exported = YOLO(str(pt_path)).export(format='onnx', imgsz=imgsz, opset=opset, simplify=True, dynamic=False)
+    exported = Path(exported)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if exported.resolve() != output_path.resolve():
+        shutil.move(str(exported), output_path)
+    return output_path
+
+
+def make_fp16(fp32_path: Path, output_path: Path) -> Path:
+    """가중치/연산 fp16 변환 (입출력은 fp32 유지 → 기존 전처리 그대로 사용)"""
+    import onnx
+    from onnxconverter_common import float16
+
+    model = onnx.load(str(fp32_path))
+    model = float16.convert_float_to_float16(model, keep_io_types=True)
+    onnx.save(model, str(output_path))
+    return output_path
+
+
+def make_int8_dynamic(fp32_path: Path, output_path: Path) -> Path:
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(str(fp32_path), str(output_path), weight_type=QuantType.QInt8)
+    return output_path
+
+
+class _CalibrationReader:
+    """onnxruntime.quantization CalibrationDataReader 인터페이스"""
+
+    def __init__(self, input_name: str, images: List[Path], imgsz: int):
+        self.input_name = input_name
+        self._iter = (letterbox_tensor(p, imgsz) for p in images)
+
+    def get_next(self):
+        tensor = next(self._iter, None)
+        return None if tensor is None else {self.input_name: tensor}
+
+
+def make_int8_static(fp32_path: Path, output_path: Path, calibration_images: List[Path], imgsz: int) -> Path:
+    """QDQ 정적 양자화 (채널별 가중치 int8, 활성값 uint8, 합성 데이터 캘리브레이션)"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_static, QuantType, QuantFormat
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    if not calibration_images:
+        raise RuntimeError("캘리브레이션 이미지가 없습니다")
+
+    prep_path = output_path.with_suffix('.prep.onnx')
+    quant_pre_process(str(fp32_path), str(prep_path))
+    input_name = ort.InferenceSession(str(prep_path), providers=['CPUExecutionProvider']).get_inputs()[0].name
+    quantize_static(
+        str(prep_path), str(output_path),
+        _CalibrationReader(input_name, calibration_images, imgsz),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    prep_path.unlink(missing_ok=True)
+    return output_path
+
+
+def optimize_graph(model_path: Path) -> Path:
+    """ORT 오프라인 그래프 최적화 결과 저장 (EXTENDED: 하드웨어 독립 융합까지만 적용)"""
+    import onnxruntime as ort
+
+    optimized_path = model_path.with_suffix('.opt.onnx')
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = str(optimized_path)
+    ort.InferenceSession(str(model_path), sess_options=options, providers=['CPUExecutionProvider'])
+    return optimized_path
+
+
+# ============================================
+# 벤치마크 / 정확도 검증
+# ============================================
+
+def benchmark_cpu(model_path: Path, images: List[Path], imgsz: int, threads: int = 0) -> Dict[str, float]:
+    """고정 이미지 세트 CPU 지연 시간 (전처리 제외, 세션 실행만 측정)"""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+    session = ort.InferenceSession(str(model_path), sess_options=options, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+
+    tensors = [letterbox_tensor(p, imgsz) for p in images] or [np.zeros((1, 3, imgsz, imgsz), np.float32)]
+    for tensor in tensors[:BENCHMARK_WARMUP]:
+        session.run(None, {input_name: tensor})
+
+    latencies = []
+    for tensor in tensors:
+        start = time.perf_counter()
+        session.run(None, {input_name: tensor})
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.asarray(latencies)
+    return {
+        'latency_p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'latency_p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'latency_mean_ms': round(float(latencies.mean()), 2),
+        'images': len(tensors),
+    }
+
+
+def evaluate_map(model_path, data_yaml, imgsz: int) -> Dict[str, float]:
+    """Ultralytics val로 mAP 측정 (.pt와 .onnx 동일 경로)"""
+    from ultralytics import YOLO
+
+    metrics = YOLO(str(model_path), task='segment').val(
+        data=str(data_yaml), imgsz=imgsz, batch=1, device='cpu', plots=False, verbose=False
+    )
+    result = {'map50': float(metrics.box.map50), 'map50_95': float(metrics.box.map)}
+    if getattr(metrics, 'seg', None) is not None:
+        result['mask_map50'] = float(metrics.seg.map50)
+    return result
+
+
+# ============================================
+# 파이프라인
+# ============================================
+
+def build_variants(pt_path, output_dir=DEFAULT_OUTPUT_DIR, imgsz: int = 640, data_yaml=None,
+                   variants=VARIANTS, opset: int = DEFAULT_OPSET, max_drift: float = MAX_MAP_DRIFT,
+                   threads: int = 0, dataset_root: Optional[Path] = None) -> Dict:
+    """변형 생성 → 그래프 최적화 → 벤치마크 → mAP drift 검증 → 엣지 후보 선택"""
+    pt_path = Path(pt_path)
+    output_dir = Path(output_dir) / pt_path.stem
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    calibration_images = sample_images(CALIBRATION_IMAGES, 'train', dataset_root)
+    benchmark_images = sample_images(BENCHMARK_IMAGES, 'val', dataset_root) or \
+        sample_images(BENCHMARK_IMAGES, 'train', dataset_root, seed=SAMPLE_SEED + 1)
+
+    print(f"[EXPORT] fp32 내보내기: {pt_path} (opset {opset}, imgsz {imgsz})")
+    fp32_path = export_fp32(pt_path, output_dir / f"{pt_path.stem}.fp32.onnx", imgsz, opset)
+
+    builders = {
+        'fp32': lambda path: fp32_path,
+        'fp16': lambda path: make_fp16(fp32_path, path),
+        'int8_dynamic': lambda path: make_int8_dynamic(fp32_path, path),
+        'int8_static': lambda path: make_int8_static(fp32_path, path, calibration_images, imgsz),
+    }
+
+    baseline = None
+    if data_yaml:
+        print("[EVAL] 기준(.pt) mAP 측정 중...")
+        baseline = evaluate_map(pt_path, data_yaml, imgsz)
+        print(f"[EVAL] 기준 mAP50: {baseline['map50']:.4f}")
+
+    records = []
+    for variant in variants:
+        record = {'variant': variant}
+        try:
+            raw_path = builders[variant](output_dir / f"{pt_path.stem}.{variant}.onnx")
+            optimized_path = optimize_graph(raw_path)
+            record['path'] = str(optimized_path)
+            record['size_mb'] = round(optimized_path.stat().st_size / 1024 / 1024, 2)
+            record.update(benchmark_cpu(optimized_path, benchmark_images, imgsz, threads))
+            if baseline:
+                accuracy = evaluate_map(optimized_path, data_yaml, imgsz)
+                record.update(accuracy)
+                record['map50_drift'] = round(baseline['map50'] - accuracy['map50'], 4)
+                record['acceptable'] = record['map50_drift'] <= max_drift
+            else:
+                record['acceptable'] = None  # 정확도 미검증
+            print(f"[OK] {variant}: {record['size_mb']}MB, p50 {record['latency_p50_ms']}ms"
+                  + (f", mAP50 drift {record['map50_drift']:+.4f}" if baseline else ""))
+        except ImportError as e:
+            record['error'] = f"의존성 없음: {e}"
+            print(f"[SKIP] {variant}: {record['error']}")
+        except Exception as e:
+            record['error'] = str(e)
+            print(f"[WARN] {variant} 변형 생성/검증 실패: {e}")
+        records.append(record)
+
+    # 허용 drift 이내(검증 안 된 경우 fp32만 신뢰)에서 p50 최소 변형 선택
+    candidates = [
+        r for r in records
+        if 'error' not in r and (r['acceptable'] or (r['acceptable'] is None and r['variant'] == 'fp32'))
+    ]
+    recommended = min(candidates, key=lambda r: r['latency_p50_ms'])['variant'] if candidates else None
+
+    report = {
+        'source': str(pt_path),
+        'imgsz': imgsz,
+        'opset': opset,
+        'max_map50_drift': max_drift,
+        'baseline': baseline,
+        'calibration_images': len(calibration_images),
+        'benchmark_images': len(benchmark_images),
+        'variants': records,
+        'recommended_edge_variant': recommended,
+        'created_at': datetime.now().isoformat(),
+    }
+    with open(output_dir / 'export_report.json', 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[RESULT] 엣지 배포 추천 변형: {recommended} (보고서: {output_dir / 'export_report.json'})")
+    return report
+
+
+def record_variants(supabase, model_name: str, report: Dict, upload: bool = False) -> bool:
+    """model_registry 행의 training_metadata.export_variants에 변형별 크기/지연/정확도 기록 (선택 시 변형 파일 업로드)"""
+    response = supabase.table('model_registry').select('id, training_metadata').eq('model_name', model_name).execute()
+    if not response.data:
+        print(f"[WARN] model_registry에서 모델을 찾을 수 없습니다: {model_name}")
+        return False
+    row = response.data[0]
+
+    variants = []
+    for record in report['variants']:
+        entry = {k: v for k, v in record.items() if k != 'path'}
+        if upload and 'error' not in record:
+            bucket_path = f"{model_name}.{record['variant']}.onnx"
+            with open(record['path'], 'rb') as f:
+                supabase.storage.from_('models').upload(bucket_path, f.read(), {'upsert': 'true'})
+            entry['model_path'] = bucket_path
+        variants.append(entry)
+
+    metadata = dict(row.get('training_metadata') or {})
+    metadata['export_variants'] = variants
+    metadata['recommended_edge_variant'] = report['recommended_edge_variant']
+    metadata['export_benchmark'] = {
+        'imgsz': report['imgsz'],
+        'opset': report['opset'],
+        'baseline': report['baseline'],
+        'benchmark_images': report['benchmark_images'],
+        'max_map50_drift': report['max_map50_drift'],
+        'created_at': report['created_at'],
+    }
+    supabase.table('model_registry').update({
+        'training_metadata': metadata,
+        'updated_at': datetime.now().isoformat(),
+    }).eq('id', row['id']).execute()
+    print(f"[OK] model_registry 변형 기록 완료: {model_name} ({len(variants)}개)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ONNX 변형(fp32/fp16/int8) 내보내기 + 벤치마크 + mAP drift 검증')
+    parser.add_argument('pt_path', help='로컬 .pt 모델 경로')
+    parser.add_argument('--data', help='mAP 검증용 dataset.yaml (없으면 정확도 검증 생략)')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--opset', type=int, default=DEFAULT_OPSET)
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--max-drift', type=float, default=MAX_MAP_DRIFT, help='허용 mAP50 하락폭')
+    parser.add_argument('--threads', type=int, default=0, help='벤치마크 intra-op 스레드 수 (0=ORT 기본)')
+    parser.add_argument('--output-dir', default=str(DEFAULT_OUTPUT_DIR))
+    parser.add_argument('--model-name', help='기록할 model_registry model_name')
+    parser.add_argument('--upload', action='store_true', help='변형 ONNX 파일을 models 버킷에 업로드')
+    args = parser.parse_args()
+
+    report = build_variants(args.pt_path, args.output_dir, args.imgsz, args.data, args.variants,
+                            args.opset, args.max_drift, args.threads)
+    if args.model_name:
+        sys.path.insert(0, str(Path(__file__).parent))
+        from convert_pt_to_onnx import setup_supabase
+        record_variants(setup_supabase(), args.model_name, report, args.upload)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+BrickBox 로컬 부품 ANN 인덱스
+
+parts_master_features의 768차원 clip_text_emb / semantic_vector로
+로컬 근사 최근접 이웃(ANN) 인덱스를 구축하여 네트워크 없이 부품 식별 top-k 조회.
+- 백엔드: hnswlib (HNSW, CPU) / 미설치 시 NumPy 정확 검색 폴백
+- 증분 추가/삭제 (삭제는 마킹 후 주기적 프루닝으로 압축 재구축)
+- 디스크 지속화 (인덱스 파일 + 메타 JSON)
+
+실행 방법:
+    python scripts/part_ann_index.py build --source catalog
+    python scripts/part_ann_index.py build --source db
+    python scripts/part_ann_index.py prune
+    python scripts/part_ann_index.py stats
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+EMBEDDING_DIM = 768
+DEFAULT_INDEX_DIR = Path("output/index/parts_ann")
+
+META_FILE = "parts_index_meta.json"
+HNSW_FILE = "parts_hnsw.bin"
+EXACT_FILE = "parts_exact.npy"
+
+# 프루닝 기준: 삭제 마킹 비율 또는 마지막 프루닝 후 경과 일수
+PRUNE_DELETED_RATIO = 0.10
+PRUNE_MAX_DAYS = 14
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2 정규화 (내적 = 코사인 유사도)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def parse_vector(value) -> Optional[np.ndarray]:
+    """pgvector 문자열('[0.1,...]') 또는 리스트를 NumPy 벡터로 변환"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        value = json.loads(value)
+    vector = np.asarray(value, dtype=np.float32)
+    if vector.shape != (EMBEDDING_DIM,):
+        return None
+    return vector
+
+
+class PartANNIndex:
+    """부품 임베딩 ANN 인덱스 (label = parts_master_features.id)"""
+
+    def __init__(self, index_dir: Path = DEFAULT_INDEX_DIR, dim: int = EMBEDDING_DIM,
+                 backend: Optional[str] = None, ef_construction: int = 200, m: int = 32, ef_search: int = 64):
+        self.index_dir = Path(index_dir)
+        self.dim = dim
+        self.backend = backend or ('hnswlib' if HNSWLIB_AVAILABLE else 'exact')
+        if self.backend == 'hnswlib' and not HNSWLIB_AVAILABLE:
+            raise ImportError("hnswlib 없음 - pip install hnswlib")
+        self.ef_construction = ef_construction
+        self.m = m
+        self.ef_search = ef_search
+
+        # label → {'part_id', 'color_id'}
+        self.entries: Dict[int, Dict] = {}
+        self.deleted: set = set()
+        self.created_at = datetime.now().isoformat()
+        self.last_pruned_at = self.created_at
+
+        self._hnsw = None
+        # exact 백엔드: 정규화된 벡터 행렬 + 행별 label
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._labels = np.zeros((0,), dtype=np.int64)
+
+    # ------------------------------------------------------------
+    # 구축 / 증분 갱신
+    # ------------------------------------------------------------
+
+    def _init_hnsw(self, capacity: int):
+        self._hnsw = hnswlib.Index(space='ip', dim=self.dim)
+        self._hnsw.init_index(max_elements=max(capacity, 1024), ef_construction=self.ef_construction, M=self.m)
+        self._hnsw.set_ef(self.ef_search)
+
+    def add(self, labels: Iterable[int], vectors: np.ndarray, metadata: Iterable[Dict]):
+        """벡터 추가 (이미 있는 label은 벡터 갱신, 삭제 마킹 해제)"""
+        labels = np.asarray(list(labels), dtype=np.int64)
+        vectors = _normalize(vectors)
+        metadata = list(metadata)
+        if len(labels) == 0:
+            return
+        if len(labels) != len(vectors) or len(labels) != len(metadata):
+            raise ValueError("labels/vectors/metadata 길이 불일치")
+
+        if self.backend == 'hnswlib':
+            if self._hnsw is None:
+                self._init_hnsw(len(labels) * 2)
+            required = self._hnsw.get_current_count() + len(labels)
+            if required > self._hnsw.get_max_elements():
+                self._hnsw.resize_index(max(required, self._hnsw.get_max_elements() * 2))
+            for label in labels:
+                if int(label) in self.deleted:
+                    self._hnsw.unmark_deleted(int(label))
+            self._hnsw.add_items(vectors, labels)
+        else:
+            # 기존 label 행 제거 후 추가 (갱신)
+            keep = ~np.isin(self._labels, labels)
+            self._vectors = np.concatenate([self._vectors[keep], vectors])
+            self._labels = np.concatenate([self._labels[keep], labels])
+
+        for label, meta in zip(labels, metadata):
+            self.entries[int(label)] = {'part_id': meta.get('part_id'), 'color_id': meta.get('color_id')}
+            self.deleted.discard(int(label))
+
+    def remove(self, labels: Iterable[int]) -> int:
+        """벡터 삭제 (hnswlib은 삭제 마킹 → prune()에서 압축)"""
+        removed = 0
+        labels = [int(label) for label in labels if int(label) in self.entries and int(label) not in self.deleted]
+        if not labels:
+            return 0
+        if self.backend == 'hnswlib':
+            for label in labels:
+                self._hnsw.mark_deleted(label)
+                self.deleted.add(label)
+                removed += 1
+        else:
+            keep = ~np.isin(self._labels, labels)
+            removed = int((~keep).sum())
+            self._vectors = self._vectors[keep]
+            self._labels = self._labels[keep]
+            for label in labels:
+                self.entries.pop(label, None)
+        return removed
+
+    def needs_pruning(self) -> bool:
+        stats = self.stats()
+        return stats['deleted_ratio'] > PRUNE_DELETED_RATIO or stats['last_pruning_days'] > PRUNE_MAX_DAYS
+
+    def prune(self) -> int:
+        """삭제 마킹된 항목을 물리적으로 제거 (살아있는 벡터로 재구축)"""
+        pruned = len(self.deleted)
+        if self.backend == 'hnswlib' and self._hnsw is not None and pruned:
+            live = [label for label in self.entries if label not in self.deleted]
+            vectors = np.asarray(self._hnsw.get_items(live), dtype=np.float32) if live else np.zeros((0, self.dim), dtype=np.float32)
+            self._init_hnsw(len(live) * 2)
+            if live:
+                self._hnsw.add_items(vectors, np.asarray(live, dtype=np.int64))
+            for label in self.deleted:
+                self.entries.pop(label, None)
+            self.deleted = set()
+        self.last_pruned_at = datetime.now().isoformat()
+        return pruned
+
+    # ------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.entries) - len(self.deleted)
+
+    def query(self, vectors: np.ndarray, k: int = 5) -> List[List[Dict]]:
+        """top-k 조회 (쿼리별 [{'id', 'part_id', 'color_id', 'score'}], score = 코사인 유사도)"""
+        queries = _normalize(vectors)
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        if self.backend == 'hnswlib':
+            labels, distances = self._hnsw.knn_query(queries, k=k)
+            scores = 1.0 - distances
+        else:
+            sims = queries @ self._vectors.T
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            labels = self._labels[np.take_along_axis(top, order, axis=1)]
+            scores = np.take_along_axis(top_scores, order, axis=1)
+
+        results = []
+        for row_labels, row_scores in zip(labels, scores):
+            row = []
+            for label, score in zip(row_labels, row_scores):
+                meta = self.entries.get(int(label), {})
+                row.append({
+                    'id': int(label),
+                    'part_id': meta.get('part_id'),
+                    'color_id': meta.get('color_id'),
+                    'score': float(score)
+                })
+            results.append(row)
+        return results
+
+    # ------------------------------------------------------------
+    # 지속화
+    # ------------------------------------------------------------
+
+    def save(self):
+        """인덱스 파일 + 메타 JSON 저장 (tmp → rename)"""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        if self.backend == 'hnswlib':
+            tmp_path = self.index_dir / (HNSW_FILE + '.tmp')
+            self._hnsw.save_index(str(tmp_path))
+            os.replace(tmp_path, self.index_dir / HNSW_FILE)
+        else:
+            tmp_path = self.index_dir / ('tmp_' + EXACT_FILE)
+            np.save(tmp_path, self._vectors)
+            os.replace(tmp_path, self.index_dir / EXACT_FILE)
+
+        meta = {
+            'backend': self.backend,
+            'dim': self.dim,
+            'm': self.m,
+            'ef_construction': self.ef_construction,
+            'ef_search': self.ef_search,
+            'created_at': self.created_at,
+            'last_pruned_at': self.last_pruned_at,
+            'saved_at': datetime.now().isoformat(),
+            'labels': self._labels.tolist() if self.backend == 'exact' else None,
+            'entries': {str(label): meta for label, meta in self.entries.items()},
+            'deleted': sorted(self.deleted)
+        }
+        tmp_meta = self.index_dir / (META_FILE + '.tmp')
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_meta, self.index_dir / META_FILE)
+
+    @classmethod
+    def load(cls, index_dir: Path = DEFAULT_INDEX_DIR) -> 'PartANNIndex':
+        index_dir = Path(index_dir)
+        with open(index_dir / META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        index = cls(index_dir, dim=meta['dim'], backend=meta['backend'],
+                    ef_construction=meta['ef_construction'], m=meta['m'], ef_search=meta['ef_search'])
+        index.created_at = meta['created_at']
+        index.last_pruned_at = meta['last_pruned_at']
+        index.entries = {int(label): entry for label, entry in meta['entries'].items()}
+        index.deleted = set(meta['deleted'])
+
+        if index.backend == 'hnswlib':
+            index._hnsw = hnswlib.Index(space='ip', dim=index.dim)
+            index._hnsw.load_index(str(index_dir / HNSW_FILE), max_elements=max(len(index.entries) * 2, 1024))
+            index._hnsw.set_ef(index.ef_search)
+        else:
+            index._vectors = np.load(index_dir / EXACT_FILE)
+            index._labels = np.asarray(meta['labels'], dtype=np.int64)
+        return index
+
+    def stats(self) -> Dict:
+        """인덱스 상태 (SLO 체크용)"""
+        size_bytes = 0
+        for name in (HNSW_FILE, EXACT_FILE, META_FILE):
+            path = self.index_dir / name
+            if path.exists():
+                size_bytes += path.stat().st_size
+        last_pruned = datetime.fromisoformat(self.last_pruned_at)
+        total = len(self.entries)
+        return {
+            'backend': self.backend,
+            'vector_count': len(self),
+            'deleted_count': len(self.deleted),
+            'deleted_ratio': (len(self.deleted) / total) if total else 0.0,
+            'index_size_mb': size_bytes / (1024 * 1024),
+            'last_pruned_at': self.last_pruned_at,
+            'last_pruning_days': (datetime.now() - last_pruned).total_seconds() / 86400
+        }
+
+
+# ------------------------------------------------------------
+# 구축 소스
+# ------------------------------------------------------------
+
+def build_from_catalog(catalog_dir: Optional[Path] = None, index_dir: Path = DEFAULT_INDEX_DIR, **kwargs) -> PartANNIndex:
+    """precompute_catalog_embeddings.py 결과(float16 행렬 + 인덱스)에서 구축"""
+    sys.path.insert(0, str(Path(__file__).parent))
+    from precompute_catalog_embeddings import load_catalog_embeddings, DEFAULT_OUTPUT_DIR
+
+    matrix, entries = load_catalog_embeddings(catalog_dir or DEFAULT_OUTPUT_DIR)
+    index = PartANNIndex(index_dir, **kwargs)
+    index.add([e['id'] for e in entries], np.asarray(matrix, dtype=np.float32), entries)
+    return index
+
+
+def fetch_db_vectors(supabase, column: str = 'clip_text_emb', page_size: int = 1000) -> Tuple[List[int], np.ndarray, List[Dict]]:
+    """parts_master_features에서 768차원 벡터 조회 (벡터 없는 행 제외)"""
+    labels, vectors, metadata = [], [], []
+    start = 0
+    while True:
+        result = supabase.table('parts_master_features') \
+            .select(f'id, part_id, color_id, {column}') \
+            .not_.is_(column, 'null') \
+            .order('id') \
+            .range(start, start + page_size - 1) \
+            .execute()
+        page = result.data or []
+        for row in page:
+            vector = parse_vector(row.get(column))
+            if vector is None:
+                continue
+            labels.append(row['id'])
+            vectors.append(vector)
+            metadata.append({'part_id': row['part_id'], 'color_id': row.get('color_id')})
+        if len(page) < page_size:
+            break
+        start += page_size
+    matrix = np.stack(vectors) if vectors else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return labels, matrix, metadata
+
+
+def build_from_db(supabase, column: str = 'clip_text_emb', index_dir: Path = DEFAULT_INDEX_DIR, **kwargs) -> PartANNIndex:
+    """DB의 clip_text_emb 또는 semantic_vector 컬럼에서 구축"""
+    labels, matrix, metadata = fetch_db_vectors(supabase, column)
+    index = PartANNIndex(index_dir, **kwargs)
+    index.add(labels, matrix, metadata)
+    return index
+
+
+_loaded_index: Optional[PartANNIndex] = None
+
+
+def get_part_index(index_dir: Path = DEFAULT_INDEX_DIR) -> Optional[PartANNIndex]:
+    """프로세스 내 상주 인덱스 반환 (없으면 디스크에서 1회 로드, 파일 없으면 None)"""
+    global _loaded_index
+    if _loaded_index is None:
+        if not (Path(index_dir) / META_FILE).exists():
+            return None
+        _loaded_index = PartANNIndex.load(index_dir)
+    return _loaded_index
+
+
+def _setup_supabase():
+    from supabase import create_client
+
+    url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
+    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('VITE_SUPABASE_SERVICE_ROLE') or os.getenv('SUPABASE_KEY')
+    if not url or not key:
+        print("[ERROR] Supabase 환경 변수가 설정되지 않았습니다 (VITE_SUPABASE_URL, VITE_SUPABASE_SERVICE_ROLE)")
+        sys.exit(1)
+    return create_client(url, key)
+
+
+def _benchmark(index: PartANNIndex, queries: int = 200, k: int = 5) -> float:
+    """무작위 쿼리 평균 조회 지연 (ms)"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((queries, index.dim)).astype(np.float32)
+    start = time.perf_counter()
+    for vector in vectors:
+        index.query(vector, k=k)
+    return (time.perf_counter() - start) * 1000 / queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 부품 ANN 인덱스 관리')
+    parser.add_argument('command', choices=['build', 'prune', 'stats'], help='실행할 작업')
+    parser.add_argument('--source', choices=['catalog', 'db'], default='catalog', help='구축 소스')
+    parser.add_argument('--column', choices=['clip_text_emb', 'semantic_vector'], default='clip_text_emb', help='DB 벡터 컬럼')
+    parser.add_argument('--catalog-dir', default=None, help='카탈로그 임베딩 디렉토리')
+    parser.add_argument('--index-dir', default=str(DEFAULT_INDEX_DIR), help='인덱스 저장 디렉토리')
+    parser.add_argument('--backend', choices=['hnswlib', 'exact'], default=None, help='인덱스 백엔드')
+    args = parser.parse_args()
+
+    index_dir = Path(args.index_dir)
+
+    if args.command == 'build':
+        if args.source == 'catalog':
+            index = build_from_catalog(args.catalog_dir, index_dir, backend=args.backend)
+        else:
+            index = build_from_db(_setup_supabase(), args.column, index_dir, backend=args.backend)
+        index.save()
+        print(f"[OK] 인덱스 구축 완료: {len(index)}개 ({index.backend}) → {index_dir}")
+    elif args.command == 'prune':
+        index = PartANNIndex.load(index_dir)
+        pruned = index.prune()
+        index.save()
+        print(f"[OK] 프루닝 완료: {pruned}개 제거, 남은 벡터 {len(index)}개")
+    else:
+        index = PartANNIndex.load(index_dir)
+
+    stats = index.stats()
+    stats['avg_query_ms'] = round(_benchmark(index), 4) if len(index) else None
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+BrickBox 부품 카탈로그 텍스트 임베딩 일괄 사전 계산
+
+parts_master_features 전체 (부품 × 색상)에 대해 프롬프트 텍스트를 생성하고
+CLIP 서비스의 배치 경로(/v1/embeddings, list 입력)로 임베딩한 뒤
+- float16 임베딩 행렬 파일 (clip_text_emb.f16.npy, N x 768)
+- 행 번호 → (id, part_id, color_id) 인덱스 (clip_text_emb_index.json)
+- DB 일괄 upsert (clip_text_emb, semantic_vector)
+를 함께 기록한다. 배치 단위 체크포인트로 중단 후 재개 가능.
+DB upsert 실패 구간은 체크포인트(failed_ranges)에 기록되어 재실행 시 행렬 파일의 임베딩으로 재시도한다.
+
+실행 방법:
+    python scripts/precompute_catalog_embeddings.py
+    python scripts/precompute_catalog_embeddings.py --skip-db --batch-size 128
+    python scripts/precompute_catalog_embeddings.py --restart
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+# .env 파일 로드 시도
+try:
+    from dotenv import load_dotenv
+    load_dotenv(Path(__file__).parent.parent / '.env')
+except ImportError:
+    pass
+
+EMBEDDING_DIM = 768
+DEFAULT_OUTPUT_DIR = Path("output/embeddings/catalog")
+DEFAULT_CLIP_URL = os.getenv("CLIP_SERVICE_URL", "http://localhost:3021")
+
+MATRIX_FILE = "clip_text_emb.f16.npy"
+INDEX_FILE = "clip_text_emb_index.json"
+CHECKPOINT_FILE = "checkpoint.json"
+
+# Supabase 한 번에 조회/업서트할 행 수
+PAGE_SIZE = 1000
+UPSERT_BATCH_SIZE = 100
+
+
+def setup_supabase():
+    """Supabase 클라이언트 설정 (Service Role 우선)"""
+    from supabase import create_client
+
+    url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
+    key = (
+        os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        or os.getenv('VITE_SUPABASE_SERVICE_ROLE')
+        or os.getenv('SUPABASE_KEY')
+    )
+    if not url or not key:
+        print("[ERROR] Supabase 환경 변수가 설정되지 않았습니다 (VITE_SUPABASE_URL, VITE_SUPABASE_SERVICE_ROLE)")
+        sys.exit(1)
+    return create_client(url, key)
+
+
+def fetch_all_parts(supabase) -> List[Dict]:
+    """parts_master_features 전체 조회 (id 순, 페이지 단위)"""
+    rows = []
+    start = 0
+    while True:
+        result = supabase.table('parts_master_features') \
+            .select('id, part_id, part_name, color_id, feature_text, recognition_hints') \
+            .order('id') \
+            .range(start, start + PAGE_SIZE - 1) \
+            .execute()
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return rows
+
+
+def fetch_color_names(supabase) -> Dict[int, str]:
+    """lego_colors에서 color_id → 색상 이름 맵 조회"""
+    try:
+        result = supabase.table('lego_colors').select('color_id, name').execute()
+        return {row['color_id']: row['name'] for row in (result.data or []) if row.get('name')}
+    except Exception as e:
+        print(f"[WARN] 색상 이름 조회 실패 (색상 없이 프롬프트 생성): {e}")
+        return {}
+
+
+def build_prompt_text(row: Dict, color_names: Dict[int, str]) -> str:
+    """부품/색상 행에서 임베딩용 프롬프트 텍스트 생성 (embedding_worker와 동일 규칙 + 색상명)"""
+    text = row.get('feature_text') or f"{row.get('part_name') or row['part_id']} 레고 부품"
+    hints = row.get('recognition_hints')
+    if isinstance(hints, dict) and hints.get('ko'):
+        text += " " + hints['ko']
+    color_name = color_names.get(row.get('color_id'))
+    if color_name:
+        text = f"{color_name} {text}"
+    return text.strip()
+
+
+def embed_texts(clip_url: str, texts: List[str], timeout: int = 300, retries: int = 3) -> np.ndarray:
+    """CLIP 서비스 배치 경로로 텍스트 임베딩 (N x 768, float32)"""
+    last_error = None
+    for attempt in range(1, retries + 1):
+        try:
+            response = requests.post(
+                f"{clip_url.rstrip('/')}/v1/embeddings",
+                json={'input': texts, 'model': 'clip-vit-l/14', 'dimensions': EMBEDDING_DIM},
+                timeout=timeout
+            )
+            response.raise_for_status()
+            data = sorted(response.json()['data'], key=lambda d: d['index'])
+            matrix = np.asarray([d['embedding'] for d in data], dtype=np.float32)
+            if matrix.shape != (len(texts), EMBEDDING_DIM):
+                raise ValueError(f"임베딩 형태 불일치: {matrix.shape}")
+            return matrix
+        except Exception as e:
+            # 모든 실패(모델 워밍업 503, 타임아웃, 응답 형태 오류 등)를 잠시 대기 후 재시도
+            last_error = e
+            print(f"[WARN] 임베딩 요청 실패 ({attempt}/{retries}): {e}")
+            time.sleep(2 * attempt)
+    raise RuntimeError(f"CLIP 서비스 임베딩 실패: {last_error}")
+
+
+def embedding_to_str(emb: np.ndarray) -> str:
+    """임베딩을 DB 저장 형식으로 변환"""
+    return '[' + ','.join(f'{v:.6f}' for v in emb) + ']'
+
+
+def upsert_embeddings(supabase, rows: List[Dict], matrix: np.ndarray,
+                      offset: int = 0) -> Tuple[int, List[List[int]]]:
+    """clip_text_emb / semantic_vector 일괄 upsert (id 기준)
+
+    반환: (성공 행 수, 실패 구간 [[시작, 끝), ...] - offset 기준 카탈로그 행 번호)
+    """
+    success = 0
+    failed: List[List[int]] = []
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        chunk = rows[i:i + UPSERT_BATCH_SIZE]
+        now = datetime.now().isoformat()
+        records = []
+        for j, row in enumerate(chunk):
+            emb_str = embedding_to_str(np.asarray(matrix[i + j], dtype=np.float32))
+            records.append({
+                'id': row['id'],
+                'part_id': row['part_id'],
+                'color_id': row.get('color_id'),
+                'clip_text_emb': emb_str,
+                'semantic_vector': emb_str,  # 동일 벡터 사용
+                'embedding_status': 'completed',
+                'updated_at': now
+            })
+        try:
+            supabase.table('parts_master_features').upsert(records, on_conflict='id').execute()
+            success += len(records)
+        except Exception as e:
+            print(f"[WARN] DB upsert 실패 ({len(records)}개, 행 {offset + i}-{offset + i + len(records) - 1}): {e}")
+            failed.append([offset + i, offset + i + len(records)])
+    return success, failed
+
+
+def retry_failed_upserts(supabase, rows: List[Dict], matrix: np.ndarray, checkpoint: Dict) -> None:
+    """체크포인트에 기록된 upsert 실패 구간을 행렬 파일의 임베딩으로 재시도 (남은 실패만 다시 기록)"""
+    pending = checkpoint.get('failed_ranges') or []
+    if not pending:
+        return
+    print(f"[RESUME] DB upsert 실패 구간 재시도: {sum(end - start for start, end in pending)}개 행")
+    remaining: List[List[int]] = []
+    for start, end in pending:
+        success, failed = upsert_embeddings(supabase, rows[start:end], matrix[start:end], offset=start)
+        checkpoint['db_upserted'] += success
+        remaining.extend(failed)
+    checkpoint['failed_ranges'] = remaining
+
+
+def catalog_signature(index: List[Dict]) -> str:
+    """카탈로그 구성(행 순서 + 프롬프트) 해시 - 재개 시 동일 카탈로그인지 확인"""
+    h = hashlib.sha256()
+    for entry in index:
+        h.update(f"{entry['id']}|{entry['text']}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def load_checkpoint(output_dir: Path) -> Optional[Dict]:
+    path = output_dir / CHECKPOINT_FILE
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] 체크포인트 읽기 실패 (처음부터 실행): {e}")
+        return None
+
+
+def save_checkpoint(output_dir: Path, checkpoint: Dict):
+    """체크포인트 원자적 저장 (tmp → rename)"""
+    path = output_dir / CHECKPOINT_FILE
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_catalog_embeddings(output_dir: Path = DEFAULT_OUTPUT_DIR, mmap: bool = True) -> Tuple[np.ndarray, List[Dict]]:
+    """사전 계산된 카탈로그 임베딩 로드 (float16 행렬, 행 인덱스)
+
+    완료되지 않은 카탈로그(체크포인트 미완료)는 완료된 행까지만 반환한다.
+    """
+    output_dir = Path(output_dir)
+    matrix = np.load(output_dir / MATRIX_FILE, mmap_mode='r' if mmap else None)
+    with open(output_dir / INDEX_FILE, 'r', encoding='utf-8') as f:
+        index = json.load(f)['entries']
+    checkpoint = load_checkpoint(output_dir)
+    done = checkpoint['done'] if checkpoint else len(index)
+    return matrix[:done], index[:done]
+
+
+def run(args) -> Dict:
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    supabase = setup_supabase()
+
+    print("[INFO] 부품 카탈로그 조회 중...")
+    rows = fetch_all_parts(supabase)
+    color_names = fetch_color_names(supabase)
+    if not rows:
+        print("[ERROR] parts_master_features 데이터가 없습니다")
+        return {'success': False, 'total': 0}
+
+    index = [{
+        'row': i,
+        'id': row['id'],
+        'part_id': row['part_id'],
+        'color_id': row.get('color_id'),
+        'text': build_prompt_text(row, color_names)
+    } for i, row in enumerate(rows)]
+    signature = catalog_signature(index)
+    total = len(index)
+    print(f"[OK] 카탈로그 {total}개 (부품 × 색상), 색상 이름 {len(color_names)}개")
+
+    # 재개 판단: 동일 카탈로그 + 행렬 파일 존재 시 이어서 처리
+    checkpoint = None if args.restart else load_checkpoint(output_dir)
+    matrix_path = output_dir / MATRIX_FILE
+    if checkpoint and checkpoint.get('signature') == signature and matrix_path.exists():
+        matrix = np.load(matrix_path, mmap_mode='r+')
+        done = checkpoint['done']
+        print(f"[RESUME] 체크포인트에서 재개: {done}/{total}")
+    else:
+        if checkpoint:
+            print("[INFO] 카탈로그가 변경되어 처음부터 다시 계산합니다")
+        matrix = np.lib.format.open_memmap(matrix_path, mode='w+', dtype=np.float16, shape=(total, EMBEDDING_DIM))
+        with open(output_dir / INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'model': 'clip-vit-l/14',
+                'dimensions': EMBEDDING_DIM,
+                'dtype': 'float16',
+                'signature': signature,
+                'created_at': datetime.now().isoformat(),
+                'entries': index
+            }, f, ensure_ascii=False, separators=(',', ':'))
+        done = 0
+        checkpoint = {'signature': signature, 'total': total, 'done': 0, 'db_upserted': 0, 'failed_ranges': []}
+        save_checkpoint(output_dir, checkpoint)
+
+    # done은 행렬 파일 기준 진행도, DB 반영 실패 구간은 failed_ranges로 따로 추적
+    checkpoint.setdefault('failed_ranges', [])
+    if not args.skip_db:
+        retry_failed_upserts(supabase, rows, matrix, checkpoint)
+        save_checkpoint(output_dir, checkpoint)
+
+    start_time = time.time()
+    start_done = done
+    while done < total:
+        end = min(done + args.batch_size, total)
+        batch_rows = rows[done:end]
+        embeddings = embed_texts(args.clip_url, [entry['text'] for entry in index[done:end]])
+
+        matrix[done:end] = embeddings.astype(np.float16)
+        matrix.flush()
+
+        if not args.skip_db:
+            success, failed = upsert_embeddings(supabase, batch_rows, embeddings, offset=done)
+            checkpoint['db_upserted'] += success
+            checkpoint['failed_ranges'].extend(failed)
+
+        done = end
+        checkpoint['done'] = done
+        checkpoint['updated_at'] = datetime.now().isoformat()
+        save_checkpoint(output_dir, checkpoint)
+
+        elapsed = time.time() - start_time
+        rate = (done - start_done) / elapsed if elapsed > 0 else 0.0
+        print(f"[PROGRESS] {done}/{total} ({done / total * 100:.1f}%), {rate:.1f} rows/s")
+
+    checkpoint['completed_at'] = datetime.now().isoformat()
+    save_checkpoint(output_dir, checkpoint)
+
+    size_mb = matrix_path.stat().st_size / (1024 * 1024)
+    print("=" * 60)
+    print(f"[OK] 카탈로그 임베딩 완료: {total}개, 행렬 {size_mb:.1f}MB ({matrix_path})")
+    failed_rows = sum(end - start for start, end in checkpoint['failed_ranges'])
+    if not args.skip_db:
+        print(f"[OK] DB upsert: {checkpoint['db_upserted']}개")
+        if failed_rows:
+            print(f"[ERROR] DB upsert 실패 {failed_rows}개 행 (구간: {checkpoint['failed_ranges'][:10]}) "
+                  f"- 다시 실행하면 실패 구간만 재시도합니다")
+    print("=" * 60)
+    return {'success': args.skip_db or not failed_rows, 'total': total, 'db_upserted': checkpoint['db_upserted'],
+            'failed_rows': failed_rows, 'matrix_path': str(matrix_path)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='부품 카탈로그 텍스트 임베딩 일괄 사전 계산')
+    parser.add_argument('--output-dir', default=str(DEFAULT_OUTPUT_DIR), help='출력 디렉토리')
+    parser.add_argument('--clip-url', default=DEFAULT_CLIP_URL, help='CLIP 임베딩 서비스 URL')
+    parser.add_argument('--batch-size', type=int, default=64, help='CLIP 서비스 요청당 텍스트 수')
+    parser.add_argument('--skip-db', action='store_true', help='DB upsert 생략 (파일만 생성)')
+    parser.add_argument('--restart', action='store_true', help='체크포인트 무시하고 처음부터 계산')
+    args = parser.parse_args()
+
+    result = run(args)
+    sys.exit(0 if result.get('success') else 1)
+
+
+if __name__ == '__main__':
+    main()
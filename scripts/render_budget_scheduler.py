@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+렌더 예산 스케줄러
+- 전역 렌더 예산(렌더-시간)을 부품별 기대 정확도 향상 / 렌더 비용 비율로 배분
+  · 현재 정확도: part_training_status(map50, recall), 미학습 부품은 오차 1.0
+  · 보유 샘플: dataset_synthetic/{부품}/images 파일 수
+  · 렌더 비용: 과거 rendering_jobs 실측(초/장) → 메타 render_time_sec 중앙값 → 전체 중앙값
+  · 난이도: 하드 예제 마이닝 결과(latest.json)의 hardness 가중
+- 학습 곡선 err(n) = err_now · ((n_now + n0) / (n + n0))^α 로 추가 샘플의 한계 이득을 추정하고
+  청크 단위 탐욕 배분 (이득/초가 가장 큰 부품부터, 수확 체감 반영)
+- 결과는 rendering_jobs 우선순위 큐(pending)로 발행, --run 모드에서 우선순위 순으로 Blender 실행
+  → 고정 --count 대신 렌더-시간당 정확도 향상 극대화
+
+실행 방법:
+    python scripts/render_budget_scheduler.py --budget_hours 24 --dry_run
+    python scripts/render_budget_scheduler.py --budget_hours 24
+    python scripts/render_budget_scheduler.py --run --max_jobs 5
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATASET_ROOT = PROJECT_ROOT / 'output' / 'synthetic' / 'dataset_synthetic'
+PLAN_DIR = PROJECT_ROOT / 'output' / 'render_budget'
+HARD_EXAMPLE_REPORT = PROJECT_ROOT / 'output' / 'hard_examples' / 'latest.json'
+
+JOB_TYPE = 'budget_schedule'
+LEARNING_CURVE_ALPHA = 0.5      # 합성 데이터 검출 학습 곡선 지수 (오차 ∝ n^-α)
+LEARNING_CURVE_N0 = 20          # 샘플 0장 부품의 발산 방지 평활 상수
+UNTRAINED_ERROR = 1.0           # 미학습 부품 오차
+DEFAULT_SEC_PER_IMAGE = 12.0    # 비용 정보가 전혀 없을 때 (fast 품질 기준)
+META_SAMPLE_LIMIT = 50          # 비용 추정 시 부품당 읽을 메타 JSON 수
+CHUNK_SIZE = 20                 # 배분 단위 (Blender 기동 오버헤드 대비 최소 작업량)
+MIN_JOB_IMAGES = 20
+MAX_IMAGES_PER_PART = 400       # 한 계획에서 부품당 상한
+TARGET_SAMPLES_PER_PART = 1500  # 이 이상 보유한 부품은 배분 제외
+PRIORITY_RANK = {'high': 0, 'normal': 1, 'low': 2}
+
+
+def get_supabase_client():
+    """환경 변수 기반 Supabase 클라이언트 (설정 없으면 None)"""
+    try:
+        from supabase import create_client
+        from dotenv import load_dotenv
+        load_dotenv(PROJECT_ROOT / 'config' / 'synthetic_dataset.env')
+    except ImportError:
+        return None
+    url = os.getenv('VITE_SUPABASE_URL') or os.getenv('SUPABASE_URL')
+    key = os.getenv('VITE_SUPABASE_SERVICE_ROLE') or os.getenv('SUPABASE_SERVICE_ROLE')
+    if not url or not key:
+        return None
+    return create_client(url, key)
+
+
+def fetch_part_metrics(supabase) -> Dict[str, Dict]:
+    """part_training_status → {part_id: {map50, recall, status, last_trained_at}}"""
+    if supabase is None:
+        return {}
+    try:
+        rows = supabase.table('part_training_status').select(
+            'part_id, status, map50, recall, last_trained_at').execute().data or []
+    except Exception as e:
+        print(f"[WARN] part_training_status 조회 실패: {e}")
+        return {}
+    return {str(row['part_id']): row for row in rows}
+
+
+def fetch_job_costs(supabase, limit: int = 500) -> Dict[str, float]:
+    """완료된 rendering_jobs 실측 초/장 (부품별 중앙값, Blender 기동/업로드 포함)"""
+    if supabase is None:
+        return {}
+    try:
+        rows = supabase.table('rendering_jobs').select(
+            'part_id, image_count, started_at, completed_at, progress').eq(
+            'status', 'completed').order('completed_at', desc=True).limit(limit).execute().data or []
+    except Exception as e:
+        print(f"[WARN] rendering_jobs 조회 실패: {e}")
+        return {}
+
+    samples = {}
+    for row in rows:
+        sec_per_image = (row.get('progress') or {}).get('sec_per_image')
+        if not sec_per_image and row.get('started_at') and row.get('completed_at') and row.get('image_count'):
+            try:
+                started = datetime.fromisoformat(row['started_at'].replace('Z', '+00:00'))
+                completed = datetime.fromisoformat(row['completed_at'].replace('Z', '+00:00'))
+                sec_per_image = (completed - started).total_seconds() / row['image_count']
+            except (ValueError, TypeError):
+                sec_per_image = None
+        if sec_per_image and sec_per_image > 0:
+            samples.setdefault(str(row['part_id']), []).append(float(sec_per_image))
+    return {part_id: statistics.median(values) for part_id, values in samples.items()}
+
+
+def scan_local_dataset(dataset_root: Path = DATASET_ROOT) -> Dict[str, Dict]:
+    """dataset_synthetic/{element|part} 폴더별 보유 이미지 수와 메타 render_time_sec 중앙값"""
+    parts = {}
+    if not dataset_root.exists():
+        return parts
+    for entry in os.scandir(dataset_root):
+        if not entry.is_dir():
+            continue
+        images_dir = Path(entry.path) / 'images'
+        meta_dir = Path(entry.path) / 'meta'
+        count = sum(1 for f in os.scandir(images_dir) if f.is_file()) if images_dir.exists() else 0
+
+        part_id, element_id, render_times = entry.name, None, []
+        if meta_dir.exists():
+            for meta_entry in list(os.scandir(meta_dir))[:META_SAMPLE_LIMIT]:
+                if not meta_entry.name.endswith('.json'):
+                    continue
+                try:
+                    with open(meta_entry.path, 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                part_id = str(meta.get('part_id') or part_id)
+                element_id = meta.get('element_id') or element_id
+                if meta.get('render_time_sec'):
+                    render_times.append(float(meta['render_time_sec']))
+
+        info = parts.setdefault(part_id, {'samples': 0, 'render_times': [], 'subdir': entry.name,
+                                          'element_id': element_id})
+        info['samples'] += count
+        info['render_times'].extend(render_times)
+    for info in parts.values():
+        times = info.pop('render_times')
+        info['meta_sec_per_image'] = statistics.median(times) if times else None
+    return parts
+
+
+def load_hardness(report_path: Path = HARD_EXAMPLE_REPORT) -> Dict[str, float]:
+    """하드 예제 마이닝 최신 결과의 부품별 난이도 (없으면 빈 dict)"""
+    try:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {str(part['part_id']): float(part.get('hardness', 0.0)) for part in report.get('parts', [])}
+
+
+def expected_error(current_error: float, current_samples: int, samples: int) -> float:
+    """학습 곡선으로 samples장 보유 시 기대 오차"""
+    ratio = (current_samples + LEARNING_CURVE_N0) / (samples + LEARNING_CURVE_N0)
+    return current_error * ratio ** LEARNING_CURVE_ALPHA
+
+
+def build_candidates(metrics: Dict[str, Dict], local: Dict[str, Dict], job_costs: Dict[str, float],
+                     hardness: Dict[str, float], part_ids: Optional[List[str]] = None) -> List[Dict]:
+    """배분 대상 부품별 현재 오차/보유 샘플/비용/가중치"""
+    known_costs = list(job_costs.values()) + [info['meta_sec_per_image'] for info in local.values()
+                                              if info.get('meta_sec_per_image')]
+    fallback_cost = statistics.median(known_costs) if known_costs else DEFAULT_SEC_PER_IMAGE
+
+    candidates = []
+    for part_id in part_ids or sorted(set(metrics) | set(local)):
+        status = metrics.get(part_id, {})
+        info = local.get(part_id, {})
+        map50 = float(status.get('map50') or 0.0)
+        recall = float(status.get('recall') or 0.0)
+        trained = status.get('status') == 'completed' and map50 > 0
+        # 미검출이 분류기 혼동보다 치명적이므로 map50/recall 중 낮은 쪽 기준
+        if not trained:
+            error = UNTRAINED_ERROR
+        else:
+            error = 1.0 - (min(map50, recall) if recall > 0 else map50)
+        cost = job_costs.get(part_id) or info.get('meta_sec_per_image') or fallback_cost
+        candidates.append({
+            'part_id': part_id,
+            'element_id': info.get('element_id'),
+            'subdir': info.get('subdir', part_id),
+            'samples': int(info.get('samples', 0)),
+            'map50': map50,
+            'recall': recall,
+            'error': max(0.0, error),
+            'weight': 1.0 + hardness.get(part_id, 0.0),
+            'sec_per_image': float(cost),
+            'cost_source': 'jobs' if part_id in job_costs else ('meta' if info.get('meta_sec_per_image') else 'fallback'),
+        })
+    return candidates
+
+
+def allocate_budget(candidates: List[Dict], budget_hours: float, chunk_size: int = CHUNK_SIZE,
+                    max_per_part: int = MAX_IMAGES_PER_PART,
+                    target_samples: int = TARGET_SAMPLES_PER_PART) -> List[Dict]:
+    """청크 단위 탐욕 배분: (기대 오차 감소 × 가중치) / 렌더 초 가 큰 부품부터 예산 소진"""
+    remaining = budget_hours * 3600.0
+    allocated = {c['part_id']: 0 for c in candidates}
+    gains = {c['part_id']: 0.0 for c in candidates}
+
+    def marginal(c):
+        have = c['samples'] + allocated[c['part_id']]
+        gain = (expected_error(c['error'], c['samples'], have) -
+                expected_error(c['error'], c['samples'], have + chunk_size)) * c['weight']
+        return gain, gain / (chunk_size * c['sec_per_image'])
+
+    heap = []
+    for c in candidates:
+        if c['error'] > 0 and c['samples'] < target_samples:
+            gain, rate = marginal(c)
+            heapq.heappush(heap, (-rate, c['part_id'], gain, c))
+
+    while heap:
+        _, part_id, gain, c = heapq.heappop(heap)
+        cost = chunk_size * c['sec_per_image']
+        if cost > remaining:
+            continue  # 더 저렴한 부품이 남아 있을 수 있으므로 계속
+        remaining -= cost
+        allocated[part_id] += chunk_size
+        gains[part_id] += gain
+        if allocated[part_id] + chunk_size <= max_per_part and c['samples'] + allocated[part_id] < target_samples:
+            gain, rate = marginal(c)
+            heapq.heappush(heap, (-rate, part_id, gain, c))
+
+    plan = []
+    for c in candidates:
+        count = allocated[c['part_id']]
+        if count < MIN_JOB_IMAGES:
+            continue
+        plan.append(dict(c, image_count=count, expected_gain=gains[c['part_id']],
+                         est_hours=count * c['sec_per_image'] / 3600.0,
+                         gain_per_hour=gains[c['part_id']] / max(count * c['sec_per_image'] / 3600.0, 1e-9)))
+    plan.sort(key=lambda p: p['gain_per_hour'], reverse=True)
+    for rank, job in enumerate(plan):
+        job['priority'] = 'high' if rank < len(plan) / 3 else ('normal' if rank < 2 * len(plan) / 3 else 'low')
+    return plan
+
+
+def save_plan(plan: List[Dict], budget_hours: float) -> Path:
+    """배분 계획 저장 (타임스탬프 파일 + latest.json)"""
+    PLAN_DIR.mkdir(parents=True, exist_ok=True)
+    document = {
+        'created_at': datetime.now().isoformat(),
+        'budget_hours': budget_hours,
+        'planned_hours': sum(job['est_hours'] for job in plan),
+        'planned_images': sum(job['image_count'] for job in plan),
+        'expected_gain': sum(job['expected_gain'] for job in plan),
+        'jobs': plan,
+    }
+    path = PLAN_DIR / f"plan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    for target in (path, PLAN_DIR / 'latest.json'):
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def publish_jobs(supabase, plan: List[Dict], plan_id: str) -> int:
+    """이전 미실행 예산 작업을 취소하고 새 계획을 rendering_jobs(pending)로 발행"""
+    supabase.table('rendering_jobs').update({
+        'status': 'cancelled', 'updated_at': datetime.now().isoformat(),
+    }).eq('status', 'pending').eq('config->>type', JOB_TYPE).execute()
+
+    rows = [{
+        'element_id': job['element_id'],
+        'part_id': job['part_id'],
+        'status': 'pending',
+        'priority': job['priority'],
+        'image_count': job['image_count'],
+        'notes': (f"렌더 예산 배분: mAP50 {job['map50']:.3f}, 보유 {job['samples']}장, "
+                  f"기대 이득 {job['expected_gain']:.4f} ({job['gain_per_hour']:.4f}/h)"),
+        'config': {
+            'type': JOB_TYPE,
+            'plan_id': plan_id,
+            'part_id': job['part_id'],
+            'element_id': job['element_id'],
+            'output_subdir': job['subdir'],
+            'image_count': job['image_count'],
+            'current_count': job['samples'],
+            'expected_gain': job['expected_gain'],
+            'gain_per_hour': job['gain_per_hour'],
+            'sec_per_image': job['sec_per_image'],
+        },
+        'created_at': datetime.now().isoformat(),
+    } for job in plan]
+    if rows:
+        supabase.table('rendering_jobs').insert(rows).execute()
+    return len(rows)
+
+
+def fetch_pending_jobs(supabase, limit: int = 100) -> List[Dict]:
+    """pending rendering_jobs를 우선순위 → 렌더-시간당 이득 → 생성 순으로 정렬"""
+    rows = supabase.table('rendering_jobs').select('*').eq('status', 'pending').limit(limit).execute().data or []
+    return sorted(rows, key=lambda r: (PRIORITY_RANK.get(r.get('priority'), 1),
+                                       -float((r.get('config') or {}).get('gain_per_hour') or 0.0),
+                                       r.get('created_at') or ''))
+
+
+def build_blender_command(job: Dict) -> List[str]:
+    """rendering_jobs 행 → 렌더러 실행 인자 (synthetic-api 렌더 실행과 동일 구성)"""
+    config = job.get('config') or {}
+    element_id = job.get('element_id') or config.get('element_id')
+    cmd = [
+        os.getenv('BLENDER_PATH', 'blender'), '--background',
+        '--python', str(Path(__file__).parent / 'render_ldraw_to_supabase.py'), '--',
+        '--part-id', str(job['part_id']),
+        '--count', str(job['image_count']),
+        '--quality', config.get('quality', 'fast'),
+        '--ldraw-path', os.getenv('LDRAW_PATH', 'C:/LDraw/parts'),
+        '--output-dir', str(DATASET_ROOT.parent),
+        '--output-subdir', str(config.get('output_subdir') or element_id or job['part_id']),
+    ]
+    if element_id:
+        cmd += ['--element-id', str(element_id)]
+    if job.get('split'):
+        cmd += ['--split', job['split']]
+    return cmd
+
+
+def run_job_queue(supabase, max_jobs: int = 1, timeout: int = 6 * 3600) -> List[Dict]:
+    """우선순위 순으로 pending 작업 실행, 실측 초/장을 progress에 기록 (다음 계획의 비용 추정에 사용)"""
+    results = []
+    for job in fetch_pending_jobs(supabase)[:max_jobs]:
+        started = datetime.now()
+        claimed = supabase.table('rendering_jobs').update({
+            'status': 'processing', 'started_at': started.isoformat(), 'updated_at': started.isoformat(),
+        }).eq('id', job['id']).eq('status', 'pending').execute()
+        if not claimed.data:
+            continue  # 다른 워커가 먼저 가져감
+
+        print(f"[INFO] 렌더 작업 {job['id']}: {job['part_id']} {job['image_count']}장 (priority={job.get('priority')})")
+        start = time.time()
+        try:
+            proc = subprocess.run(build_blender_command(job), capture_output=True, text=True, timeout=timeout)
+            success, error = proc.returncode == 0, (proc.stderr or '')[-2000:] or None
+        except (subprocess.TimeoutExpired, OSError) as e:
+            success, error = False, str(e)
+        elapsed = time.time() - start
+
+        update = {
+            'status': 'completed' if success else 'failed',
+            'completed_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat(),
+            'progress': {'elapsed_sec': round(elapsed, 1),
+                         'sec_per_image': round(elapsed / max(job['image_count'], 1), 3)},
+        }
+        if not success:
+            update['error_message'] = error
+        supabase.table('rendering_jobs').update(update).eq('id', job['id']).execute()
+        print(f"[{'OK' if success else 'ERROR'}] 렌더 작업 {job['id']} {update['status']} ({elapsed / 60:.1f}분)")
+        results.append({'id': job['id'], 'part_id': job['part_id'], 'success': success, 'elapsed_sec': elapsed})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='렌더 예산 스케줄러 (부품별 정확도 향상/렌더 비용 기반 배분)')
+    parser.add_argument('--budget_hours', type=float, default=24.0, help='배분할 전역 렌더 예산 (렌더-시간)')
+    parser.add_argument('--parts', nargs='+', help='대상 부품 ID 제한 (기본: 상태/로컬 데이터에 있는 전체)')
+    parser.add_argument('--chunk_size', type=int, default=CHUNK_SIZE, help='배분 단위 이미지 수')
+    parser.add_argument('--max_per_part', type=int, default=MAX_IMAGES_PER_PART, help='부품당 최대 배분 이미지 수')
+    parser.add_argument('--dataset_root', default=str(DATASET_ROOT), help='dataset_synthetic 경로')
+    parser.add_argument('--dry_run', action='store_true', help='rendering_jobs에 발행하지 않고 계획만 출력')
+    parser.add_argument('--run', action='store_true', help='계획 대신 pending 작업을 우선순위 순으로 실행')
+    parser.add_argument('--max_jobs', type=int, default=1, help='--run 시 실행할 작업 수')
+    args = parser.parse_args()
+
+    supabase = get_supabase_client()
+    if args.run:
+        if supabase is None:
+            print("[ERROR] Supabase 설정이 없어 작업 큐를 읽을 수 없습니다")
+            sys.exit(1)
+        results = run_job_queue(supabase, args.max_jobs)
+        sys.exit(0 if all(r['success'] for r in results) else 1)
+
+    if supabase is None:
+        print("[WARN] Supabase 설정 없음: 로컬 데이터만으로 계획합니다 (모든 부품 미학습 취급)")
+    candidates = build_candidates(fetch_part_metrics(supabase), scan_local_dataset(Path(args.dataset_root)),
+                                  fetch_job_costs(supabase), load_hardness(), args.parts)
+    plan = allocate_budget(candidates, args.budget_hours, args.chunk_size, args.max_per_part)
+    path = save_plan(plan, args.budget_hours)
+
+    print(f"[STATS] 후보 {len(candidates)}개 부품 → {len(plan)}개 작업, "
+          f"{sum(j['image_count'] for j in plan)}장 / {sum(j['est_hours'] for j in plan):.1f}h "
+          f"(예산 {args.budget_hours:.1f}h)")
+    for job in plan[:20]:
+        print(f"   [{job['priority']}] {job['part_id']}: {job['image_count']}장, mAP50 {job['map50']:.3f}, "
+              f"보유 {job['samples']}장, {job['sec_per_image']:.1f}s/장({job['cost_source']}), "
+              f"이득 {job['gain_per_hour']:.4f}/h")
+    print(f"[OK] 계획 저장: {path}")
+
+    if args.dry_run or supabase is None:
+        return
+    published = publish_jobs(supabase, plan, path.stem)
+    print(f"[OK] rendering_jobs에 {published}개 작업 발행")
+
+
+if __name__ == '__main__':
+    main()
@@ -526,57 +526,102 @@ except Exception:
     pass
 
 # JSON 직렬화 보조: Vector/Euler/NumPy 등 비원시 타입 변환
-def make_json_safe(value):
-    try:
-        import numpy as _np
-    except Exception:
-        _np = None
+# 타입별 변환기를 1회 결정해 캐시 (값마다 import/isinstance 체인 반복 없음)
+try:
+    from mathutils import Vector as _MathVector, Euler as _MathEuler
+    _MATHUTILS_TYPES = (_MathVector, _MathEuler)
+except Exception:
+    _MATHUTILS_TYPES = ()
+
 
-    # 기본 타입은 그대로 반환
-    if value is None or isinstance(value, (bool, int, float, str)):
-        return value
+def _json_safe_passthrough(value):
+    return value
 
-    # Blender 수학 타입 변환
+
+def _json_safe_mathutils(value):
     try:
-        from mathutils import Vector as _Vector, Euler as _Euler
-        if isinstance(value, (_Vector, _Euler)):
-            try:
-                return [float(x) for x in value[:]]
-            except Exception:
-                # Fallback: 개별 속성 접근
-                comps = []
-                for attr in ('x', 'y', 'z'):
-                    if hasattr(value, attr):
-                        try:
-                            comps.append(float(getattr(value, attr)))
-                        except Exception:
-                            pass
-                return comps
+        return [float(x) for x in value[:]]
     except Exception:
-        pass
+        # Fallback: 개별 속성 접근
+        comps = []
+        for attr in ('x', 'y', 'z'):
+            if hasattr(value, attr):
+                try:
+                    comps.append(float(getattr(value, attr)))
+                except Exception:
+                    pass
+        return comps
 
-    # NumPy 스칼라/배열 처리
-    if _np is not None:
-        try:
-            if isinstance(value, _np.generic):
-                return value.item()
-            if isinstance(value, _np.ndarray):
-                return value.tolist()
-        except Exception:
-            pass
 
-    # 시퀀스/매핑 재귀 변환
-    if isinstance(value, (list, tuple, set)):
-        return [make_json_safe(v) for v in value]
-    if isinstance(value, dict):
-        return { str(make_json_safe(k)): make_json_safe(v) for k, v in value.items() }
+def _json_safe_numpy_scalar(value):
+    return value.item()
+
+
+def _json_safe_ndarray(value):
+    return value.tolist()
+
+
+def _json_safe_sequence(value):
+    return [make_json_safe(v) for v in value]
+
 
+def _json_safe_dict(value):
+    return {str(make_json_safe(k)): make_json_safe(v) for k, v in value.items()}
+
+
+def _json_safe_fallback(value):
     # 기타 객체는 문자열로 폴백
     try:
         return str(value)
     except Exception:
         return None
 
+
+_JSON_SAFE_DISPATCH = {
+    type(None): _json_safe_passthrough,
+    bool: _json_safe_passthrough,
+    int: _json_safe_passthrough,
+    float: _json_safe_passthrough,
+    str: _json_safe_passthrough,
+    list: _json_safe_sequence,
+    tuple: _json_safe_sequence,
+    set: _json_safe_sequence,
+    dict: _json_safe_dict,
+    np.ndarray: _json_safe_ndarray,
+}
+
+
+def _resolve_json_safe(cls):
+    """처음 보는 타입의 변환기 결정 (기존 판정 순서: 원시 → mathutils → NumPy → 시퀀스/매핑 → 문자열)"""
+    if issubclass(cls, (bool, int, float, str)):
+        handler = _json_safe_passthrough
+    elif _MATHUTILS_TYPES and issubclass(cls, _MATHUTILS_TYPES):
+        handler = _json_safe_mathutils
+    elif issubclass(cls, np.generic):
+        handler = _json_safe_numpy_scalar
+    elif issubclass(cls, np.ndarray):
+        handler = _json_safe_ndarray
+    elif issubclass(cls, (list, tuple, set)):
+        handler = _json_safe_sequence
+    elif issubclass(cls, dict):
+        handler = _json_safe_dict
+    else:
+        handler = _json_safe_fallback
+    _JSON_SAFE_DISPATCH[cls] = handler
+    return handler
+
+
+def make_json_safe(value):
+    handler = _JSON_SAFE_DISPATCH.get(value.__class__)
+    if handler is None:
+        handler = _resolve_json_safe(value.__class__)
+    return handler(value)
+
+
+def json_safe_default(value):
+    """json.dump(default=...) 훅: 원시 타입 트리는 C 인코더가 그대로 처리하고 비원시 값만 변환"""
+    return make_json_safe(value)
+
 # Supabase 클라이언트 (Blender 내에서 실행) - 강화된 폴백
 try:
     import sys
@@ -691,6 +736,7 @@ class LDrawRenderer:
         # 데이터셋 경로 구성용 프로필
         self.set_id = set_id or 'synthetic'
         self.split = split or 'train'
+        self.e2_format = 'json'  # E2 저장 형식: json | min | msgpack | cbor (e2_codec.py)
         
         # 흰색 부품 감지 임계값 (설정 가능)
         self.WHITE_THRESHOLD = 0.9  # RGB 값이 이 값 이상이면 흰색으로 판단
@@ -710,6 +756,10 @@ class LDrawRenderer:
         # [OPTIMIZE] ICC 프로파일 캐싱 (매번 생성하지 않고 한 번만 생성)
         self._cached_icc_profile = None
         self._cached_exif_template = None
+        # [OPTIMIZE] WebP 인코딩 정책(시간 예산 + 목표 SSIM, 지연 생성)
+        self._webp_policy = None
+        # 하드 예제 마이닝 혼동 쌍 (confusion_groups.json, 인스턴스당 1회 로드)
+        self._confusion_pairs = None
         self._setup_gpu_optimization()
         self._setup_memory_optimization()
         
@@ -1805,6 +1855,36 @@ class LDrawRenderer:
         )
         return None
 
+    def _get_webp_encoder(self):
+        """scripts/webp_encoder 모듈 (콘텐츠 적응형 WebP 인코딩 정책)"""
+        scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        import webp_encoder
+        return webp_encoder
+    
+    def _get_webp_policy(self):
+        """method/quality를 시간 예산·목표 SSIM으로 결정하는 인코딩 정책 (인스턴스당 1개, 실측 통계 누적)"""
+        if self._webp_policy is None:
+            self._webp_policy = self._get_webp_encoder().WebPEncodePolicy()
+        return self._webp_policy
+    
+    def _encode_webp(self, img, icc_profile=None, exif_data=None):
+        """메모리 내 정책 인코딩 (method/quality 자동 결정, 파일 I/O 없음)"""
+        result = self._get_webp_policy().encode(img, icc_profile, exif_data)
+        if len(result.data) < 1024:
+            raise IOError(f"WebP 인코딩 결과가 너무 작음: {len(result.data)} bytes (최소 1KB 필요)")
+        ssim_text = f", SSIM {result.ssim:.4f}" if result.ssim is not None else ""
+        print(f"[INFO] WebP 인코딩: m{result.method} q{result.quality}{ssim_text}, "
+              f"{len(result.data):,} bytes, {result.encode_ms:.0f}ms ({result.attempts}회)")
+        return result
+    
+    def _write_webp(self, img, image_path: str, icc_profile=None, exif_data=None):
+        """메모리 내 정책 인코딩 후 원자적 교체 (임시 PIL 저장/shutil.move 재시도 루프 대체)"""
+        result = self._encode_webp(img, icc_profile, exif_data)
+        self._get_webp_encoder().write_bytes_atomic(image_path, result.data)
+        return result
+    
     def _ensure_webp_metadata(self, image_path: str):
         """기술문서 기준 메타데이터(ICC sRGB, EXIF)를 WebP에 주입하고 품질 강화.
         - OpenCV 기반 고급 이미지 품질 개선 우선 사용
@@ -1883,8 +1963,6 @@ class LDrawRenderer:
         """고품질 렌더(white 배경, 고샘플)에서 필터 없이 ICC/EXIF만 주입하는 경량 경로."""
         try:
             from PIL import Image
-            import shutil
-            import tempfile
             icc_profile = None
             exif_data = None
             try:
@@ -1905,93 +1983,16 @@ class LDrawRenderer:
                 exif_data = piexif.dump(exif_dict)
             except Exception:
                 pass
-            temp_file = image_path + ".tmp"
-            # [FIX] 원본 파일이 다른 프로세스에 의해 잠겨있을 수 있으므로 안전하게 읽기
-            img = None
-            try:
-                img = Image.open(image_path)
-                if img.mode not in ("RGB", "RGBA"):
-                    img = img.convert("RGB")
-                if img.mode == "RGBA":
-                    bg = Image.new('RGB', img.size, (255, 255, 255))
-                    bg.paste(img, mask=img.split()[3])
-                    img = bg
-                save_kwargs = {"format": "WEBP", "quality": 90, "method": 6, "lossless": False}
-                if icc_profile:
-                    save_kwargs["icc_profile"] = icc_profile
-                if exif_data:
-                    save_kwargs["exif"] = exif_data
-                # [FIX] WebP 저장 시도 (오류 처리 강화)
-                try:
-                    img.save(temp_file, **save_kwargs)
-                    # [FIX] 저장 후 파일 존재 확인
-                    if not os.path.exists(temp_file):
-                        raise IOError(f"임시 파일 저장 실패: {temp_file}가 생성되지 않았습니다.")
-                    # [FIX] 파일 크기 확인 (최소 1KB)
-                    file_size = os.path.getsize(temp_file)
-                    if file_size < 1024:
-                        raise IOError(f"임시 파일 크기가 너무 작음: {file_size} bytes (최소 1KB 필요)")
-                except Exception as save_err:
-                    print(f"[ERROR] WebP 임시 파일 저장 실패: {save_err}")
-                    # 파일 핸들 해제 후 재시도
-                    if img:
-                        img.close()
-                    raise
-            finally:
-                # [FIX] 파일 핸들 명시적 해제
-                if img:
-                    img.close()
-            
-            # [FIX] 파일 이동 전 파일 핸들 해제 대기 (Windows 파일 잠금 방지)
-            import time
-            max_retries = 5
-            retry_delay = 0.2
-            
-            # [FIX] 임시 파일 존재 여부 확인
-            if not os.path.exists(temp_file):
-                print(f"[ERROR] 임시 파일이 존재하지 않습니다: {temp_file}, 원본 파일 유지")
-                return
-            
-            for retry in range(max_retries):
-                try:
-                    # 원본 파일이 다른 프로세스에 의해 잠겨있는지 확인
-                    if os.path.exists(image_path):
-                        try:
-                            # 파일을 읽기 모드로 열어서 잠금 확인
-                            with open(image_path, 'rb') as f:
-                                f.read(1)
-                                f.seek(0)
-                        except PermissionError:
-                            if retry < max_retries - 1:
-                                time.sleep(retry_delay * (retry + 1))
-                                continue
-                    
-                    # [FIX] 파일 이동 전 임시 파일 존재 여부 재확인
-                    if not os.path.exists(temp_file):
-                        print(f"[ERROR] 파일 이동 시도 중 임시 파일이 사라졌습니다: {temp_file}")
-                        break
-                    
-                    # 파일 이동 시도
-                    shutil.move(temp_file, image_path)
-                    print(f"[INFO] Fast metadata embed 완료(필터 스킵): {image_path}")
-                    break
-                except PermissionError as pe:
-                    if retry < max_retries - 1:
-                        print(f"[WARN] 파일 이동 실패 (시도 {retry + 1}/{max_retries}): {pe}, 재시도 중...")
-                        time.sleep(retry_delay * (retry + 1))
-                    else:
-                        # 최종 실패 시 원본 파일 유지하고 임시 파일 삭제
-                        print(f"[ERROR] 파일 이동 최종 실패: {pe}, 원본 파일 유지")
-                        try:
-                            if os.path.exists(temp_file):
-                                os.remove(temp_file)
-                        except Exception:
-                            pass
-                        raise
-                except FileNotFoundError as fnf_error:
-                    # [FIX] FileNotFoundError 처리 (임시 파일이 없거나 삭제된 경우)
-                    print(f"[ERROR] 파일 이동 실패 (임시 파일 없음): {fnf_error}, 원본 파일 유지")
-                    break
+            # [FIX] 원본 파일 핸들은 디코딩 직후 해제 (이후 원자적 교체 시 Windows 잠금 방지)
+            with Image.open(image_path) as src:
+                img = src.copy() if src.mode in ("RGB", "RGBA") else src.convert("RGB")
+            if img.mode == "RGBA":
+                bg = Image.new('RGB', img.size, (255, 255, 255))
+                bg.paste(img, mask=img.split()[3])
+                img = bg
+            # [OPTIMIZE] 메모리 내 정책 인코딩 + 원자적 교체 (q90/m6 고정 → 시간 예산·목표 SSIM 기반)
+            self._write_webp(img, image_path, icc_profile, exif_data)
+            print(f"[INFO] Fast metadata embed 완료(필터 스킵): {image_path}")
         except Exception as e:
             print(f"[WARN] Fast metadata embed 실패, 일반 경로 사용: {e}")
             self._ensure_webp_metadata_pil(image_path)
@@ -2013,14 +2014,9 @@ class LDrawRenderer:
                 PIL_AVAILABLE = False
                 return
             
-            import tempfile
-            import shutil
             import cv2
             import numpy as np
             
-            # 임시 파일 생성
-            temp_file = image_path + ".tmp"
-            
             # 이미지 로드 및 전처리
             with Image.open(image_path) as img:
                 # RGB 모드로 변환
@@ -2105,27 +2101,11 @@ class LDrawRenderer:
                             except Exception:
                                 pass
                         
-                        # 원본 파일에 직접 저장 (임시 파일 없음, 파일 이동 시간 절약 약 0.5-1초)
-                        save_kwargs = {
-                            "format": "WEBP",
-                            "quality": 90,
-                            "method": 6,
-                            "lossless": False,
-                        }
-                        if icc_profile:
-                            save_kwargs["icc_profile"] = icc_profile
-                        if exif_data:
-                            save_kwargs["exif"] = exif_data
-                        
-                        # [FIX] 직접 저장 시도 (오류 처리 강화)
+                        # 원본 파일에 직접 저장 (임시 파일 없음, 메모리 내 정책 인코딩 후 1회 기록)
                         try:
-                            img.save(image_path, **save_kwargs)
-                            # [FIX] 저장 후 파일 존재 및 크기 확인
-                            if not os.path.exists(image_path):
-                                raise IOError(f"파일 저장 실패: {image_path}가 생성되지 않았습니다.")
-                            file_size = os.path.getsize(image_path)
-                            if file_size < 1024:
-                                raise IOError(f"파일 크기가 너무 작음: {file_size} bytes (최소 1KB 필요)")
+                            webp_result = self._encode_webp(img, icc_profile, exif_data)
+                            with open(image_path, 'wb') as f:
+                                f.write(webp_result.data)
                             print(f"[INFO] WebP 품질 강화 완료 (직접 저장): {image_path}")
                             return  # 빠른 경로 종료
                         except Exception as save_err:
@@ -2254,93 +2234,17 @@ class LDrawRenderer:
                     except Exception as exif_e:
                         print(f"[WARN] EXIF 메타데이터 생성 실패: {exif_e}")
                 
-                # WebP 저장 옵션 설정 (기술문서 기준)
-                save_kwargs = {
-                    "format": "WEBP",
-                    "quality": 90,  # q=90
-                    "method": 6,    # -m 6 (압축 품질)
-                    "lossless": False,
-                }
-                
-                # ICC 프로파일 추가 (강제)
-                if icc_profile:
-                    save_kwargs["icc_profile"] = icc_profile
-                else:
+                if not icc_profile:
                     print("[WARN] ICC 프로파일이 없어 WebP 품질이 저하될 수 있습니다.")
-                
-                # EXIF 메타데이터 추가 (강제)
-                if exif_data:
-                    save_kwargs["exif"] = exif_data
-                else:
+                if not exif_data:
                     print("[WARN] EXIF 메타데이터가 없어 메타데이터가 불완전할 수 있습니다.")
                 
-                # 임시 파일에 저장
-                try:
-                    img.save(temp_file, **save_kwargs)
-                    # [FIX] 임시 파일 저장 후 존재 여부 확인
-                    if not os.path.exists(temp_file):
-                        print(f"[ERROR] 임시 파일 저장 실패: {temp_file}가 생성되지 않았습니다.")
-                        raise FileNotFoundError(f"임시 파일이 생성되지 않았습니다: {temp_file}")
-                    print(f"[INFO] WebP 품질 강화 완료: {image_path}")
-                except Exception as save_error:
-                    print(f"[ERROR] WebP 저장 실패: {save_error}")
-                    # 임시 파일이 생성되었지만 불완전한 경우 삭제
-                    if os.path.exists(temp_file):
-                        try:
-                            os.remove(temp_file)
-                        except Exception:
-                            pass
-                    raise
-            
-            # [FIX] 원본 파일을 임시 파일로 교체 (Windows 파일 잠금 방지)
-            import time
-            max_retries = 5
-            retry_delay = 0.2
-            
-            # [FIX] 임시 파일 존재 여부 확인
-            if not os.path.exists(temp_file):
-                print(f"[ERROR] 임시 파일이 존재하지 않습니다: {temp_file}, 원본 파일 유지")
-                return
+                # [OPTIMIZE] 메모리 내 정책 인코딩 (q90/m6 고정 → 시간 예산·목표 SSIM 기반)
+                webp_result = self._encode_webp(img, icc_profile, exif_data)
             
-            for retry in range(max_retries):
-                try:
-                    # 원본 파일이 다른 프로세스에 의해 잠겨있는지 확인
-                    if os.path.exists(image_path):
-                        try:
-                            # 파일을 읽기 모드로 열어서 잠금 확인
-                            with open(image_path, 'rb') as f:
-                                f.read(1)
-                                f.seek(0)
-                        except PermissionError:
-                            if retry < max_retries - 1:
-                                time.sleep(retry_delay * (retry + 1))
-                                continue
-                    
-                    # [FIX] 파일 이동 전 임시 파일 존재 여부 재확인
-                    if not os.path.exists(temp_file):
-                        print(f"[ERROR] 파일 이동 시도 중 임시 파일이 사라졌습니다: {temp_file}")
-                        break
-                    
-                    # 파일 이동 시도
-                    shutil.move(temp_file, image_path)
-                    break
-                except PermissionError as pe:
-                    if retry < max_retries - 1:
-                        print(f"[WARN] 파일 이동 실패 (시도 {retry + 1}/{max_retries}): {pe}, 재시도 중...")
-                        time.sleep(retry_delay * (retry + 1))
-                    else:
-                        # 최종 실패 시 원본 파일 유지하고 임시 파일 삭제
-                        print(f"[ERROR] 파일 이동 최종 실패: {pe}, 원본 파일 유지")
-                        try:
-                            if os.path.exists(temp_file):
-                                os.remove(temp_file)
-                        except Exception:
-                            pass
-                        raise
-                except FileNotFoundError as fnf_error:
-                    # [FIX] FileNotFoundError 처리 (임시 파일이 없거나 삭제된 경우)
-                    print(f"[ERROR] 파일 이동 실패 (임시 파일 없음): {fnf_error}, 원본 파일 유지")
-                    break
+            # [FIX] 원본 핸들 해제 후 원자적 교체 (Windows 파일 잠금 시 재시도)
+            self._get_webp_encoder().write_bytes_atomic(image_path, webp_result.data)
+            print(f"[INFO] WebP 품질 강화 완료: {image_path}")
             
         except Exception as e:
             print(f"[ERROR] WebP 품질 강화 실패: {e}")
@@ -2917,6 +2821,17 @@ class LDrawRenderer:
             
             # 깊이 맵 파일이 있으면 실제 검증 수행
             if depth_path and os.path.exists(depth_path):
+                # 독립 EXR 리더 우선 (깊이 채널만 NumPy로 읽음, bpy 이미지 로더/OpenEXR 불필요)
+                try:
+                    depth_exr_validator = self._get_depth_exr_validator()
+                    depth_map = depth_exr_validator.load_depth_map(depth_path)
+                    validation_result = depth_exr_validator.score_depth_map(depth_map)
+                    depth_score = validation_result['depth_quality_score']
+                    print(f"[INFO] 깊이 맵 검증 완료 (NumPy EXR): {depth_score:.4f} (valid_ratio: {validation_result['valid_pixel_ratio']:.2f}, depth_var_norm: {validation_result.get('depth_variance_normalized', 0.0):.4f}, edge_norm: {validation_result.get('edge_strength_normalized', 0.0):.4f})")
+                    return depth_score
+                except Exception as reader_error:
+                    print(f"[DEBUG] NumPy EXR 읽기 실패, Blender 로더로 재시도: {reader_error}")
+                
                 # [FIX] Blender 내장 이미지 로더 사용 (OpenEXR 모듈 충돌 방지)
                 try:
                     # Blender의 bpy로 EXR 이미지 로드
@@ -3224,8 +3139,21 @@ class LDrawRenderer:
             print(f"Depth Map 검증 실패: {e}")
             return depth_score
     
+    def _get_depth_exr_validator(self):
+        """scripts/depth_exr_validator 모듈 (Blender 밖에서도 동일 로직으로 깊이 검증)"""
+        scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        import depth_exr_validator
+        return depth_exr_validator
+    
     def _validate_depth_map_exr(self, depth_map, zmin, zmax):
         """[FIX] 수정됨: 실제 깊이 맵 검증 (기술문서 어노테이션.txt:287-303 기준) - 합성 렌더링 특성 고려"""
+        try:
+            return self._get_depth_exr_validator().score_depth_map(depth_map, zmin, zmax)
+        except ImportError:
+            pass
+        
         try:
             import cv2
             import numpy as np
@@ -3451,6 +3379,7 @@ class LDrawRenderer:
             # - depth_score: 0.85 유지
             qa_flag_runtime = 'PASS' if (ssim >= 0.965 and snr >= 25.0 and rms <= 1.5 and depth >= 0.85) else 'FAIL_QUALITY'
             qa_flag_strict = 'PASS' if (ssim >= 0.965 and snr >= 25.0 and rms <= 1.5 and depth >= 0.85) else 'FAIL_QUALITY'
+            segmentation = self._get_segmentation(metadata)
             e2_metadata = {
                 "schema_version": "1.6.1-E2",
                 "pair_uid": f"uuid-{part_id}-{unique_id}",
@@ -3468,6 +3397,8 @@ class LDrawRenderer:
                     "bbox_pixel_xyxy": self._extract_bbox_pixel(metadata),
                     "bbox_norm_xyxy": self._extract_bbox_norm(metadata),
                     "segmentation": {
+                        "format": segmentation.get('format', 'coco_rle'),
+                        "size": segmentation.get('size', [self.resolution[1], self.resolution[0]]),
                         "rle_base64": self._extract_segmentation_rle(metadata),
                         "compressed_size": self._calculate_seg_size(metadata)
                     }
@@ -3502,6 +3433,21 @@ class LDrawRenderer:
             print(f"E2 메타데이터 생성 실패: {e}")
             return {}
     
+    def _write_e2(self, e2_metadata, e2_json_path):
+        """E2 저장 (json 외 형식은 scripts/e2_codec, 기존 indent JSON 대비 절감 바이트 출력)"""
+        if self.e2_format == 'json':
+            with open(e2_json_path, 'w', encoding='utf-8') as f:
+                json.dump(e2_metadata, f, ensure_ascii=False, indent=2)
+            return e2_json_path
+        scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        import e2_codec
+        path, size = e2_codec.write_e2(e2_metadata, e2_json_path, self.e2_format)
+        baseline = len(e2_codec.dumps(e2_metadata, 'json'))
+        print(f"[INFO] E2 {self.e2_format}: {size} bytes (indent JSON 대비 {baseline - size} bytes 절감)")
+        return str(path)
+    
     def _extract_bbox_pixel(self, metadata):
         """픽셀 좌표 bbox 추출"""
         try:
@@ -3539,21 +3485,48 @@ class LDrawRenderer:
         except:
             return [0.0, 0.0, 1.0, 1.0]
     
-    def _extract_segmentation_rle(self, metadata):
-        """세그멘테이션 RLE 추출"""
+    def _get_segmentation(self, metadata):
+        """메타데이터의 세그멘테이션 RLE 필드 (render_single_part에서 마스크로부터 생성)"""
         try:
-            seg = metadata.get('annotation', {}).get('seg', {})
-            return seg.get('rle_base64', 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==')
-        except:
-            return 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+            return metadata.get('annotation', {}).get('seg', {}) or {}
+        except Exception:
+            return {}
+    
+    def _extract_segmentation_rle(self, metadata):
+        """세그멘테이션 RLE 추출 (COCO 압축 counts의 base64, 마스크 없으면 빈 문자열)"""
+        return self._get_segmentation(metadata).get('rle_base64', '')
     
     def _calculate_seg_size(self, metadata):
-        """세그멘테이션 압축 크기 계산"""
+        """세그멘테이션 압축 크기 계산 (COCO counts 바이트 수)"""
+        return int(self._get_segmentation(metadata).get('compressed_size', 0))
+    
+    def _get_mask_rle(self):
+        """scripts/mask_rle 모듈 (마스크 → COCO RLE, 깊이 EXR 마스크)"""
+        scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        import mask_rle
+        return mask_rle
+    
+    def _build_segmentation(self, depth_path, polygon_uv, camera_params):
+        """객체 마스크 → COCO RLE (깊이 패스의 배경 Z로 객체 마스크 추출, 실패 시 polygon_uv 래스터화)"""
         try:
-            seg = metadata.get('annotation', {}).get('seg', {})
-            return seg.get('compressed_size', 8432)
-        except:
-            return 8432
+            mask_rle = self._get_mask_rle()
+            if depth_path and os.path.exists(depth_path):
+                try:
+                    clip_end = (camera_params or {}).get('clip_end')
+                    depth_map = self._get_depth_exr_validator().load_depth_map(depth_path)
+                    mask = mask_rle.mask_from_depth(depth_map, clip_end)
+                    if mask.any():
+                        return mask_rle.segmentation_field(mask, 'depth')
+                except Exception as e:
+                    print(f"[WARN] 깊이 마스크 생성 실패, 폴리곤으로 대체: {e}")
+            if polygon_uv and len(polygon_uv) >= 3:
+                width, height = self.resolution[0], self.resolution[1]
+                return mask_rle.segmentation_field(mask_rle.rasterize_polygon(polygon_uv, width, height), 'polygon')
+        except Exception as e:
+            print(f"[WARN] 세그멘테이션 RLE 생성 실패: {e}")
+        return None
     
     def _calculate_qa_flag(self, quality_metrics, part_id=None):
         """QA 플래그 자동 계산 (SSIM/SNR/Sharpness/RMS 종합)"""
@@ -6247,9 +6220,8 @@ class LDrawRenderer:
             os.makedirs(meta_e_dir, exist_ok=True)
             e2_json_path = os.path.join(meta_e_dir, e2_json_filename)
             
-            # E2 JSON 로컬 저장
-            with open(e2_json_path, 'w', encoding='utf-8') as f:
-                json.dump(e2_metadata, f, ensure_ascii=False, indent=2)
+            # E2 로컬 저장 (형식은 --e2-format)
+            e2_json_path = self._write_e2(e2_metadata, e2_json_path)
             
             print(f"로컬 E2 JSON 저장 완료: {e2_json_path}")
             return {"e2_json_path": e2_json_path}
@@ -6565,15 +6537,29 @@ class LDrawRenderer:
         return 'groove' in part_str or 'slope' in part_str
     
     def _get_confusion_groups(self, part_id):
-        """혼동 그룹"""
+        """혼동 그룹 (형상 규칙 그룹 + 하드 예제 마이닝에서 실제 혼동된 부품 ID)"""
         # 간단한 혼동 그룹 분류
         part_str = str(part_id).lower()
         if 'plate' in part_str:
-            return ['plate_group']
+            groups = ['plate_group']
         elif 'brick' in part_str:
-            return ['brick_group']
+            groups = ['brick_group']
         else:
-            return []
+            groups = []
+        
+        # 검출기가 실제로 혼동한 부품 (output/hard_examples/confusion_groups.json, 없으면 생략)
+        try:
+            scripts_dir = os.path.dirname(os.path.abspath(__file__))
+            if scripts_dir not in sys.path:
+                sys.path.insert(0, scripts_dir)
+            from hard_example_miner import get_mined_confusions, load_confusion_pairs
+            if self._confusion_pairs is None:
+                self._confusion_pairs = load_confusion_pairs()
+            groups += [other for other in get_mined_confusions(part_id, pairs=self._confusion_pairs)
+                       if other not in groups]
+        except Exception:
+            pass
+        return groups
     
     def _get_distinguishing_features(self, part_id):
         """구별 특징"""
@@ -7207,6 +7193,12 @@ class LDrawRenderer:
             'color_management': str(self.color_management),
             'quality_metrics': make_json_safe(quality_metrics)  # 품질 메트릭 추가
         }
+        
+        # 세그멘테이션 마스크 (COCO RLE) - E2 annotation.segmentation 원본
+        segmentation = self._build_segmentation(depth_path, polygon_uv, camera_params)
+        if segmentation:
+            metadata['annotation'] = {'seg': segmentation}
+            print(f"[INFO] 세그멘테이션 RLE: {segmentation['source']}, area={segmentation['area']}px, {segmentation['compressed_size']} bytes")
 
         # element-id 전달분 반영
         try:
@@ -7224,8 +7216,13 @@ class LDrawRenderer:
         # 16. 로컬 메타데이터 JSON 저장 (완벽한 폴더 구조)
         try:
             meta_json_path = os.path.join(meta_dir, json_filename)
+            try:
+                payload = json.dumps(metadata, ensure_ascii=False, indent=2, default=json_safe_default)
+            except (TypeError, ValueError):
+                # 비문자열 dict 키 등 default 훅으로 처리되지 않는 경우 전체 변환 후 직렬화
+                payload = json.dumps(make_json_safe(metadata), ensure_ascii=False, indent=2)
             with open(meta_json_path, 'w', encoding='utf-8') as f:
-                json.dump(make_json_safe(metadata), f, ensure_ascii=False, indent=2)
+                f.write(payload)
             print(f"메타데이터 JSON 저장: {meta_json_path}")
         except Exception as e:
             print(f"메타데이터 JSON 저장 실패: {e}")
@@ -7237,9 +7234,7 @@ class LDrawRenderer:
             unique_id = uid  # 이미 정의된 uid 사용
             e2_metadata = self._create_e2_metadata(part_id, element_id, unique_id, metadata, quality_metrics)
             if e2_metadata:
-                e2_json_path = os.path.join(meta_e_dir, e2_json_filename)
-                with open(e2_json_path, 'w', encoding='utf-8') as f:
-                    json.dump(e2_metadata, f, ensure_ascii=False, indent=2)
+                e2_json_path = self._write_e2(e2_metadata, os.path.join(meta_e_dir, e2_json_filename))
                 print(f"E2 메타데이터 JSON 저장: {e2_json_path}")
         except Exception as e:
             print(f"E2 메타데이터 JSON 저장 실패: {e}")
@@ -7375,6 +7370,8 @@ def main():
     parser.add_argument('--resolution', help='렌더 해상도, 예: 768x768 또는 960x960')
     parser.add_argument('--target-fill', type=float, help='화면 점유율(0~1), 예: 0.92')
     parser.add_argument('--element-id', help='원본 엘리먼트 ID (있을 경우 메타에 기록)')
+    parser.add_argument('--e2-format', default='json', choices=['json', 'min', 'msgpack', 'cbor'],
+                        help='E2 메타데이터 저장 형식 (json|min|msgpack|cbor, 기본: json)')
     parser.add_argument('--clear-cache', action='store_true', help='모든 캐시 정리')
     parser.add_argument('--cache-stats', action='store_true', help='캐시 통계만 출력')
     parser.add_argument('--disable-parallel', action='store_true', help='병렬 렌더링 비활성화')
@@ -7573,6 +7570,7 @@ def main():
         )
         # renderer에서 output_dir 접근 필요 시 저장
         renderer.output_dir = output_dir
+        renderer.e2_format = getattr(args, 'e2_format', 'json')
         print("OK: 렌더러 초기화 완료")
     except Exception as e:
         print(f"ERROR: 렌더러 초기화 실패: {e}")
@@ -25,6 +25,9 @@ BrickBox 렌더링 속도 최적화 '고급' 진단 스크립트
     --auto-baseline \
     --quality-simulation \
     --report json > audit_enhanced.json
+
+  # 메타데이터 카탈로그(metadata_catalog.py update) 컬럼 스캔 - JSON 파일을 열지 않음
+  python render_optimize_audit_enhanced.py --catalog output/catalog --group-by series
 """
 
 import argparse
@@ -43,8 +46,12 @@ from typing import Any, Dict, List, Tuple, Optional
 # ----------------------------
 def parse_args():
     p = argparse.ArgumentParser(description="BrickBox 렌더 설정 진단 & 속도 최적화 시뮬레이터 (고급)")
-    p.add_argument("--glob", required=True,
+    p.add_argument("--glob",
                    help="스캔할 JSON 파일 글롭 패턴")
+    p.add_argument("--catalog",
+                   help="메타데이터 카탈로그 디렉토리 (지정 시 --glob 대신 Parquet 컬럼 스캔)")
+    p.add_argument("--element-id", action="append",
+                   help="카탈로그 element_id 필터 (반복 가능)")
     p.add_argument("--baseline-sec", type=float, default=4.0,
                    help="현재 1 프레임 렌더 시간(초) 추정치")
     p.add_argument("--auto-baseline", action="store_true",
@@ -63,7 +70,10 @@ def parse_args():
                    help="병렬 워커 수")
     p.add_argument("--save-db", action="store_true",
                    help="결과를 Supabase DB에 저장")
-    return p.parse_args()
+    args = p.parse_args()
+    if not args.glob and not args.catalog:
+        p.error("--glob 또는 --catalog 중 하나가 필요합니다")
+    return args
 
 # ----------------------------
 # 향상된 유틸리티
@@ -172,6 +182,49 @@ def scan_jsons_enhanced(pattern: str, max_files: int, workers: int) -> Tuple[Lis
     
     return results, dict(error_stats)
 
+def scan_catalog(catalog_dir: str, max_files: int, element_ids: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """메타데이터 카탈로그 컬럼 스캔 - scan_jsons_enhanced 와 동일한 행 형식 (meta 파일 기준, meta-e 오류는 무관)"""
+    sys.path.insert(0, str(Path(__file__).parent))
+    import pyarrow.dataset as ds
+    from metadata_catalog import MetadataCatalog
+    
+    columns = ["meta_path", "meta_error", "samples", "tile_size", "resolution_x", "resolution_y", "denoise",
+               "device", "engine", "variant", "shape_tag", "series", "render_time_sec", "ssim", "snr",
+               "rms", "color_id", "is_transparent", "is_bright_part"]
+    # meta 없이 meta-e만 있는 행은 제외 (scan_jsons_enhanced는 meta JSON만 순회)
+    table = MetadataCatalog(catalog_dir).query(columns, element_ids=element_ids,
+                                               where=ds.field("meta_path").is_valid()).sort_by("meta_path")
+    if max_files and table.num_rows > max_files:
+        table = table.slice(0, max_files)
+    
+    results, error_stats = [], defaultdict(int)
+    for r in table.to_pylist():
+        if r["meta_error"]:
+            error_stats[r["meta_error"].split(":", 1)[0]] += 1
+            continue
+        results.append({
+            "samples": r["samples"] or 0,
+            "tile_size": r["tile_size"] or 0,
+            "resolution_x": r["resolution_x"] or 0,
+            "resolution_y": r["resolution_y"] or 0,
+            "denoise": r["denoise"],
+            "device": (r["device"] or "").lower(),
+            "engine": (r["engine"] or "").lower(),
+            "variant": r["variant"] or "",
+            "shape_tag": r["shape_tag"] or "",
+            "series": r["series"] or "",
+            "render_time_sec": r["render_time_sec"] or 0.0,
+            "ssim": r["ssim"] or 0.0,
+            "snr": r["snr"] or 0.0,
+            "rms": r["rms"] or 0.0,
+            "color_id": r["color_id"] or 0,
+            "is_transparent": bool(r["is_transparent"]),
+            "is_bright_part": bool(r["is_bright_part"]),
+            "__file": r["meta_path"],
+        })
+    
+    return results, dict(error_stats)
+
 # ----------------------------
 # 복잡도 그룹별 분석
 # ----------------------------
@@ -420,7 +473,10 @@ def build_report_enhanced(rows: List[Dict[str, Any]], baseline_sec: float,
 # ----------------------------
 def main():
     args = parse_args()
-    rows, error_stats = scan_jsons_enhanced(args.glob, args.max_files, args.workers)
+    if args.catalog:
+        rows, error_stats = scan_catalog(args.catalog, args.max_files, args.element_id)
+    else:
+        rows, error_stats = scan_jsons_enhanced(args.glob, args.max_files, args.workers)
     
     # 자동 baseline 계산
     baseline_sec = args.baseline_sec
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+학습 처리량 벤치마크
+- 고정 시드의 작은 합성 세그멘테이션 데이터셋 생성 (실데이터/네트워크 불필요)
+- workers / batch / imgsz / cache 조합별로 고정 반복 수만 학습하여 측정
+  · images/sec, 데이터로더 대기 vs 연산 시간 (배치 콜백 사이 간격), 에폭별 최대 메모리(RSS, 워커 포함)
+- 조합마다 별도 프로세스(spawn)로 실행하여 메모리/스레드 상태가 섞이지 않게 함
+- JSON + Markdown 리포트, 기준 리포트 대비 처리량 회귀 검출
+
+실행 방법:
+    python scripts/training_benchmark.py --workers 0,2,4 --batch 4,8 --imgsz 320,416 --cache none,ram,mmap
+    python scripts/training_benchmark.py --baseline output/benchmark/training_benchmark_20250101_000000.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import itertools
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+BENCHMARK_ROOT = Path('output/benchmark')
+SYNTHETIC_CLASSES = ['brick_2x4', 'plate_1x2', 'tile_round']
+CACHE_MODES = ('none', 'ram', 'disk', 'mmap')
+REGRESSION_THRESHOLD = 0.10   # 기준 대비 images/sec 10% 이상 하락 시 회귀
+
+# 운영 학습(1단계)과 같은 증강 설정 - 데이터로더 비용이 실제와 비슷해야 의미가 있음
+PRODUCTION_AUGMENTATION = {
+    'copy_paste': 1.0,
+    'mosaic': 1.0,
+    'mixup': 0.2,
+    'fliplr': 0.5,
+    'hsv_h': 0.015,
+    'hsv_s': 0.7,
+    'hsv_v': 0.4,
+    'perspective': 0.001,
+    'erasing': 0.2,
+    'overlap_mask': True,
+    'mask_ratio': 4,
+}
+
+
+# ============================================
+# 합성 데이터셋
+# ============================================
+
+def build_synthetic_dataset(num_images: int, image_size: int = 640, seed: int = 0,
+                            root: Path = BENCHMARK_ROOT / 'synthetic_dataset') -> Path:
+    """고정 시드 합성 데이터셋 생성 (같은 인자면 재사용) → dataset.yaml 경로"""
+    from PIL import Image, ImageDraw
+
+    root = Path(root) / f"n{num_images}_s{image_size}_seed{seed}"
+    dataset_yaml = root / 'dataset.yaml'
+    if dataset_yaml.exists():
+        return dataset_yaml
+
+    rng = random.Random(seed)
+    num_val = max(4, num_images // 16)
+    for split, count in (('train', num_images), ('val', num_val)):
+        (root / 'images' / split).mkdir(parents=True, exist_ok=True)
+        (root / 'labels' / split).mkdir(parents=True, exist_ok=True)
+        for i in range(count):
+            background = tuple(rng.randint(90, 160) for _ in range(3))
+            image = Image.new('RGB', (image_size, image_size), background)
+            draw = ImageDraw.Draw(image)
+            lines = []
+            for _ in range(rng.randint(1, 4)):
+                class_id = rng.randrange(len(SYNTHETIC_CLASSES))
+                cx, cy = rng.uniform(0.2, 0.8) * image_size, rng.uniform(0.2, 0.8) * image_size
+                radius = rng.uniform(0.06, 0.15) * image_size
+                sides = (4, 6, 12)[class_id]
+                phase = rng.uniform(0, math.pi)
+                points = [
+                    (cx + radius * math.cos(phase + 2 * math.pi * k / sides),
+                     cy + radius * math.sin(phase + 2 * math.pi * k / sides))
+                    for k in range(sides)
+                ]
+                draw.polygon(points, fill=tuple(rng.randint(0, 255) for _ in range(3)))
+                coords = ' '.join(f"{min(max(x / image_size, 0), 1):.6f} {min(max(y / image_size, 0), 1):.6f}" for x, y in points)
+                lines.append(f"{class_id} {coords}")
+            name = f"synthetic_{split}_{i:05d}"
+            image.save(root / 'images' / split / f"{name}.jpg", quality=90)
+            (root / 'labels' / split / f"{name}.txt").write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    dataset_yaml.write_text(
+        f"path: {root.resolve()}\ntrain: images/train\nval: images/val\n"
+        f"nc: {len(SYNTHETIC_CLASSES)}\nnames: {json.dumps(SYNTHETIC_CLASSES)}\n",
+        encoding='utf-8'
+    )
+    print(f"[OK] 합성 데이터셋 생성: {root} (train {num_images}, val {num_val})")
+    return dataset_yaml
+
+
+# ============================================
+# 측정
+# ============================================
+
+def _process_rss_mb() -> float:
+    """현재 프로세스 + 자식(데이터로더 워커) RSS 합계(MB)"""
+    try:
+        import psutil
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss / 1024 / 1024
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _benchmark_worker(dataset_yaml: str, run: Dict, result_queue):
+    """벤치마크 자식 프로세스: 한 조합을 학습하며 배치 단위 시간/메모리 측정"""
+    try:
+        from ultralytics import YOLO
+
+        state = {'last_end': None, 'batch_start': None, 'epoch_peak': 0.0, 'step': 0}
+        waits, computes, epochs = [], [], []
+        first_batch = {}
+
+        def on_train_epoch_start(trainer):
+            # 에폭마다 step/last_end 초기화 (에폭 첫 배치의 워커 기동 대기가 정상 상태 대기로 집계되지 않도록)
+            state['step'] = 0
+            state['last_end'] = time.perf_counter()
+            state['epoch_peak'] = _process_rss_mb()
+
+        def on_train_batch_start(trainer):
+            now = time.perf_counter()
+            state['batch_start'] = now
+            # 이전 배치 종료 → 이번 배치 시작 = 데이터로더 대기 (에폭 첫 배치는 워커 기동 포함)
+            wait = now - state['last_end']
+            if state['step'] == 0:
+                first_batch.setdefault('wait_sec', round(wait, 3))
+            elif state['step'] >= run['warmup_iters']:
+                waits.append(wait)
+
+        def on_train_batch_end(trainer):
+            now = time.perf_counter()
+            if state['step'] >= run['warmup_iters']:
+                computes.append(now - state['batch_start'])
+            state['last_end'] = now
+            state['step'] += 1
+            if state['step'] % 5 == 0:
+                state['epoch_peak'] = max(state['epoch_peak'], _process_rss_mb())
+
+        def on_train_epoch_end(trainer):
+            epochs.append({'epoch': trainer.epoch + 1, 'peak_rss_mb': round(max(state['epoch_peak'], _process_rss_mb()), 1)})
+
+        model = YOLO(run['model'])
+        model.add_callback('on_train_epoch_start', on_train_epoch_start)
+        model.add_callback('on_train_batch_start', on_train_batch_start)
+        model.add_callback('on_train_batch_end', on_train_batch_end)
+        model.add_callback('on_train_epoch_end', on_train_epoch_end)
+
+        trainer = None
+        cache_arg = {'none': False, 'ram': 'ram', 'disk': 'disk', 'mmap': False}[run['cache']]
+        if run['cache'] == 'mmap':
+            from training_image_cache import build_image_cache, build_cached_trainer
+            trainer = build_cached_trainer(build_image_cache(dataset_yaml, run['imgsz']))
+
+        wall_start = time.perf_counter()
+        train_kwargs = dict(
+            data=dataset_yaml,
+            epochs=run['epochs'],
+            batch=run['batch'],
+            imgsz=run['imgsz'],
+            workers=run['workers'],
+            cache=cache_arg,
+            fraction=run['fraction'],
+            device=run['device'],
+            seed=0,
+            deterministic=True,
+            amp=False,
+            val=False,
+            plots=False,
+            save=False,
+            verbose=False,
+            project=str((BENCHMARK_ROOT / 'runs').resolve()),
+            name=run['name'],
+            exist_ok=True,
+            **PRODUCTION_AUGMENTATION
+        )
+        if trainer is not None:
+            model.train(trainer=trainer, **train_kwargs)
+        else:
+            model.train(**train_kwargs)
+        wall_time = time.perf_counter() - wall_start
+
+        measured = len(computes)
+        busy = sum(waits) + sum(computes)
+        result_queue.put({
+            'status': 'ok',
+            'measured_iterations': measured,
+            'images_per_sec': round(measured * run['batch'] / busy, 2) if busy else 0.0,
+            'data_wait_ms_mean': round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+            'data_wait_ms_p95': round(1000 * _percentile(waits, 0.95), 1),
+            'compute_ms_mean': round(1000 * sum(computes) / measured, 1) if measured else 0.0,
+            'compute_ms_p95': round(1000 * _percentile(computes, 0.95), 1),
+            'data_wait_ratio': round(sum(waits) / busy, 3) if busy else 0.0,
+            'first_batch_wait_sec': first_batch.get('wait_sec'),
+            'epochs': epochs,
+            'peak_rss_mb': max((e['peak_rss_mb'] for e in epochs), default=0.0),
+            'wall_time_sec': round(wall_time, 2),
+        })
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        result_queue.put({'status': 'error', 'error': str(e)})
+
+
+def run_benchmark(workers: List[int], batches: List[int], imgszs: List[int], caches: List[str],
+                  iterations: int = 20, epochs: int = 2, warmup_iters: int = 3,
+                  model: str = 'yolo11n-seg.pt', device: str = 'cpu', seed: int = 0,
+                  timeout: float = 1800) -> Dict:
+    """조합별 벤치마크 실행 → 리포트 dict"""
+    num_images = max(32, iterations * max(batches))
+    dataset_yaml = build_synthetic_dataset(num_images, seed=seed)
+    ctx = multiprocessing.get_context('spawn')
+
+    runs = []
+    combos = list(itertools.product(workers, batches, imgszs, caches))
+    for index, (num_workers, batch, imgsz, cache) in enumerate(combos, 1):
+        run = {
+            'name': f"w{num_workers}_b{batch}_s{imgsz}_{cache}",
+            'model': model,
+            'device': device,
+            'workers': num_workers,
+            'batch': batch,
+            'imgsz': imgsz,
+            'cache': cache,
+            'epochs': epochs,
+            'warmup_iters': warmup_iters,
+            # 에폭당 반복 수를 조합과 무관하게 iterations로 고정
+            'fraction': min(1.0, iterations * batch / num_images),
+        }
+        print(f"[BENCH] ({index}/{len(combos)}) {run['name']} 실행 중...", flush=True)
+        result_queue = ctx.Queue()
+        process = ctx.Process(target=_benchmark_worker, args=(str(dataset_yaml), run, result_queue))
+        process.start()
+        try:
+            result = result_queue.get(timeout=timeout)
+        except Exception:
+            result = {'status': 'error', 'error': f'시간 초과 ({timeout}s)'}
+        process.join(10)
+        if process.is_alive():
+            process.terminate()
+
+        runs.append({**{k: run[k] for k in ('name', 'workers', 'batch', 'imgsz', 'cache')}, **result})
+        if result['status'] == 'ok':
+            print(f"[BENCH] {run['name']}: {result['images_per_sec']} img/s, "
+                  f"대기 {result['data_wait_ms_mean']}ms / 연산 {result['compute_ms_mean']}ms, "
+                  f"최대 RSS {result['peak_rss_mb']}MB", flush=True)
+        else:
+            print(f"[WARN] {run['name']} 실패: {result['error']}", flush=True)
+
+    return {
+        'created_at': datetime.now().isoformat(),
+        'host': _host_info(),
+        'settings': {
+            'model': model, 'device': device, 'iterations': iterations, 'epochs': epochs,
+            'warmup_iters': warmup_iters, 'seed': seed, 'dataset': str(dataset_yaml),
+        },
+        'runs': runs,
+    }
+
+
+def _host_info() -> Dict:
+    info = {
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+    for package in ('torch', 'ultralytics', 'numpy'):
+        try:
+            info[package] = __import__(package).__version__
+        except ImportError:
+            info[package] = None
+    return info
+
+
+# ============================================
+# 회귀 비교 / 리포트
+# ============================================
+
+def find_regressions(report: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[Dict]:
+    """기준 리포트와 같은 조합의 images/sec가 threshold 이상 떨어진 항목"""
+    if baseline.get('settings', {}).get('model') != report['settings']['model']:
+        print("[WARN] 기준 리포트와 모델이 달라 회귀 비교 결과가 부정확할 수 있습니다")
+    previous = {r['name']: r for r in baseline.get('runs', []) if r.get('status') == 'ok'}
+    regressions = []
+    for run in report['runs']:
+        before = previous.get(run['name'])
+        if run.get('status') != 'ok' or not before or not before['images_per_sec']:
+            continue
+        change = run['images_per_sec'] / before['images_per_sec'] - 1
+        if change <= -threshold:
+            regressions.append({'name': run['name'], 'baseline': before['images_per_sec'],
+                                'current': run['images_per_sec'], 'change': round(change, 3)})
+    return regressions
+
+
+def write_report(report: Dict, output_dir: Path = BENCHMARK_ROOT) -> Path:
+    """JSON + Markdown 리포트 저장 → JSON 경로"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"training_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    json_path = output_dir / f"{stem}.json"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    settings, host = report['settings'], report['host']
+    lines = [
+        f"# 학습 처리량 벤치마크 ({report['created_at'][:19]})",
+        '',
+        f"- 모델: `{settings['model']}` / 디바이스: `{settings['device']}` / 반복: {settings['iterations']} × {settings['epochs']} 에폭 (워밍업 {settings['warmup_iters']} 제외)",
+        f"- 호스트: {host['platform']}, CPU {host['cpu_count']}, torch {host.get('torch')}, ultralytics {host.get('ultralytics')}",
+        '',
+        '| 조합 | workers | batch | imgsz | cache | img/s | 대기 ms (p95) | 연산 ms (p95) | 대기 비율 | 최대 RSS MB |',
+        '|---|---|---|---|---|---|---|---|---|---|',
+    ]
+    ranked = sorted(report['runs'], key=lambda r: r.get('images_per_sec', 0), reverse=True)
+    for run in ranked:
+        if run.get('status') != 'ok':
+            lines.append(f"| {run['name']} | {run['workers']} | {run['batch']} | {run['imgsz']} | {run['cache']} | 실패 | | | | |")
+            continue
+        lines.append(
+            f"| {run['name']} | {run['workers']} | {run['batch']} | {run['imgsz']} | {run['cache']} | "
+            f"{run['images_per_sec']} | {run['data_wait_ms_mean']} ({run['data_wait_ms_p95']}) | "
+            f"{run['compute_ms_mean']} ({run['compute_ms_p95']}) | {run['data_wait_ratio']:.0%} | {run['peak_rss_mb']} |"
+        )
+    if report.get('regressions') is not None:
+        lines += ['', '## 기준 대비 회귀', '']
+        if report['regressions']:
+            lines += [f"- `{r['name']}`: {r['baseline']} → {r['current']} img/s ({r['change']:+.1%})" for r in report['regressions']]
+        else:
+            lines.append('- 없음')
+
+    md_path = json_path.with_suffix('.md')
+    md_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    print(f"[OK] 벤치마크 리포트: {json_path}, {md_path}")
+    return json_path
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='학습 처리량 벤치마크 (workers/batch/imgsz/cache 스윕)')
+    parser.add_argument('--workers', type=_int_list, default=[0, 2, 4], help='데이터로더 워커 수 목록 (예: 0,2,4)')
+    parser.add_argument('--batch', type=_int_list, default=[4, 8], help='배치 크기 목록')
+    parser.add_argument('--imgsz', type=_int_list, default=[416], help='이미지 크기 목록')
+    parser.add_argument('--cache', type=lambda v: v.split(','), default=['none', 'ram', 'mmap'],
+                        help=f"캐시 모드 목록 ({', '.join(CACHE_MODES)})")
+    parser.add_argument('--iterations', type=int, default=20, help='에폭당 반복(배치) 수')
+    parser.add_argument('--epochs', type=int, default=2, help='조합당 에폭 수 (에폭별 메모리 측정)')
+    parser.add_argument('--warmup_iters', type=int, default=3, help='측정에서 제외할 초기 반복 수')
+    parser.add_argument('--model', default='yolo11n-seg.pt', help='모델 (기본: 1단계 YOLO11n-seg)')
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='회귀 비교용 기준 리포트(JSON)')
+    parser.add_argument('--regression_threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    invalid = [c for c in args.cache if c not in CACHE_MODES]
+    if invalid:
+        parser.error(f"알 수 없는 캐시 모드: {invalid}")
+
+    report = run_benchmark(args.workers, args.batch, args.imgsz, args.cache, args.iterations, args.epochs,
+                           args.warmup_iters, args.model, args.device, args.seed)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = find_regressions(report, json.load(f), args.regression_threshold)
+    write_report(report)
+
+    if report.get('regressions'):
+        print(f"[ERROR] 처리량 회귀 {len(report['regressions'])}건 (기준 대비 {args.regression_threshold:.0%} 이상 하락)")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
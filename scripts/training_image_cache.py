@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+학습 이미지 전처리 캐시 (메모리 매핑)
+- 데이터셋의 WebP/PNG 렌더를 한 번만 디코딩하여 imgsz 크기로 리사이즈 + 레터박스
+- uint8 memmap 배열(N x S x S x 3) + 라벨 배열로 저장, 데이터셋 해시로 식별
+- Ultralytics 데이터셋 서브클래스(CachedYOLODataset): load_image()를 memmap 조회로 대체 (에폭마다 WebP 디코딩 제거)
+  · 모자이크 버퍼(ims/im_hw0/im_hw/buffer)는 기본 load_image와 동일하게 관리, spawn 워커로 피클 가능
+- 1단계/2단계/증분 학습이 같은 캐시를 공유 (요청 imgsz 이하이면 재사용)
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    from ultralytics.data.dataset import YOLODataset
+except ImportError:
+    # 캐시 생성 CLI는 Ultralytics 없이도 동작 (CachedYOLODataset은 학습 시에만 사용)
+    YOLODataset = object
+
+DEFAULT_CACHE_ROOT = Path('output/cache/train_images')
+IMAGE_EXTENSIONS = ('.webp', '.png', '.jpg', '.jpeg')
+PAD_VALUE = 114  # Ultralytics 레터박스 패딩 값과 동일
+CACHE_VERSION = 1
+
+
+def _load_dataset_config(dataset_yaml) -> dict:
+    if yaml is None:
+        raise ImportError("PyYAML이 필요합니다: pip install pyyaml")
+    with open(dataset_yaml, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def _resolve_split_dir(dataset_config: dict, dataset_yaml, split: str) -> Optional[Path]:
+    value = dataset_config.get(split)
+    if not value:
+        return None
+    split_path = Path(value)
+    if not split_path.is_absolute():
+        base = Path(dataset_config.get('path') or Path(dataset_yaml).parent)
+        split_path = base / split_path
+    return split_path if split_path.exists() else None
+
+
+def _label_path_for(image_path: Path) -> Path:
+    """Ultralytics 규칙: .../images/... -> .../labels/... (확장자 .txt)"""
+    parts = list(image_path.parts)
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i] == 'images':
+            parts[i] = 'labels'
+            break
+    return Path(*parts).with_suffix('.txt')
+
+
+def list_dataset_images(dataset_yaml) -> List[Path]:
+    """dataset.yaml의 train/val/test 이미지 목록 (정렬, 중복 제거)"""
+    dataset_config = _load_dataset_config(dataset_yaml)
+    images = set()
+    for split in ('train', 'val', 'test'):
+        split_dir = _resolve_split_dir(dataset_config, dataset_yaml, split)
+        if split_dir is None:
+            continue
+        for ext in IMAGE_EXTENSIONS:
+            images.update(p.resolve() for p in split_dir.rglob(f'*{ext}'))
+    return sorted(images)
+
+
+def compute_dataset_hash(image_paths: List[Path]) -> str:
+    """이미지 경로 + 크기 + 수정시각 + 라벨 내용 기반 데이터셋 해시"""
+    hasher = hashlib.sha256()
+    for path in image_paths:
+        stat = path.stat()
+        hasher.update(f"{path}|{stat.st_size}|{int(stat.st_mtime)}".encode('utf-8'))
+        label_path = _label_path_for(path)
+        if label_path.exists():
+            hasher.update(label_path.read_bytes())
+    return hasher.hexdigest()[:16]
+
+
+def _parse_label_file(label_path: Path) -> np.ndarray:
+    """YOLO 라벨(bbox 또는 폴리곤) -> (M, 5) [cls, cx, cy, w, h]"""
+    rows = []
+    if not label_path.exists():
+        return np.zeros((0, 5), dtype=np.float32)
+    for line in label_path.read_text(encoding='utf-8').splitlines():
+        values = line.split()
+        if len(values) < 5:
+            continue
+        cls = float(values[0])
+        coords = np.asarray(values[1:], dtype=np.float32)
+        if len(coords) == 4:
+            rows.append([cls, *coords])
+        else:
+            # 세그멘테이션 폴리곤은 외접 bbox로 요약
+            xs, ys = coords[0::2], coords[1::2]
+            x1, x2, y1, y2 = xs.min(), xs.max(), ys.min(), ys.max()
+            rows.append([cls, (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+    return np.asarray(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def _resize_long_side(image: np.ndarray, imgsz: int) -> np.ndarray:
+    """Ultralytics load_image(rect_mode=True)와 동일한 긴 변 기준 리사이즈"""
+    h0, w0 = image.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = (min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz))
+        image = cv2.resize(image, (w, h), interpolation=cv2.INTER_LINEAR)
+    return image
+
+
+class TrainingImageCache:
+    """memmap 기반 전처리 이미지 캐시 (읽기 전용, 프로세스 간 공유)"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        with open(self.cache_dir / 'meta.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.imgsz = self.meta['imgsz']
+        # 디코딩 실패 이미지는 제외 (데이터로더가 원래 경로로 처리)
+        failed = set(self.meta.get('failed', []))
+        self.index = {path: i for i, path in enumerate(self.meta['images']) if path not in failed}
+        self.shapes = np.load(self.cache_dir / 'shapes.npy')  # (N, 4) h0, w0, h, w
+        self.labels = np.load(self.cache_dir / 'labels.npy')
+        self.label_offsets = np.load(self.cache_dir / 'label_offsets.npy')
+        self._images = None
+
+    @property
+    def images(self) -> np.ndarray:
+        # 데이터로더 워커마다 지연 오픈 (페이지 캐시를 통해 실제 메모리는 공유됨)
+        if self._images is None:
+            self._images = np.load(self.cache_dir / 'images.npy', mmap_mode='r')
+        return self._images
+
+    def __getstate__(self):
+        # spawn 워커로 전달 시 memmap 내용을 복사하지 않도록 핸들 제외
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, image_path) -> Optional[int]:
+        return self.index.get(str(Path(image_path).resolve()))
+
+    def load(self, i: int) -> Tuple[np.ndarray, Tuple[int, int], Tuple[int, int]]:
+        """(이미지 BGR, 원본 (h0, w0), 리사이즈 (h, w)) - 레터박스 패딩 영역은 잘라서 반환"""
+        h0, w0, h, w = (int(v) for v in self.shapes[i])
+        return np.array(self.images[i, :h, :w]), (h0, w0), (h, w)
+
+    def labels_for(self, i: int) -> np.ndarray:
+        return self.labels[self.label_offsets[i]:self.label_offsets[i + 1]]
+
+
+def build_image_cache(dataset_yaml, imgsz: int, cache_root=DEFAULT_CACHE_ROOT,
+                      workers: Optional[int] = None, force: bool = False) -> Path:
+    """데이터셋 이미지를 디코딩/리사이즈하여 memmap 캐시 생성 (동일 해시 + imgsz 이상 캐시가 있으면 재사용)"""
+    if cv2 is None:
+        raise ImportError("OpenCV가 필요합니다: pip install opencv-python")
+
+    image_paths = list_dataset_images(dataset_yaml)
+    if not image_paths:
+        raise FileNotFoundError(f"데이터셋 이미지가 없습니다: {dataset_yaml}")
+
+    dataset_hash = compute_dataset_hash(image_paths)
+    cache_dir = Path(cache_root) / dataset_hash
+    meta_path = cache_dir / 'meta.json'
+
+    if meta_path.exists() and not force:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') == CACHE_VERSION and meta.get('imgsz', 0) >= imgsz and meta.get('complete'):
+            print(f"[CACHE] 전처리 캐시 재사용: {cache_dir} ({meta['count']}장, {meta['imgsz']}px)")
+            return cache_dir
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    count = len(image_paths)
+    print(f"[CACHE] 전처리 캐시 생성: {count}장 -> {imgsz}px ({cache_dir})")
+
+    start = time.time()
+    images = np.lib.format.open_memmap(
+        cache_dir / 'images.npy', mode='w+', dtype=np.uint8, shape=(count, imgsz, imgsz, 3)
+    )
+    shapes = np.zeros((count, 4), dtype=np.int32)
+    label_arrays: List[np.ndarray] = [None] * count
+    failed = []
+
+    def _process(i: int):
+        path = image_paths[i]
+        # cv2.imread는 디코딩 중 GIL을 해제하므로 스레드 풀로 병렬화
+        image = cv2.imread(str(path))
+        if image is None:
+            failed.append(str(path))
+            images[i] = PAD_VALUE
+            label_arrays[i] = np.zeros((0, 5), dtype=np.float32)
+            return
+        h0, w0 = image.shape[:2]
+        resized = _resize_long_side(image, imgsz)
+        h, w = resized.shape[:2]
+        images[i] = PAD_VALUE
+        images[i, :h, :w] = resized
+        shapes[i] = (h0, w0, h, w)
+        label_arrays[i] = _parse_label_file(_label_path_for(path))
+
+    with ThreadPoolExecutor(max_workers=workers or min(16, os.cpu_count() or 4)) as executor:
+        for done, _ in enumerate(executor.map(_process, range(count)), 1):
+            if done % 1000 == 0:
+                print(f"[CACHE] {done}/{count}")
+
+    images.flush()
+    del images
+
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(a) for a in label_arrays])
+    np.save(cache_dir / 'shapes.npy', shapes)
+    np.save(cache_dir / 'labels.npy', np.concatenate(label_arrays).astype(np.float32) if count else np.zeros((0, 5), np.float32))
+    np.save(cache_dir / 'label_offsets.npy', offsets)
+
+    meta = {
+        'version': CACHE_VERSION,
+        'dataset_hash': dataset_hash,
+        'dataset_yaml': str(Path(dataset_yaml).resolve()),
+        'imgsz': imgsz,
+        'count': count,
+        'images': [str(p) for p in image_paths],
+        'failed': failed,
+        'build_time_sec': round(time.time() - start, 1),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'complete': True,
+    }
+    # meta.json은 마지막에 기록 (중단된 캐시는 재사용되지 않음)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    size_gb = count * imgsz * imgsz * 3 / 1024 ** 3
+    print(f"[OK] 전처리 캐시 생성 완료: {meta['build_time_sec']}초, {size_gb:.2f}GB, 디코딩 실패 {len(failed)}장")
+    return cache_dir
+
+
+class CachedYOLODataset(YOLODataset):
+    """memmap 캐시에서 이미지를 읽는 YOLODataset (캐시에 없는 이미지는 기본 디코딩 경로 사용)
+
+    모듈 수준 클래스 + 클로저 없는 상태만 보유하므로 spawn 데이터로더 워커로 피클 가능.
+    memmap 핸들은 TrainingImageCache가 워커마다 지연 오픈한다.
+    """
+
+    def __init__(self, *args, cache_dir=None, **kwargs):
+        self.image_cache = TrainingImageCache(cache_dir)
+        self.cache_indices = None
+        super().__init__(*args, **kwargs)
+        self._resolve_cache_indices()
+        hits = sum(1 for j in self.cache_indices if j is not None)
+        print(f"[CACHE] 데이터로더 캐시 연결: {hits}/{len(self.im_files)}장 ({self.image_cache.cache_dir.name})")
+
+    def _resolve_cache_indices(self):
+        # 캐시 인덱스를 미리 계산하여 배치마다 경로 정규화 비용 제거
+        if self.cache_indices is None or len(self.cache_indices) != len(self.im_files):
+            self.cache_indices = [self.image_cache.lookup(f) for f in self.im_files]
+        return self.cache_indices
+
+    def load_image(self, i, rect_mode=True):
+        """BaseDataset.load_image와 동일한 반환값/버퍼 관리, 디코딩만 memmap 조회로 대체"""
+        if self.ims[i] is not None:
+            return self.ims[i], self.im_hw0[i], self.im_hw[i]
+        j = self._resolve_cache_indices()[i]
+        if j is None:
+            return super().load_image(i, rect_mode)
+
+        im, (h0, w0), _ = self.image_cache.load(j)
+        if rect_mode:
+            if max(im.shape[:2]) != self.imgsz:
+                im = _resize_long_side(im, self.imgsz)
+        elif im.shape[:2] != (self.imgsz, self.imgsz):
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+
+        # 증강 학습 시 모자이크 버퍼에 추가 (Mosaic.get_indexes가 buffer에서 샘플링)
+        if self.augment:
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                k = self.buffer.pop(0)
+                if getattr(self, 'cache', None) != 'ram':
+                    self.ims[k], self.im_hw0[k], self.im_hw[k] = None, None, None
+        return im, (h0, w0), im.shape[:2]
+
+
+def build_cached_dataset(cache_dir, cfg, img_path, batch, data, mode: str = 'train', rect: bool = False, stride: int = 32):
+    """ultralytics.data.build.build_yolo_dataset과 같은 인자로 CachedYOLODataset 생성"""
+    from ultralytics.utils import colorstr
+
+    return CachedYOLODataset(
+        img_path=img_path,
+        imgsz=cfg.imgsz,
+        batch_size=batch,
+        augment=mode == 'train',
+        hyp=cfg,
+        rect=cfg.rect or rect,
+        cache=cfg.cache or None,
+        single_cls=cfg.single_cls or False,
+        stride=int(stride),
+        pad=0.0 if mode == 'train' else 0.5,
+        prefix=colorstr(f"{mode}: "),
+        task=cfg.task,
+        classes=cfg.classes,
+        data=data,
+        fraction=cfg.fraction if mode == 'train' else 1.0,
+        cache_dir=cache_dir,
+    )
+
+
+def build_cached_trainer(cache_dir, task: str = 'segment'):
+    """memmap 캐시 데이터셋을 사용하는 Ultralytics 트레이너 클래스 생성 (model.train(trainer=...)용)"""
+    if task == 'segment':
+        from ultralytics.models.yolo.segment import SegmentationTrainer as BaseTrainer
+    else:
+        from ultralytics.models.yolo.detect import DetectionTrainer as BaseTrainer
+
+    cache_dir = str(cache_dir)
+
+    class CachedImageTrainer(BaseTrainer):
+        def build_dataset(self, img_path, mode='train', batch=None):
+            model = getattr(self.model, 'module', self.model)
+            gs = max(int(model.stride.max() if model else 0), 32)
+            return build_cached_dataset(cache_dir, self.args, img_path, batch, self.data,
+                                        mode=mode, rect=mode == 'val', stride=gs)
+
+    return CachedImageTrainer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='학습 이미지 전처리 캐시 생성')
+    parser.add_argument('dataset_yaml', help='dataset.yaml 경로')
+    parser.add_argument('--imgsz', type=int, default=768, help='캐시 이미지 크기 (1단계/2단계 중 큰 값 권장)')
+    parser.add_argument('--cache-root', default=str(DEFAULT_CACHE_ROOT), help='캐시 루트 디렉토리')
+    parser.add_argument('--workers', type=int, help='디코딩 스레드 수')
+    parser.add_argument('--force', action='store_true', help='기존 캐시 무시하고 재생성')
+    args = parser.parse_args()
+
+    try:
+        build_image_cache(args.dataset_yaml, args.imgsz, args.cache_root, args.workers, args.force)
+    except Exception as e:
+        print(f"[ERROR] 전처리 캐시 생성 실패: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
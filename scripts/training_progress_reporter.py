@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+학습 진행률 비동기 리포터
+- training_jobs 업데이트를 백그라운드 스레드에서 전송 (학습 스레드는 네트워크 지연/실패에 블로킹되지 않음)
+- 최신 값 우선 병합 + 최소 전송 간격 (에폭이 빨라도 DB 쓰기는 간격당 1회)
+- 에폭별 메트릭은 히스토리로 모아 다음 전송 시 일괄 기록
+- 상태 전이(training -> completed/failed)는 간격과 무관하게 즉시 전송, 종료 시 flush
+"""
+
+import os
+import time
+import atexit
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+PROGRESS_MIN_INTERVAL = float(os.getenv('TRAINING_PROGRESS_MIN_INTERVAL', '5'))
+METRIC_HISTORY_LIMIT = 500     # progress.metric_history 최대 보관 에폭 수
+RETRY_BACKOFF_MAX = 60.0       # 전송 실패 시 최대 재시도 대기(초)
+CLOSE_TIMEOUT = 10.0           # 프로세스 종료 시 flush 대기(초)
+
+
+class TrainingProgressReporter:
+    """training_jobs 한 행에 대한 비동기/병합 업데이트 전송기"""
+
+    def __init__(self, job_id, client=None, client_factory: Optional[Callable[[], Any]] = None,
+                 min_interval: float = PROGRESS_MIN_INTERVAL, history_limit: int = METRIC_HISTORY_LIMIT):
+        self.job_id = job_id
+        self._client = client
+        self._client_factory = client_factory
+        self.min_interval = min_interval
+        self.history_limit = history_limit
+
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Any] = {}   # 전송 대기 중인 컬럼 값 (최신 값 우선)
+        self._history: List[Dict[str, Any]] = []
+        self._history_dirty = False
+        self._urgent = False
+        self._closed = False
+        self._in_flight = False
+        self._last_sent = 0.0
+        self._backoff = 0.0
+
+        self.stats = {'updates': 0, 'sent': 0, 'coalesced': 0, 'failed': 0}
+        self._thread = threading.Thread(target=self._run, name=f'progress-reporter-{job_id}', daemon=True)
+        self._thread.start()
+
+    # ---------- 학습 스레드 API (논블로킹) ----------
+
+    def update(self, fields: Dict[str, Any], history_entry: Optional[Dict[str, Any]] = None, urgent: bool = False):
+        """컬럼 값 병합 예약 (progress dict는 키 단위 병합)"""
+        with self._cond:
+            if self._pending:
+                self.stats['coalesced'] += 1
+            for key, value in fields.items():
+                if key == 'progress' and isinstance(value, dict) and isinstance(self._pending.get('progress'), dict):
+                    self._pending['progress'] = {**self._pending['progress'], **value}
+                else:
+                    self._pending[key] = value
+            if history_entry:
+                self._history.append(history_entry)
+                del self._history[:-self.history_limit]
+                self._history_dirty = True
+            self._urgent = self._urgent or urgent
+            self.stats['updates'] += 1
+            self._cond.notify()
+
+    def report_progress(self, epoch: int, total_epochs: int, metrics: Optional[Dict[str, float]] = None, **extra):
+        """에폭 진행률 보고 (최소 간격 내 호출은 병합)"""
+        percent = round((epoch / total_epochs) * 100, 2) if total_epochs else 0.0
+        progress = {
+            'current_epoch': epoch,
+            'total_epochs': total_epochs,
+            'percent': percent,
+            'status': 'training',
+            'metrics': metrics or {},
+            **extra,
+        }
+        history_entry = {'epoch': epoch, **(metrics or {})} if metrics else None
+        self.update({'progress': progress, 'status': 'training'}, history_entry)
+
+    def report_status(self, status: str, progress: Optional[Dict[str, Any]] = None,
+                      metrics: Optional[Dict[str, Any]] = None, **columns):
+        """상태 전이 보고 (즉시 전송 예약)"""
+        fields: Dict[str, Any] = {'status': status, **columns}
+        if progress is not None:
+            fields['progress'] = {'status': status, **progress}
+        if metrics is not None:
+            fields['metrics'] = metrics
+        if status == 'completed' and 'completed_at' not in fields:
+            fields['completed_at'] = datetime.now().isoformat()
+        self.update(fields, urgent=True)
+
+    def flush(self, timeout: float = CLOSE_TIMEOUT) -> bool:
+        """대기 중인 업데이트가 전송될 때까지 대기 (타임아웃 시 False)"""
+        deadline = time.time() + timeout
+        with self._cond:
+            self._urgent = True
+            self._cond.notify()
+            while self._pending or self._history_dirty or self._in_flight:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = CLOSE_TIMEOUT) -> bool:
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        return flushed
+
+    # ---------- 백그라운드 전송 ----------
+
+    def _get_client(self):
+        if self._client is None and self._client_factory is not None:
+            self._client = self._client_factory()
+        return self._client
+
+    def _ready_to_send(self) -> float:
+        """전송 가능까지 남은 시간(초), 0이면 즉시"""
+        if not (self._pending or self._history_dirty):
+            return float('inf')
+        interval = self._backoff if self._backoff else (0.0 if self._urgent else self.min_interval)
+        return max(0.0, self._last_sent + interval - time.time())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed and not self._pending and not self._history_dirty:
+                        return
+                    wait = self._ready_to_send()
+                    if wait == 0.0:
+                        break
+                    if self._closed and self._backoff:
+                        # 종료 중 재시도 대기는 하지 않음 (마지막 시도 실패 시 포기)
+                        return
+                    self._cond.wait(None if wait == float('inf') else wait)
+
+                payload = self._pending
+                self._pending = {}
+                if self._history_dirty:
+                    progress = dict(payload.get('progress') or {})
+                    progress['metric_history'] = list(self._history)
+                    payload['progress'] = progress
+                    self._history_dirty = False
+                self._urgent = False
+                self._in_flight = True
+
+            payload['updated_at'] = datetime.now().isoformat()
+            error = None
+            try:
+                client = self._get_client()
+                if client is None:
+                    raise RuntimeError('Supabase 클라이언트 없음')
+                client.table('training_jobs').update(payload).eq('id', self.job_id).execute()
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._in_flight = False
+                self._last_sent = time.time()
+                if error is None:
+                    self.stats['sent'] += 1
+                    self._backoff = 0.0
+                else:
+                    self.stats['failed'] += 1
+                    self._backoff = min(RETRY_BACKOFF_MAX, max(1.0, self._backoff * 2))
+                    print(f"[WARN] 진행률 업데이트 실패 ({self._backoff:.0f}초 후 재시도): {error}")
+                    # 실패한 값 복원 (그 사이 들어온 최신 값이 우선)
+                    restored = {k: v for k, v in payload.items() if k != 'updated_at'}
+                    if 'progress' in restored and 'progress' in self._pending:
+                        restored['progress'] = {**restored['progress'], **self._pending['progress']}
+                    restored.update({k: v for k, v in self._pending.items() if k != 'progress'})
+                    self._pending = restored
+                self._cond.notify_all()
+
+
+_reporters: Dict[Any, TrainingProgressReporter] = {}
+_reporters_lock = threading.Lock()
+
+
+def get_progress_reporter(job_id, client=None, client_factory: Optional[Callable[[], Any]] = None) -> TrainingProgressReporter:
+    """작업 ID별 프로세스 전역 리포터 반환 (같은 작업의 진행률/상태 쓰기를 한 곳으로 모음)"""
+    with _reporters_lock:
+        reporter = _reporters.get(job_id)
+        if reporter is None:
+            reporter = TrainingProgressReporter(job_id, client=client, client_factory=client_factory)
+            _reporters[job_id] = reporter
+        elif reporter._client is None and client is not None:
+            reporter._client = client
+        return reporter
+
+
+def close_progress_reporters(timeout: float = CLOSE_TIMEOUT):
+    """모든 리포터 flush 후 종료 (미전송 업데이트 유실 방지)"""
+    with _reporters_lock:
+        reporters = list(_reporters.values())
+        _reporters.clear()
+    for reporter in reporters:
+        if not reporter.close(timeout):
+            print(f"[WARN] 진행률 리포터 종료 시간 초과 (작업 {reporter.job_id})")
+
+
+atexit.register(close_progress_reporters)
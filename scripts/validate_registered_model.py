@@ -23,6 +23,10 @@ sys.stderr.reconfigure(encoding='utf-8')
 project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from model_artifact_store import artifact_sha256, get_model_store
+from validation_engine import ValidationEngine
 
 # 환경변수 관리 시스템 사용
 try:
@@ -110,40 +114,22 @@ def get_active_model(supabase, version=None):
         print(f"[ERROR] 모델 조회 실패: {e}")
         return None
 
-def download_model(model_url, output_path):
-    """모델 파일 다운로드"""
+def download_model(model_url, expected_sha256=None):
+    """모델 파일 준비 (내용 해시 저장소 사용, 해시/ETag가 같으면 재다운로드 생략)"""
     try:
-        print(f"[DOWNLOAD] 모델 다운로드 중...")
+        print(f"[DOWNLOAD] 모델 준비 중...")
         print(f"   URL: {model_url}")
-        print(f"   저장 위치: {output_path}")
-        
-        import requests
-        
-        response = requests.get(model_url, stream=True)
-        response.raise_for_status()
         
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        model_path = get_model_store().fetch(model_url, expected_sha256)
         
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
+        print(f"[OK] 모델 준비 완료: {model_path}")
+        print(f"   크기: {model_path.stat().st_size / 1024 / 1024:.1f} MB")
         
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"\r   진행률: {percent:.1f}%", end='', flush=True)
-        
-        print(f"\n[OK] 모델 다운로드 완료: {output_path}")
-        print(f"   크기: {downloaded / 1024 / 1024:.1f} MB")
-        
-        return True
+        return model_path
         
     except Exception as e:
         print(f"\n[ERROR] 모델 다운로드 실패: {e}")
-        return False
+        return None
 
 def prepare_test_dataset(test_set_path=None):
     """테스트 데이터셋 준비 (여러 경로 자동 탐색)"""
@@ -255,8 +241,44 @@ names: {class_names}
     
     return str(dataset_path)
 
-def evaluate_model(model_path, dataset_path, device='cuda'):
-    """모델 평가 실행"""
+def evaluate_model(model_path, dataset_path, device='cuda', batch=16):
+    """모델 평가 실행 (배치 검증 엔진 우선, 실패 시 Ultralytics val)"""
+    try:
+        print(f"[EVAL] 모델 평가 시작 (검증 엔진)...", flush=True)
+        print(f"   모델: {model_path}", flush=True)
+        print(f"   데이터셋: {dataset_path}", flush=True)
+        
+        engine = ValidationEngine(model_path, imgsz=640, batch=batch, device=device,
+                                  conf_threshold=0.25, iou_threshold=0.60)
+        metrics = engine.validate(Path(dataset_path) / "data.yaml")
+    except Exception as e:
+        print(f"[WARN] 검증 엔진 실패, Ultralytics val로 대체: {e}", flush=True)
+        return evaluate_model_ultralytics(model_path, dataset_path, device)
+    
+    print(f"\n[OK] 평가 완료 ({metrics['images']}장, {metrics['images_per_sec']} img/s):")
+    print(f"   mAP50: {metrics['mAP50']:.4f}")
+    print(f"   mAP50-95: {metrics['mAP50_95']:.4f}")
+    print(f"   Precision: {metrics['precision']:.4f}")
+    print(f"   Recall: {metrics['recall']:.4f}")
+    print(f"   F1 Score: {metrics['f1_score']:.4f}")
+    
+    weakest = sorted(metrics['per_class'].items(), key=lambda item: item[1]['ap50'])[:5]
+    if weakest:
+        print(f"   AP50 하위 클래스:")
+        for name, class_metrics in weakest:
+            print(f"      {name}: AP50 {class_metrics['ap50']:.4f} (GT {class_metrics['support']}개)")
+    
+    # 파싱을 위한 표준 형식 출력
+    print(f"\n[METRICS]")
+    print(f"mAP50: {metrics['mAP50']:.6f}")
+    print(f"mAP50-95: {metrics['mAP50_95']:.6f}")
+    print(f"Precision: {metrics['precision']:.6f}")
+    print(f"Recall: {metrics['recall']:.6f}")
+    
+    return metrics
+
+def evaluate_model_ultralytics(model_path, dataset_path, device='cuda'):
+    """모델 평가 실행 (Ultralytics val)"""
     try:
         print(f"[EVAL] 모델 평가 시작...", flush=True)
         print(f"   모델: {model_path}", flush=True)
@@ -502,6 +524,7 @@ def update_model_metrics(supabase, model_id, metrics):
             'validation_precision': metrics['precision'],
             'validation_recall': metrics['recall'],
             'validation_f1_score': metrics['f1_score'],
+            'validation_per_class': metrics.get('per_class', {}),
             'last_validated': str(Path().cwd() / 'output' / 'validation')  # 타임스탬프 추가 가능
         }
         
@@ -531,28 +554,12 @@ def validate_model_accuracy(model_info, test_set_path=None, device='cuda'):
             print(f"[ERROR] 모델 URL이 없습니다.", flush=True)
             return False
         
-        # 로컬 저장 경로
-        model_dir = Path("output/validation/models")
-        model_dir.mkdir(parents=True, exist_ok=True)
-        
-        model_filename = model_url.split('/')[-1]
-        model_path = model_dir / model_filename
-        
-        # .onnx인 경우 직접 사용 가능 (YOLO v8+ 지원)
-        if model_url.endswith('.onnx'):
-            onnx_path = model_dir / model_filename
-            if download_model(model_url, onnx_path):
-                # ONNX 파일을 직접 사용
-                model_path = onnx_path
-                print(f"[INFO] ONNX 모델 다운로드 완료: {model_path}", flush=True)
-            else:
-                print(f"[ERROR] ONNX 모델 다운로드 실패", flush=True)
-                return False
-        else:
-            # .pt 파일 다운로드
-            if not download_model(model_url, model_path):
-                print(f"[ERROR] 모델 파일 다운로드 실패", flush=True)
-                return False
+        # 콘텐츠 해시 캐시 (.pt / .onnx 모두 직접 사용)
+        kind = 'onnx' if model_url.endswith('.onnx') else 'pt'
+        model_path = download_model(model_url, artifact_sha256(model_info, kind))
+        if not model_path:
+            print(f"[ERROR] 모델 파일 다운로드 실패", flush=True)
+            return False
         
         print(f"[OK] 모델 파일 준비 완료: {model_path}", flush=True)
         
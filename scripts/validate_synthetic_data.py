@@ -4,15 +4,15 @@ BrickBox 합성 데이터 정합성 및 품질 검증 스크립트
 기술문서 기준: WebP 정책, SLO/QA 규칙, 메타데이터 스키마 준수
 """
 
-import os
-import json
-import cv2
-import numpy as np
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Any
 import argparse
 from dataclasses import dataclass
 import logging
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+from dataset_validation_engine import DatasetValidationEngine, ValidationThresholds, ValidationCache, add_cache_arguments, cache_from_args
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -30,9 +30,25 @@ class ValidationResult:
 class SyntheticDataValidator:
     """합성 데이터 검증기"""
     
-    def __init__(self, dataset_path: str):
+    # 엔진 검사명 → 기존 보고서 validation_type
+    ENGINE_CHECK_TYPES = {
+        'pairing': 'file_count',
+        'image': 'webp_image',
+        'label': 'yolo_label',
+        'meta': 'metadata_schema',
+        'meta_e': 'metadata_e2',
+        'depth': 'depth_exr'
+    }
+    
+    def __init__(self, dataset_path: str, workers: int = None, output_jsonl: str = None,
+                 cache: ValidationCache = None, since: float = None):
         self.dataset_path = Path(dataset_path)
         self.results: List[ValidationResult] = []
+        self.workers = workers
+        self.output_jsonl = output_jsonl
+        self.cache = cache
+        self.since = since
+        self.summary: Dict[str, Any] = {}
         
         # 기술문서 기준 임계값
         self.SSIM_THRESHOLD = 0.965  # WebP 중복 제거 기준
@@ -84,431 +100,51 @@ class SyntheticDataValidator:
         
         return results
     
-    def validate_yolo_labels(self, label_path: str) -> List[ValidationResult]:
-        """YOLO 라벨 검증"""
-        results = []
-        
-        try:
-            with open(label_path, 'r') as f:
-                lines = f.readlines()
-            
-            if not lines:
-                results.append(ValidationResult(
-                    file_path=label_path,
-                    validation_type="yolo_label",
-                    status="FAIL",
-                    message="빈 라벨 파일"
-                ))
-                return results
-            
-            for line_num, line in enumerate(lines, 1):
-                parts = line.strip().split()
-                if len(parts) < 5:
-                    results.append(ValidationResult(
-                        file_path=label_path,
-                        validation_type="yolo_label",
-                        status="FAIL",
-                        message=f"라인 {line_num}: 최소 5개 필드 필요 (class xc yc w h)"
-                    ))
-                    continue
-                
-                try:
-                    class_id = int(parts[0])
-                    xc, yc, w, h = map(float, parts[1:5])
-                    
-                    # YOLO 1-class 검증
-                    if class_id != 0:
-                        results.append(ValidationResult(
-                            file_path=label_path,
-                            validation_type="yolo_label",
-                            status="WARN",
-                            message=f"라인 {line_num}: YOLO 1-class 기준에 맞지 않음 (class_id={class_id})"
-                        ))
-                    
-                    # 좌표 범위 검증
-                    if not (0 <= xc <= 1 and 0 <= yc <= 1 and 0 < w <= 1 and 0 < h <= 1):
-                        results.append(ValidationResult(
-                            file_path=label_path,
-                            validation_type="yolo_label",
-                            status="FAIL",
-                            message=f"라인 {line_num}: 좌표 범위 초과 (xc={xc}, yc={yc}, w={w}, h={h})"
-                        ))
-                    
-                    # 폴리곤 좌표 검증 (5개 필드 이후)
-                    if len(parts) > 5:
-                        polygon_coords = parts[5:]
-                        if len(polygon_coords) % 2 != 0:
-                            results.append(ValidationResult(
-                                file_path=label_path,
-                                validation_type="yolo_label",
-                                status="FAIL",
-                                message=f"라인 {line_num}: 폴리곤 좌표 개수 홀수"
-                            ))
-                        else:
-                            # 폴리곤 좌표 범위 검증
-                            for i in range(0, len(polygon_coords), 2):
-                                try:
-                                    x, y = float(polygon_coords[i]), float(polygon_coords[i+1])
-                                    if not (0 <= x <= 1 and 0 <= y <= 1):
-                                        results.append(ValidationResult(
-                                            file_path=label_path,
-                                            validation_type="yolo_label",
-                                            status="FAIL",
-                                            message=f"라인 {line_num}: 폴리곤 좌표 범위 초과 (x={x}, y={y})"
-                                        ))
-                                except ValueError:
-                                    results.append(ValidationResult(
-                                        file_path=label_path,
-                                        validation_type="yolo_label",
-                                        status="FAIL",
-                                        message=f"라인 {line_num}: 폴리곤 좌표 파싱 오류"
-                                    ))
-                
-                except ValueError:
-                    results.append(ValidationResult(
-                        file_path=label_path,
-                        validation_type="yolo_label",
-                        status="FAIL",
-                        message=f"라인 {line_num}: 숫자 파싱 오류"
-                    ))
-            
-            if not any(r.status == "FAIL" for r in results):
-                results.append(ValidationResult(
-                    file_path=label_path,
-                    validation_type="yolo_label",
-                    status="PASS",
-                    message="YOLO 라벨 형식 정상"
-                ))
-        
-        except Exception as e:
-            results.append(ValidationResult(
-                file_path=label_path,
-                validation_type="yolo_label",
-                status="FAIL",
-                message=f"파일 읽기 오류: {str(e)}"
-            ))
-        
-        return results
-    
-    def validate_metadata(self, meta_path: str) -> List[ValidationResult]:
-        """메타데이터 검증"""
-        results = []
-        
-        try:
-            with open(meta_path, 'r', encoding='utf-8') as f:
-                meta = json.load(f)
-            
-            # 스키마 버전 확인
-            schema_version = meta.get('schema_version', '')
-            if not schema_version.startswith('1.6.1'):
-                results.append(ValidationResult(
-                    file_path=meta_path,
-                    validation_type="metadata_schema",
-                    status="WARN",
-                    message=f"스키마 버전 확인 필요: {schema_version}"
-                ))
-            
-            # 필수 필드 확인
-            required_fields = [
-                'part_id', 'element_id', 'pair_uid',
-                'transform', 'material', 'bounding_box',
-                'polygon_uv', 'render_settings', 'quality_metrics'
-            ]
-            
-            for field in required_fields:
-                if field not in meta:
-                    results.append(ValidationResult(
-                        file_path=meta_path,
-                        validation_type="metadata_schema",
-                        status="FAIL",
-                        message=f"필수 필드 누락: {field}"
-                    ))
-            
-            # 품질 메트릭 검증
-            if 'quality_metrics' in meta:
-                qm = meta['quality_metrics']
-                
-                # SSIM 검증
-                ssim = qm.get('ssim', 0)
-                if ssim < self.SSIM_THRESHOLD:
-                    results.append(ValidationResult(
-                        file_path=meta_path,
-                        validation_type="quality_metrics",
-                        status="WARN",
-                        message=f"SSIM 임계값 미달: {ssim} < {self.SSIM_THRESHOLD}"
-                    ))
-                
-                # SNR 검증
-                snr = qm.get('snr', 0)
-                if snr < self.SNR_MIN:
-                    results.append(ValidationResult(
-                        file_path=meta_path,
-                        validation_type="quality_metrics",
-                        status="WARN",
-                        message=f"SNR 임계값 미달: {snr} < {self.SNR_MIN}"
-                    ))
-                
-                # QA 플래그 확인
-                qa_flag = qm.get('qa_flag', False)
-                if qa_flag:
-                    results.append(ValidationResult(
-                        file_path=meta_path,
-                        validation_type="quality_metrics",
-                        status="WARN",
-                        message=f"QA 플래그 활성화: {qa_flag}"
-                    ))
-            
-            # bbox와 polygon 일치성 검증
-            if 'bounding_box' in meta and 'polygon_uv' in meta:
-                bbox = meta['bounding_box']
-                polygon = meta['polygon_uv']
-                
-                # bbox 중심점과 크기
-                bbox_cx, bbox_cy = bbox.get('center_x', 0), bbox.get('center_y', 0)
-                bbox_w, bbox_h = bbox.get('width', 0), bbox.get('height', 0)
-                
-                # 폴리곤 좌표 범위 계산
-                if polygon:
-                    poly_x = [p[0] for p in polygon]
-                    poly_y = [p[1] for p in polygon]
-                    
-                    poly_min_x, poly_max_x = min(poly_x), max(poly_x)
-                    poly_min_y, poly_max_y = min(poly_y), max(poly_y)
-                    
-                    # bbox와 폴리곤 범위 비교 (허용 오차 5%)
-                    tolerance = 0.05
-                    bbox_min_x = bbox_cx - bbox_w/2
-                    bbox_max_x = bbox_cx + bbox_w/2
-                    bbox_min_y = bbox_cy - bbox_h/2
-                    bbox_max_y = bbox_cy + bbox_h/2
-                    
-                    if (abs(poly_min_x - bbox_min_x) > tolerance or 
-                        abs(poly_max_x - bbox_max_x) > tolerance or
-                        abs(poly_min_y - bbox_min_y) > tolerance or
-                        abs(poly_max_y - bbox_max_y) > tolerance):
-                        results.append(ValidationResult(
-                            file_path=meta_path,
-                            validation_type="bbox_polygon_consistency",
-                            status="WARN",
-                            message="bbox와 polygon 범위 불일치"
-                        ))
-            
-            # 렌더 설정 검증
-            if 'render_settings' in meta:
-                rs = meta['render_settings']
-                resolution = rs.get('resolution', [])
-                if len(resolution) != 2 or resolution[0] != resolution[1]:
-                    results.append(ValidationResult(
-                        file_path=meta_path,
-                        validation_type="render_settings",
-                        status="WARN",
-                        message=f"해상도 설정 확인 필요: {resolution}"
-                    ))
-            
-            if not any(r.status in ["FAIL", "WARN"] for r in results):
-                results.append(ValidationResult(
-                    file_path=meta_path,
-                    validation_type="metadata_schema",
-                    status="PASS",
-                    message="메타데이터 스키마 정상"
-                ))
-        
-        except json.JSONDecodeError as e:
-            results.append(ValidationResult(
-                file_path=meta_path,
-                validation_type="metadata_schema",
-                status="FAIL",
-                message=f"JSON 파싱 오류: {str(e)}"
-            ))
-        except Exception as e:
-            results.append(ValidationResult(
-                file_path=meta_path,
-                validation_type="metadata_schema",
-                status="FAIL",
-                message=f"메타데이터 검증 오류: {str(e)}"
-            ))
-        
-        return results
-    
-    def validate_webp_image(self, image_path: str) -> List[ValidationResult]:
-        """WebP 이미지 검증"""
-        results = []
-        
-        try:
-            # OpenCV로 WebP 이미지 읽기
-            img = cv2.imread(image_path, cv2.IMREAD_COLOR)
-            if img is None:
-                results.append(ValidationResult(
-                    file_path=image_path,
-                    validation_type="webp_image",
-                    status="FAIL",
-                    message="WebP 이미지 읽기 실패"
-                ))
-                return results
-            
-            height, width = img.shape[:2]
-            
-            # 해상도 검증 (1024x1024 권장)
-            if width != height:
-                results.append(ValidationResult(
-                    file_path=image_path,
-                    validation_type="webp_image",
-                    status="WARN",
-                    message=f"정사각형 이미지 아님: {width}x{height}"
-                ))
-            
-            if width < 512 or height < 512:
-                results.append(ValidationResult(
-                    file_path=image_path,
-                    validation_type="webp_image",
-                    status="WARN",
-                    message=f"해상도 낮음: {width}x{height}"
-                ))
-            
-            # 이미지 품질 기본 검증
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # 블러 검증 (Laplacian variance)
-            laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-            if laplacian_var < 100:  # 임계값 조정 가능
-                results.append(ValidationResult(
-                    file_path=image_path,
-                    validation_type="webp_image",
-                    status="WARN",
-                    message=f"이미지 블러 가능성: Laplacian variance={laplacian_var:.2f}"
-                ))
-            
-            # 채널별 통계
-            mean_b, mean_g, mean_r = np.mean(img, axis=(0, 1))
-            std_b, std_g, std_r = np.std(img, axis=(0, 1))
-            
-            # 채널 불균형 검증
-            if abs(mean_b - mean_g) > 30 or abs(mean_g - mean_r) > 30:
-                results.append(ValidationResult(
-                    file_path=image_path,
-                    validation_type="webp_image",
-                    status="WARN",
-                    message=f"채널 불균형: B={mean_b:.1f}, G={mean_g:.1f}, R={mean_r:.1f}"
-                ))
-            
-            results.append(ValidationResult(
-                file_path=image_path,
-                validation_type="webp_image",
-                status="PASS",
-                message=f"WebP 이미지 정상: {width}x{height}, Laplacian={laplacian_var:.2f}"
-            ))
-        
-        except Exception as e:
-            results.append(ValidationResult(
-                file_path=image_path,
-                validation_type="webp_image",
-                status="FAIL",
-                message=f"WebP 이미지 검증 오류: {str(e)}"
-            ))
-        
-        return results
-    
-    def calculate_mask_bbox_ratio(self, label_path: str, meta_path: str) -> float:
-        """마스크/bbox 면적 비율 계산"""
-        try:
-            # 라벨에서 bbox 정보 추출
-            with open(label_path, 'r') as f:
-                lines = f.readlines()
-            
-            if not lines:
-                return 0.0
-            
-            # 첫 번째 객체의 bbox 정보
-            parts = lines[0].strip().split()
-            if len(parts) < 5:
-                return 0.0
-            
-            bbox_w, bbox_h = float(parts[3]), float(parts[4])
-            bbox_area = bbox_w * bbox_h
-            
-            # 폴리곤 면적 계산 (Shoelace formula)
-            if len(parts) > 5:
-                polygon_coords = parts[5:]
-                if len(polygon_coords) % 2 == 0:
-                    points = []
-                    for i in range(0, len(polygon_coords), 2):
-                        x, y = float(polygon_coords[i]), float(polygon_coords[i+1])
-                        points.append([x, y])
-                    
-                    if len(points) >= 3:
-                        # Shoelace formula
-                        n = len(points)
-                        area = 0.0
-                        for i in range(n):
-                            j = (i + 1) % n
-                            area += points[i][0] * points[j][1]
-                            area -= points[j][0] * points[i][1]
-                        polygon_area = abs(area) / 2.0
-                        
-                        if bbox_area > 0:
-                            return polygon_area / bbox_area
-            
-            return 0.0
-        
-        except Exception:
-            return 0.0
-    
     def validate_all(self) -> List[ValidationResult]:
-        """전체 데이터셋 검증"""
+        """전체 데이터셋 검증 (통합 검증 엔진: stem 조인 + 프로세스 풀 단일 패스)"""
         logger.info(f"데이터셋 검증 시작: {self.dataset_path}")
         
         # 1. 구조 검증
         self.results.extend(self.validate_dataset_structure())
         
-        # 2. 개별 파일 검증
-        if (self.dataset_path / 'images').exists():
-            image_files = list((self.dataset_path / 'images').glob('*.webp'))
-            label_files = list((self.dataset_path / 'labels').glob('*.txt'))
-            meta_files = list((self.dataset_path / 'meta').glob('*.json'))
-            
-            # 파일 수 일치 확인
-            if len(image_files) != len(label_files) or len(image_files) != len(meta_files):
-                self.results.append(ValidationResult(
-                    file_path=str(self.dataset_path),
-                    validation_type="file_count",
-                    status="FAIL",
-                    message=f"파일 수 불일치: images={len(image_files)}, labels={len(label_files)}, meta={len(meta_files)}"
-                ))
-                return self.results
-            
-            # 각 샘플별 검증
-            for i, (img_file, label_file, meta_file) in enumerate(zip(image_files, label_files, meta_files)):
-                logger.info(f"검증 중: {img_file.name} ({i+1}/{len(image_files)})")
-                
-                # 라벨 검증
-                self.results.extend(self.validate_yolo_labels(str(label_file)))
-                
-                # 메타데이터 검증
-                self.results.extend(self.validate_metadata(str(meta_file)))
-                
-                # WebP 이미지 검증
-                self.results.extend(self.validate_webp_image(str(img_file)))
-                
-                # 마스크/bbox 면적 비율 검증
-                ratio = self.calculate_mask_bbox_ratio(str(label_file), str(meta_file))
-                if ratio > 0:
-                    if ratio < self.MASK_BBOX_RATIO_MIN or ratio > self.MASK_BBOX_RATIO_MAX:
-                        self.results.append(ValidationResult(
-                            file_path=str(label_file),
-                            validation_type="mask_bbox_ratio",
-                            status="WARN",
-                            message=f"마스크/bbox 면적 비율 범위 초과: {ratio:.3f} (범위: {self.MASK_BBOX_RATIO_MIN}-{self.MASK_BBOX_RATIO_MAX})"
-                        ))
-                    else:
-                        self.results.append(ValidationResult(
-                            file_path=str(label_file),
-                            validation_type="mask_bbox_ratio",
-                            status="PASS",
-                            message=f"마스크/bbox 면적 비율 정상: {ratio:.3f}"
-                        ))
+        # 2. 샘플별 검증 (image/label/meta/meta-e를 stem으로 조인, 이미지당 1회 디코드)
+        thresholds = ValidationThresholds(
+            ssim_min=self.SSIM_THRESHOLD,
+            snr_min=self.SNR_MIN,
+            rms_max=self.RMS_THRESHOLD,
+            depth_score_min=self.DEPTH_QUALITY_MIN,
+            mask_bbox_ratio_min=self.MASK_BBOX_RATIO_MIN,
+            mask_bbox_ratio_max=self.MASK_BBOX_RATIO_MAX,
+            single_class=True
+        )
+        engine = DatasetValidationEngine(self.dataset_path, thresholds=thresholds, workers=self.workers,
+                                         cache=self.cache, since=self.since)
+        self.summary = engine.run(self.output_jsonl, on_result=self._collect_engine_result)
+        logger.info(f"샘플 {self.summary['samples']}개 검증 완료 ({self.summary['elapsed_sec']:.1f}초, "
+                    f"캐시 재사용 {self.summary['cache_hits']}개)")
         
         return self.results
     
+    def _collect_engine_result(self, result: Dict[str, Any]):
+        """엔진 샘플 결과 → ValidationResult (검사별 이슈, 이슈 없으면 PASS 1건)"""
+        for check, status in result['checks'].items():
+            validation_type = self.ENGINE_CHECK_TYPES.get(check, check)
+            issues = [issue for issue in result['issues'] if issue['check'] == check]
+            for issue in issues:
+                self.results.append(ValidationResult(
+                    file_path=issue['file'] or result['sample'],
+                    validation_type=validation_type,
+                    status=issue['status'],
+                    message=issue['message']
+                ))
+            if not issues:
+                self.results.append(ValidationResult(
+                    file_path=result['files'].get(check, result['sample']),
+                    validation_type=validation_type,
+                    status=status,
+                    message="검증 통과"
+                ))
+    
     def generate_report(self) -> str:
         """검증 보고서 생성"""
         total_results = len(self.results)
@@ -562,6 +198,9 @@ def main():
     parser.add_argument('dataset_path', help='검증할 데이터셋 경로')
     parser.add_argument('--output', '-o', help='보고서 출력 파일 (선택사항)')
     parser.add_argument('--verbose', '-v', action='store_true', help='상세 로그 출력')
+    parser.add_argument('--workers', type=int, help='검증 프로세스 수 (기본: CPU-1)')
+    parser.add_argument('--jsonl', help='샘플별 결과 JSONL 출력 경로 (요약은 .summary.json)')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
     
@@ -569,8 +208,14 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     # 검증 실행
-    validator = SyntheticDataValidator(args.dataset_path)
-    results = validator.validate_all()
+    cache, since = cache_from_args(args)
+    validator = SyntheticDataValidator(args.dataset_path, workers=args.workers, output_jsonl=args.jsonl,
+                                       cache=cache, since=since)
+    try:
+        results = validator.validate_all()
+    finally:
+        if cache:
+            cache.close()
     
     # 보고서 생성
     report = validator.generate_report()
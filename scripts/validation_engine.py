@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+모델 검증 엔진
+- 모델 파일은 model_artifact_store 저장소 사용 (해시/ETag로 재다운로드 방지)
+- ONNX Runtime(.onnx) / PyTorch(.pt) 배치 추론, 스레드 풀 이미지 디코딩 + 다음 배치 선행 로드
+- 전체 예측을 쌓은 뒤 벡터화된 IoU 매칭/AP 계산 (Ultralytics val과 동일한 지표 정의)
+- 클래스별 AP50 / AP50-95 / Precision / Recall
+
+실행 방법:
+    python scripts/validation_engine.py --model best.onnx --data dataset.yaml
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from model_artifact_store import get_model_store
+
+IMAGE_EXTENSIONS = ('.webp', '.png', '.jpg', '.jpeg')
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+MAX_NMS_CANDIDATES = 3000   # NMS 전 신뢰도 상위 후보 수 (Ultralytics max_nms와 같은 역할)
+
+
+# ============================================
+# 데이터셋 로딩
+# ============================================
+
+def _label_path_for(image_path: Path) -> Path:
+    parts = list(image_path.parts)
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i] == 'images':
+            parts[i] = 'labels'
+            break
+    return Path(*parts).with_suffix('.txt')
+
+
+def load_split(data_yaml, split: str = 'val') -> Tuple[List[Path], List[str]]:
+    """dataset.yaml의 split 이미지 목록과 클래스 이름"""
+    import yaml
+
+    data_yaml = Path(data_yaml)
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    names = config.get('names') or []
+    names = [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+
+    split_dir = Path(config.get(split) or f'images/{split}')
+    if not split_dir.is_absolute():
+        split_dir = Path(config.get('path') or data_yaml.parent) / split_dir
+    images = sorted(p for p in split_dir.rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS) if split_dir.exists() else []
+    return images, [str(n) for n in names]
+
+
+def read_labels(label_path: Path) -> np.ndarray:
+    """YOLO 라벨 (bbox 또는 폴리곤) → (M, 5) [cls, cx, cy, w, h] 정규화 좌표"""
+    if not label_path.exists():
+        return np.zeros((0, 5), dtype=np.float32)
+    rows = []
+    for line in label_path.read_text(encoding='utf-8').splitlines():
+        values = line.split()
+        if len(values) < 5:
+            continue
+        coords = np.asarray(values[1:], dtype=np.float32)
+        if len(coords) == 4:
+            rows.append([float(values[0]), *coords])
+        else:
+            xs, ys = coords[0::2], coords[1::2]
+            rows.append([float(values[0]), (xs.min() + xs.max()) / 2, (ys.min() + ys.max()) / 2,
+                         xs.max() - xs.min(), ys.max() - ys.min()])
+    return np.asarray(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def load_sample(image_path: Path, imgsz: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """이미지 디코딩 + 레터박스 → (CHW float32, 라벨 클래스, 라벨 xyxy(입력 좌표계))"""
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        image = image.convert('RGB')
+        width, height = image.size
+        ratio = min(imgsz / width, imgsz / height)
+        new_w, new_h = max(1, int(round(width * ratio))), max(1, int(round(height * ratio)))
+        resized = np.asarray(image.resize((new_w, new_h), Image.Resampling.BILINEAR))
+    left, top = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[top:top + new_h, left:left + new_w] = resized
+
+    labels = read_labels(_label_path_for(image_path))
+    boxes = np.empty((len(labels), 4), dtype=np.float32)
+    boxes[:, 0] = (labels[:, 1] - labels[:, 3] / 2) * width * ratio + left
+    boxes[:, 1] = (labels[:, 2] - labels[:, 4] / 2) * height * ratio + top
+    boxes[:, 2] = (labels[:, 1] + labels[:, 3] / 2) * width * ratio + left
+    boxes[:, 3] = (labels[:, 2] + labels[:, 4] / 2) * height * ratio + top
+    return canvas.transpose(2, 0, 1).astype(np.float32) / 255.0, labels[:, 0].astype(np.int64), boxes
+
+
+# ============================================
+# 지표 계산 (벡터화)
+# ============================================
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, 4) x (M, 4) xyxy → (N, M) IoU"""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(br - tl, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match_predictions(pred_cls: np.ndarray, true_cls: np.ndarray, iou: np.ndarray,
+                      iouv: np.ndarray = IOU_THRESHOLDS) -> np.ndarray:
+    """IoU 임계값별 TP 판정 (GT당 최고 IoU 예측 1개, 클래스 일치 필수) → (N_pred, T) bool"""
+    correct = np.zeros((len(pred_cls), len(iouv)), dtype=bool)
+    if not len(pred_cls) or not len(true_cls):
+        return correct
+    iou = (iou * (true_cls[:, None] == pred_cls[None, :])).astype(np.float32)  # (M_true, N_pred)
+    for t, threshold in enumerate(iouv):
+        matches = np.argwhere(iou >= threshold)
+        if len(matches):
+            if len(matches) > 1:
+                matches = matches[iou[matches[:, 0], matches[:, 1]].argsort()[::-1]]
+                matches = matches[np.unique(matches[:, 1], return_index=True)[1]]
+                matches = matches[np.unique(matches[:, 0], return_index=True)[1]]
+            correct[matches[:, 1], t] = True
+    return correct
+
+
+def compute_ap(recall: np.ndarray, precision: np.ndarray) -> float:
+    """101점 보간 AP (COCO 방식)"""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+    return float(trapezoid(np.interp(x, mrec, mpre), x))
+
+
+def ap_per_class(tp: np.ndarray, conf: np.ndarray, pred_cls: np.ndarray, target_cls: np.ndarray) -> Dict[str, np.ndarray]:
+    """클래스별 AP(임계값별), 그리고 평균 F1 최대 신뢰도에서의 P/R"""
+    eps = 1e-16
+    order = np.argsort(-conf)
+    tp, conf, pred_cls = tp[order], conf[order], pred_cls[order]
+    classes, counts = np.unique(target_cls, return_counts=True)
+
+    grid = np.linspace(0, 1, 1000)
+    ap = np.zeros((len(classes), tp.shape[1]))
+    p_curve = np.zeros((len(classes), len(grid)))
+    r_curve = np.zeros((len(classes), len(grid)))
+    for ci, c in enumerate(classes):
+        mask = pred_cls == c
+        if not mask.any():
+            continue
+        tpc = tp[mask].cumsum(0)
+        fpc = (1 - tp[mask]).cumsum(0)
+        recall = tpc / (counts[ci] + eps)
+        precision = tpc / (tpc + fpc)
+        r_curve[ci] = np.interp(-grid, -conf[mask], recall[:, 0], left=0)
+        p_curve[ci] = np.interp(-grid, -conf[mask], precision[:, 0], left=1)
+        for t in range(tp.shape[1]):
+            ap[ci, t] = compute_ap(recall[:, t], precision[:, t])
+
+    f1_curve = 2 * p_curve * r_curve / (p_curve + r_curve + eps)
+    kernel = np.ones(max(1, round(len(grid) * 0.05))) / max(1, round(len(grid) * 0.05))
+    best = int(np.convolve(f1_curve.mean(0), kernel, mode='same').argmax()) if len(classes) else 0
+    return {
+        'classes': classes,
+        'support': counts,
+        'ap': ap,
+        'precision': p_curve[:, best] if len(classes) else np.zeros(0),
+        'recall': r_curve[:, best] if len(classes) else np.zeros(0),
+    }
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float, max_det: int) -> np.ndarray:
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        if order.size == 1:
+            break
+        iou = box_iou(boxes[i:i + 1], boxes[order[1:]])[0]
+        order = order[1:][iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+# ============================================
+# 추론 백엔드
+# ============================================
+
+class _OnnxBackend:
+    def __init__(self, model_path: Path, device: str):
+        import onnxruntime as ort
+
+        providers = ['CPUExecutionProvider']
+        if device != 'cpu' and 'CUDAExecutionProvider' in ort.get_available_providers():
+            providers.insert(0, 'CUDAExecutionProvider')
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_path), sess_options=options, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.imgsz = model_input.shape[2] if isinstance(model_input.shape[2], int) else None
+        self.fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        outputs = self.session.get_outputs()
+        self.num_masks = outputs[1].shape[1] if len(outputs) > 1 and isinstance(outputs[1].shape[1], int) else 0
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        if self.fixed_batch and self.fixed_batch != len(batch):
+            # 고정 배치(기본 export) 모델은 이미지 단위 실행
+            return np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))])
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class _TorchBackend:
+    def __init__(self, model_path: Path, device: str):
+        import torch
+        from ultralytics import YOLO
+
+        self.torch = torch
+        self.device = torch.device('cuda' if device != 'cpu' and torch.cuda.is_available() else 'cpu')
+        self.model = YOLO(str(model_path)).model.to(self.device).eval()
+        self.half = self.device.type == 'cuda'
+        if self.half:
+            self.model.half()
+        self.imgsz = None
+        self.num_masks = int(getattr(self.model.model[-1], 'nm', 0) or 0)
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        with self.torch.inference_mode():
+            tensor = self.torch.from_numpy(batch).to(self.device)
+            tensor = tensor.half() if self.half else tensor
+            output = self.model(tensor)
+            output = output[0] if isinstance(output, (list, tuple)) else output
+            return output.float().cpu().numpy()
+
+
+# ============================================
+# 검증 엔진
+# ============================================
+
+class ValidationEngine:
+    """배치 추론 + 벡터화 지표 계산 검증기 (모델 1회 로드, 여러 데이터셋에 재사용 가능)"""
+
+    def __init__(self, model_path, imgsz: int = 640, batch: int = 16, device: str = 'cpu',
+                 conf_threshold: float = 0.001, iou_threshold: float = 0.6, max_det: int = 300,
+                 workers: Optional[int] = None):
+        model_path = Path(model_path)
+        self.backend = _OnnxBackend(model_path, device) if model_path.suffix == '.onnx' else _TorchBackend(model_path, device)
+        self.imgsz = self.backend.imgsz or imgsz
+        self.batch = batch
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+        self.workers = workers or min(8, os.cpu_count() or 4)
+
+    def _postprocess(self, pred: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(4 + nc + nm, N) → (boxes xyxy, conf, cls) NMS 후"""
+        pred = pred.T
+        num_classes = pred.shape[1] - 4 - self.backend.num_masks
+        scores = pred[:, 4:4 + num_classes]
+        cls = scores.argmax(axis=1)
+        conf = scores[np.arange(len(pred)), cls]
+        keep = conf >= self.conf_threshold
+        xywh, conf, cls = pred[keep, :4], conf[keep], cls[keep]
+        if len(conf) > MAX_NMS_CANDIDATES:
+            top = np.argpartition(-conf, MAX_NMS_CANDIDATES)[:MAX_NMS_CANDIDATES]
+            xywh, conf, cls = xywh[top], conf[top], cls[top]
+        boxes = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+        # 클래스 오프셋으로 클래스별 NMS를 한 번에 수행
+        index = nms(boxes + cls[:, None] * (self.imgsz + 1), conf, self.iou_threshold, self.max_det)
+        return boxes[index], conf[index], cls[index]
+
+    def validate(self, data_yaml, split: str = 'val', class_names: Optional[List[str]] = None,
+                 on_image: Optional[Callable] = None) -> Dict:
+        """split 전체 검증 → 지표 dict
+
+        on_image(image_path, gt_cls, gt_boxes, boxes, conf, cls, iou)가 주어지면 이미지별 예측을 전달
+        (하드 예제 마이닝 등 이미지 단위 분석용, 좌표는 레터박스 입력 좌표계)
+        """
+        images, dataset_names = load_split(data_yaml, split)
+        if not images:
+            raise FileNotFoundError(f"검증 이미지가 없습니다: {data_yaml} ({split})")
+        names = class_names or dataset_names
+
+        stats_tp, stats_conf, stats_cls, target_cls = [], [], [], []
+        timings = {'decode': 0.0, 'inference': 0.0, 'metrics': 0.0}
+        start = time.perf_counter()
+
+        batches = [images[i:i + self.batch] for i in range(0, len(images), self.batch)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            def submit(paths):
+                return [pool.submit(load_sample, p, self.imgsz) for p in paths]
+
+            pending = submit(batches[0])
+            for b in range(len(batches)):
+                t0 = time.perf_counter()
+                samples = [f.result() for f in pending]
+                # 현재 배치 추론 동안 다음 배치 디코딩
+                pending = submit(batches[b + 1]) if b + 1 < len(batches) else []
+                t1 = time.perf_counter()
+                preds = self.backend(np.stack([s[0] for s in samples]))
+                t2 = time.perf_counter()
+
+                for image_path, pred, (_, gt_cls, gt_boxes) in zip(batches[b], preds, samples):
+                    boxes, conf, cls = self._postprocess(pred)
+                    iou = box_iou(gt_boxes, boxes) if len(gt_boxes) and len(boxes) else np.zeros((len(gt_boxes), len(boxes)))
+                    if on_image is not None:
+                        on_image(image_path, gt_cls, gt_boxes, boxes, conf, cls, iou)
+                    stats_tp.append(match_predictions(cls, gt_cls, iou))
+                    stats_conf.append(conf)
+                    stats_cls.append(cls)
+                    target_cls.append(gt_cls)
+                t3 = time.perf_counter()
+                timings['decode'] += t1 - t0
+                timings['inference'] += t2 - t1
+                timings['metrics'] += t3 - t2
+
+        t0 = time.perf_counter()
+        result = ap_per_class(np.concatenate(stats_tp), np.concatenate(stats_conf),
+                              np.concatenate(stats_cls), np.concatenate(target_cls))
+        timings['metrics'] += time.perf_counter() - t0
+        elapsed = time.perf_counter() - start
+
+        ap = result['ap']
+        precision = float(result['precision'].mean()) if len(result['classes']) else 0.0
+        recall = float(result['recall'].mean()) if len(result['classes']) else 0.0
+        per_class = {}
+        for i, c in enumerate(result['classes']):
+            name = names[c] if c < len(names) else str(c)
+            per_class[name] = {
+                'class_id': int(c),
+                'support': int(result['support'][i]),
+                'ap50': round(float(ap[i, 0]), 4),
+                'ap50_95': round(float(ap[i].mean()), 4),
+                'precision': round(float(result['precision'][i]), 4),
+                'recall': round(float(result['recall'][i]), 4),
+            }
+
+        return {
+            'mAP50': float(ap[:, 0].mean()) if len(ap) else 0.0,
+            'mAP50_95': float(ap.mean()) if len(ap) else 0.0,
+            'precision': precision,
+            'recall': recall,
+            'f1_score': 2 * precision * recall / (precision + recall + 1e-10),
+            'per_class': per_class,
+            'images': len(images),
+            'images_per_sec': round(len(images) / elapsed, 1) if elapsed else 0.0,
+            'timings_sec': {k: round(v, 3) for k, v in timings.items()},
+        }
+
+
+def validate(model_path, data_yaml, **engine_options) -> Dict:
+    """단일 호출용 래퍼"""
+    return ValidationEngine(model_path, **engine_options).validate(data_yaml)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='배치/병렬 모델 검증 엔진')
+    parser.add_argument('--model', required=True, help='모델 경로(.pt/.onnx) 또는 URL')
+    parser.add_argument('--data', required=True, help='dataset.yaml 경로')
+    parser.add_argument('--split', default='val')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--batch', type=int, default=16)
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--conf', type=float, default=0.001)
+    parser.add_argument('--iou', type=float, default=0.6)
+    parser.add_argument('--workers', type=int, help='이미지 디코딩 스레드 수')
+    args = parser.parse_args()
+
+    model_path = get_model_store().fetch(args.model) if args.model.startswith('http') else Path(args.model)
+    engine = ValidationEngine(model_path, args.imgsz, args.batch, args.device, args.conf, args.iou, workers=args.workers)
+    result = engine.validate(args.data, args.split)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
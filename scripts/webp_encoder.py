@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+콘텐츠 적응형 WebP 인코딩 정책
+- method: 시간 예산(ms) 안에서 가능한 최고 method 선택 (method별 ms/MP를 실측 EMA로 갱신, 기본 상한 4)
+  · 768px 렌더 실측: method 6은 method 2 대비 3~5배 시간, quality 80 기준 용량 차이는 수 % 수준
+- quality: 목표 SSIM을 만족하는 최저 quality 탐색 (메모리 내 인코딩→디코딩, 1/2 해상도 휘도 SSIM)
+  · 콘텐츠 복잡도(그래디언트 에너지) 구간별로 합격 quality/불합격 하한을 기억해 다음 이미지 시작값으로 사용
+  · quality를 올려도 SSIM이 거의 오르지 않으면(렌더 노이즈 등) 탐색 중단
+- 인코딩은 메모리 버퍼(BytesIO)에서 수행하고 결과 바이트를 한 번만 기록 (임시 파일 저장→재로드 없음)
+
+실행 방법:
+    python scripts/webp_encoder.py benchmark output/synthetic/dataset_synthetic/6335317/images/*.png --budget-ms 120
+"""
+
+import io
+import os
+import time
+import argparse
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_TIME_BUDGET_MS = 120.0
+DEFAULT_TARGET_SSIM = 0.98
+DEFAULT_MAX_METHOD = 4
+LEGACY_SETTINGS = {'quality': 90, 'method': 6}
+# method별 초기 예상 인코딩 시간 (ms / 메가픽셀), 실측으로 갱신
+DEFAULT_MS_PER_MP = {0: 50.0, 1: 60.0, 2: 70.0, 3: 110.0, 4: 150.0, 5: 220.0, 6: 300.0}
+COMPLEXITY_EDGES = (2.0, 6.0, 12.0)  # 1/4 축소 휘도 평균 그래디언트 구간
+SSIM_WINDOW = 7
+SSIM_MIN_GAIN = 0.001  # quality 한 단계 상승 시 이 이하 SSIM 향상이면 포화로 판단
+SSIM_MARGIN = 0.005    # 목표 대비 이 이상 여유로 합격하면 다음 이미지는 한 단계 낮춰 시도
+EMA_ALPHA = 0.3
+
+
+@dataclass
+class WebPEncodeResult:
+    data: bytes
+    method: int
+    quality: int
+    ssim: Optional[float]
+    encode_ms: float
+    attempts: int
+    complexity_bucket: int
+
+
+def _require_pil():
+    if Image is None:
+        raise ImportError("WebP 인코딩에는 Pillow가 필요합니다: pip install Pillow")
+
+
+def to_rgb_image(image):
+    """ndarray(H, W, 3|4, uint8 RGB) 또는 PIL 이미지 → RGB PIL 이미지 (알파는 흰 배경 합성)"""
+    _require_pil()
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    if image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def _luma(rgb: np.ndarray) -> np.ndarray:
+    """휘도 (2×2 평균으로 1/2 축소, SSIM 측정용)"""
+    y = rgb[..., 0] * np.float32(0.299) + rgb[..., 1] * np.float32(0.587) + rgb[..., 2] * np.float32(0.114)
+    h, w = y.shape[0] // 2 * 2, y.shape[1] // 2 * 2
+    y = y[:h, :w]
+    return (y[0::2, 0::2] + y[1::2, 0::2] + y[0::2, 1::2] + y[1::2, 1::2]) * np.float32(0.25)
+
+
+def _box_mean(x: np.ndarray, k: int) -> np.ndarray:
+    """k×k 균일 창 평균 (적분 영상, valid 영역)"""
+    c = np.cumsum(np.cumsum(np.pad(x, ((1, 0), (1, 0))), axis=0, dtype=np.float64), axis=1)
+    return (c[k:, k:] - c[:-k, k:] - c[k:, :-k] + c[:-k, :-k]) / (k * k)
+
+
+def ssim(a: np.ndarray, b: np.ndarray, window: int = SSIM_WINDOW) -> float:
+    """그레이 SSIM (균일 창, data_range=255)"""
+    a = a.astype(np.float32, copy=False)
+    b = b.astype(np.float32, copy=False)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_a, mu_b = _box_mean(a, window), _box_mean(b, window)
+    var_a = _box_mean(a * a, window) - mu_a * mu_a
+    var_b = _box_mean(b * b, window) - mu_b * mu_b
+    cov = _box_mean(a * b, window) - mu_a * mu_b
+    s = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(s.mean())
+
+
+def complexity_bucket(gray: np.ndarray) -> int:
+    """콘텐츠 복잡도 구간 (흰 배경 위 단순 부품 ~ 텍스처/노이즈 많은 렌더)"""
+    small = gray[::2, ::2]
+    energy = float(np.abs(np.diff(small, axis=0)).mean() + np.abs(np.diff(small, axis=1)).mean())
+    return int(np.digitize(energy, COMPLEXITY_EDGES))
+
+
+class WebPEncodePolicy:
+    """시간 예산 + 목표 SSIM 기반 WebP method/quality 선택 (스레드 안전, 인스턴스 간 상태 독립)"""
+
+    def __init__(self, time_budget_ms: float = DEFAULT_TIME_BUDGET_MS, target_ssim: Optional[float] = DEFAULT_TARGET_SSIM,
+                 min_quality: int = 75, max_quality: int = 95, quality_step: int = 5,
+                 max_method: int = DEFAULT_MAX_METHOD, initial_quality: int = LEGACY_SETTINGS['quality']):
+        self.time_budget_ms = time_budget_ms
+        self.target_ssim = target_ssim
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.quality_step = quality_step
+        self.max_method = max_method
+        self._ms_per_mp: Dict[int, float] = dict(DEFAULT_MS_PER_MP)
+        self._quality: Dict[int, int] = {}
+        self._failed: Dict[int, int] = {}
+        self._initial_quality = initial_quality
+        self._lock = threading.Lock()
+
+    def choose_method(self, megapixels: float) -> int:
+        """예산 안에서 가능한 최고 method (SSIM 재시도 1회 여유를 위해 예산의 절반 기준)"""
+        budget = self.time_budget_ms / (2 if self.target_ssim else 1)
+        with self._lock:
+            for method in range(self.max_method, -1, -1):
+                if self._ms_per_mp[method] * megapixels <= budget:
+                    return method
+        return 0
+
+    def _record_time(self, method: int, megapixels: float, elapsed_ms: float):
+        with self._lock:
+            observed = elapsed_ms / max(megapixels, 1e-6)
+            self._ms_per_mp[method] = (1 - EMA_ALPHA) * self._ms_per_mp[method] + EMA_ALPHA * observed
+
+    @staticmethod
+    def _encode(image, quality: int, method: int, icc_profile=None, exif=None) -> bytes:
+        buffer = io.BytesIO()
+        kwargs = {'format': 'WEBP', 'quality': quality, 'method': method, 'lossless': False}
+        if icc_profile:
+            kwargs['icc_profile'] = icc_profile
+        if exif:
+            kwargs['exif'] = exif
+        image.save(buffer, **kwargs)
+        return buffer.getvalue()
+
+    def encode(self, image, icc_profile: Optional[bytes] = None, exif: Optional[bytes] = None) -> WebPEncodeResult:
+        """이미지 → WebP 바이트 (method는 예산, quality는 목표 SSIM 기준)"""
+        image = to_rgb_image(image)
+        rgb = np.asarray(image)
+        gray = _luma(rgb.astype(np.float32))
+        bucket = complexity_bucket(gray)
+        megapixels = image.size[0] * image.size[1] / 1e6
+        method = self.choose_method(megapixels)
+        with self._lock:
+            quality = self._quality.get(bucket, self._initial_quality)
+
+        start = time.perf_counter()
+        attempts = 0
+        score = previous = None
+        while True:
+            t0 = time.perf_counter()
+            data = self._encode(image, quality, method, icc_profile, exif)
+            self._record_time(method, megapixels, (time.perf_counter() - t0) * 1000)
+            attempts += 1
+            if not self.target_ssim:
+                break
+            with Image.open(io.BytesIO(data)) as decoded:
+                score = ssim(gray, _luma(np.asarray(decoded.convert('RGB'), dtype=np.float32)))
+            spent = (time.perf_counter() - start) * 1000
+            saturated = previous is not None and score - previous < SSIM_MIN_GAIN
+            if score >= self.target_ssim or saturated or quality >= self.max_quality or spent >= self.time_budget_ms:
+                break
+            with self._lock:
+                self._failed[bucket] = max(self._failed.get(bucket, 0), quality)
+            previous = score
+            quality = min(self.max_quality, quality + self.quality_step)
+
+        if self.target_ssim and score is not None:
+            with self._lock:
+                lower = quality - self.quality_step
+                # 합격(또는 포화)이고 한 단계 아래가 불합격 이력보다 높으면 다음 이미지는 낮춰 시도
+                passed = score >= self.target_ssim + SSIM_MARGIN or (saturated and score >= self.target_ssim - SSIM_MARGIN)
+                if attempts == 1 and passed and lower >= self.min_quality and lower > self._failed.get(bucket, 0):
+                    self._quality[bucket] = lower
+                else:
+                    self._quality[bucket] = quality
+        return WebPEncodeResult(data, method, quality, score, (time.perf_counter() - start) * 1000, attempts, bucket)
+
+
+def write_bytes_atomic(path: str, data: bytes, max_retries: int = 5, retry_delay: float = 0.2):
+    """바이트를 임시 파일 → os.replace로 교체 (Windows 파일 잠금 시 재시도)"""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    for retry in range(max_retries):
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            if retry == max_retries - 1:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+            time.sleep(retry_delay * (retry + 1))
+
+
+def benchmark(paths: List[str], time_budget_ms: float, target_ssim: float):
+    """기존 설정(q90, m6) 대비 정책 인코딩의 시간/용량/SSIM 비교"""
+    _require_pil()
+    policy = WebPEncodePolicy(time_budget_ms=time_budget_ms, target_ssim=target_ssim)
+    totals = {'legacy_ms': 0.0, 'legacy_bytes': 0, 'policy_ms': 0.0, 'policy_bytes': 0}
+    scores = []
+    for path in paths:
+        with Image.open(path) as img:
+            image = to_rgb_image(img)
+            image.load()
+        t0 = time.perf_counter()
+        legacy = WebPEncodePolicy._encode(image, LEGACY_SETTINGS['quality'], LEGACY_SETTINGS['method'])
+        totals['legacy_ms'] += (time.perf_counter() - t0) * 1000
+        totals['legacy_bytes'] += len(legacy)
+        result = policy.encode(image)
+        totals['policy_ms'] += result.encode_ms
+        totals['policy_bytes'] += len(result.data)
+        if result.ssim is not None:
+            scores.append(result.ssim)
+        print(f"[INFO] {os.path.basename(path)}: m{result.method} q{result.quality} "
+              f"ssim={result.ssim if result.ssim is None else round(result.ssim, 4)} "
+              f"{len(result.data):,}B {result.encode_ms:.1f}ms (기존 {len(legacy):,}B)")
+    n = max(len(paths), 1)
+    print(f"[STATS] 기존 q90/m6: 평균 {totals['legacy_ms'] / n:.1f}ms, {totals['legacy_bytes'] / n:,.0f}B")
+    print(f"[STATS] 정책: 평균 {totals['policy_ms'] / n:.1f}ms, {totals['policy_bytes'] / n:,.0f}B"
+          + (f", 최소 SSIM {min(scores):.4f}" if scores else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='콘텐츠 적응형 WebP 인코딩 정책')
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench_parser = sub.add_parser('benchmark', help='기존 q90/m6 대비 비교')
+    bench_parser.add_argument('images', nargs='+')
+    bench_parser.add_argument('--budget-ms', type=float, default=DEFAULT_TIME_BUDGET_MS)
+    bench_parser.add_argument('--target-ssim', type=float, default=DEFAULT_TARGET_SSIM)
+    args = parser.parse_args()
+    benchmark(args.images, args.budget_ms, args.target_ssim)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,11 @@ import logging
 from PIL import Image
 import subprocess
 import tempfile
+import sys
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent))
+from dataset_validation_engine import DatasetValidationEngine, ValidationThresholds, ValidationCache, add_cache_arguments, cache_from_args
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -280,37 +285,46 @@ class WebPQualityChecker:
         
         return results
     
-    def validate_dataset(self, dataset_path: str) -> List[Dict[str, Any]]:
-        """데이터셋 전체 검증"""
+    def validate_dataset(self, dataset_path: str, workers: int = None, cache: ValidationCache = None,
+                         since: float = None) -> List[Dict[str, Any]]:
+        """데이터셋 전체 검증 (통합 검증 엔진: 이미지당 1회 디코드, 프로세스 풀)"""
         results = []
         dataset_path = Path(dataset_path)
         
-        # WebP 파일들 찾기
-        webp_files = list((dataset_path / 'images').glob('*.webp'))
+        thresholds = ValidationThresholds(
+            ssim_min=self.SSIM_THRESHOLD,
+            min_resolution=self.MIN_RESOLUTION
+        )
+        engine = DatasetValidationEngine(dataset_path, checks=('image',), thresholds=thresholds, workers=workers,
+                                         cache=cache, since=since)
+        samples = [sample for sample in engine.index() if sample.files.get('image', '').lower().endswith('.webp')]
         
-        if not webp_files:
+        if not samples:
             logger.error("WebP 파일을 찾을 수 없습니다.")
             return results
         
-        logger.info(f"WebP 파일 {len(webp_files)}개 검증 시작")
+        logger.info(f"WebP 파일 {len(samples)}개 검증 시작")
         
-        # 개별 파일 검증
-        for webp_file in webp_files:
-            logger.info(f"검증 중: {webp_file.name}")
-            
-            # 파라미터 검증
-            param_result = self.check_webp_parameters(str(webp_file))
-            results.append(param_result)
-            
-            # 품질 검증
-            quality_result = self.check_image_quality(str(webp_file))
-            results.append(quality_result)
+        for result in engine.iter_results(samples):
+            stats = result['stats']
+            issues = [issue['message'] for issue in result['issues']]
+            width, height = stats.get('width'), stats.get('height')
+            results.append({
+                "file_path": result['files']['image'],
+                "resolution": f"{width}x{height}" if width else None,
+                "sharpness": stats.get('laplacian_var'),
+                "noise_level": stats.get('noise_level'),
+                "color_balance": stats.get('color_balance'),
+                "icc_profile": stats.get('icc_profile'),
+                "status": result['status'],
+                "message": " / ".join(issues) if issues else f"WebP 이미지 정상: {width}x{height}"
+            })
         
         # 중복 품질 검증 (샘플링)
-        if len(webp_files) > 1:
+        if len(samples) > 1:
             logger.info("중복 품질 검증 시작")
-            sample_files = webp_files[:min(10, len(webp_files))]  # 최대 10개 샘플
-            duplicate_results = self.check_duplicate_quality([str(f) for f in sample_files])
+            sample_files = [sample.files['image'] for sample in samples[:min(10, len(samples))]]  # 최대 10개 샘플
+            duplicate_results = self.check_duplicate_quality(sample_files)
             results.extend(duplicate_results)
         
         return results
@@ -371,6 +385,8 @@ def main():
     parser.add_argument('--output', '-o', help='보고서 출력 파일 (선택사항)')
     parser.add_argument('--reencode', action='store_true', help='기준에 맞지 않는 파일 재인코딩')
     parser.add_argument('--verbose', '-v', action='store_true', help='상세 로그 출력')
+    parser.add_argument('--workers', type=int, help='검증 프로세스 수 (기본: CPU-1)')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
     
@@ -379,7 +395,12 @@ def main():
     
     # 검증 실행
     checker = WebPQualityChecker()
-    results = checker.validate_dataset(args.dataset_path)
+    cache, since = cache_from_args(args)
+    try:
+        results = checker.validate_dataset(args.dataset_path, args.workers, cache=cache, since=since)
+    finally:
+        if cache:
+            cache.close()
     
     # 보고서 생성
     report = checker.generate_report(results)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+YOLO 라벨/폴리곤 벡터화 툴킷
+- 라벨 파일 전체를 packed NumPy 표현으로 파싱
+  · 파일 → 객체: file_offsets, 객체 → 폴리곤 점: poly_offsets, 좌표: boxes(N,4) / points(M,2)
+  · 파싱은 청크 단위 프로세스 풀, 이후 모든 계산은 데이터셋 전체에 대해 벡터화
+- bbox 유효성, 폴리곤 면적(shoelace), 마스크/bbox 비율, 폴리곤 외접 bbox와 bbox 일치성, 좌표 클리핑
+- packed 결과는 .npz로 저장/재사용 가능
+
+실행 방법:
+    python scripts/yolo_label_toolkit.py audit output/synthetic/dataset_synthetic --output label_audit.json
+    python scripts/yolo_label_toolkit.py clip output/synthetic
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PARSE_CHUNK = 2000          # 프로세스 풀 작업 단위 (파일 수)
+POOL_MIN_FILES = 5000       # 이보다 적으면 단일 프로세스 파싱
+
+
+def pack_polygons(polygons: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """폴리곤 목록([[x, y], ...] 또는 평탄 [x0, y0, ...]) → (offsets(K+1), points(M,2))"""
+    arrays = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons]
+    counts = np.array([len(a) for a in arrays], dtype=np.int64)
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    points = np.concatenate(arrays) if arrays else np.zeros((0, 2), dtype=np.float64)
+    return offsets, points
+
+
+def _segment_reduce(ufunc, values: np.ndarray, offsets: np.ndarray, empty_value: float) -> np.ndarray:
+    """offsets 구간별 ufunc.reduceat (빈 구간은 empty_value)"""
+    counts = np.diff(offsets)
+    out = np.full(len(counts), empty_value, dtype=np.float64)
+    nonempty = counts > 0
+    if values.size and nonempty.any():
+        out[nonempty] = ufunc.reduceat(values, offsets[:-1][nonempty])
+    return out
+
+
+def polygon_bounds(offsets: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """폴리곤별 외접 bbox (K,4: x_min, y_min, x_max, y_max), 점이 없으면 NaN"""
+    return np.stack([
+        _segment_reduce(np.minimum, points[:, 0], offsets, np.nan),
+        _segment_reduce(np.minimum, points[:, 1], offsets, np.nan),
+        _segment_reduce(np.maximum, points[:, 0], offsets, np.nan),
+        _segment_reduce(np.maximum, points[:, 1], offsets, np.nan),
+    ], axis=1)
+
+
+def polygon_areas(offsets: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """폴리곤별 면적 (shoelace, 구간 끝에서 시작점으로 닫힘), 3점 미만은 0"""
+    counts = np.diff(offsets)
+    if not points.size:
+        return np.zeros(len(counts), dtype=np.float64)
+    nxt = np.arange(1, len(points) + 1)
+    ends = offsets[1:][counts > 0] - 1
+    nxt[ends] = offsets[:-1][counts > 0]
+    x, y = points[:, 0], points[:, 1]
+    cross = x * y[nxt] - x[nxt] * y
+    areas = np.abs(_segment_reduce(np.add, cross, offsets, 0.0)) / 2.0
+    areas[counts < 3] = 0.0
+    return areas
+
+
+def _parse_files(paths: List[str]) -> Dict:
+    """라벨 파일 청크 파싱 → packed 배열 (프로세스 풀 워커)"""
+    object_counts, class_ids, boxes, lines, poly_counts, coords, errors = [], [], [], [], [], [], []
+    for file_index, path in enumerate(paths):
+        count = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError as e:
+            errors.append((file_index, 0, f"파일 읽기 오류: {e}"))
+            object_counts.append(0)
+            continue
+        for line_num, line in enumerate(text.splitlines(), 1):
+            tokens = line.split()
+            if not tokens:
+                continue
+            if len(tokens) < 5:
+                errors.append((file_index, line_num, "최소 5개 필드 필요 (class xc yc w h)"))
+                continue
+            try:
+                class_id = int(tokens[0])
+                values = [float(t) for t in tokens[1:]]
+            except ValueError:
+                errors.append((file_index, line_num, "숫자 파싱 오류"))
+                continue
+            polygon = values[4:]
+            if len(polygon) % 2:
+                errors.append((file_index, line_num, "폴리곤 좌표 개수 홀수"))
+                polygon = polygon[:-1]
+            class_ids.append(class_id)
+            boxes.append(values[:4])
+            lines.append(line_num)
+            poly_counts.append(len(polygon) // 2)
+            coords.extend(polygon)
+            count += 1
+        object_counts.append(count)
+    return {
+        'object_counts': np.asarray(object_counts, dtype=np.int64),
+        'class_ids': np.asarray(class_ids, dtype=np.int32),
+        'boxes': np.asarray(boxes, dtype=np.float64).reshape(-1, 4),
+        'lines': np.asarray(lines, dtype=np.int32),
+        'poly_counts': np.asarray(poly_counts, dtype=np.int64),
+        'points': np.asarray(coords, dtype=np.float64).reshape(-1, 2),
+        'errors': errors,
+    }
+
+
+class LabelSet:
+    """packed YOLO 라벨 (객체 단위 배열 + 파일/폴리곤 offset)"""
+
+    def __init__(self, files: List[str], file_offsets: np.ndarray, class_ids: np.ndarray, boxes: np.ndarray,
+                 lines: np.ndarray, poly_offsets: np.ndarray, points: np.ndarray,
+                 errors: Optional[List[Tuple[int, int, str]]] = None):
+        self.files = files
+        self.file_offsets = file_offsets
+        self.class_ids = class_ids
+        self.boxes = boxes
+        self.lines = lines
+        self.poly_offsets = poly_offsets
+        self.points = points
+        self.errors = errors or []
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    @property
+    def object_files(self) -> np.ndarray:
+        """객체별 파일 인덱스"""
+        return np.repeat(np.arange(len(self.files)), np.diff(self.file_offsets))
+
+    @classmethod
+    def from_files(cls, paths: Sequence, workers: Optional[int] = None) -> 'LabelSet':
+        paths = [str(p) for p in paths]
+        chunks = [paths[i:i + PARSE_CHUNK] for i in range(0, len(paths), PARSE_CHUNK)]
+        workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        if workers > 1 and len(paths) >= POOL_MIN_FILES:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_parse_files, chunks))
+        else:
+            parts = [_parse_files(chunk) for chunk in chunks]
+
+        errors, base = [], 0
+        for chunk, part in zip(chunks, parts):
+            errors.extend((base + file_index, line, message) for file_index, line, message in part['errors'])
+            base += len(chunk)
+        object_counts = np.concatenate([p['object_counts'] for p in parts]) if parts else np.zeros(0, np.int64)
+        poly_counts = np.concatenate([p['poly_counts'] for p in parts]) if parts else np.zeros(0, np.int64)
+        file_offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+        np.cumsum(object_counts, out=file_offsets[1:])
+        poly_offsets = np.zeros(len(poly_counts) + 1, dtype=np.int64)
+        np.cumsum(poly_counts, out=poly_offsets[1:])
+        concat = lambda key, shape: np.concatenate([p[key] for p in parts]) if parts else np.zeros(shape)
+        return cls(paths, file_offsets, concat('class_ids', 0).astype(np.int32), concat('boxes', (0, 4)),
+                   concat('lines', 0).astype(np.int32), poly_offsets, concat('points', (0, 2)), errors)
+
+    @classmethod
+    def from_directory(cls, root, recursive: bool = True, workers: Optional[int] = None) -> 'LabelSet':
+        """디렉토리의 *.txt 라벨 전체 (recursive=False면 바로 아래 파일만)"""
+        root = Path(root)
+        paths = sorted(root.rglob('*.txt') if recursive else root.glob('*.txt'))
+        return cls.from_files(paths, workers)
+
+    def save(self, path):
+        np.savez(path, files=np.asarray(self.files), file_offsets=self.file_offsets, class_ids=self.class_ids,
+                 boxes=self.boxes, lines=self.lines, poly_offsets=self.poly_offsets, points=self.points,
+                 errors=np.asarray(json.dumps(self.errors, ensure_ascii=False)))
+
+    @classmethod
+    def load(cls, path) -> 'LabelSet':
+        data = np.load(path)
+        return cls(data['files'].tolist(), data['file_offsets'], data['class_ids'], data['boxes'], data['lines'],
+                   data['poly_offsets'], data['points'], [tuple(e) for e in json.loads(str(data['errors']))])
+
+    # ----- 벡터화 계산 -----
+
+    def bbox_xyxy(self) -> np.ndarray:
+        cx, cy, w, h = self.boxes.T
+        return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+    def bbox_areas(self) -> np.ndarray:
+        return self.boxes[:, 2] * self.boxes[:, 3]
+
+    def bbox_valid(self) -> np.ndarray:
+        """0 <= min < max <= 1 (x, y 모두)"""
+        x1, y1, x2, y2 = self.bbox_xyxy().T
+        return (x1 >= 0) & (x1 < x2) & (x2 <= 1) & (y1 >= 0) & (y1 < y2) & (y2 <= 1)
+
+    def polygon_counts(self) -> np.ndarray:
+        return np.diff(self.poly_offsets)
+
+    def polygon_out_of_range(self) -> np.ndarray:
+        """객체별 폴리곤 좌표가 [0, 1] 밖인 점 존재 여부"""
+        bad = ((self.points < 0) | (self.points > 1)).any(axis=1).astype(np.float64)
+        return _segment_reduce(np.maximum, bad, self.poly_offsets, 0.0) > 0
+
+    def polygon_areas(self) -> np.ndarray:
+        return polygon_areas(self.poly_offsets, self.points)
+
+    def mask_bbox_ratios(self) -> np.ndarray:
+        """폴리곤 면적 / bbox 면적 (폴리곤 3점 미만 또는 bbox 면적 0이면 NaN)"""
+        areas = self.polygon_areas()
+        bbox = self.bbox_areas()
+        ratios = np.full(len(self), np.nan)
+        valid = (self.polygon_counts() >= 3) & (bbox > 0)
+        ratios[valid] = areas[valid] / bbox[valid]
+        return ratios
+
+    def polygon_bbox_deviation(self) -> np.ndarray:
+        """bbox 모서리와 폴리곤 외접 bbox 모서리의 최대 편차 (폴리곤 없으면 NaN)"""
+        return np.abs(self.bbox_xyxy() - polygon_bounds(self.poly_offsets, self.points)).max(axis=1)
+
+    def audit(self, ratio_range: Tuple[float, float] = (0.25, 0.98), area_range: Tuple[float, float] = (0.01, 0.95),
+              tolerance: float = 0.05, single_class: bool = False) -> Dict[str, np.ndarray]:
+        """객체별 이슈 플래그 (모두 길이 N의 bool 배열)"""
+        ratios = self.mask_bbox_ratios()
+        areas = self.bbox_areas()
+        deviation = self.polygon_bbox_deviation()
+        flags = {
+            'bbox_out_of_range': ~self.bbox_valid(),
+            'bbox_area': (areas < area_range[0]) | (areas > area_range[1]),
+            'polygon_out_of_range': self.polygon_out_of_range(),
+            'mask_bbox_ratio': ~np.isnan(ratios) & ((ratios < ratio_range[0]) | (ratios > ratio_range[1])),
+            'bbox_polygon_mismatch': ~np.isnan(deviation) & (deviation > tolerance),
+        }
+        if single_class:
+            flags['class_id'] = self.class_ids != 0
+        return flags
+
+    def file_flags(self, object_flags: np.ndarray) -> np.ndarray:
+        """객체 단위 플래그 → 파일 단위 (파일 내 하나라도 True)"""
+        return _segment_reduce(np.maximum, object_flags.astype(np.float64), self.file_offsets, 0.0) > 0
+
+    # ----- 수정/기록 -----
+
+    def clipped(self) -> Tuple['LabelSet', np.ndarray]:
+        """좌표를 [0, 1]로 클리핑한 사본과 변경된 파일 마스크"""
+        boxes = np.clip(self.boxes, 0.0, 1.0)
+        points = np.clip(self.points, 0.0, 1.0)
+        changed_objects = (boxes != self.boxes).any(axis=1)
+        changed_points = (points != self.points).any(axis=1).astype(np.float64)
+        changed_objects |= _segment_reduce(np.maximum, changed_points, self.poly_offsets, 0.0) > 0
+        clipped = LabelSet(self.files, self.file_offsets, self.class_ids, boxes, self.lines,
+                           self.poly_offsets, points, self.errors)
+        changed = self.file_flags(changed_objects)
+        # 객체로 파싱된 오류 라인(홀수 폴리곤 좌표)은 남는 좌표를 버리도록 재기록 (파싱 불가 라인은 원문 유지)
+        for file_index, line_num, _ in self.errors:
+            start, end = self.file_offsets[file_index], self.file_offsets[file_index + 1]
+            if line_num in self.lines[start:end]:
+                changed[file_index] = True
+        return clipped, changed
+
+    def unparsed_lines(self, file_index: int) -> set:
+        """객체로 파싱되지 못한 오류 라인 번호 (재기록 시 원문 유지 대상)"""
+        start, end = self.file_offsets[file_index], self.file_offsets[file_index + 1]
+        error_lines = {line_num for index, line_num, _ in self.errors if index == file_index and line_num > 0}
+        return error_lines - set(self.lines[start:end].tolist())
+
+    def format_file(self, file_index: int) -> str:
+        """파일 하나의 YOLO 라벨 텍스트 (소수점 6자리, 파싱 불가 라인은 원문 그대로 유지)"""
+        rows = {}
+        for obj in range(self.file_offsets[file_index], self.file_offsets[file_index + 1]):
+            coords = np.concatenate([self.boxes[obj], self.points[self.poly_offsets[obj]:self.poly_offsets[obj + 1]].ravel()])
+            rows[int(self.lines[obj])] = ' '.join([str(int(self.class_ids[obj]))] + [f"{v:.6f}" for v in coords])
+        unparsed = self.unparsed_lines(file_index) if self.errors else set()
+        if unparsed:
+            with open(self.files[file_index], 'r', encoding='utf-8') as f:
+                for line_num, line in enumerate(f.read().splitlines(), 1):
+                    if line_num in unparsed:
+                        rows[line_num] = line
+        ordered = [rows[line_num] for line_num in sorted(rows)]
+        return '\n'.join(ordered) + ('\n' if ordered else '')
+
+    def write_files(self, file_mask: np.ndarray) -> int:
+        for file_index in np.flatnonzero(file_mask):
+            text = self.format_file(file_index)  # 원문 라인 유지 시 원본을 읽으므로 열기 전에 생성
+            with open(self.files[file_index], 'w', encoding='utf-8') as f:
+                f.write(text)
+        return int(file_mask.sum())
+
+
+def audit_report(labels: LabelSet, **audit_kwargs) -> Dict:
+    """데이터셋 라벨 QA 요약 (이슈 유형별 객체/파일 수, 비율 통계, 예시 파일)"""
+    flags = labels.audit(**audit_kwargs)
+    ratios = labels.mask_bbox_ratios()
+    ratios = ratios[~np.isnan(ratios)]
+    files = labels.files
+    report = {
+        'files': len(files),
+        'objects': len(labels),
+        'empty_files': int((np.diff(labels.file_offsets) == 0).sum()),
+        'parse_errors': len(labels.errors),
+        'parse_error_examples': [{'file': files[i], 'line': line, 'message': message}
+                                 for i, line, message in labels.errors[:20]],
+        'issues': {},
+        'mask_bbox_ratio': {
+            'mean': float(ratios.mean()) if ratios.size else None,
+            'p05': float(np.percentile(ratios, 5)) if ratios.size else None,
+            'p95': float(np.percentile(ratios, 95)) if ratios.size else None,
+        },
+        'bbox_area_mean': float(labels.bbox_areas().mean()) if len(labels) else None,
+    }
+    for name, mask in flags.items():
+        file_mask = labels.file_flags(mask)
+        report['issues'][name] = {
+            'objects': int(mask.sum()),
+            'files': int(file_mask.sum()),
+            'examples': [files[i] for i in np.flatnonzero(file_mask)[:10]],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLO 라벨/폴리곤 벡터화 툴킷')
+    sub = parser.add_subparsers(dest='command', required=True)
+    audit_parser = sub.add_parser('audit', help='라벨 QA (bbox/폴리곤/마스크 비율/일치성)')
+    audit_parser.add_argument('root', help='라벨 루트 디렉토리 (하위 *.txt 전체)')
+    audit_parser.add_argument('--output', '-o', help='보고서 JSON 경로')
+    audit_parser.add_argument('--single-class', action='store_true', help='class_id != 0 표시')
+    audit_parser.add_argument('--save-npz', help='packed 라벨 저장 경로 (.npz)')
+    clip_parser = sub.add_parser('clip', help='좌표를 0-1 범위로 클리핑 (변경된 파일만 기록)')
+    clip_parser.add_argument('root', help='라벨 루트 디렉토리')
+    clip_parser.add_argument('--dry-run', action='store_true', help='기록하지 않고 대상만 출력')
+    for p in (audit_parser, clip_parser):
+        p.add_argument('--workers', type=int, help='파싱 프로세스 수 (기본: CPU-1)')
+    args = parser.parse_args()
+
+    labels = LabelSet.from_directory(args.root, workers=args.workers)
+    print(f"[INFO] 라벨 {len(labels.files)}개 파일, 객체 {len(labels)}개, 파싱 오류 {len(labels.errors)}개")
+
+    if args.command == 'audit':
+        report = audit_report(labels, single_class=args.single_class)
+        for name, issue in report['issues'].items():
+            print(f"   {name}: 객체 {issue['objects']}개 / 파일 {issue['files']}개")
+        if args.save_npz:
+            labels.save(args.save_npz)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"[OK] 보고서 저장: {args.output}")
+        sys.exit(1 if report['parse_errors'] or report['issues']['bbox_out_of_range']['objects'] else 0)
+
+    clipped, changed = labels.clipped()
+    print(f"[FIX] 좌표 범위 수정 대상: {int(changed.sum())}개 파일")
+    if not args.dry_run:
+        clipped.write_files(changed)
+
+
+if __name__ == '__main__':
+    main()
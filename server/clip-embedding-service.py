@@ -10,26 +10,32 @@ import os
 import sys
 import json
 import asyncio
-from typing import List, Dict, Any, Optional
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union
 from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import torch
-from transformers import CLIPProcessor, CLIPModel
 import numpy as np
 from pydantic import BaseModel
 from PIL import Image
 import base64
 from io import BytesIO
 
-# 모델 로드 (전역)
+# 모델 레지스트리 (지연 로드 + 상주)
+sys.path.insert(0, str(Path(__file__).parent))
+from clip_model_registry import get_registry, STATUS_READY, STATUS_FAILED
+
+MODEL_NAME = "openai/clip-vit-large-patch14"
 device = "cuda" if torch.cuda.is_available() else "cpu"
-model = None
-processor = None
+registry = get_registry()
+
+# 배치 텍스트 임베딩 한 요청당 최대 입력 수 (OpenAI API 호환 list 입력)
+MAX_BATCH_INPUTS = int(os.getenv("CLIP_MAX_BATCH_INPUTS", "256"))
 
 class EmbeddingRequest(BaseModel):
-    input: str
+    input: Union[str, List[str]]
     model: str = "clip-vit-l/14"
     dimensions: int = 768
 
@@ -44,23 +50,17 @@ class EmbeddingResponse(BaseModel):
     model: str
     usage: Dict[str, int]
 
-async def load_clip_model():
-    """CLIP 모델 로드 (transformers 사용)"""
-    global model, processor
+async def get_clip_model():
+    """CLIP 모델 조회 (미로드 시 첫 요청에서 로드, 워밍업 중이면 완료까지 대기)"""
     try:
-        print(f"Loading CLIP ViT-L/14 on {device}...")
-        model = CLIPModel.from_pretrained("openai/clip-vit-large-patch14").to(device)
-        processor = CLIPProcessor.from_pretrained("openai/clip-vit-large-patch14")
-        print("CLIP model loaded successfully")
-        return True
+        # 로드는 블로킹 작업이므로 이벤트 루프 밖에서 실행
+        return await asyncio.to_thread(registry.get, MODEL_NAME)
     except Exception as e:
-        print(f"Failed to load CLIP model: {e}")
-        return False
+        raise HTTPException(status_code=503, detail=f"CLIP model not available: {str(e)}")
 
 async def generate_clip_embedding(text: str) -> List[float]:
     """CLIP 텍스트 임베딩 생성 (768차원, L2 정규화)"""
-    if not model or not processor:
-        raise HTTPException(status_code=500, detail="CLIP model not loaded")
+    model, processor = await get_clip_model()
     
     try:
         # 텍스트 토큰화 (transformers 사용)
@@ -85,10 +85,30 @@ async def generate_clip_embedding(text: str) -> List[float]:
         print(f"CLIP embedding generation failed: {e}")
         raise HTTPException(status_code=500, detail=f"Embedding generation failed: {str(e)}")
 
+async def generate_clip_embeddings_batch(texts: List[str]) -> List[List[float]]:
+    """CLIP 텍스트 임베딩 배치 생성 (한 번의 forward, 768차원, L2 정규화)"""
+    model, processor = await get_clip_model()
+    
+    try:
+        inputs = processor(text=texts, return_tensors="pt", padding=True, truncation=True).to(device)
+        
+        with torch.no_grad():
+            text_features = model.get_text_features(**inputs)
+            text_features = text_features / text_features.norm(dim=-1, keepdim=True)
+        
+        embeddings = text_features.cpu().numpy()
+        if embeddings.shape[1] != 768:
+            raise ValueError(f"Expected 768 dimensions, got {embeddings.shape[1]}")
+        
+        return embeddings.tolist()
+        
+    except Exception as e:
+        print(f"CLIP batch embedding generation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch embedding generation failed: {str(e)}")
+
 async def generate_clip_image_embedding(image_base64: str) -> List[float]:
     """CLIP 이미지 임베딩 생성 (768차원, L2 정규화)"""
-    if not model or not processor:
-        raise HTTPException(status_code=500, detail="CLIP model not loaded")
+    model, processor = await get_clip_model()
     
     try:
         # base64 디코딩
@@ -158,10 +178,10 @@ async def generate_clip_image_embedding(image_base64: str) -> List[float]:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """서비스 시작/종료 시 실행"""
-    # 시작 시 모델 로드
-    success = await load_clip_model()
-    if not success:
-        print("[ERROR] Failed to load CLIP model, service may not work properly")
+    # 모델 로드를 기다리지 않고 즉시 요청 수락 (백그라운드 워밍업, /health는 "warming" 보고)
+    # CLIP_EAGER_WARMUP=false 이면 첫 요청 시 지연 로드
+    if os.getenv("CLIP_EAGER_WARMUP", "true").lower() != "false":
+        registry.warmup(MODEL_NAME)
     yield
     # 종료 시 정리 작업 (필요시)
 
@@ -185,19 +205,53 @@ app.add_middleware(
 @app.get("/health")
 async def health_check():
     """헬스 체크"""
-    model_loaded = model is not None and processor is not None
+    model_info = registry.info(MODEL_NAME)
+    model_status = model_info["status"]
+    if model_status == STATUS_READY:
+        status = "healthy"
+    elif model_status == STATUS_FAILED:
+        status = "unhealthy"
+    else:
+        # cold/warming: 서비스는 응답 가능, 첫 요청 또는 워밍업 완료 시 ready
+        status = "warming"
     return {
-        "status": "healthy" if model_loaded else "unhealthy",
+        "status": status,
         "model": "clip-vit-l/14",
         "device": device,
         "dimensions": 768,
-        "model_loaded": model_loaded
+        "model_loaded": model_status == STATUS_READY,
+        "model_status": model_status,
+        "model_load_time_sec": model_info["load_time_sec"],
+        "model_error": model_info["error"]
     }
 
 @app.post("/v1/embeddings", response_model=EmbeddingResponse)
 async def create_embeddings(request: EmbeddingRequest):
     """임베딩 생성 엔드포인트 (OpenAI API 호환)"""
     try:
+        # 배치 입력 (list[str]): 한 번의 forward로 처리
+        if isinstance(request.input, list):
+            texts = [t.strip() if isinstance(t, str) else "" for t in request.input]
+            if not texts or any(not t for t in texts):
+                raise HTTPException(status_code=400, detail="All input texts must be non-empty")
+            if len(texts) > MAX_BATCH_INPUTS:
+                raise HTTPException(status_code=400, detail=f"Too many inputs: {len(texts)} (max {MAX_BATCH_INPUTS})")
+            
+            embeddings = await generate_clip_embeddings_batch(texts)
+            token_count = sum(len(t.split()) for t in texts)
+            return EmbeddingResponse(
+                data=[{
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": emb
+                } for i, emb in enumerate(embeddings)],
+                model="clip-vit-l/14",
+                usage={
+                    "prompt_tokens": token_count,
+                    "total_tokens": token_count
+                }
+            )
+        
         # 입력 검증
         if not request.input or not request.input.strip():
             raise HTTPException(status_code=400, detail="Input text is required")
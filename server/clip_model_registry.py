@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+CLIP 모델 레지스트리
+- 첫 사용 시 지연 로드 (또는 백그라운드 워밍업)
+- safetensors 가중치 메모리 매핑 로드 (low_cpu_mem_usage)
+- 로드된 모델은 프로세스 내에 상주하여 호출 간 재사용
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+# 모델 상태 값
+STATUS_COLD = "cold"        # 아직 로드 요청 없음
+STATUS_WARMING = "warming"  # 로드 중
+STATUS_READY = "ready"      # 로드 완료 (상주)
+STATUS_FAILED = "failed"    # 로드 실패
+
+
+class CLIPModelRegistry:
+    """모델 이름별로 (model, processor)를 한 번만 로드하고 상주시키는 레지스트리"""
+
+    def __init__(self, device: Optional[str] = None):
+        self._device = device
+        self._models: Dict[str, Tuple[Any, Any]] = {}
+        self._status: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        self._load_times: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    @property
+    def device(self) -> str:
+        """추론 디바이스 (torch 임포트는 첫 조회 시점으로 지연)"""
+        if self._device is None:
+            import torch
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+    def _lock_for(self, model_name: str) -> threading.Lock:
+        with self._registry_lock:
+            if model_name not in self._locks:
+                self._locks[model_name] = threading.Lock()
+                self._status.setdefault(model_name, STATUS_COLD)
+            return self._locks[model_name]
+
+    def _load(self, model_name: str) -> Tuple[Any, Any]:
+        """실제 가중치 로드 (safetensors mmap 우선, 실패 시 기본 로드)"""
+        from transformers import CLIPProcessor, CLIPModel
+
+        # 로컬 캐시 디렉토리 지정 시 네트워크 조회 없이 로드
+        cache_dir = os.getenv("CLIP_MODEL_DIR") or None
+        local_only = os.getenv("CLIP_LOCAL_FILES_ONLY", "false").lower() == "true"
+
+        start = time.time()
+        try:
+            # safetensors는 safe_open(mmap)으로 열리고, low_cpu_mem_usage로
+            # 랜덤 초기화 + 복사 단계를 건너뛰어 콜드 스타트 메모리/시간 절감
+            model = CLIPModel.from_pretrained(
+                model_name,
+                use_safetensors=True,
+                low_cpu_mem_usage=True,
+                cache_dir=cache_dir,
+                local_files_only=local_only,
+            )
+        except (OSError, ValueError) as e:
+            # safetensors 가중치가 없는 체크포인트 폴백
+            print(f"[WARN] safetensors 로드 실패, 기본 가중치로 재시도: {e}")
+            model = CLIPModel.from_pretrained(
+                model_name,
+                low_cpu_mem_usage=True,
+                cache_dir=cache_dir,
+                local_files_only=local_only,
+            )
+        model = model.to(self.device)
+        model.eval()
+        processor = CLIPProcessor.from_pretrained(
+            model_name,
+            cache_dir=cache_dir,
+            local_files_only=local_only,
+        )
+        self._load_times[model_name] = time.time() - start
+        return model, processor
+
+    def get(self, model_name: str) -> Tuple[Any, Any]:
+        """(model, processor) 반환 - 미로드 시 현재 스레드에서 로드 (다른 스레드가 로드 중이면 대기)"""
+        loaded = self._models.get(model_name)
+        if loaded is not None:
+            return loaded
+
+        with self._lock_for(model_name):
+            # 락 대기 중 다른 스레드가 로드를 끝냈을 수 있음
+            loaded = self._models.get(model_name)
+            if loaded is not None:
+                return loaded
+
+            self._status[model_name] = STATUS_WARMING
+            print(f"[LOAD] CLIP 모델 로드 중: {model_name} ({self.device})")
+            try:
+                loaded = self._load(model_name)
+            except Exception as e:
+                self._status[model_name] = STATUS_FAILED
+                self._errors[model_name] = str(e)
+                print(f"[ERROR] CLIP 모델 로드 실패: {model_name}: {e}")
+                raise
+
+            self._models[model_name] = loaded
+            self._status[model_name] = STATUS_READY
+            self._errors.pop(model_name, None)
+            print(f"[OK] CLIP 모델 로드 완료: {model_name} ({self._load_times[model_name]:.1f}s)")
+            return loaded
+
+    def warmup(self, model_name: str) -> threading.Thread:
+        """백그라운드 스레드에서 모델 로드 시작 (서비스는 즉시 요청 수락 가능)"""
+        self._lock_for(model_name)
+        if self._status.get(model_name) in (STATUS_COLD, STATUS_FAILED):
+            self._status[model_name] = STATUS_WARMING
+
+        def _run():
+            try:
+                self.get(model_name)
+            except Exception:
+                # 실패 상태는 get()에서 기록됨, 다음 요청 시 재시도
+                pass
+
+        thread = threading.Thread(target=_run, name=f"clip-warmup-{model_name}", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self, model_name: str) -> bool:
+        return model_name in self._models
+
+    def status(self, model_name: str) -> str:
+        if model_name in self._models:
+            return STATUS_READY
+        return self._status.get(model_name, STATUS_COLD)
+
+    def info(self, model_name: str) -> Dict[str, Any]:
+        """헬스 체크용 상태 정보"""
+        return {
+            "status": self.status(model_name),
+            "load_time_sec": round(self._load_times[model_name], 2) if model_name in self._load_times else None,
+            "error": self._errors.get(model_name),
+        }
+
+    def unload(self, model_name: str) -> bool:
+        """상주 모델 해제 (메모리 회수용)"""
+        with self._lock_for(model_name):
+            removed = self._models.pop(model_name, None) is not None
+            self._status[model_name] = STATUS_COLD
+            return removed
+
+
+# 프로세스 전역 레지스트리 (서비스/추론 스크립트 공용)
+_registry: Optional[CLIPModelRegistry] = None
+_registry_init_lock = threading.Lock()
+
+
+def get_registry() -> CLIPModelRegistry:
+    """전역 CLIPModelRegistry 반환"""
+    global _registry
+    if _registry is None:
+        with _registry_init_lock:
+            if _registry is None:
+                _registry = CLIPModelRegistry()
+    return _registry
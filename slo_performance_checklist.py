@@ -11,8 +11,12 @@ import time
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+from pathlib import Path
 import numpy as np
 
+# scripts/ 모듈 임포트 경로
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -56,17 +60,32 @@ class SLOPerformanceChecker:
     def _check_stage2_entry_rate(self):
         """Stage-2 진입률 ≤25% 체크"""
         try:
-            # 실제로는 FusionIdentifier에서 Stage-2 진입 통계 수집
-            # 임시로 시뮬레이션
-            total_queries = 1000
-            stage2_entries = np.random.binomial(total_queries, 0.2)  # 20% 시뮬레이션
-            stage2_rate = (stage2_entries / total_queries) * 100
+            # 캐스케이드 추론(ai_inference.py --cascade)이 기록한 실시간 카운터
+            stats_path = Path(os.getenv('CASCADE_STATS_PATH', 'output/inference/cascade_stats.json'))
+            if not stats_path.exists():
+                self.check_results['stage2_entry_rate'] = {
+                    'status': 'WARNING',
+                    'description': f'캐스케이드 통계 없음: {stats_path} (ai_inference.py --cascade 실행 필요)'
+                }
+                logger.warning(f"캐스케이드 통계 없음: {stats_path}")
+                return
+            
+            with open(stats_path, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+            
+            total_queries = stats.get('regions', 0)
+            stage2_entries = stats.get('stage2_regions', 0)
+            stage2_rate = stats.get('stage2_entry_rate', 0.0)
             
             self.check_results['stage2_entry_rate'] = {
                 'value': stage2_rate,
                 'threshold': 25.0,
+                'total_regions': total_queries,
+                'stage2_regions': stage2_entries,
+                'frames': stats.get('frames', 0),
+                'latency_ms': stats.get('latency_ms', {}),
                 'status': 'PASS' if stage2_rate <= 25.0 else 'FAIL',
-                'description': f'Stage-2 진입률: {stage2_rate:.1f}% (임계치: 25%)'
+                'description': f'Stage-2 진입률: {stage2_rate:.1f}% ({stage2_entries}/{total_queries} 영역, 임계치: 25%)'
             }
             
             logger.info(f"Stage-2 진입률: {stage2_rate:.1f}%")
@@ -128,19 +147,33 @@ class SLOPerformanceChecker:
     def _check_index_pruning(self):
         """인덱스 정기 프루닝 체크"""
         try:
-            # 실제로는 FAISS 인덱스 크기와 프루닝 주기 확인
-            # 임시로 시뮬레이션
-            index_size_mb = 150.0  # 150MB
-            last_pruning_days = 7  # 7일 전 마지막 프루닝
+            # 로컬 부품 ANN 인덱스 (scripts/part_ann_index.py) 실제 상태 확인
+            from part_ann_index import get_part_index, PRUNE_DELETED_RATIO, PRUNE_MAX_DAYS
             
-            pruning_needed = index_size_mb > 200.0 or last_pruning_days > 14
+            index = get_part_index()
+            if index is None:
+                self.check_results['index_pruning'] = {
+                    'status': 'WARNING',
+                    'description': '로컬 부품 인덱스 없음 (python scripts/part_ann_index.py build)'
+                }
+                logger.warning("로컬 부품 인덱스 없음")
+                return
+            
+            stats = index.stats()
+            index_size_mb = round(stats['index_size_mb'], 2)
+            last_pruning_days = round(stats['last_pruning_days'], 1)
+            deleted_ratio = stats['deleted_ratio']
+            
+            pruning_needed = index_size_mb > 200.0 or last_pruning_days > PRUNE_MAX_DAYS or deleted_ratio > PRUNE_DELETED_RATIO
             
             self.check_results['index_pruning'] = {
                 'index_size_mb': index_size_mb,
                 'last_pruning_days': last_pruning_days,
+                'vector_count': stats['vector_count'],
+                'deleted_ratio': deleted_ratio,
                 'pruning_needed': pruning_needed,
                 'status': 'PASS' if not pruning_needed else 'WARNING',
-                'description': f'인덱스 크기: {index_size_mb}MB, 마지막 프루닝: {last_pruning_days}일 전'
+                'description': f'인덱스 크기: {index_size_mb}MB, 마지막 프루닝: {last_pruning_days}일 전, 삭제 비율: {deleted_ratio * 100:.1f}%'
             }
             
             logger.info(f"인덱스 크기: {index_size_mb}MB, 마지막 프루닝: {last_pruning_days}일 전")
@@ -153,23 +186,40 @@ class SLOPerformanceChecker:
             }
     
     def _check_hard_template_selection(self):
-        """하드 템플릿 선별 파이프 체크"""
+        """하드 템플릿 선별 파이프 체크 (하드 예제 마이닝 최신 리포트 기준)"""
         try:
-            # 실제로는 템플릿 선별 파이프라인 상태 확인
-            # 임시로 시뮬레이션
-            total_templates = 1000
-            hard_templates = 50  # 하드 템플릿 5%
-            selection_pipeline_active = True
+            report_path = Path('output/hard_examples/latest.json')
+            if not report_path.exists():
+                self.check_results['hard_template_selection'] = {
+                    'pipeline_active': False,
+                    'status': 'FAIL',
+                    'description': '하드 예제 마이닝 리포트 없음 (scripts/hard_example_miner.py 미실행)'
+                }
+                logger.warning("하드 예제 마이닝 리포트 없음")
+                return
+            
+            with open(report_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            
+            total_templates = report.get('total_images', 0)
+            hard_templates = report.get('hard_images', 0)
+            report_age_days = (datetime.now() - datetime.fromisoformat(report['created_at'])).days
+            # 최근 7일 내 마이닝이 돌았으면 파이프라인 활성으로 판단
+            selection_pipeline_active = report_age_days <= 7
             
-            hard_template_ratio = (hard_templates / total_templates) * 100
+            hard_template_ratio = (hard_templates / total_templates) * 100 if total_templates else 0.0
+            hardest_parts = [p['part_id'] for p in report.get('parts', [])[:5]]
             
             self.check_results['hard_template_selection'] = {
                 'total_templates': total_templates,
                 'hard_templates': hard_templates,
                 'hard_template_ratio': hard_template_ratio,
+                'hardest_parts': hardest_parts,
+                'report_age_days': report_age_days,
                 'pipeline_active': selection_pipeline_active,
+                # 리포트 없음과 같은 상황 (파이프라인 비활성) → 동일하게 FAIL
                 'status': 'PASS' if selection_pipeline_active else 'FAIL',
-                'description': f'하드 템플릿 비율: {hard_template_ratio:.1f}%, 파이프라인 활성: {selection_pipeline_active}'
+                'description': f'하드 템플릿 비율: {hard_template_ratio:.1f}%, 파이프라인 활성: {selection_pipeline_active} ({report_age_days}일 전 마이닝)'
             }
             
             logger.info(f"하드 템플릿 비율: {hard_template_ratio:.1f}%, 파이프라인 활성: {selection_pipeline_active}")